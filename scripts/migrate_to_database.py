@@ -4,6 +4,7 @@ Migration script to convert JSONL diary to SQLite database.
 Run this once to migrate existing diary.jsonl data to the new database.
 """
 
+import argparse
 import sys
 import os
 
@@ -22,8 +23,26 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Migrate diary.jsonl to the database")
+    parser.add_argument("--path", default="data/diary.jsonl", help="JSONL diary to import")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Lines per transaction")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore the stored checkpoint and import from the start")
+    return parser.parse_args()
+
+
+def print_progress(p):
+    """Print one progress line per committed chunk."""
+    pct = 100.0 * p['offset'] / p['total_bytes'] if p['total_bytes'] else 100.0
+    rate = p['rows'] / p['elapsed'] if p['elapsed'] else 0.0
+    print(f"  {pct:5.1f}%  {p['offset'] / 1e6:,.1f}/{p['total_bytes'] / 1e6:,.1f} MB  "
+          f"{p['rows']:,} entries ({rate:,.0f}/s), {p['skipped']} skipped", flush=True)
+
+
 def main():
     """Main migration function."""
+    args = parse_args()
     print("=" * 60)
     print("AI Trading Bot - Database Migration Script")
     print("=" * 60)
@@ -41,7 +60,7 @@ def main():
 
     # Migrate JSONL diary
     print("\n[MIGRATE] Migrating diary.jsonl to database...")
-    jsonl_path = 'data/diary.jsonl'
+    jsonl_path = args.path
 
     if not os.path.exists(jsonl_path):
         print(f"[ERROR] Error: {jsonl_path} not found")
@@ -49,7 +68,9 @@ def main():
         return
 
     try:
-        count = db.migrate_jsonl_diary(jsonl_path)
+        # Resumable: rerunning after an interruption continues at the last committed chunk
+        count = db.migrate_jsonl_diary(jsonl_path, chunk_size=args.chunk_size, resume=not args.restart,
+                                       progress=print_progress)
         print(f"[OK] Successfully migrated {count} diary entries")
 
         # Backup original JSONL file
@@ -0,0 +1,112 @@
+"""
+Run TradingBotEngine over historical candles in accelerated (virtual) time.
+
+Examples:
+    python scripts/run_backtest.py --assets BTC ETH --days 90 --interval 1h
+    python scripts/run_backtest.py --assets BTC --candles BTC=data/btc_5m.jsonl
+    python scripts/run_backtest.py --assets BTC --recorded data/llm_decisions.jsonl
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from src.backend.backtest.agents import RecordedAgent, RuleBasedAgent
+from src.backend.backtest.data import fetch_binance_candles, load_candles, save_candles
+from src.backend.backtest.runner import BacktestRunner
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Backtest the trading engine on historical candles")
+    parser.add_argument("--assets", nargs="+", default=["BTC"], help="Assets to trade")
+    parser.add_argument("--interval", default="1h", help="Decision interval")
+    parser.add_argument("--base-interval", default="5m", help="Candle interval used for fills and triggers")
+    parser.add_argument("--days", type=int, default=30, help="Days of history to download")
+    parser.add_argument("--candles", nargs="*", default=[], metavar="ASSET=PATH",
+                        help="Load candles from files instead of downloading")
+    parser.add_argument("--cache-dir", default="data/backtest", help="Where downloaded candles are cached")
+    parser.add_argument("--recorded", help="Replay recorded LLM decisions (JSONL) instead of the rule-based agent")
+    parser.add_argument("--balance", type=float, default=10000.0, help="Starting balance (USDC)")
+    parser.add_argument("--allocation", type=float, default=1000.0, help="Rule-based agent allocation per trade")
+    parser.add_argument("--warmup", type=int, default=100, help="Base candles skipped before the first decision")
+    parser.add_argument("--output", help="Write equity curve, fills and summary to this JSON file")
+    return parser.parse_args()
+
+
+def load_history(args) -> dict:
+    """Load candles from files or download (and cache) them from Binance."""
+    files = dict(item.split("=", 1) for item in args.candles)
+    end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=args.days)
+
+    history = {}
+    for asset in args.assets:
+        if asset in files:
+            history[asset] = load_candles(files[asset])
+            continue
+
+        cache_path = Path(args.cache_dir) / f"{asset}_{args.base_interval}_{args.days}d.jsonl"
+        if cache_path.exists():
+            history[asset] = load_candles(str(cache_path))
+        else:
+            logger.info(f"Downloading {args.days} days of {args.base_interval} candles for {asset}...")
+            history[asset] = fetch_binance_candles(asset, args.base_interval, start, end)
+            save_candles(str(cache_path), history[asset])
+    return history
+
+
+def main():
+    args = parse_args()
+    history = load_history(args)
+
+    runner = BacktestRunner(
+        candles=history,
+        agent=RuleBasedAgent(allocation_usd=args.allocation),
+        interval=args.interval,
+        base_interval=args.base_interval,
+        starting_balance=args.balance,
+        warmup_candles=args.warmup,
+    )
+    if args.recorded:
+        runner.agent.agent = RecordedAgent(args.recorded, clock=runner.clock)
+
+    logger.info(f"Backtesting {', '.join(args.assets)} from {runner.start} to {runner.end}")
+    result = asyncio.run(runner.run())
+
+    print("=" * 60)
+    print("Backtest Summary")
+    print("=" * 60)
+    for key, value in result.summary().items():
+        print(f"  - {key}: {value:.4f}" if isinstance(value, float) else f"  - {key}: {value}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "summary": result.summary(),
+                "equity_curve": result.equity_curve,
+                "fills": result.fills,
+                "errors": result.errors,
+            }, f, indent=2)
+        logger.info(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from functools import lru_cache
 from src.gui.services.bot_service import BotService
 from src.gui.services.state_manager import StateManager
+from src.database.async_db import AsyncDatabaseManager, get_async_db_manager
 
 @lru_cache()
 def get_state_manager() -> StateManager:
@@ -12,3 +13,7 @@ def get_bot_service() -> BotService:
     state_manager = get_state_manager()
     bot_service.state_manager = state_manager
     return bot_service
+
+@lru_cache()
+def get_database() -> AsyncDatabaseManager:
+    return get_async_db_manager()
@@ -1,11 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from src.api.routes import bot, positions, trades, market, settings, websocket, proposals
+from src.api.routes import bot, positions, trades, market, settings, websocket, proposals, llm, search
+from src.database.async_db import close_async_db_manager
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the database threads and release pooled connections
+    await close_async_db_manager()
 
 app = FastAPI(
     title="NOF1 Trading Bot API",
     description="Backend API for NOF1 Trading Bot",
-    version="0.3.0"
+    version="0.3.0",
+    lifespan=lifespan
 )
 
 # CORS Middleware
@@ -30,6 +39,8 @@ app.include_router(trades.router, prefix="/api/v1/trades", tags=["Trades"])
 app.include_router(market.router, prefix="/api/v1/market", tags=["Market"])
 app.include_router(settings.router, prefix="/api/v1/settings", tags=["Settings"])
 app.include_router(proposals.router, prefix="/api/v1/proposals", tags=["Proposals"])
+app.include_router(llm.router, prefix="/api/v1/llm", tags=["LLM"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["Search"])
 app.include_router(websocket.router, tags=["WebSocket"])
 
 @app.get("/")
@@ -1,7 +1,9 @@
+from datetime import datetime, timedelta
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from src.api.dependencies import get_bot_service
+from src.api.dependencies import get_bot_service, get_database
+from src.database.async_db import AsyncDatabaseManager
 from src.gui.services.bot_service import BotService
 
 router = APIRouter()
@@ -33,3 +35,18 @@ async def stop_bot(bot_service: BotService = Depends(get_bot_service)):
         return {"status": "stopped", "message": "Bot stopped successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/equity")
+async def get_equity(
+    days: int = 30,
+    max_points: int = 500,
+    bucket: Optional[str] = None,
+    db: AsyncDatabaseManager = Depends(get_database)
+):
+    """Equity curve downsampled to max_points, or OHLC per bucket (hour/day)"""
+    if bucket is None:
+        return await db.get_equity_curve(days=days, max_points=max_points)
+    try:
+        return await db.get_equity_ohlc(bucket=bucket, start_date=datetime.utcnow() - timedelta(days=days))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
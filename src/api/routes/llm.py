@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from src.api.dependencies import get_database
+from src.database.async_db import AsyncDatabaseManager
+
+router = APIRouter()
+
+@router.get("/stats")
+async def get_llm_stats(
+    bucket: str = "day",
+    days: int = 7,
+    model: Optional[str] = None,
+    db: AsyncDatabaseManager = Depends(get_database)
+):
+    """Cost and latency per model per time bucket"""
+    try:
+        return await db.get_llm_call_stats(
+            bucket=bucket,
+            start_date=datetime.utcnow() - timedelta(days=days),
+            model=model,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/calls")
+async def get_llm_calls(
+    limit: int = 50,
+    model: Optional[str] = None,
+    outcome: Optional[str] = None,
+    db: AsyncDatabaseManager = Depends(get_database)
+):
+    """Most recent LLM call records"""
+    return await db.get_llm_calls(model=model, parse_outcome=outcome, limit=limit)
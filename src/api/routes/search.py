@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from src.api.dependencies import get_database
+from src.database.async_db import AsyncDatabaseManager
+
+router = APIRouter()
+
+@router.get("/")
+async def search_rationales(
+    response: Response,
+    q: str,
+    kind: Optional[List[str]] = Query(None),
+    asset: Optional[str] = None,
+    action: Optional[str] = None,
+    days: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncDatabaseManager = Depends(get_database)
+):
+    """
+    Full-text search over diary, trade and proposal rationales, best match first.
+
+    `kind` may be repeated (diary, trade, proposal). Pass the X-Next-Cursor
+    response header back as `cursor` to fetch the next page.
+    """
+    try:
+        results, next_cursor = await db.search_rationales(
+            q,
+            kinds=kind,
+            asset=asset,
+            action=action,
+            start_date=datetime.utcnow() - timedelta(days=days) if days else None,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return results
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from src.api.dependencies import get_bot_service
 from src.gui.services.bot_service import BotService
 
@@ -6,11 +7,28 @@ router = APIRouter()
 
 @router.get("/")
 def get_trades(
+    response: Response,
     limit: int = 50, 
     offset: int = 0, 
     asset: str = None, 
     action: str = None,
+    cursor: Optional[str] = None,
     bot_service: BotService = Depends(get_bot_service)
 ):
-    trades = bot_service.get_trade_history(limit=limit, offset=offset, asset=asset, action=action)
+    """
+    Trade history, most recent first.
+
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next
+    page; `offset` is still accepted for clients that do not use cursors.
+    """
+    if cursor is None and offset:
+        return bot_service.get_trade_history(limit=limit, offset=offset, asset=asset, action=action)
+    try:
+        trades, next_cursor = bot_service.get_trade_history_page(
+            limit=limit, cursor=cursor, asset=asset, action=action
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return trades
@@ -0,0 +1,55 @@
+"""Provider-side prompt cache hit accounting shared by the LLM agents."""
+
+import logging
+import threading
+
+
+class PromptCacheStats:
+    """
+    Accumulates prompt vs cached token counts reported by the provider.
+
+    ``hit_rate`` is the share of prompt tokens served from the provider cache,
+    which is what determines the latency/cost saving of a stable prompt prefix.
+    """
+
+    def __init__(self, provider: str, log_every: int = 10):
+        self.provider = provider
+        self.log_every = log_every
+        self.requests = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, prompt_tokens, cached_tokens) -> None:
+        """Record one response's usage; either count may be None when unreported."""
+        if prompt_tokens is None:
+            return
+        cached = int(cached_tokens or 0)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += int(prompt_tokens)
+            self.cached_tokens += cached
+            if cached > 0:
+                self.cache_hits += 1
+            requests = self.requests
+
+        logging.info(
+            f"{self.provider} prompt cache: {cached}/{int(prompt_tokens)} tokens cached "
+            f"(cumulative hit rate {self.hit_rate:.1%})"
+        )
+        if self.log_every and requests % self.log_every == 0:
+            logging.info(f"{self.provider} prompt cache summary: {self.as_dict()}")
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "hit_rate": round(self.hit_rate, 4),
+        }
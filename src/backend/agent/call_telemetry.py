@@ -0,0 +1,154 @@
+"""Structured per-call LLM telemetry persisted to the database."""
+
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from src.backend.config_loader import CONFIG
+
+
+@dataclass
+class LLMCallRecord:
+    """
+    Accumulates one decision call: every round trip, tool round and retry
+    between the first request and the parsed result.
+    """
+    provider: str
+    model: str
+    purpose: str = "decision"
+    assets: Optional[str] = None
+    streamed: bool = False
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    reasoning_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: Optional[float] = None
+    requests: int = 0
+    tool_rounds: int = 0
+    tool_calls: int = 0
+    retry_reason: Optional[str] = None
+    parse_outcome: str = "pending"
+    error: Optional[str] = None
+    ttft_ms: Optional[float] = None
+    wall_time_ms: Optional[float] = None
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+    started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def add_usage(self, prompt=None, completion=None, reasoning=None, cached=None, cost=None) -> None:
+        """Add one response's token counts; unreported values are skipped."""
+        self.prompt_tokens += int(prompt or 0)
+        self.completion_tokens += int(completion or 0)
+        self.reasoning_tokens += int(reasoning or 0)
+        self.cached_tokens += int(cached or 0)
+        if cost is not None:
+            self.cost_usd = (self.cost_usd or 0.0) + float(cost)
+
+    def first_token(self) -> None:
+        """Mark the first token (or, for non-streamed calls, the first response)."""
+        if self.ttft_ms is None:
+            self.ttft_ms = (time.perf_counter() - self.started) * 1000
+
+    def retry(self, reason: str) -> None:
+        self.retry_reason = reason if not self.retry_reason else f"{self.retry_reason}; {reason}"
+
+    def tool_round(self, calls: int) -> None:
+        self.tool_rounds += 1
+        self.tool_calls += calls
+
+    def finish(self, outcome: str, error: Optional[str] = None) -> None:
+        """Set the outcome; an outcome marked while parsing (e.g. "repaired") takes precedence over "ok"."""
+        if outcome != "ok" or self.parse_outcome == "pending":
+            self.parse_outcome = outcome
+        if error is not None:
+            self.error = error[:2000]
+        self.wall_time_ms = (time.perf_counter() - self.started) * 1000
+
+    def as_row(self) -> Dict[str, Any]:
+        """Column values for ``DatabaseManager.record_llm_call``."""
+        return {
+            "timestamp": self.timestamp,
+            "provider": self.provider,
+            "model": self.model,
+            "purpose": self.purpose,
+            "assets": self.assets,
+            "streamed": self.streamed,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "reasoning_tokens": self.reasoning_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cost_usd": self.cost_usd,
+            "wall_time_ms": self.wall_time_ms,
+            "ttft_ms": self.ttft_ms,
+            "requests": self.requests,
+            "tool_rounds": self.tool_rounds,
+            "tool_calls": self.tool_calls,
+            "retry_reason": self.retry_reason,
+            "parse_outcome": self.parse_outcome,
+            "error": self.error,
+        }
+
+
+class LLMTelemetry:
+    """
+    Writes finished ``LLMCallRecord`` rows to the ``llm_calls`` table.
+
+    Inserts run on a single background thread so a slow disk never adds
+    latency to the decision path. When the provider does not report a cost,
+    it is estimated from CONFIG ``llm_pricing`` (USD per million tokens).
+    """
+
+    def __init__(self, db=None, enabled: Optional[bool] = None, pricing: Optional[Dict[str, Any]] = None):
+        """
+        Initialize telemetry sink.
+
+        Args:
+            db: DatabaseManager to write to (defaults to the global instance, created lazily)
+            enabled: Persist records (defaults to CONFIG llm_telemetry_enabled)
+            pricing: {model: {"prompt": usd_per_mtok, "completion": usd_per_mtok}}
+        """
+        self.db = db
+        self.enabled = CONFIG.get("llm_telemetry_enabled", True) if enabled is None else enabled
+        self.pricing = (CONFIG.get("llm_pricing") or {}) if pricing is None else pricing
+        self.last: Optional[LLMCallRecord] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self, provider: str, model: str, assets: Iterable[str] = (), **kwargs) -> LLMCallRecord:
+        return LLMCallRecord(provider=provider, model=model, assets=",".join(assets) or None, **kwargs)
+
+    def estimate_cost(self, call: LLMCallRecord) -> Optional[float]:
+        price = self.pricing.get(call.model)
+        if not isinstance(price, dict):
+            return None
+        # Reasoning tokens are billed as completion tokens and already included in completion_tokens
+        return (call.prompt_tokens * float(price.get("prompt", 0))
+                + call.completion_tokens * float(price.get("completion", 0))) / 1_000_000
+
+    def record(self, call: LLMCallRecord) -> Optional[Future]:
+        """Queue a finished call for insertion; returns the write future (None when disabled)."""
+        if call.parse_outcome == "pending":
+            call.finish("error")
+        if call.cost_usd is None:
+            call.cost_usd = self.estimate_cost(call)
+        self.last = call
+        logging.info(
+            f"LLM call {call.model}: {call.parse_outcome} in {call.wall_time_ms:.0f} ms, "
+            f"{call.prompt_tokens}+{call.completion_tokens} tokens, {call.tool_rounds} tool rounds"
+        )
+        if not self.enabled:
+            return None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-telemetry")
+        return self._executor.submit(self._write, call.as_row())
+
+    def _write(self, row: Dict[str, Any]) -> Optional[int]:
+        try:
+            if self.db is None:
+                from src.database.db_manager import get_db_manager
+                self.db = get_db_manager()
+            return self.db.record_llm_call(**row)
+        except Exception as e:
+            logging.warning(f"Failed to record LLM call telemetry: {e}")
+            return None
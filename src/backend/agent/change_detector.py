@@ -0,0 +1,163 @@
+"""Materiality gate: skip the LLM call when the market has not moved enough to matter."""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class AssetSnapshot:
+    """The few per-asset values whose change can flip a decision."""
+    price: Optional[float]
+    rsi: Optional[float]
+    macd_hist: Optional[float]
+
+
+def _as_float(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _macd_hist(macd) -> Optional[float]:
+    if isinstance(macd, dict):
+        hist = macd.get("valueMACDHist")
+        if hist is None and macd.get("valueMACD") is not None and macd.get("valueMACDSignal") is not None:
+            hist = _as_float(macd["valueMACD"]) - _as_float(macd["valueMACDSignal"])
+        return _as_float(hist)
+    return _as_float(macd)
+
+
+def snapshot_market(market_sections: Sequence[Dict]) -> Dict[str, AssetSnapshot]:
+    """Reduce Phase 8 market sections to comparable per-asset snapshots."""
+    snapshots = {}
+    for section in market_sections or []:
+        intraday = section.get("intraday") or {}
+        snapshots[section.get("asset")] = AssetSnapshot(
+            price=_as_float(section.get("current_price")),
+            rsi=_as_float(intraday.get("rsi14")),
+            macd_hist=_macd_hist(intraday.get("macd")),
+        )
+    return snapshots
+
+
+def snapshot_positions(account: Dict) -> Tuple:
+    """Hashable view of open positions and orders (sizes rounded to ignore dust)."""
+    positions = tuple(sorted(
+        (str(p.get("symbol")), round(float(p.get("quantity") or 0), 8))
+        for p in (account or {}).get("positions") or []
+    ))
+    open_orders = len((account or {}).get("open_orders") or [])
+    return positions, open_orders
+
+
+class MaterialityGate:
+    """
+    Decides whether a new LLM decision is needed this iteration.
+
+    A call is material when any asset moved more than ``price_move_pct`` since the
+    last decision, RSI crossed one of ``rsi_levels``, the MACD histogram changed
+    sign, positions/orders changed, or ``max_interval`` seconds have passed.
+    Otherwise the previous decision is reused as holds and the skip is counted.
+    """
+
+    def __init__(
+        self,
+        price_move_pct: float = 0.3,
+        rsi_levels: Sequence[float] = (30.0, 50.0, 70.0),
+        max_interval: float = 900.0,
+    ):
+        """
+        Initialize materiality gate.
+
+        Args:
+            price_move_pct: Relative price move (in percent) that forces a call
+            rsi_levels: RSI levels whose crossing forces a call
+            max_interval: Seconds after which a call is forced regardless
+        """
+        self.price_move_pct = price_move_pct
+        self.rsi_levels = tuple(rsi_levels)
+        self.max_interval = max_interval
+
+        self.calls_made = 0
+        self.calls_saved = 0
+        self._market: Dict[str, AssetSnapshot] = {}
+        self._positions: Optional[Tuple] = None
+        self._last_time: Optional[datetime] = None
+        self._last_decisions: Optional[Dict] = None
+
+    def check(self, market_sections: Sequence[Dict], account: Dict, now: datetime) -> Tuple[bool, str]:
+        """Return (material, reason) for the current snapshot."""
+        if self._last_decisions is None or self._last_time is None:
+            return True, "no previous decision"
+        if (now - self._last_time).total_seconds() >= self.max_interval:
+            return True, f"{self.max_interval:.0f}s since last decision"
+        if snapshot_positions(account) != self._positions:
+            return True, "positions or orders changed"
+
+        current = snapshot_market(market_sections)
+        if set(current) != set(self._market):
+            return True, "asset set changed"
+        for asset, new in current.items():
+            reason = self._asset_change(asset, self._market[asset], new)
+            if reason:
+                return True, reason
+        return False, "no material change"
+
+    def _asset_change(self, asset: str, old: AssetSnapshot, new: AssetSnapshot) -> Optional[str]:
+        if old.price and new.price is not None:
+            move = abs(new.price - old.price) / old.price * 100
+            if move >= self.price_move_pct:
+                return f"{asset} moved {move:.2f}%"
+        elif old.price != new.price:
+            return f"{asset} price became available"
+        if old.rsi is not None and new.rsi is not None:
+            for level in self.rsi_levels:
+                if (old.rsi - level) * (new.rsi - level) < 0:
+                    return f"{asset} RSI crossed {level:g}"
+        if old.macd_hist is not None and new.macd_hist is not None and old.macd_hist * new.macd_hist < 0:
+            return f"{asset} MACD crossed signal"
+        return None
+
+    def record_decision(self, market_sections: Sequence[Dict], account: Dict, decisions: Dict, now: datetime):
+        """Remember the snapshot a fresh LLM decision was made on."""
+        self.calls_made += 1
+        self._market = snapshot_market(market_sections)
+        self._positions = snapshot_positions(account)
+        self._last_time = now
+        self._last_decisions = decisions
+
+    def reuse_decision(self, assets: List[str], reason: str) -> Dict:
+        """Previous decision re-issued as holds (nothing is re-executed)."""
+        self.calls_saved += 1
+        previous = {
+            d.get("asset"): d for d in (self._last_decisions or {}).get("trade_decisions") or []
+            if isinstance(d, dict)
+        }
+        decisions = []
+        for asset in assets:
+            last = previous.get(asset, {})
+            decisions.append({
+                "asset": asset,
+                "action": "hold",
+                "allocation_usd": 0.0,
+                "tp_price": None,
+                "sl_price": None,
+                "exit_plan": last.get("exit_plan", ""),
+                "rationale": f"Unchanged market ({reason}); previous: {last.get('action', 'hold')} - {last.get('rationale', '')}",
+            })
+        logging.info(f"Materiality gate: skipped LLM call ({reason}); {self.calls_saved} saved / {self.calls_made} made")
+        return {
+            "reasoning": (self._last_decisions or {}).get("reasoning", ""),
+            "trade_decisions": decisions,
+        }
+
+    def get_stats(self) -> Dict:
+        total = self.calls_made + self.calls_saved
+        return {
+            "calls_made": self.calls_made,
+            "calls_saved": self.calls_saved,
+            "saved_pct": round(self.calls_saved / total * 100, 1) if total else 0.0,
+        }
@@ -1,11 +1,35 @@
 """Decision-making agent that orchestrates LLM prompts and indicator lookups."""
 
+import asyncio
+import aiohttp
 import requests
 from src.backend.config_loader import CONFIG
 from src.backend.indicators.taapi_client import TAAPIClient
 import json
 import logging
 from datetime import datetime
+from src.backend.agent.stream_parser import DecisionStreamParser
+from src.backend.agent.cache_stats import PromptCacheStats
+from src.backend.agent.call_telemetry import LLMTelemetry
+from src.backend.agent.json_repair import repair_decision_payload
+from src.backend.agent.tool_resolver import IndicatorToolResolver
+
+
+# Seconds to establish a connection on the async path (reads use llm_timeout)
+CONNECT_TIMEOUT = 10
+
+
+class LLMHTTPError(RuntimeError):
+    """Non-200 response from the LLM endpoint on the async code path."""
+
+    def __init__(self, status: int, text: str):
+        super().__init__(f"LLM request failed with status {status}: {text[:200]}")
+        self.status = status
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
 
 class TradingAgent:
     """High-level trading agent that delegates reasoning to an LLM service."""
@@ -21,6 +45,19 @@ class TradingAgent:
         self.taapi = TAAPIClient()
         # Fast/cheap sanitizer model to normalize outputs on parse failures
         self.sanitize_model = CONFIG.get("sanitize_model") or "openai/gpt-5"
+        self.timeout = CONFIG.get("llm_timeout") or 60
+        # Stable prompt prefix: system prompt memoized per asset list and marked
+        # cacheable so providers can reuse it across decision cycles
+        self.prompt_cache = bool(CONFIG.get("prompt_cache_enabled"))
+        self._system_prompts: dict[tuple, str] = {}
+        self.cache_stats = PromptCacheStats("OpenRouter")
+        self.telemetry = LLMTelemetry()
+
+        # Pooled keep-alive clients: one per code path, reused across decisions,
+        # tool-call rounds and sanitize calls to avoid repeated TCP+TLS handshakes
+        self.session = requests.Session()
+        self._aio_session: aiohttp.ClientSession | None = None
+        self._aio_loop: asyncio.AbstractEventLoop | None = None
 
         # Warn if using a model that may not support tools
         if ":free" in self.model.lower() or "deepseek" in self.model.lower():
@@ -38,9 +75,76 @@ class TradingAgent:
         """
         return self._decide(context, assets=assets)
 
-    def _decide(self, context, assets):
-        """Dispatch decision request to the LLM and enforce output contract."""
-        system_prompt = (
+    async def decide_trade_async(self, assets, context):
+        """Async variant of :meth:`decide_trade` using the pooled aiohttp session.
+
+        Cancelling the awaiting task aborts the in-flight HTTP request.
+        """
+        return await self._decide_async(context, assets=assets)
+
+    async def decide_trade_streaming(self, assets, context, on_decision):
+        """Stream the completion, calling ``on_decision`` as each decision closes.
+
+        Lets the caller start executing the first decisions while the model is
+        still generating the rest. Returns the full payload like decide_trade.
+        """
+        return await self._decide_async(context, assets=assets, on_decision=on_decision)
+
+    def close(self):
+        """Close the blocking HTTP session."""
+        self.session.close()
+
+    async def aclose(self):
+        """Close the async HTTP sessions (recreated lazily on next use)."""
+        if self._aio_session is not None and not self._aio_session.closed:
+            await self._aio_session.close()
+        self._aio_session = None
+        self._aio_loop = None
+        await self.taapi.close()
+
+    # ------------------------------------------------------------------
+    # Request building (shared by sync and async paths)
+    # ------------------------------------------------------------------
+
+    def _system_prompt(self, assets):
+        """Return the system prompt for the given asset list (memoized)."""
+        key = tuple(assets)
+        prompt = self._system_prompts.get(key)
+        if prompt is None:
+            prompt = self._system_prompts[key] = self._render_system_prompt(list(assets))
+        return prompt
+
+    def _system_message(self, assets):
+        """System message, as a cache_control content part when prompt caching is on."""
+        prompt = self._system_prompt(assets)
+        if not self.prompt_cache:
+            return {"role": "system", "content": prompt}
+        return {"role": "system", "content": [
+            {"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}},
+        ]}
+
+    def _record_usage(self, usage, call=None):
+        """Feed provider-reported token counts into cache_stats and the call record."""
+        if not isinstance(usage, dict):
+            return
+        details = usage.get("prompt_tokens_details") or {}
+        self.cache_stats.record(usage.get("prompt_tokens"), details.get("cached_tokens"))
+        if call is not None:
+            call.add_usage(
+                usage.get("prompt_tokens"),
+                usage.get("completion_tokens"),
+                (usage.get("completion_tokens_details") or {}).get("reasoning_tokens"),
+                details.get("cached_tokens"),
+                usage.get("cost"),
+            )
+
+    @staticmethod
+    def _retry_reason(status, allow_tools, flags):
+        return f"{status} {'tools_rejected' if allow_tools and not flags[0] else 'structured_rejected'}"
+
+    def _render_system_prompt(self, assets):
+        """Build the system prompt for the given asset list."""
+        return (
             "You are a rigorous QUANTITATIVE TRADER and interdisciplinary MATHEMATICIAN-ENGINEER optimizing risk-adjusted returns for perpetual futures under real execution, margin, and funding constraints.\n"
             "You will receive market + account context for SEVERAL assets, including:\n"
             f"- assets = {json.dumps(assets)}\n"
@@ -87,13 +191,10 @@ class TradingAgent:
             "- Each item inside trade_decisions must contain the keys {asset, action, allocation_usd, tp_price, sl_price, exit_plan, rationale}.\n"
             "- Do not emit Markdown or any extra properties.\n"
         )
-        user_prompt = context
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
 
-        tools = [{
+    def _tools(self):
+        """Tool definitions exposed to the LLM."""
+        return [{
             "type": "function",
             "function": {
                 "name": "fetch_taapi_indicator",
@@ -117,6 +218,8 @@ class TradingAgent:
             },
         }]
 
+    def _headers(self):
+        """HTTP headers for OpenRouter requests."""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -125,289 +228,226 @@ class TradingAgent:
             headers["HTTP-Referer"] = self.referer
         if self.app_title:
             headers["X-Title"] = self.app_title
+        return headers
 
-        def _post(payload):
-            """Send a POST request to OpenRouter, logging request and response metadata."""
-            # Log the full request payload for debugging
-            logging.info("Sending request to OpenRouter (model: %s)", payload.get('model'))
-            with open("llm_requests.log", "a", encoding="utf-8") as f:
-                f.write(f"\n\n=== {datetime.now()} ===\n")
-                f.write(f"Model: {payload.get('model')}\n")
-                f.write(f"Headers: {json.dumps({k: v for k, v in headers.items() if k != 'Authorization'})}\n")
-                f.write(f"Payload:\n{json.dumps(payload, indent=2)}\n")
-            resp = requests.post(self.base_url, headers=headers, json=payload, timeout=60)
-            logging.info("Received response from OpenRouter (status: %s)", resp.status_code)
-            if resp.status_code != 200:
-                logging.error("OpenRouter error: %s - %s", resp.status_code, resp.text)
-                with open("llm_requests.log", "a", encoding="utf-8") as f:
-                    f.write(f"ERROR Response: {resp.status_code} - {resp.text}\n")
-            resp.raise_for_status()
-            return resp.json()
-
-        def _sanitize_output(raw_content: str, assets_list):
-            """Coerce arbitrary LLM output into the required reasoning + decisions schema."""
-            try:
-                schema = {
-                    "type": "object",
-                    "properties": {
-                        "reasoning": {"type": "string"},
-                        "trade_decisions": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "asset": {"type": "string", "enum": assets_list},
-                                    "action": {"type": "string", "enum": ["buy", "sell", "hold"]},
-                                    "allocation_usd": {"type": "number"},
-                                    "tp_price": {"type": ["number", "null"]},
-                                    "sl_price": {"type": ["number", "null"]},
-                                    "exit_plan": {"type": "string"},
-                                    "rationale": {"type": "string"},
-                                },
-                                "required": ["asset", "action", "allocation_usd", "tp_price", "sl_price", "exit_plan", "rationale"],
-                                "additionalProperties": False,
-                            },
-                            "minItems": 1,
-                        }
-                    },
-                    "required": ["reasoning", "trade_decisions"],
-                    "additionalProperties": False,
-                }
-                payload = {
-                    "model": self.sanitize_model,
-                    "messages": [
-                        {"role": "system", "content": (
-                            "You are a strict JSON normalizer. Return ONLY a JSON array matching the provided JSON Schema. "
-                            "If input is wrapped or has prose/markdown, fix it. Do not add fields."
-                        )},
-                        {"role": "user", "content": raw_content},
-                    ],
-                    "response_format": {
-                        "type": "json_schema",
-                        "json_schema": {
-                            "name": "trade_decisions",
-                            "strict": True,
-                            "schema": schema,
-                        },
+    @staticmethod
+    def _build_schema(assets):
+        """Assemble the JSON schema used for structured LLM responses."""
+        base_properties = {
+            "asset": {"type": "string", "enum": assets},
+            "action": {"type": "string", "enum": ["buy", "sell", "hold"]},
+            "allocation_usd": {"type": "number", "minimum": 0},
+            "tp_price": {"type": ["number", "null"]},
+            "sl_price": {"type": ["number", "null"]},
+            "exit_plan": {"type": "string"},
+            "rationale": {"type": "string"},
+        }
+        required_keys = ["asset", "action", "allocation_usd", "tp_price", "sl_price", "exit_plan", "rationale"]
+        return {
+            "type": "object",
+            "properties": {
+                "reasoning": {"type": "string"},
+                "trade_decisions": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": base_properties,
+                        "required": required_keys,
+                        "additionalProperties": False,
                     },
-                    "temperature": 0,
+                    "minItems": 1,
                 }
-                resp = _post(payload)
-                msg = resp.get("choices", [{}])[0].get("message", {})
-                parsed = msg.get("parsed")
-                if isinstance(parsed, dict):
-                    if "trade_decisions" in parsed:
-                        return parsed
-                # fallback: try content
-                content = msg.get("content") or "[]"
-                try:
-                    loaded = json.loads(content)
-                    if isinstance(loaded, dict) and "trade_decisions" in loaded:
-                        return loaded
-                except (json.JSONDecodeError, KeyError, ValueError, TypeError):
-                    pass
-                return {"reasoning": "", "trade_decisions": []}
-            except (requests.RequestException, json.JSONDecodeError, KeyError, ValueError, TypeError) as se:
-                logging.error("Sanitize failed: %s", se)
-                return {"reasoning": "", "trade_decisions": []}
-
-        allow_tools = True
-        allow_structured = True
+            },
+            "required": ["reasoning", "trade_decisions"],
+            "additionalProperties": False,
+        }
 
-        def _build_schema():
-            """Assemble the JSON schema used for structured LLM responses."""
-            base_properties = {
-                "asset": {"type": "string", "enum": assets},
-                "action": {"type": "string", "enum": ["buy", "sell", "hold"]},
-                "allocation_usd": {"type": "number", "minimum": 0},
-                "tp_price": {"type": ["number", "null"]},
-                "sl_price": {"type": ["number", "null"]},
-                "exit_plan": {"type": "string"},
-                "rationale": {"type": "string"},
-            }
-            required_keys = ["asset", "action", "allocation_usd", "tp_price", "sl_price", "exit_plan", "rationale"]
-            return {
-                "type": "object",
-                "properties": {
-                    "reasoning": {"type": "string"},
-                    "trade_decisions": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": base_properties,
-                            "required": required_keys,
-                            "additionalProperties": False,
-                        },
-                        "minItems": 1,
-                    }
+    def _build_request(self, messages, assets, allow_structured, allow_tools):
+        """Build the chat completion payload for one round."""
+        data = {"model": self.model, "messages": messages}
+        if self.prompt_cache:
+            # Ask OpenRouter to report usage, including cached prompt tokens
+            data["usage"] = {"include": True}
+        if allow_structured:
+            data["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "trade_decisions",
+                    "strict": True,
+                    "schema": self._build_schema(assets),
                 },
-                "required": ["reasoning", "trade_decisions"],
-                "additionalProperties": False,
             }
+        if allow_tools:
+            data["tools"] = self._tools()
+            data["tool_choice"] = "auto"
+        if CONFIG.get("reasoning_enabled"):
+            data["reasoning"] = {
+                "enabled": True,
+                "effort": CONFIG.get("reasoning_effort") or "high",
+                # "max_tokens": CONFIG.get("reasoning_max_tokens") or 100000,
+                "exclude": False,
+            }
+        if CONFIG.get("provider_config") or CONFIG.get("provider_quantizations"):
+            provider_payload = dict(CONFIG.get("provider_config") or {})
+            quantizations = CONFIG.get("provider_quantizations")
+            if quantizations:
+                provider_payload["quantizations"] = quantizations
+            data["provider"] = provider_payload
+        return data
 
-        for _ in range(6):
-            data = {"model": self.model, "messages": messages}
-            if allow_structured:
-                data["response_format"] = {
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "trade_decisions",
-                        "strict": True,
-                        "schema": _build_schema(),
+    def _build_sanitize_request(self, raw_content, assets_list):
+        """Build the payload asking the sanitizer model to normalize raw output."""
+        schema = {
+            "type": "object",
+            "properties": {
+                "reasoning": {"type": "string"},
+                "trade_decisions": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "asset": {"type": "string", "enum": assets_list},
+                            "action": {"type": "string", "enum": ["buy", "sell", "hold"]},
+                            "allocation_usd": {"type": "number"},
+                            "tp_price": {"type": ["number", "null"]},
+                            "sl_price": {"type": ["number", "null"]},
+                            "exit_plan": {"type": "string"},
+                            "rationale": {"type": "string"},
+                        },
+                        "required": ["asset", "action", "allocation_usd", "tp_price", "sl_price", "exit_plan", "rationale"],
+                        "additionalProperties": False,
                     },
+                    "minItems": 1,
                 }
+            },
+            "required": ["reasoning", "trade_decisions"],
+            "additionalProperties": False,
+        }
+        return {
+            "model": self.sanitize_model,
+            "messages": [
+                {"role": "system", "content": (
+                    "You are a strict JSON normalizer. Return ONLY a JSON array matching the provided JSON Schema. "
+                    "If input is wrapped or has prose/markdown, fix it. Do not add fields."
+                )},
+                {"role": "user", "content": raw_content},
+            ],
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "trade_decisions",
+                    "strict": True,
+                    "schema": schema,
+                },
+            },
+            "temperature": 0,
+        }
+
+    @staticmethod
+    def _parse_sanitize_response(resp):
+        """Extract the normalized decisions from a sanitizer response."""
+        msg = resp.get("choices", [{}])[0].get("message", {})
+        parsed = msg.get("parsed")
+        if isinstance(parsed, dict):
+            if "trade_decisions" in parsed:
+                return parsed
+        # fallback: try content
+        content = msg.get("content") or "[]"
+        try:
+            loaded = json.loads(content)
+            if isinstance(loaded, dict) and "trade_decisions" in loaded:
+                return loaded
+        except (json.JSONDecodeError, KeyError, ValueError, TypeError):
+            pass
+        return {"reasoning": "", "trade_decisions": []}
+
+    def _log_request(self, payload):
+        """Log the full request payload for debugging."""
+        logging.info("Sending request to OpenRouter (model: %s)", payload.get('model'))
+        with open("llm_requests.log", "a", encoding="utf-8") as f:
+            f.write(f"\n\n=== {datetime.now()} ===\n")
+            f.write(f"Model: {payload.get('model')}\n")
+            f.write(f"Headers: {json.dumps({k: v for k, v in self._headers().items() if k != 'Authorization'})}\n")
+            f.write(f"Payload:\n{json.dumps(payload, indent=2)}\n")
+
+    @staticmethod
+    def _log_error_response(status, text):
+        logging.error("OpenRouter error: %s - %s", status, text)
+        with open("llm_requests.log", "a", encoding="utf-8") as f:
+            f.write(f"ERROR Response: {status} - {text}\n")
+
+    async def _log_request_async(self, payload):
+        """:meth:`_log_request` on a worker thread (payload dump and file write stay off the loop)."""
+        await asyncio.to_thread(self._log_request, payload)
+
+    async def _log_error_response_async(self, status, text):
+        await asyncio.to_thread(self._log_error_response, status, text)
+
+    def _downgrade_on_error(self, status, err, allow_tools, allow_structured):
+        """Decide how to retry after an HTTP error.
+
+        Returns:
+            Updated (allow_tools, allow_structured) flags, or None to re-raise.
+        """
+        raw = (err.get("error", {}).get("metadata", {}) or {}).get("raw", "")
+        provider = (err.get("error", {}).get("metadata", {}) or {}).get("provider_name", "")
+        error_message = err.get("error", {}).get("message", "")
+
+        # OpenRouter: Model doesn't support tool use
+        if "no endpoints found" in error_message.lower() and "tool" in error_message.lower():
+            logging.warning(f"Model {self.model} doesn't support tool use on OpenRouter; retrying without tools.")
             if allow_tools:
-                data["tools"] = tools
-                data["tool_choice"] = "auto"
-            if CONFIG.get("reasoning_enabled"):
-                data["reasoning"] = {
-                    "enabled": True,
-                    "effort": CONFIG.get("reasoning_effort") or "high",
-                    # "max_tokens": CONFIG.get("reasoning_max_tokens") or 100000,
-                    "exclude": False,
-                }
-            if CONFIG.get("provider_config") or CONFIG.get("provider_quantizations"):
-                provider_payload = dict(CONFIG.get("provider_config") or {})
-                quantizations = CONFIG.get("provider_quantizations")
-                if quantizations:
-                    provider_payload["quantizations"] = quantizations
-                data["provider"] = provider_payload
-            try:
-                resp_json = _post(data)
-            except requests.HTTPError as e:
-                try:
-                    err = e.response.json()
-                except (json.JSONDecodeError, ValueError, AttributeError):
-                    err = {}
-                raw = (err.get("error", {}).get("metadata", {}) or {}).get("raw", "")
-                provider = (err.get("error", {}).get("metadata", {}) or {}).get("provider_name", "")
-                error_message = err.get("error", {}).get("message", "")
-
-                # OpenRouter: Model doesn't support tool use
-                if "no endpoints found" in error_message.lower() and "tool" in error_message.lower():
-                    logging.warning(f"Model {self.model} doesn't support tool use on OpenRouter; retrying without tools.")
-                    if allow_tools:
-                        allow_tools = False
-                        continue
-
-                # xAI: Rejected tool schema
-                if e.response.status_code == 422 and provider.lower().startswith("xai") and "deserialize" in raw.lower():
-                    logging.warning("xAI rejected tool schema; retrying without tools.")
-                    if allow_tools:
-                        allow_tools = False
-                        continue
-                # Provider may not support structured outputs / response_format
-                err_text = json.dumps(err)
-                if allow_structured and ("response_format" in err_text or "structured" in err_text or e.response.status_code in (400, 422)):
-                    logging.warning("Provider rejected structured outputs; retrying without response_format.")
-                    allow_structured = False
-                    continue
-                raise
-
-            choice = resp_json["choices"][0]
-            message = choice["message"]
-            messages.append(message)
-
-            tool_calls = message.get("tool_calls") or []
-            if allow_tools and tool_calls:
-                for tc in tool_calls:
-                    if tc.get("type") == "function" and tc.get("function", {}).get("name") == "fetch_taapi_indicator":
-                        args = json.loads(tc["function"].get("arguments") or "{}")
-                        try:
-                            params = {
-                                "secret": self.taapi.api_key,
-                                "exchange": "binance",
-                                "symbol": args["symbol"],
-                                "interval": args["interval"],
-                            }
-                            if args.get("period") is not None:
-                                params["period"] = args["period"]
-                            if args.get("backtrack") is not None:
-                                params["backtrack"] = args["backtrack"]
-                            if isinstance(args.get("other_params"), dict):
-                                params.update(args["other_params"])
-                            ind_resp = requests.get(f"{self.taapi.base_url}{args['indicator']}", params=params, timeout=30).json()
-                            messages.append({
-                                "role": "tool",
-                                "tool_call_id": tc.get("id"),
-                                "name": "fetch_taapi_indicator",
-                                "content": json.dumps(ind_resp),
-                            })
-                        except (requests.RequestException, json.JSONDecodeError, KeyError, ValueError) as ex:
-                            messages.append({
-                                "role": "tool",
-                                "tool_call_id": tc.get("id"),
-                                "name": "fetch_taapi_indicator",
-                                "content": f"Error: {str(ex)}",
-                            })
-                continue
-
-            try:
-                # Prefer parsed field from structured outputs if present
-                if isinstance(message.get("parsed"), dict):
-                    parsed = message.get("parsed")
-                else:
-                    content = message.get("content") or "{}"
-                    parsed = json.loads(content)
-
-                if not isinstance(parsed, dict):
-                    logging.error("Expected dict payload, got: %s; attempting sanitize", type(parsed))
-                    sanitized = _sanitize_output(content if 'content' in locals() else json.dumps(parsed), assets)
-                    if sanitized.get("trade_decisions"):
-                        return sanitized
-                    return {"reasoning": "", "trade_decisions": []}
-
-                reasoning_text = parsed.get("reasoning", "") or ""
-                decisions = parsed.get("trade_decisions")
-
-                if isinstance(decisions, list):
-                    normalized = []
-                    for item in decisions:
-                        if isinstance(item, dict):
-                            item.setdefault("allocation_usd", 0.0)
-                            item.setdefault("tp_price", None)
-                            item.setdefault("sl_price", None)
-                            item.setdefault("exit_plan", "")
-                            item.setdefault("rationale", "")
-                            normalized.append(item)
-                        elif isinstance(item, list) and len(item) >= 7:
-                            normalized.append({
-                                "asset": item[0],
-                                "action": item[1],
-                                "allocation_usd": float(item[2]) if item[2] else 0.0,
-                                "tp_price": float(item[3]) if item[3] and item[3] != "null" else None,
-                                "sl_price": float(item[4]) if item[4] and item[4] != "null" else None,
-                                "exit_plan": item[5] if len(item) > 5 else "",
-                                "rationale": item[6] if len(item) > 6 else ""
-                            })
-                    return {"reasoning": reasoning_text, "trade_decisions": normalized}
-
-                logging.error("trade_decisions missing or invalid; attempting sanitize")
-                sanitized = _sanitize_output(content if 'content' in locals() else json.dumps(parsed), assets)
-                if sanitized.get("trade_decisions"):
-                    return sanitized
-                return {"reasoning": reasoning_text, "trade_decisions": []}
-            except (json.JSONDecodeError, KeyError, ValueError, TypeError) as e:
-                logging.error("JSON parse error: %s, content: %s", e, content[:200])
-                # Try sanitizer as last resort
-                sanitized = _sanitize_output(content, assets)
-                if sanitized.get("trade_decisions"):
-                    return sanitized
-                return {
-                    "reasoning": "Parse error",
-                    "trade_decisions": [{
-                        "asset": a,
-                        "action": "hold",
-                        "allocation_usd": 0.0,
-                        "tp_price": None,
-                        "sl_price": None,
-                        "exit_plan": "",
-                        "rationale": "Parse error"
-                    } for a in assets]
-                }
+                return False, allow_structured
+
+        # xAI: Rejected tool schema
+        if status == 422 and provider.lower().startswith("xai") and "deserialize" in raw.lower():
+            logging.warning("xAI rejected tool schema; retrying without tools.")
+            if allow_tools:
+                return False, allow_structured
+        # Provider may not support structured outputs / response_format
+        err_text = json.dumps(err)
+        if allow_structured and ("response_format" in err_text or "structured" in err_text or status in (400, 422)):
+            logging.warning("Provider rejected structured outputs; retrying without response_format.")
+            return allow_tools, False
+        return None
+
+    def _tool_request(self, args):
+        """Translate fetch_taapi_indicator arguments into a TAAPI URL and params."""
+        params = {
+            "secret": self.taapi.api_key,
+            "exchange": "binance",
+            "symbol": args["symbol"],
+            "interval": args["interval"],
+        }
+        if args.get("period") is not None:
+            params["period"] = args["period"]
+        if args.get("backtrack") is not None:
+            params["backtrack"] = args["backtrack"]
+        if isinstance(args.get("other_params"), dict):
+            params.update(args["other_params"])
+        return f"{self.taapi.base_url}{args['indicator']}", params
 
+    @staticmethod
+    def _tool_message(tc, content):
         return {
-            "reasoning": "tool loop cap",
+            "role": "tool",
+            "tool_call_id": tc.get("id"),
+            "name": "fetch_taapi_indicator",
+            "content": content,
+        }
+
+    @staticmethod
+    def _indicator_tool_calls(message):
+        """Return the fetch_taapi_indicator calls requested in ``message``."""
+        return [
+            tc for tc in (message.get("tool_calls") or [])
+            if tc.get("type") == "function" and tc.get("function", {}).get("name") == "fetch_taapi_indicator"
+        ]
+
+    @staticmethod
+    def _hold_all(assets, reason):
+        return {
+            "reasoning": reason,
             "trade_decisions": [{
                 "asset": a,
                 "action": "hold",
@@ -415,6 +455,394 @@ class TradingAgent:
                 "tp_price": None,
                 "sl_price": None,
                 "exit_plan": "",
-                "rationale": "tool loop cap"
+                "rationale": reason
             } for a in assets]
         }
+
+    def _parse_decision(self, message, assets, call=None):
+        """Parse a final LLM message into the decision contract.
+
+        Returns:
+            (result, raw_content, fallback): ``result`` is the parsed decision
+            payload, or None when the raw content must go through the sanitizer,
+            in which case ``fallback`` is returned if sanitizing fails. Local
+            repairs are marked on ``call``.
+        """
+        content = None
+        try:
+            # Prefer parsed field from structured outputs if present
+            if isinstance(message.get("parsed"), dict):
+                parsed = message.get("parsed")
+            else:
+                content = message.get("content") or "{}"
+                parsed = json.loads(content)
+
+            if not isinstance(parsed, dict):
+                repaired = repair_decision_payload(parsed, assets)
+                if repaired is not None:
+                    self._mark_repaired(call)
+                    return repaired, None, None
+                logging.error("Expected dict payload, got: %s; attempting sanitize", type(parsed))
+                return None, content if content is not None else json.dumps(parsed), {"reasoning": "", "trade_decisions": []}
+
+            reasoning_text = parsed.get("reasoning", "") or ""
+            decisions = parsed.get("trade_decisions")
+
+            if isinstance(decisions, list):
+                normalized = []
+                for item in decisions:
+                    if isinstance(item, dict):
+                        item.setdefault("allocation_usd", 0.0)
+                        item.setdefault("tp_price", None)
+                        item.setdefault("sl_price", None)
+                        item.setdefault("exit_plan", "")
+                        item.setdefault("rationale", "")
+                        normalized.append(item)
+                    elif isinstance(item, list) and len(item) >= 7:
+                        normalized.append({
+                            "asset": item[0],
+                            "action": item[1],
+                            "allocation_usd": float(item[2]) if item[2] else 0.0,
+                            "tp_price": float(item[3]) if item[3] and item[3] != "null" else None,
+                            "sl_price": float(item[4]) if item[4] and item[4] != "null" else None,
+                            "exit_plan": item[5] if len(item) > 5 else "",
+                            "rationale": item[6] if len(item) > 6 else ""
+                        })
+                return {"reasoning": reasoning_text, "trade_decisions": normalized}, None, None
+
+            repaired = repair_decision_payload(parsed, assets)
+            if repaired is not None:
+                self._mark_repaired(call)
+                return repaired, None, None
+            logging.error("trade_decisions missing or invalid; attempting sanitize")
+            raw = content if content is not None else json.dumps(parsed)
+            return None, raw, {"reasoning": reasoning_text, "trade_decisions": []}
+        except (json.JSONDecodeError, KeyError, ValueError, TypeError) as e:
+            content = content or ""
+            # Cheap local repair (fences, trailing commas, truncation) before paying for a sanitize call
+            repaired = repair_decision_payload(content, assets)
+            if repaired is not None:
+                self._mark_repaired(call)
+                return repaired, None, None
+            logging.error("JSON parse error: %s, content: %s", e, content[:200])
+            # Try sanitizer as last resort
+            return None, content, self._hold_all(assets, "Parse error")
+
+    @staticmethod
+    def _mark_repaired(call):
+        if call is not None:
+            call.parse_outcome = "repaired"
+
+    @staticmethod
+    def _finish_sanitized(call, sanitized, fallback):
+        """Close ``call`` after a sanitize pass and pick the payload to return."""
+        if sanitized.get("trade_decisions"):
+            call.finish("sanitized")
+            return sanitized
+        call.finish("fallback")
+        return fallback
+
+    def _start_call(self, assets, purpose="decision", streamed=False):
+        model = self.model if purpose == "decision" else self.sanitize_model
+        return self.telemetry.start("openrouter", model, assets, purpose=purpose, streamed=streamed)
+
+    # ------------------------------------------------------------------
+    # Blocking code path (requests.Session)
+    # ------------------------------------------------------------------
+
+    def _post(self, payload, call=None):
+        """Send a POST request to OpenRouter, logging request and response metadata."""
+        self._log_request(payload)
+        if call is not None:
+            call.requests += 1
+        resp = self.session.post(self.base_url, headers=self._headers(), json=payload, timeout=self.timeout)
+        logging.info("Received response from OpenRouter (status: %s)", resp.status_code)
+        if resp.status_code != 200:
+            self._log_error_response(resp.status_code, resp.text)
+        resp.raise_for_status()
+        resp_json = resp.json()
+        if call is not None:
+            call.first_token()
+        self._record_usage(resp_json.get("usage"), call)
+        return resp_json
+
+    def _sanitize_output(self, raw_content: str, assets_list):
+        """Coerce arbitrary LLM output into the required reasoning + decisions schema."""
+        call = self._start_call(assets_list, purpose="sanitize")
+        try:
+            result = self._parse_sanitize_response(self._post(self._build_sanitize_request(raw_content, assets_list), call))
+            call.finish("ok" if result.get("trade_decisions") else "fallback")
+            return result
+        except (requests.RequestException, json.JSONDecodeError, KeyError, ValueError, TypeError) as se:
+            logging.error("Sanitize failed: %s", se)
+            call.finish("error", str(se))
+            return {"reasoning": "", "trade_decisions": []}
+        finally:
+            self.telemetry.record(call)
+
+    def _run_tool_call(self, tc, resolver):
+        args = json.loads(tc["function"].get("arguments") or "{}")
+        local = resolver.resolve(args)
+        if local is not None:
+            return self._tool_message(tc, json.dumps(local))
+        try:
+            url, params = self._tool_request(args)
+            ind_resp = self.session.get(url, params=params, timeout=30).json()
+            resolver.remember(args, ind_resp)
+            return self._tool_message(tc, json.dumps(ind_resp))
+        except (requests.RequestException, json.JSONDecodeError, KeyError, ValueError) as ex:
+            return self._tool_message(tc, f"Error: {str(ex)}")
+
+    def _decide(self, context, assets):
+        """Dispatch decision request to the LLM and enforce output contract."""
+        messages = [
+            self._system_message(assets),
+            {"role": "user", "content": context},
+        ]
+        allow_tools = True
+        allow_structured = True
+        resolver = IndicatorToolResolver()
+        call = self._start_call(assets)
+
+        try:
+            for _ in range(6):
+                data = self._build_request(messages, assets, allow_structured, allow_tools)
+                try:
+                    resp_json = self._post(data, call)
+                except requests.HTTPError as e:
+                    try:
+                        err = e.response.json()
+                    except (json.JSONDecodeError, ValueError, AttributeError):
+                        err = {}
+                    flags = self._downgrade_on_error(e.response.status_code, err, allow_tools, allow_structured)
+                    if flags is None:
+                        raise
+                    call.retry(self._retry_reason(e.response.status_code, allow_tools, flags))
+                    allow_tools, allow_structured = flags
+                    continue
+
+                message = resp_json["choices"][0]["message"]
+                messages.append(message)
+
+                if allow_tools and message.get("tool_calls"):
+                    tool_calls = self._indicator_tool_calls(message)
+                    call.tool_round(len(tool_calls))
+                    for tc in tool_calls:
+                        messages.append(self._run_tool_call(tc, resolver))
+                    continue
+
+                result, raw, fallback = self._parse_decision(message, assets, call)
+                if result is not None:
+                    call.finish("ok")
+                    return result
+                return self._finish_sanitized(call, self._sanitize_output(raw, assets), fallback)
+
+            call.finish("tool_cap")
+            return self._hold_all(assets, "tool loop cap")
+        except BaseException as e:
+            call.finish("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self.telemetry.record(call)
+
+    # ------------------------------------------------------------------
+    # Async code path (pooled aiohttp session)
+    # ------------------------------------------------------------------
+
+    async def _get_aio_session(self) -> aiohttp.ClientSession:
+        """Return the keep-alive session, recreating it if closed or bound to another loop."""
+        loop = asyncio.get_running_loop()
+        if self._aio_session is None or self._aio_session.closed or self._aio_loop is not loop:
+            if self._aio_session is not None and not self._aio_session.closed:
+                await self._discard_aio_session(self._aio_session, self._aio_loop)
+            # llm_timeout bounds each read like requests' timeout= on the blocking
+            # path; no total cap, so slow reasoning models can finish their answer
+            self._aio_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=120),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=CONNECT_TIMEOUT, sock_read=self.timeout),
+            )
+            self._aio_loop = loop
+        return self._aio_session
+
+    @staticmethod
+    async def _discard_aio_session(session, loop):
+        """Close a session created on another event loop so its connector is released."""
+        try:
+            if loop is not None and loop.is_running() and loop is not asyncio.get_running_loop():
+                asyncio.run_coroutine_threadsafe(session.close(), loop)
+            else:
+                # A finished loop's connections are already gone; this marks the connector closed
+                await session.close()
+        except RuntimeError as e:
+            logging.debug("Could not close stale aiohttp session: %s", e)
+
+    async def _post_async(self, payload, call=None):
+        """Async counterpart of :meth:`_post`; raises LLMHTTPError on non-200."""
+        session = await self._get_aio_session()
+        await self._log_request_async(payload)
+        if call is not None:
+            call.requests += 1
+        async with session.post(self.base_url, headers=self._headers(), json=payload) as resp:
+            logging.info("Received response from OpenRouter (status: %s)", resp.status)
+            if resp.status != 200:
+                text = await resp.text()
+                await self._log_error_response_async(resp.status, text)
+                raise LLMHTTPError(resp.status, text)
+            resp_json = await resp.json(content_type=None)
+        if call is not None:
+            call.first_token()
+        self._record_usage(resp_json.get("usage"), call)
+        return resp_json
+
+    async def _post_stream(self, payload, on_decision, call=None):
+        """Stream a completion over SSE and rebuild the final assistant message.
+
+        Content deltas go through a DecisionStreamParser; tool-call deltas are
+        merged by index so tool rounds work the same as in the non-streaming path.
+        """
+        session = await self._get_aio_session()
+        payload = dict(payload, stream=True)
+        await self._log_request_async(payload)
+        if call is not None:
+            call.requests += 1
+        parser = DecisionStreamParser()
+        tool_calls = {}
+
+        # Streams can run for minutes: only a stall longer than llm_timeout aborts them
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=CONNECT_TIMEOUT, sock_read=self.timeout)
+        async with session.post(self.base_url, headers=self._headers(), json=payload, timeout=timeout) as resp:
+            logging.info("Streaming response from OpenRouter (status: %s)", resp.status)
+            if resp.status != 200:
+                text = await resp.text()
+                await self._log_error_response_async(resp.status, text)
+                raise LLMHTTPError(resp.status, text)
+
+            async for raw_line in resp.content:
+                line = raw_line.decode("utf-8", errors="replace").strip()
+                # Skip SSE comments such as ": OPENROUTER PROCESSING"
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                # Usage arrives on the final chunk (with empty choices)
+                self._record_usage(chunk.get("usage"), call)
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                delta = choices[0].get("delta") or {}
+                if call is not None and (delta.get("content") or delta.get("tool_calls")):
+                    call.first_token()
+
+                for tc in delta.get("tool_calls") or []:
+                    slot = tool_calls.setdefault(tc.get("index", 0), {
+                        "id": None, "type": "function", "function": {"name": "", "arguments": ""},
+                    })
+                    if tc.get("id"):
+                        slot["id"] = tc["id"]
+                    fn = tc.get("function") or {}
+                    slot["function"]["name"] += fn.get("name") or ""
+                    slot["function"]["arguments"] += fn.get("arguments") or ""
+
+                text = delta.get("content")
+                if text:
+                    for decision in parser.feed(text):
+                        on_decision(decision)
+
+        message = {"role": "assistant", "content": parser.text}
+        if tool_calls:
+            message["tool_calls"] = [tool_calls[i] for i in sorted(tool_calls)]
+        return message
+
+    async def _sanitize_output_async(self, raw_content: str, assets_list):
+        call = self._start_call(assets_list, purpose="sanitize")
+        try:
+            resp = await self._post_async(self._build_sanitize_request(raw_content, assets_list), call)
+            result = self._parse_sanitize_response(resp)
+            call.finish("ok" if result.get("trade_decisions") else "fallback")
+            return result
+        except (LLMHTTPError, aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError, KeyError, ValueError, TypeError) as se:
+            logging.error("Sanitize failed: %s", se)
+            call.finish("error", f"{type(se).__name__}: {se}")
+            return {"reasoning": "", "trade_decisions": []}
+        finally:
+            self.telemetry.record(call)
+
+    async def _run_tool_call_async(self, tc, resolver):
+        args = json.loads(tc["function"].get("arguments") or "{}")
+        local = resolver.resolve(args)
+        if local is not None:
+            return self._tool_message(tc, json.dumps(local))
+        try:
+            url, params = self._tool_request(args)
+            session = await self._get_aio_session()
+            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+                ind_resp = await resp.json(content_type=None)
+            resolver.remember(args, ind_resp)
+            return self._tool_message(tc, json.dumps(ind_resp))
+        except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError, KeyError, ValueError) as ex:
+            return self._tool_message(tc, f"Error: {str(ex)}")
+
+    async def _decide_async(self, context, assets, on_decision=None):
+        """Async version of :meth:`_decide` with identical retry and parsing rules.
+
+        When ``on_decision`` is given, completions are streamed and each decision
+        is passed to it as soon as its JSON object closes.
+        """
+        messages = [
+            self._system_message(assets),
+            {"role": "user", "content": context},
+        ]
+        allow_tools = True
+        allow_structured = True
+        resolver = IndicatorToolResolver()
+        call = self._start_call(assets, streamed=on_decision is not None)
+
+        try:
+            for _ in range(6):
+                data = self._build_request(messages, assets, allow_structured, allow_tools)
+                try:
+                    if on_decision is None:
+                        message = (await self._post_async(data, call))["choices"][0]["message"]
+                    else:
+                        message = await self._post_stream(data, on_decision, call)
+                except LLMHTTPError as e:
+                    try:
+                        err = e.json()
+                    except (json.JSONDecodeError, ValueError):
+                        err = {}
+                    flags = self._downgrade_on_error(e.status, err, allow_tools, allow_structured)
+                    if flags is None:
+                        raise
+                    call.retry(self._retry_reason(e.status, allow_tools, flags))
+                    allow_tools, allow_structured = flags
+                    continue
+
+                messages.append(message)
+
+                if allow_tools and message.get("tool_calls"):
+                    tool_calls = self._indicator_tool_calls(message)
+                    call.tool_round(len(tool_calls))
+                    messages.extend(await asyncio.gather(*(self._run_tool_call_async(tc, resolver) for tc in tool_calls)))
+                    continue
+
+                result, raw, fallback = self._parse_decision(message, assets, call)
+                if result is not None:
+                    call.finish("ok")
+                    return result
+                return self._finish_sanitized(call, await self._sanitize_output_async(raw, assets), fallback)
+
+            call.finish("tool_cap")
+            return self._hold_all(assets, "tool loop cap")
+        except asyncio.CancelledError:
+            call.finish("cancelled")
+            raise
+        except BaseException as e:
+            call.finish("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self.telemetry.record(call)
@@ -2,9 +2,16 @@
 
 from google import genai
 from google.genai import types
+import asyncio
 import json
 import logging
+import time
 from datetime import datetime
+from src.backend.agent.cache_stats import PromptCacheStats
+from src.backend.agent.call_telemetry import LLMTelemetry
+from src.backend.agent.json_repair import repair_decision_payload, repair_json
+from src.backend.agent.stream_parser import DecisionStreamParser
+from src.backend.agent.tool_resolver import IndicatorToolResolver
 from src.backend.config_loader import CONFIG
 from src.backend.indicators.taapi_client import TAAPIClient
 import requests
@@ -25,15 +32,31 @@ class GeminiTradingAgent:
         # The new SDK uses a unified Client object
         self.client = genai.Client(api_key=self.api_key)
 
+        # Explicit context caching: system instruction + tool declarations are
+        # uploaded once per asset list and referenced by name on each request
+        self.prompt_cache = bool(CONFIG.get("prompt_cache_enabled"))
+        self.cache_ttl = int(CONFIG.get("gemini_cache_ttl") or 3600)
+        self._cached_contents: dict[tuple, tuple[str | None, float]] = {}
+        self.cache_stats = PromptCacheStats("Gemini")
+        self.telemetry = LLMTelemetry()
+
         logging.info(f"Initialized GeminiTradingAgent (google-genai) with model: {self.model_name}")
 
     def decide_trade(self, assets, context):
         """Decide for multiple assets in one call."""
         return self._decide(context, assets=assets)
 
-    def _decide(self, context, assets):
-        """Dispatch decision request to Gemini and enforce output contract."""
-        system_prompt = (
+    async def decide_trade_async(self, assets, context):
+        """Async counterpart of decide_trade on the async client (``client.aio``).
+
+        Cancelling the awaiting task (e.g. a hedge that lost the race) aborts
+        the in-flight request instead of leaving it running in a worker thread.
+        """
+        return await self._decide_async(context, assets=assets)
+
+    def _system_prompt(self, assets):
+        """Build the system instruction for the given asset list."""
+        return (
             "You are a rigorous QUANTITATIVE TRADER and interdisciplinary MATHEMATICIAN-ENGINEER optimizing risk-adjusted returns for perpetual futures under real execution, margin, and funding constraints.\n"
             "You will receive market + account context for SEVERAL assets, including:\n"
             f"- assets = {json.dumps(assets)}\n"
@@ -88,8 +111,10 @@ class GeminiTradingAgent:
             "- 91-100: A+ Setup. All systems go (Trend + Momentum + Volatility + Fundamentals). Aggressive entry.\n"
         )
 
-        # Define tool using Python dict/Type schema for google-genai
-        fetch_taapi_tool = types.Tool(
+    @staticmethod
+    def _build_tool():
+        """Define tool using Python dict/Type schema for google-genai."""
+        return types.Tool(
             function_declarations=[
                 types.FunctionDeclaration(
                     name="fetch_taapi_indicator",
@@ -118,8 +143,10 @@ class GeminiTradingAgent:
             ]
         )
 
-        # Build JSON schema explicitly
-        response_schema = {
+    @staticmethod
+    def _response_schema(assets):
+        """Build JSON schema explicitly."""
+        return {
             "type": "object",
             "properties": {
                 "reasoning": {"type": "string"},
@@ -145,7 +172,179 @@ class GeminiTradingAgent:
         }
 
 
-        # Log the request
+    def _cached_content(self, assets):
+        """Return the cached-content name holding the stable prompt prefix, or None.
+
+        Creation failures (e.g. prompt below the model's minimum cacheable size)
+        are remembered for one TTL so every call does not retry them.
+        """
+        if not self.prompt_cache:
+            return None
+        key = tuple(assets)
+        now = time.monotonic()
+        entry = self._cached_contents.get(key)
+        if entry and entry[1] > now:
+            return entry[0]
+
+        try:
+            cache = self.client.caches.create(
+                model=self.model_name,
+                config=types.CreateCachedContentConfig(
+                    display_name="trading-agent-system-prompt",
+                    system_instruction=self._system_prompt(list(assets)),
+                    tools=[self._build_tool()],
+                    ttl=f"{self.cache_ttl}s",
+                ),
+            )
+            name = cache.name
+            logging.info(f"Created Gemini context cache {name} (ttl {self.cache_ttl}s)")
+        except Exception as e:
+            logging.warning(f"Gemini context caching unavailable, sending full prompt: {e}")
+            name = None
+        # Refresh slightly before the server-side expiry
+        self._cached_contents[key] = (name, now + max(self.cache_ttl - 60, 1))
+        return name
+
+    def _chat_config(self, assets, cached_content=None):
+        if cached_content:
+            # System instruction and tools live in the cache; they must not be resent
+            return types.GenerateContentConfig(
+                temperature=0.7,
+                candidate_count=1,
+                cached_content=cached_content,
+            )
+        return types.GenerateContentConfig(
+            temperature=0.7,
+            candidate_count=1,
+            system_instruction=self._system_prompt(assets),
+            tools=[self._build_tool()],
+        )
+
+    @staticmethod
+    def _turn_config(response_schema, cached_content=None):
+        """Per-message config requesting JSON output (and referencing the cache)."""
+        return types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=response_schema,
+            cached_content=cached_content,
+        )
+
+    def _record_usage(self, response, call=None):
+        """Log prompt vs cached token counts reported in usage_metadata."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            self.cache_stats.record(
+                getattr(usage, "prompt_token_count", None),
+                getattr(usage, "cached_content_token_count", None),
+            )
+            if call is not None:
+                call.add_usage(
+                    getattr(usage, "prompt_token_count", None),
+                    getattr(usage, "candidates_token_count", None),
+                    getattr(usage, "thoughts_token_count", None),
+                    getattr(usage, "cached_content_token_count", None),
+                )
+
+    def _fetch_indicator(self, args, resolver=None):
+        """Execute a fetch_taapi_indicator call and wrap the result for Gemini.
+
+        ``resolver`` answers supported indicators locally and memoizes results
+        for the current decision; TAAPI is only called for the rest.
+        """
+        logging.info(f"Gemini requested TAAPI indicator: {args}")
+        args = dict(args or {})
+        if resolver is not None:
+            local = resolver.resolve(args)
+            if local is not None:
+                return {"result": local}
+        try:
+            params = {
+                "secret": self.taapi.api_key,
+                "exchange": "binance",
+                "symbol": args["symbol"],
+                "interval": args["interval"],
+            }
+            if "period" in args and args["period"] is not None:
+                params["period"] = args["period"]
+            if "backtrack" in args and args["backtrack"] is not None:
+                params["backtrack"] = args["backtrack"]
+            if "other_params" in args and isinstance(args["other_params"], dict):
+                params.update(args["other_params"])
+
+            ind_resp = requests.get(
+                f"{self.taapi.base_url}{args['indicator']}",
+                params=params,
+                timeout=30
+            ).json()
+
+            # Check for TAAPI errors
+            if "error" in ind_resp:
+                logging.error(f"TAAPI Error: {ind_resp['error']}")
+                return {"error": ind_resp['error']}
+            if resolver is not None:
+                resolver.remember(args, ind_resp)
+            return {"result": ind_resp}
+
+        except Exception as ex:
+            logging.error(f"TAAPI Request Exception: {ex}")
+            return {"error": str(ex)}
+
+    def _parse_response_text(self, response_text, assets, call=None):
+        """Parse Gemini's JSON output into the decision contract.
+
+        Repairs and fallbacks are marked on ``call`` as its parse outcome.
+        """
+        if not response_text:
+            logging.warning("Gemini returned empty response text.")
+            self._mark_outcome(call, "fallback")
+            return self._fallback_response(assets, "Empty response from Gemini")
+
+        logging.info(f"Gemini response received ({len(response_text)} chars)")
+
+        with open("llm_requests.log", "a", encoding="utf-8") as f:
+            f.write(f"Response:\n{response_text[:500]}...\n")
+
+        try:
+            parsed = json.loads(response_text)
+        except Exception:
+            # Local repair: code fences, trailing commas, truncated output
+            parsed = repair_json(response_text)
+
+        if not isinstance(parsed, dict) or not isinstance(parsed.get("trade_decisions"), list):
+            repaired = repair_decision_payload(parsed, assets)
+            if repaired is not None:
+                for item in repaired["trade_decisions"]:
+                    item.setdefault("confidence", 0.0)
+                self._mark_outcome(call, "repaired")
+                return repaired
+        if not isinstance(parsed, dict):
+            self._mark_outcome(call, "fallback")
+            return self._fallback_response(assets, "Invalid JSON structure")
+
+        # Normalize fields
+        decisions = parsed.get("trade_decisions")
+        if isinstance(decisions, list):
+            normalized = []
+            for item in decisions:
+                if isinstance(item, dict):
+                    item.setdefault("allocation_usd", 0.0)
+                    item.setdefault("tp_price", None)
+                    item.setdefault("sl_price", None)
+                    item.setdefault("exit_plan", "")
+                    item.setdefault("rationale", "")
+                    item.setdefault("confidence", 0.0)
+                    normalized.append(item)
+            return {"reasoning": parsed.get("reasoning", ""), "trade_decisions": normalized}
+
+        self._mark_outcome(call, "fallback")
+        return self._fallback_response(assets, "Missing trade_decisions")
+
+    @staticmethod
+    def _mark_outcome(call, outcome):
+        if call is not None:
+            call.parse_outcome = outcome
+
+    def _log_request(self, context):
         logging.info(f"Sending request to Gemini (model: {self.model_name})")
         with open("llm_requests.log", "a", encoding="utf-8") as f:
             f.write(f"\n\n=== {datetime.now()} ===\n")
@@ -153,32 +352,37 @@ class GeminiTradingAgent:
             f.write(f"Provider: Google (google-genai SDK)\n")
             f.write(f"Context length: {len(context)} characters\n")
 
+    def _decide(self, context, assets):
+        """Dispatch decision request to Gemini and enforce output contract."""
+        response_schema = self._response_schema(assets)
+        resolver = IndicatorToolResolver()
+        call = self.telemetry.start("gemini", self.model_name, assets)
+
+        # Log the request
+        self._log_request(context)
+
         # Create chat session
+        cached_content = self._cached_content(assets)
         chat = self.client.chats.create(
             model=self.model_name,
             history=[],
-            config=types.GenerateContentConfig(
-                temperature=0.7,
-                candidate_count=1,
-                system_instruction=system_prompt,
-                tools=[fetch_taapi_tool], 
-            )
+            config=self._chat_config(assets, cached_content)
         )
 
         full_prompt = f"{context}" # System prompt is now in config
-        
+
         logging.info(f"Sending prompt to Gemini (Length: {len(full_prompt)})")
 
         try:
             # First send
             try:
+                call.requests += 1
                 response = chat.send_message(
                     message=full_prompt,
-                    config=types.GenerateContentConfig(
-                        response_mime_type="application/json",
-                        response_schema=response_schema
-                    )
+                    config=self._turn_config(response_schema, cached_content)
                 )
+                call.first_token()
+                self._record_usage(response, call)
             except Exception as e:
                  logging.error(f"Failed to send initial message to Gemini: {e}")
                  # Check explicitly for empty content or invalid input specific errors here if needed
@@ -191,114 +395,180 @@ class GeminiTradingAgent:
                 # Check for function calls
                 if not response.candidates:
                     break
-                    
+
                 part = response.candidates[0].content.parts[0]
-                
+
                 if part.function_call:
                     fc = part.function_call
                     if fc.name == "fetch_taapi_indicator":
                         # Execute logic
-                        args = fc.args
-                        logging.info(f"Gemini requested TAAPI indicator: {args}")
-
-                        try:
-                            params = {
-                                "secret": self.taapi.api_key,
-                                "exchange": "binance",
-                                "symbol": args["symbol"],
-                                "interval": args["interval"],
-                            }
-                            if "period" in args and args["period"] is not None:
-                                params["period"] = args["period"]
-                            if "backtrack" in args and args["backtrack"] is not None:
-                                params["backtrack"] = args["backtrack"]
-                            if "other_params" in args and isinstance(args["other_params"], dict):
-                                params.update(args["other_params"])
-
-                            ind_resp = requests.get(
-                                f"{self.taapi.base_url}{args['indicator']}",
-                                params=params,
-                                timeout=30
-                            ).json()
-                            
-                            # Check for TAAPI errors
-                            if "error" in ind_resp:
-                                 logging.error(f"TAAPI Error: {ind_resp['error']}")
-                                 function_result = {"error": ind_resp['error']}
-                            else:
-                                 function_result = {"result": ind_resp}
-                                 
-                        except Exception as ex:
-                            logging.error(f"TAAPI Request Exception: {ex}")
-                            function_result = {"error": str(ex)}
+                        call.tool_round(1)
+                        function_result = self._fetch_indicator(fc.args, resolver)
 
                         # Send output back
                         try:
+                            call.requests += 1
                             response = chat.send_message(
                                 message=types.Part.from_function_response(
                                     name="fetch_taapi_indicator",
                                     response=function_result
                                 ),
-                                config=types.GenerateContentConfig(
-                                    response_mime_type="application/json",
-                                    response_schema=response_schema
-                                )
+                                config=self._turn_config(response_schema, cached_content)
                             )
+                            self._record_usage(response, call)
                         except Exception as e:
                             logging.error(f"Gemini API error on turn {turn}: {e}")
+                            call.retry(f"turn {turn} failed: {type(e).__name__}")
                             break # Break loop on API error
                         continue
-                
+
                 # If we get here, no function call -> Final result
                 break
 
-            response_text = response.text
-            if not response_text:
-                 logging.warning("Gemini returned empty response text.")
-                 return self._fallback_response(assets, "Empty response from Gemini")
-                 
-            logging.info(f"Gemini response received ({len(response_text)} chars)")
-            
-            with open("llm_requests.log", "a", encoding="utf-8") as f:
-                 f.write(f"Response:\n{response_text[:500]}...\n")
+            result = self._parse_response_text(response.text, assets, call)
+            call.finish("ok")
+            return result
 
-            try:
-                parsed = json.loads(response_text)
-            except Exception:
-                # Fallback extraction
-                 if "```json" in response_text:
-                    start = response_text.find("```json") + 7
-                    end = response_text.find("```", start)
-                    if end > start:
-                         parsed = json.loads(response_text[start:end].strip())
-                    else:
-                        parsed = None
-                 else:
-                     parsed = None
-            
-            if not isinstance(parsed, dict):
-                 return self._fallback_response(assets, "Invalid JSON structure")
-                 
-            # Normalize fields
-            decisions = parsed.get("trade_decisions")
-            if isinstance(decisions, list):
-                normalized = []
-                for item in decisions:
-                    if isinstance(item, dict):
-                        item.setdefault("allocation_usd", 0.0)
-                        item.setdefault("tp_price", None)
-                        item.setdefault("sl_price", None)
-                        item.setdefault("exit_plan", "")
-                        item.setdefault("rationale", "")
-                        item.setdefault("confidence", 0.0)
-                        normalized.append(item)
-                return {"reasoning": parsed.get("reasoning", ""), "trade_decisions": normalized}
-            
-            return self._fallback_response(assets, "Missing trade_decisions")
+        except Exception as e:
+            logging.error(f"Gemini API error: {e}", exc_info=True)
+            call.finish("error", f"{type(e).__name__}: {e}")
+            return self._fallback_response(assets, f"Exception: {str(e)}")
+        finally:
+            self.telemetry.record(call)
+
+    async def _decide_async(self, context, assets):
+        """Async version of :meth:`_decide` (same turn loop, awaitable requests)."""
+        response_schema = self._response_schema(assets)
+        resolver = IndicatorToolResolver()
+        call = self.telemetry.start("gemini", self.model_name, assets)
+        await asyncio.to_thread(self._log_request, context)
+
+        cached_content = await asyncio.to_thread(self._cached_content, assets)
+        chat = self.client.aio.chats.create(
+            model=self.model_name,
+            history=[],
+            config=self._chat_config(assets, cached_content)
+        )
+
+        try:
+            call.requests += 1
+            response = await chat.send_message(
+                message=context,
+                config=self._turn_config(response_schema, cached_content)
+            )
+            call.first_token()
+            self._record_usage(response, call)
+
+            for turn in range(10):
+                if not response.candidates:
+                    break
+                part = response.candidates[0].content.parts[0]
+                if not (part.function_call and part.function_call.name == "fetch_taapi_indicator"):
+                    break
+
+                call.tool_round(1)
+                function_result = await asyncio.to_thread(self._fetch_indicator, part.function_call.args, resolver)
+                try:
+                    call.requests += 1
+                    response = await chat.send_message(
+                        message=types.Part.from_function_response(
+                            name="fetch_taapi_indicator",
+                            response=function_result
+                        ),
+                        config=self._turn_config(response_schema, cached_content)
+                    )
+                    self._record_usage(response, call)
+                except Exception as e:
+                    logging.error(f"Gemini API error on turn {turn}: {e}")
+                    call.retry(f"turn {turn} failed: {type(e).__name__}")
+                    break
+
+            result = await asyncio.to_thread(self._parse_response_text, response.text, assets, call)
+            call.finish("ok")
+            return result
 
+        except asyncio.CancelledError:
+            call.finish("cancelled")
+            raise
         except Exception as e:
             logging.error(f"Gemini API error: {e}", exc_info=True)
+            call.finish("error", f"{type(e).__name__}: {e}")
             return self._fallback_response(assets, f"Exception: {str(e)}")
+        finally:
+            self.telemetry.record(call)
+
+    async def decide_trade_streaming(self, assets, context, on_decision):
+        """Stream the response, calling ``on_decision`` as each decision object closes.
+
+        Uses the async client (``client.aio``), so cancelling the awaiting task
+        aborts generation. Returns the full payload, same contract as decide_trade.
+        """
+        response_schema = self._response_schema(assets)
+        resolver = IndicatorToolResolver()
+        call = self.telemetry.start("gemini", self.model_name, assets, streamed=True)
+        await asyncio.to_thread(self._log_request, context)
+
+        cached_content = await asyncio.to_thread(self._cached_content, assets)
+        chat = self.client.aio.chats.create(
+            model=self.model_name,
+            history=[],
+            config=self._chat_config(assets, cached_content)
+        )
+        message = context
+        parser = DecisionStreamParser()
+
+        try:
+            for turn in range(10):
+                parser = DecisionStreamParser()
+                function_call = None
+                call.requests += 1
+                stream = await chat.send_message_stream(
+                    message=message,
+                    config=self._turn_config(response_schema, cached_content)
+                )
+                usage_chunk = None
+                async for chunk in stream:
+                    if getattr(chunk, "usage_metadata", None) is not None:
+                        usage_chunk = chunk
+                    content = chunk.candidates[0].content if chunk.candidates else None
+                    for part in (content.parts if content and content.parts else []):
+                        call.first_token()
+                        if part.function_call:
+                            function_call = part.function_call
+                        elif part.text:
+                            for decision in parser.feed(part.text):
+                                decision.setdefault("confidence", 0.0)
+                                on_decision(decision)
+                if usage_chunk is not None:
+                    self._record_usage(usage_chunk, call)
+
+                if function_call and function_call.name == "fetch_taapi_indicator":
+                    call.tool_round(1)
+                    function_result = await asyncio.to_thread(self._fetch_indicator, function_call.args, resolver)
+                    message = types.Part.from_function_response(
+                        name="fetch_taapi_indicator",
+                        response=function_result
+                    )
+                    continue
+                break
+
+            result = await asyncio.to_thread(self._parse_response_text, parser.text, assets, call)
+            call.finish("ok")
+            return result
+
+        except asyncio.CancelledError:
+            call.finish("cancelled")
+            raise
+        except Exception as e:
+            logging.error(f"Gemini streaming error: {e}", exc_info=True)
+            call.finish("error", f"{type(e).__name__}: {e}")
+            return self._fallback_response(assets, f"Exception: {str(e)}")
+        finally:
+            self.telemetry.record(call)
+
+    async def aclose(self):
+        """Close the pooled TAAPI session."""
+        await self.taapi.close()
 
     def _fallback_response(self, assets, reasoning="Error occurred"):
         """Generate fallback HOLD response when API fails."""
@@ -0,0 +1,264 @@
+"""Hedged decision agent: races providers and keeps the first schema-valid answer."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.backend.config_loader import CONFIG
+
+VALID_ACTIONS = {"buy", "sell", "hold"}
+
+
+def is_valid_decision_payload(result: Any, assets: Sequence[str]) -> bool:
+    """Check a decision payload against the agent output contract.
+
+    All-hold payloads produced by parse-error fallbacks are treated as invalid so
+    a healthy hedge can still win.
+    """
+    if not isinstance(result, dict) or not isinstance(result.get("trade_decisions"), list):
+        return False
+    decisions = result["trade_decisions"]
+    if not decisions:
+        return False
+    for item in decisions:
+        if not isinstance(item, dict):
+            return False
+        if item.get("asset") not in assets or item.get("action") not in VALID_ACTIONS:
+            return False
+        try:
+            float(item.get("allocation_usd") or 0)
+        except (TypeError, ValueError):
+            return False
+    fallback_markers = ("parse error", "api error", "tool loop cap")
+    if all(
+        d.get("action") == "hold" and any(m in str(d.get("rationale", "")).lower() for m in fallback_markers)
+        for d in decisions
+    ):
+        return False
+    return True
+
+
+@dataclass
+class ModelStats:
+    """Latency and health bookkeeping for one model."""
+    ewma_latency: Optional[float] = None
+    calls: int = 0
+    wins: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    unhealthy_until: float = 0.0
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+
+class HedgedTradingAgent:
+    """
+    Wraps several decision agents and hedges slow requests.
+
+    The fastest healthy model (by EWMA latency) is asked first. If it has not
+    produced a schema-valid answer after ``hedge_delay`` seconds, the next model
+    is started as well; the first valid response wins and the other request is
+    cancelled. Models that fail repeatedly are skipped for a cooldown period.
+
+    Cancelling a loser only frees its request when the agent has a native
+    ``decide_trade_async``; agents without one run in a worker thread that
+    finishes in the background. ``model`` names the model that produced the
+    most recently returned payload.
+    """
+
+    def __init__(
+        self,
+        agents: Sequence[Tuple[str, Any]],
+        hedge_delay: float = 10.0,
+        ewma_alpha: float = 0.3,
+        max_failures: int = 3,
+        failure_cooldown: float = 300.0,
+    ):
+        """
+        Initialize hedged agent.
+
+        Args:
+            agents: (name, agent) pairs in preference order; each agent provides
+                ``decide_trade`` and optionally ``decide_trade_async``
+            hedge_delay: Seconds to wait on the current model before hedging
+            ewma_alpha: Weight of the newest latency sample
+            max_failures: Consecutive failures before a model is benched
+            failure_cooldown: Seconds a benched model is skipped
+        """
+        if not agents:
+            raise ValueError("HedgedTradingAgent needs at least one agent")
+        self.agents: List[Tuple[str, Any]] = list(agents)
+        self.hedge_delay = hedge_delay
+        self.ewma_alpha = ewma_alpha
+        self.max_failures = max_failures
+        self.failure_cooldown = failure_cooldown
+        self.stats: Dict[str, ModelStats] = {name: ModelStats() for name, _ in self.agents}
+        self.model: str = _agent_name(self.agents[0][1])
+
+    def decide_trade(self, assets, context):
+        """Blocking entry point (for callers without an event loop)."""
+        return asyncio.run(self.decide_trade_async(assets, context))
+
+    def ranked_agents(self) -> List[Tuple[str, Any]]:
+        """Healthy models ordered by EWMA latency (unmeasured models keep config order)."""
+        now = time.monotonic()
+        order = {name: i for i, (name, _) in enumerate(self.agents)}
+        healthy = [(n, a) for n, a in self.agents if self.stats[n].is_healthy(now)]
+        if not healthy:
+            # Everything is benched: fall back to configured order rather than failing
+            healthy = list(self.agents)
+
+        def key(item):
+            latency = self.stats[item[0]].ewma_latency
+            return (latency is None, latency or 0.0, order[item[0]])
+
+        return sorted(healthy, key=key)
+
+    def _record_success(self, name: str, latency: float):
+        stats = self.stats[name]
+        stats.consecutive_failures = 0
+        stats.unhealthy_until = 0.0
+        if stats.ewma_latency is None:
+            stats.ewma_latency = latency
+        else:
+            stats.ewma_latency = self.ewma_alpha * latency + (1 - self.ewma_alpha) * stats.ewma_latency
+
+    def _record_failure(self, name: str, latency: float):
+        stats = self.stats[name]
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        # Penalize the latency estimate so a flaky model drifts down the ranking
+        penalty = max(latency, self.hedge_delay)
+        stats.ewma_latency = penalty if stats.ewma_latency is None else max(stats.ewma_latency, penalty)
+        if stats.consecutive_failures >= self.max_failures:
+            stats.unhealthy_until = time.monotonic() + self.failure_cooldown
+            logging.warning(f"Hedged agent: benching {name} for {self.failure_cooldown:.0f}s after {stats.consecutive_failures} failures")
+
+    async def _invoke(self, name: str, agent: Any, assets, context):
+        """Run one model and return (name, result, latency, error)."""
+        self.stats[name].calls += 1
+        started = time.monotonic()
+        try:
+            decide_async = getattr(agent, "decide_trade_async", None)
+            if decide_async:
+                result = await decide_async(assets, context)
+            else:
+                result = await asyncio.to_thread(agent.decide_trade, assets, context)
+            return name, result, time.monotonic() - started, None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return name, None, time.monotonic() - started, e
+
+    async def decide_trade_async(self, assets, context):
+        """Race the ranked models with hedging; return the first valid payload."""
+        candidates = self.ranked_agents()
+        pending: Dict[asyncio.Task, Tuple[str, Any]] = {}
+        fallback = None
+        fallback_agent = None
+        last_error: Optional[Exception] = None
+        next_idx = 0
+
+        def launch():
+            nonlocal next_idx
+            name, agent = candidates[next_idx]
+            next_idx += 1
+            task = asyncio.create_task(self._invoke(name, agent, assets, context))
+            pending[task] = (name, agent)
+            if next_idx > 1:
+                logging.info(f"Hedged agent: hedging with {name}")
+
+        launch()
+        try:
+            while pending:
+                timeout = self.hedge_delay if next_idx < len(candidates) else None
+                done, _ = await asyncio.wait(set(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    launch()  # Current models are slow: start the next one
+                    continue
+
+                for task in done:
+                    _, agent = pending.pop(task)
+                    name, result, latency, error = task.result()
+                    if error is None and is_valid_decision_payload(result, assets):
+                        self._record_success(name, latency)
+                        self.stats[name].wins += 1
+                        self.model = _agent_name(agent)
+                        logging.info(f"Hedged agent: {name} won in {latency:.2f}s")
+                        return result
+
+                    self._record_failure(name, latency)
+                    if error is not None:
+                        last_error = error
+                        logging.warning(f"Hedged agent: {name} failed: {error}")
+                    elif fallback is None:
+                        fallback, fallback_agent = result, agent
+                        logging.warning(f"Hedged agent: {name} returned an invalid payload")
+
+                # A model failed outright: hedge immediately instead of waiting
+                if not pending and next_idx < len(candidates):
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if fallback is not None:
+            self.model = _agent_name(fallback_agent)
+            return fallback
+        raise last_error or RuntimeError("All hedged models failed")
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Per-model latency/health figures for dashboards and logs."""
+        now = time.monotonic()
+        return {
+            name: {
+                "ewma_latency": s.ewma_latency,
+                "calls": s.calls,
+                "wins": s.wins,
+                "failures": s.failures,
+                "healthy": s.is_healthy(now),
+            }
+            for name, s in self.stats.items()
+        }
+
+    async def aclose(self):
+        for _, agent in self.agents:
+            aclose = getattr(agent, "aclose", None)
+            if aclose:
+                await aclose()
+
+
+def _agent_name(agent: Any) -> str:
+    return getattr(agent, "model", None) or getattr(agent, "model_name", None) or type(agent).__name__
+
+
+def build_hedged_agent(primary: Any) -> HedgedTradingAgent:
+    """Wrap ``primary`` with the secondary model configured via LLM_HEDGE_* settings."""
+    provider = (CONFIG.get("llm_hedge_provider") or "openrouter").lower()
+    model = CONFIG.get("llm_hedge_model")
+
+    if provider == "gemini":
+        from src.backend.agent.gemini_decision_maker import GeminiTradingAgent
+        secondary = GeminiTradingAgent()
+        if model:
+            secondary.model_name = model
+    else:
+        from src.backend.agent.decision_maker import TradingAgent
+        secondary = TradingAgent()
+        if model:
+            secondary.model = model
+
+    primary_name, secondary_name = _agent_name(primary), _agent_name(secondary)
+    if primary_name == secondary_name:
+        secondary_name = f"{secondary_name} (hedge)"
+
+    return HedgedTradingAgent(
+        [(primary_name, primary), (secondary_name, secondary)],
+        hedge_delay=float(CONFIG.get("llm_hedge_delay") or 10.0),
+    )
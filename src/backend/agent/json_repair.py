@@ -0,0 +1,204 @@
+"""Local repair of malformed LLM decision output before any remote retry."""
+
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.backend.agent.stream_parser import normalize_decision
+
+VALID_ACTIONS = ("buy", "sell", "hold")
+LIST_DECISION_KEYS = ("asset", "action", "allocation_usd", "tp_price", "sl_price", "exit_plan", "rationale")
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+
+
+def strip_fences(text: str) -> str:
+    """Return the body of the first Markdown code fence, or the text unchanged."""
+    match = _FENCE_RE.search(text)
+    return match.group(1).strip() if match else text.strip()
+
+
+def extract_json(text: str) -> str:
+    """Drop prose before the first ``{``/``[`` and after the matching close, if any."""
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return text
+    text = text[min(starts):]
+    end = max(text.rfind("}"), text.rfind("]"))
+    # Keep truncated tails intact so close_truncated can finish them
+    return text[:end + 1] if end >= 0 and _is_balanced(text[:end + 1]) else text
+
+
+def _scan(text: str):
+    """Yield (index, char, in_string) while tracking JSON string/escape state."""
+    in_string = escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                yield i, ch, True
+                continue
+            yield i, ch, True
+        else:
+            if ch == '"':
+                in_string = True
+            yield i, ch, in_string
+
+
+def _is_balanced(text: str) -> bool:
+    depth = 0
+    for _, ch, in_string in _scan(text):
+        if in_string:
+            continue
+        if ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+    return depth == 0
+
+
+def remove_trailing_commas(text: str) -> str:
+    """Remove commas directly before a closing bracket (outside strings)."""
+    out: List[str] = []
+    for _, ch, in_string in _scan(text):
+        if not in_string and ch in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+        out.append(ch)
+    return "".join(out)
+
+
+def close_truncated(text: str, max_backoff: int = 50) -> str:
+    """Close output cut off mid-object.
+
+    Never finishes a half-written value: backs off to the last point where
+    every open array holds only complete elements (after a comma or a closed
+    container) and appends the missing closers. A decision object that was
+    still being written when the output stopped is dropped, not completed.
+    """
+    stack: List[str] = []
+    cuts = []  # (end index, closers needed at that point)
+    in_string = escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+            if stack and _complete_elements_only(stack):
+                cuts.append((i + 1, "".join(reversed(stack))))
+        elif ch == "," and _complete_elements_only(stack):
+            cuts.append((i, "".join(reversed(stack))))
+    if not stack and not in_string:
+        return text
+
+    for i, closers in reversed(cuts[-max_backoff:]):
+        candidate = text[:i] + closers
+        try:
+            json.loads(candidate)
+            return candidate
+        except (json.JSONDecodeError, ValueError):
+            continue
+    return text
+
+
+def _complete_elements_only(stack: List[str]) -> bool:
+    """True if cutting here keeps no partially written array element.
+
+    Only the innermost open container may be an array; anything open inside
+    an array (a decision object, a list-form decision) is still incomplete.
+    """
+    return "]" not in stack[:-1]
+
+
+def repair_json(text: str) -> Any:
+    """Parse ``text`` after progressively applying local repairs; None if hopeless."""
+    if not isinstance(text, str) or not text.strip():
+        return None
+    candidate = text.strip()
+    steps = (strip_fences, extract_json, remove_trailing_commas, close_truncated, remove_trailing_commas)
+    for step in (None,) + steps:
+        if step is not None:
+            candidate = step(candidate)
+        try:
+            return json.loads(candidate)
+        except (json.JSONDecodeError, ValueError):
+            continue
+    return None
+
+
+def _to_float(value) -> Optional[float]:
+    if value in (None, "", "null"):
+        return None
+    return float(value)
+
+
+def coerce_decision(item: Any) -> Optional[Dict]:
+    """Map a dict or list-form ``[asset, action, allocation, tp, sl, exit_plan, rationale]`` decision.
+
+    Buy and sell decisions must carry every schema key; defaults are only
+    filled in for holds, so a decision missing its sizing or exits never executes.
+    """
+    if isinstance(item, list) and len(item) >= 2:
+        item = dict(zip(LIST_DECISION_KEYS, item))
+    if not isinstance(item, dict):
+        return None
+    action = str(item.get("action", "")).strip().lower()
+    if action in ("buy", "sell") and any(key not in item for key in LIST_DECISION_KEYS):
+        return None
+    decision = normalize_decision(dict(item))
+    decision["action"] = str(decision.get("action", "")).strip().lower()
+    decision["allocation_usd"] = _to_float(decision["allocation_usd"]) or 0.0
+    decision["tp_price"] = _to_float(decision["tp_price"])
+    decision["sl_price"] = _to_float(decision["sl_price"])
+    return decision
+
+
+def validate_decision_payload(parsed: Any, assets: Sequence[str]) -> Optional[Dict]:
+    """Coerce a parsed object into ``{reasoning, trade_decisions}``; None if it does not fit the schema."""
+    if isinstance(parsed, list):
+        parsed = {"reasoning": "", "trade_decisions": parsed}
+    if not isinstance(parsed, dict):
+        return None
+    decisions = parsed.get("trade_decisions")
+    if decisions is None and all(asset in parsed for asset in assets):
+        # Object keyed by asset: {"BTC": {...}, "ETH": {...}}
+        decisions = [dict(parsed[a], asset=a) for a in assets if isinstance(parsed[a], dict)]
+    if not isinstance(decisions, list) or not decisions:
+        return None
+
+    normalized = []
+    try:
+        for item in decisions:
+            decision = coerce_decision(item)
+            if decision is None or decision.get("asset") not in assets or decision["action"] not in VALID_ACTIONS:
+                return None
+            normalized.append(decision)
+    except (TypeError, ValueError):
+        return None
+    return {"reasoning": str(parsed.get("reasoning") or ""), "trade_decisions": normalized}
+
+
+def repair_decision_payload(raw: Any, assets: Sequence[str]) -> Optional[Dict]:
+    """Locally repair raw LLM output (text or parsed JSON) into a valid decision payload."""
+    parsed = repair_json(raw) if isinstance(raw, str) else raw
+    result = validate_decision_payload(parsed, list(assets))
+    if result is not None:
+        logging.info("Repaired LLM output locally (%d decisions)", len(result["trade_decisions"]))
+    return result
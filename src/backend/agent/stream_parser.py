@@ -0,0 +1,152 @@
+"""Incremental parser for streamed ``{"reasoning", "trade_decisions"}`` LLM output."""
+
+import json
+import logging
+from typing import Dict, List, Optional
+
+
+def normalize_decision(item: Dict) -> Dict:
+    """Fill optional decision keys with the defaults used by the agents."""
+    item.setdefault("allocation_usd", 0.0)
+    item.setdefault("tp_price", None)
+    item.setdefault("sl_price", None)
+    item.setdefault("exit_plan", "")
+    item.setdefault("rationale", "")
+    return item
+
+
+class DecisionStreamParser:
+    """
+    Emits each per-asset decision as soon as its JSON object closes.
+
+    Feed raw text chunks as they arrive; ``feed`` returns the decisions that
+    completed within that chunk. The scanner tracks string/escape state and
+    nesting depth, so it is O(n) over the stream and tolerant of leading prose
+    or Markdown fences before the first ``{``.
+    """
+
+    def __init__(self):
+        self.buffer: List[str] = []
+        self.decisions: List[Dict] = []
+        self.reasoning: Optional[str] = None
+
+        self._pos = 0  # Absolute offset of the next character to scan
+        self._text = ""  # Unconsumed tail needed to slice pending objects
+        self._text_offset = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Consume a chunk and return decisions completed by it."""
+        if not chunk:
+            return []
+        self.buffer.append(chunk)
+        self._text += chunk
+        completed: List[Dict] = []
+
+        for ch in chunk:
+            pos = self._pos
+            self._pos += 1
+
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._string_start is not None:
+                        self._last_string = self._slice(self._string_start, pos + 1)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch == ":" and self._depth == 1 and self._last_string is not None:
+                self._key = self._loads(self._last_string)
+                self._last_string = None
+            elif ch in ",}" and self._depth == 1 and self._key == "reasoning" and self._last_string is not None:
+                self.reasoning = self._loads(self._last_string)
+                self._last_string = None
+            elif ch == "[":
+                if self._depth == 1 and self._key == "trade_decisions":
+                    self._array_depth = self._depth + 1
+                self._depth += 1
+            elif ch == "{":
+                if self._array_depth is not None and self._depth == self._array_depth:
+                    self._item_start = pos
+                self._depth += 1
+            elif ch in "]}":
+                self._depth -= 1
+                if ch == "}" and self._item_start is not None and self._depth == self._array_depth:
+                    decision = self._loads(self._slice(self._item_start, pos + 1))
+                    self._item_start = None
+                    if isinstance(decision, dict):
+                        normalize_decision(decision)
+                        self.decisions.append(decision)
+                        completed.append(decision)
+                elif ch == "]" and self._array_depth is not None and self._depth == self._array_depth - 1:
+                    self._array_depth = None
+
+        self._compact()
+        return completed
+
+    def _slice(self, start: int, end: int) -> str:
+        return self._text[start - self._text_offset:end - self._text_offset]
+
+    def _compact(self):
+        """Drop scanned text that no pending object or string still needs."""
+        keep_from = self._pos
+        for marker in (self._item_start, self._string_start if self._in_string else None):
+            if marker is not None:
+                keep_from = min(keep_from, marker)
+        drop = keep_from - self._text_offset
+        if drop > 0:
+            self._text = self._text[drop:]
+            self._text_offset = keep_from
+
+    @staticmethod
+    def _loads(raw: str):
+        try:
+            return json.loads(raw)
+        except (json.JSONDecodeError, ValueError):
+            logging.debug("Stream parser could not decode fragment: %s", raw[:100])
+            return None
+
+    @property
+    def text(self) -> str:
+        """Full text received so far."""
+        return "".join(self.buffer)
+
+    def result(self) -> Optional[Dict]:
+        """
+        Final payload once the stream ends.
+
+        Uses the complete document when it parses; otherwise falls back to the
+        reasoning and decisions recovered incrementally.
+        """
+        text = self.text.strip()
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end > start:
+            parsed = self._loads(text[start:end + 1])
+            if isinstance(parsed, dict) and isinstance(parsed.get("trade_decisions"), list):
+                parsed["trade_decisions"] = [
+                    normalize_decision(d) for d in parsed["trade_decisions"] if isinstance(d, dict)
+                ]
+                return parsed
+        if self.decisions:
+            return {"reasoning": self.reasoning or "", "trade_decisions": list(self.decisions)}
+        return None
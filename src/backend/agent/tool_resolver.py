@@ -0,0 +1,81 @@
+"""Resolves fetch_taapi_indicator tool calls locally before falling back to TAAPI."""
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from src.backend.config_loader import CONFIG
+from src.backend.indicators.local_indicators import LocalIndicatorService
+
+
+class IndicatorToolResolver:
+    """
+    Per-decision answer cache for ``fetch_taapi_indicator`` tool calls.
+
+    Supported indicators are computed from the candles the engine already
+    fetched this iteration (``LocalIndicatorService.candle_cache``). Repeated
+    arguments within one decision are memoized, including remote TAAPI results
+    recorded with :meth:`remember`. Create one resolver per decision.
+    """
+
+    def __init__(self, local: Optional[LocalIndicatorService] = None, enabled: Optional[bool] = None):
+        """
+        Initialize tool resolver.
+
+        Args:
+            local: Indicator service whose candle cache is used
+            enabled: Compute locally (defaults to CONFIG local_tool_indicators)
+        """
+        self.local = local or LocalIndicatorService()
+        self.enabled = CONFIG.get("local_tool_indicators", True) if enabled is None else enabled
+        self.memo: Dict[str, Any] = {}
+        self.local_hits = 0
+        self.memo_hits = 0
+
+    @staticmethod
+    def _key(args: Dict) -> str:
+        return json.dumps(args, sort_keys=True, default=str)
+
+    @staticmethod
+    def _asset(symbol: str) -> str:
+        """``BTC/USDT`` / ``BTCUSDT`` -> ``BTC`` (Hyperliquid coin names)."""
+        symbol = str(symbol or "").upper()
+        if "/" in symbol:
+            return symbol.split("/")[0]
+        for quote in ("USDT", "USDC", "USD"):
+            if symbol.endswith(quote) and len(symbol) > len(quote):
+                return symbol[:-len(quote)]
+        return symbol
+
+    def resolve(self, args: Dict) -> Optional[Any]:
+        """Return a memoized or locally computed TAAPI-shaped result, or None to fetch remotely."""
+        key = self._key(args)
+        if key in self.memo:
+            self.memo_hits += 1
+            return self.memo[key]
+        if not self.enabled:
+            return None
+
+        try:
+            candles = self.local.candle_cache.get(self._asset(args.get("symbol")), args.get("interval"))
+            if not candles:
+                return None
+            other = args.get("other_params") if isinstance(args.get("other_params"), dict) else {}
+            result = self.local.calculate(
+                args.get("indicator", ""), candles,
+                period=args.get("period"), backtrack=args.get("backtrack") or 0, params=other,
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            logging.debug(f"Local indicator resolution failed for {args}: {e}")
+            return None
+        if result is None:
+            return None
+
+        self.local_hits += 1
+        self.memo[key] = result
+        logging.info(f"Tool call served locally: {args.get('indicator')} {args.get('symbol')} {args.get('interval')}")
+        return result
+
+    def remember(self, args: Dict, result: Any):
+        """Memoize a remote TAAPI result for the rest of this decision."""
+        self.memo[self._key(args)] = result
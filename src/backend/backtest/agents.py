@@ -0,0 +1,172 @@
+"""
+Offline decision agents for backtests.
+
+Both agents implement the same ``decide_trade(assets, context)`` contract as
+TradingAgent / GeminiTradingAgent, so they can be plugged into TradingBotEngine.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+def _hold(asset: str, rationale: str) -> Dict:
+    """Build a HOLD decision in the agent output format."""
+    return {
+        "asset": asset,
+        "action": "hold",
+        "allocation_usd": 0.0,
+        "tp_price": None,
+        "sl_price": None,
+        "exit_plan": "",
+        "rationale": rationale,
+    }
+
+
+class RuleBasedAgent:
+    """
+    Deterministic trend-following agent (EMA20 + RSI14 + MACD histogram).
+
+    Opens a position when price, momentum and RSI agree, and flips only when the
+    opposite signal fires; otherwise it holds. Useful as a cheap baseline and for
+    exercising the engine without an LLM.
+    """
+
+    def __init__(
+        self,
+        allocation_usd: float = 1000.0,
+        take_profit_pct: float = 0.02,
+        stop_loss_pct: float = 0.01,
+        rsi_overbought: float = 70.0,
+        rsi_oversold: float = 30.0,
+    ):
+        self.allocation_usd = allocation_usd
+        self.take_profit_pct = take_profit_pct
+        self.stop_loss_pct = stop_loss_pct
+        self.rsi_overbought = rsi_overbought
+        self.rsi_oversold = rsi_oversold
+
+    def decide_trade(self, assets, context):
+        """Decide for multiple assets from the engine's JSON context."""
+        try:
+            payload = json.loads(context[context.index("{"):])
+        except (ValueError, TypeError) as e:
+            logging.error(f"RuleBasedAgent could not parse context: {e}")
+            return {"reasoning": "Unparseable context", "trade_decisions": [_hold(a, "Parse error") for a in assets]}
+
+        sections = {m.get("asset"): m for m in payload.get("market_data", [])}
+        positions = {
+            p.get("symbol"): float(p.get("quantity") or 0)
+            for p in payload.get("account", {}).get("positions", [])
+        }
+
+        decisions = []
+        for asset in assets:
+            section = sections.get(asset)
+            if not section:
+                decisions.append(_hold(asset, "No market data"))
+                continue
+            decisions.append(self._decide_asset(asset, section, positions.get(asset, 0.0)))
+
+        return {"reasoning": "Rule-based EMA/RSI/MACD signal", "trade_decisions": decisions}
+
+    def _decide_asset(self, asset: str, section: Dict, position_qty: float) -> Dict:
+        price = section.get("current_price")
+        intraday = section.get("intraday", {})
+        ema20 = intraday.get("ema20")
+        rsi14 = intraday.get("rsi14")
+        macd = intraday.get("macd") or {}
+        hist = macd.get("valueMACDHist") if isinstance(macd, dict) else None
+
+        if None in (price, ema20, rsi14, hist):
+            return _hold(asset, "Insufficient indicator history")
+
+        if price > ema20 and hist > 0 and rsi14 < self.rsi_overbought:
+            signal = "buy"
+        elif price < ema20 and hist < 0 and rsi14 > self.rsi_oversold:
+            signal = "sell"
+        else:
+            return _hold(asset, f"No signal (rsi14={rsi14:.1f})")
+
+        if (signal == "buy" and position_qty > 0) or (signal == "sell" and position_qty < 0):
+            return _hold(asset, f"Already positioned for {signal}")
+
+        direction = 1 if signal == "buy" else -1
+        return {
+            "asset": asset,
+            "action": signal,
+            "allocation_usd": self.allocation_usd,
+            "tp_price": price * (1 + direction * self.take_profit_pct),
+            "sl_price": price * (1 - direction * self.stop_loss_pct),
+            "exit_plan": f"Close if price crosses EMA20 ({ema20:.2f}) against the position",
+            "rationale": f"price={price:.2f} ema20={ema20:.2f} rsi14={rsi14:.1f} macd_hist={hist:.4f}",
+        }
+
+
+class RecordedAgent:
+    """
+    Replays previously recorded LLM outputs.
+
+    Records are read from a JSONL file. Each line is either a decision payload
+    ({"reasoning", "trade_decisions"}) or a wrapper {"timestamp", "decisions"}.
+    Timestamped records are selected by the virtual clock (latest record at or
+    before now, each used once); untimed records are replayed in order. When no
+    record applies, every asset holds.
+    """
+
+    def __init__(self, path: str, clock=None):
+        self.clock = clock
+        self.records: List[Dict] = []
+        self._cursor = 0
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    raw = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                decisions = raw.get("decisions", raw)
+                ts = raw.get("timestamp")
+                when = None
+                if ts and "decisions" in raw:
+                    when = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+                    if when.tzinfo is None:
+                        when = when.replace(tzinfo=timezone.utc)
+                self.records.append({"timestamp": when, "decisions": decisions})
+
+        self.timed = bool(self.records) and all(r["timestamp"] for r in self.records)
+        if self.timed:
+            self.records.sort(key=lambda r: r["timestamp"])
+        logging.info(f"RecordedAgent loaded {len(self.records)} records from {path}")
+
+    def _next_record(self) -> Optional[Dict]:
+        if not self.timed or self.clock is None:
+            if self._cursor >= len(self.records):
+                return None
+            record = self.records[self._cursor]
+            self._cursor += 1
+            return record
+
+        now = self.clock.now()
+        chosen = None
+        while self._cursor < len(self.records) and self.records[self._cursor]["timestamp"] <= now:
+            chosen = self.records[self._cursor]
+            self._cursor += 1
+        return chosen
+
+    def decide_trade(self, assets, context):
+        """Return the next recorded decision, filtered to the requested assets."""
+        record = self._next_record()
+        if record is None:
+            return {"reasoning": "No recorded decision", "trade_decisions": [_hold(a, "No recorded decision") for a in assets]}
+
+        decisions = record["decisions"]
+        recorded = {d.get("asset"): d for d in decisions.get("trade_decisions", []) if isinstance(d, dict)}
+        return {
+            "reasoning": decisions.get("reasoning", ""),
+            "trade_decisions": [dict(recorded[a]) if a in recorded else _hold(a, "Not in recording") for a in assets],
+        }
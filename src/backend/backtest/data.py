@@ -0,0 +1,179 @@
+"""
+Historical candle loading and resampling for backtests.
+
+Candles use the same unified OHLC format as the exchanges:
+{'t': open_time_ms, 'o': open, 'h': high, 'l': low, 'c': close, 'v': volume}
+"""
+
+import csv
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+BINANCE_KLINES_URL = "https://api.binance.com/api/v3/klines"
+
+
+def interval_to_seconds(interval: str) -> int:
+    """Convert an interval string such as "5m", "4h" or "1d" to seconds."""
+    units = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+    try:
+        return int(interval[:-1]) * units[interval[-1]]
+    except (KeyError, ValueError, IndexError) as exc:
+        raise ValueError(f"Unsupported interval: {interval}") from exc
+
+
+def _normalize(raw: Dict) -> Dict:
+    """Coerce a candle-like dict (short or long keys) into unified OHLC format."""
+    t = raw.get("t", raw.get("time", raw.get("timestamp")))
+    if isinstance(t, str):
+        t = datetime.fromisoformat(t.replace("Z", "+00:00"))
+    if isinstance(t, datetime):
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=timezone.utc)
+        t = t.timestamp() * 1000
+    t = int(float(t))
+    if t < 1_000_000_000_000:  # Seconds -> milliseconds
+        t *= 1000
+    return {
+        "t": t,
+        "o": float(raw.get("o", raw.get("open"))),
+        "h": float(raw.get("h", raw.get("high"))),
+        "l": float(raw.get("l", raw.get("low"))),
+        "c": float(raw.get("c", raw.get("close"))),
+        "v": float(raw.get("v", raw.get("volume", 0)) or 0),
+    }
+
+
+def load_candles(path: str) -> List[Dict]:
+    """
+    Load candles from a JSON, JSONL or CSV file.
+
+    JSON files may hold a list of candles or Binance kline arrays; CSV files need
+    a header with t/time/timestamp and open/high/low/close(/volume) columns.
+
+    Returns:
+        Candles sorted by open time with duplicates removed
+    """
+    file_path = Path(path)
+    suffix = file_path.suffix.lower()
+    rows: List = []
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        if suffix == ".csv":
+            rows = list(csv.DictReader(f))
+        elif suffix == ".jsonl":
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = json.load(f)
+
+    candles = []
+    for row in rows:
+        if isinstance(row, list):
+            # Binance kline: [open_time, open, high, low, close, volume, ...]
+            row = {"t": row[0], "o": row[1], "h": row[2], "l": row[3], "c": row[4], "v": row[5]}
+        candles.append(_normalize(row))
+
+    deduped = {c["t"]: c for c in candles}
+    return [deduped[t] for t in sorted(deduped)]
+
+
+def save_candles(path: str, candles: List[Dict]) -> None:
+    """Write candles as JSONL so large histories can be appended and streamed."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for candle in candles:
+            f.write(json.dumps(candle) + "\n")
+
+
+def resample_candles(candles: List[Dict], interval: str) -> List[Dict]:
+    """
+    Aggregate base candles into a coarser interval.
+
+    Buckets are aligned to multiples of the interval since the epoch, matching
+    how exchanges align their kline open times.
+    """
+    step_ms = interval_to_seconds(interval) * 1000
+    resampled: List[Dict] = []
+    current: Optional[Dict] = None
+
+    for c in candles:
+        bucket = (c["t"] // step_ms) * step_ms
+        if current is None or current["t"] != bucket:
+            current = {"t": bucket, "o": c["o"], "h": c["h"], "l": c["l"], "c": c["c"], "v": c["v"]}
+            resampled.append(current)
+        else:
+            current["h"] = max(current["h"], c["h"])
+            current["l"] = min(current["l"], c["l"])
+            current["c"] = c["c"]
+            current["v"] += c["v"]
+
+    return resampled
+
+
+def fetch_binance_candles(
+    asset: str,
+    interval: str,
+    start: datetime,
+    end: datetime,
+    page_limit: int = 1000,
+    pause: float = 0.2,
+) -> List[Dict]:
+    """
+    Download historical klines from Binance, paging through the range.
+
+    Args:
+        asset: Asset symbol (e.g., "BTC"), quoted against USDT
+        interval: Kline interval (e.g., "5m")
+        start: Range start (inclusive)
+        end: Range end (exclusive)
+        page_limit: Klines per request (Binance maximum is 1000)
+        pause: Delay between pages to stay under the public rate limit
+
+    Returns:
+        Candles in unified OHLC format
+    """
+    step_ms = interval_to_seconds(interval) * 1000
+    start_ms = int(start.timestamp() * 1000)
+    end_ms = int(end.timestamp() * 1000)
+    candles: List[Dict] = []
+
+    while start_ms < end_ms:
+        response = requests.get(
+            BINANCE_KLINES_URL,
+            params={
+                "symbol": f"{asset}USDT",
+                "interval": interval,
+                "startTime": start_ms,
+                "endTime": end_ms - 1,
+                "limit": page_limit,
+            },
+            timeout=10,
+        )
+        response.raise_for_status()
+        page = response.json()
+        if not page:
+            break
+
+        for k in page:
+            candles.append({
+                "t": k[0],
+                "o": float(k[1]),
+                "h": float(k[2]),
+                "l": float(k[3]),
+                "c": float(k[4]),
+                "v": float(k[5]),
+            })
+
+        start_ms = page[-1][0] + step_ms
+        logger.info(f"Fetched {len(candles)} {interval} candles for {asset}")
+        if pause:
+            time.sleep(pause)
+
+    return candles
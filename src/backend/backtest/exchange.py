@@ -0,0 +1,108 @@
+"""
+Backtest Exchange - Paper trading execution model driven by historical candles.
+
+Prices come from the most recent *closed* candle at the virtual clock time, so
+the engine never sees data from the future.
+"""
+
+import logging
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List
+
+from src.backend.backtest.data import interval_to_seconds, resample_candles
+from src.backend.trading.paper_trading_api import PaperTradingAPI
+
+
+class BacktestExchange(PaperTradingAPI):
+    """
+    PaperTradingAPI replaying historical candles instead of live Binance prices.
+
+    Order handling, TP/SL triggers and PnL accounting are inherited unchanged,
+    so a backtest exercises the same execution model as paper trading.
+    """
+
+    def __init__(
+        self,
+        candles: Dict[str, List[Dict]],
+        clock,
+        base_interval: str = "5m",
+        starting_balance: float = 10000.0,
+    ):
+        """
+        Initialize backtest exchange.
+
+        Args:
+            candles: Base-interval candles per asset (unified OHLC format)
+            clock: Clock providing the simulated current time
+            base_interval: Interval of the supplied candles
+            starting_balance: Starting USDC balance
+        """
+        self.clock = clock
+        self.base_interval = base_interval
+        self._series: Dict[str, Dict[str, List[Dict]]] = {
+            asset: {base_interval: sorted(rows, key=lambda c: c["t"])}
+            for asset, rows in candles.items()
+        }
+        self._open_times: Dict[str, Dict[str, List[int]]] = {
+            asset: {base_interval: [c["t"] for c in series[base_interval]]}
+            for asset, series in self._series.items()
+        }
+        super().__init__(starting_balance=starting_balance)
+
+    def _load_state(self):
+        """Backtests always start flat; never resume live paper state."""
+
+    def _save_state(self):
+        """Skip persisting simulated state to the paper trading state file."""
+
+    def _now(self) -> datetime:
+        return self.clock.now()
+
+    def _get_series(self, asset: str, interval: str):
+        """Return candles and open times for ``interval``, resampling on first use."""
+        series = self._series.get(asset)
+        if series is None:
+            raise KeyError(f"No historical candles loaded for {asset}")
+
+        if interval not in series:
+            if interval_to_seconds(interval) < interval_to_seconds(self.base_interval):
+                raise ValueError(
+                    f"Cannot derive {interval} candles from {self.base_interval} data"
+                )
+            series[interval] = resample_candles(series[self.base_interval], interval)
+            self._open_times[asset][interval] = [c["t"] for c in series[interval]]
+
+        return series[interval], self._open_times[asset][interval]
+
+    def _closed_index(self, asset: str, interval: str) -> int:
+        """Number of candles whose close time is at or before the virtual now."""
+        _, open_times = self._get_series(asset, interval)
+        now_ms = int(self.clock.now().timestamp() * 1000)
+        return bisect_right(open_times, now_ms - interval_to_seconds(interval) * 1000)
+
+    async def get_current_price(self, asset: str) -> float:
+        """Close of the latest completed base candle."""
+        candles, _ = self._get_series(asset, self.base_interval)
+        idx = self._closed_index(asset, self.base_interval)
+        if idx == 0:
+            logging.warning(f"No closed candle for {asset} yet, using first open")
+            return candles[0]["o"]
+        return candles[idx - 1]["c"]
+
+    async def get_historical_candles(self, asset: str, interval: str = "5m", limit: int = 100) -> List[Dict]:
+        """Return up to ``limit`` completed candles ending at the virtual now."""
+        try:
+            candles, _ = self._get_series(asset, interval)
+            idx = self._closed_index(asset, interval)
+        except (KeyError, ValueError) as e:
+            logging.error(f"Failed to fetch historical candles for {asset}: {e}")
+            return []
+        return candles[max(0, idx - limit):idx]
+
+    def time_range(self) -> tuple:
+        """Return (first_open_ms, last_close_ms) across all loaded assets."""
+        step_ms = interval_to_seconds(self.base_interval) * 1000
+        starts = [times[self.base_interval][0] for times in self._open_times.values() if times[self.base_interval]]
+        ends = [times[self.base_interval][-1] + step_ms for times in self._open_times.values() if times[self.base_interval]]
+        return min(starts), max(ends)
@@ -0,0 +1,231 @@
+"""
+Backtest Runner - Drives TradingBotEngine over historical candles in virtual time.
+
+The engine runs its normal iteration (phases 1-11) against a BacktestExchange,
+while a VirtualClock replaces wall-clock sleeps so months of candles replay as
+fast as the CPU allows.
+"""
+
+import logging
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.backend.backtest.data import interval_to_seconds
+from src.backend.backtest.exchange import BacktestExchange
+from src.backend.bot_engine import TradingBotEngine
+from src.backend.utils.clock import VirtualClock
+
+
+class _TimedAgent:
+    """Wraps a decision agent and records the wall time of every call."""
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.durations: List[float] = []
+
+    def decide_trade(self, assets, context):
+        started = time.perf_counter()
+        try:
+            return self.agent.decide_trade(assets, context)
+        finally:
+            self.durations.append(time.perf_counter() - started)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+@dataclass
+class BacktestResult:
+    """Outcome of a backtest run."""
+    equity_curve: List[Dict] = field(default_factory=list)
+    fills: List[Dict] = field(default_factory=list)
+    timing: Dict[str, float] = field(default_factory=dict)
+    iterations: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        """Headline performance figures derived from the equity curve."""
+        if not self.equity_curve:
+            return {"iterations": self.iterations, "fills": len(self.fills)}
+
+        values = [p["total_value"] for p in self.equity_curve]
+        peak = values[0]
+        max_drawdown = 0.0
+        for v in values:
+            peak = max(peak, v)
+            if peak > 0:
+                max_drawdown = max(max_drawdown, (peak - v) / peak)
+
+        start, end = values[0], values[-1]
+        return {
+            "start_value": start,
+            "end_value": end,
+            "return_pct": ((end - start) / start * 100) if start else 0.0,
+            "max_drawdown_pct": max_drawdown * 100,
+            "iterations": self.iterations,
+            "fills": len(self.fills),
+            "errors": len(self.errors),
+            **self.timing,
+        }
+
+
+class BacktestRunner:
+    """
+    Replays historical candles through TradingBotEngine.
+
+    The clock steps one base candle at a time: TP/SL triggers are checked and
+    equity is sampled on every step, while a full engine iteration runs once per
+    decision interval.
+    """
+
+    def __init__(
+        self,
+        candles: Dict[str, List[Dict]],
+        agent,
+        interval: str = "1h",
+        base_interval: str = "5m",
+        starting_balance: float = 10000.0,
+        warmup_candles: int = 100,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        diary_path: Optional[str] = None,
+        quiet: bool = True,
+    ):
+        """
+        Initialize backtest runner.
+
+        Args:
+            candles: Base-interval candles per asset (unified OHLC format)
+            agent: Decision agent with a ``decide_trade(assets, context)`` method
+            interval: Decision interval of the engine (e.g., "1h")
+            base_interval: Interval of the supplied candles
+            starting_balance: Starting USDC balance
+            warmup_candles: Base candles skipped before the first decision so
+                indicators have history
+            start: Optional simulation start (overrides warmup_candles)
+            end: Optional simulation end (defaults to the last candle close)
+            diary_path: Where the engine writes its diary (temporary file if None)
+            quiet: Raise log level to WARNING during the run to avoid I/O overhead
+        """
+        self.assets = list(candles.keys())
+        self.interval = interval
+        self.base_interval = base_interval
+        self.starting_balance = starting_balance
+        self.quiet = quiet
+        self.diary_path = diary_path
+
+        self.step_seconds = interval_to_seconds(base_interval)
+        self.decision_seconds = interval_to_seconds(interval)
+        if self.decision_seconds % self.step_seconds != 0:
+            raise ValueError(f"Decision interval {interval} must be a multiple of {base_interval}")
+
+        first_ms = min(rows[0]["t"] for rows in candles.values() if rows)
+        last_ms = max(rows[-1]["t"] for rows in candles.values() if rows) + self.step_seconds * 1000
+        default_start = datetime.fromtimestamp(first_ms / 1000, timezone.utc) + timedelta(
+            seconds=self.step_seconds * warmup_candles
+        )
+        self.start = start or default_start
+        self.end = end or datetime.fromtimestamp(last_ms / 1000, timezone.utc)
+
+        self.clock = VirtualClock(self.start)
+        self.exchange = BacktestExchange(
+            candles,
+            clock=self.clock,
+            base_interval=base_interval,
+            starting_balance=starting_balance,
+        )
+        self.agent = _TimedAgent(agent)
+
+    def _build_engine(self, diary_path: Path) -> TradingBotEngine:
+        engine = TradingBotEngine(
+            assets=self.assets,
+            interval=self.interval,
+            exchange=self.exchange,
+            agent=self.agent,
+            clock=self.clock,
+        )
+        engine.trading_mode = "auto"
+        engine.diary_path = diary_path
+        engine.prompt_log_path = None
+        engine.is_running = True
+        engine.state.is_running = True
+        engine.start_time = self.clock.now()
+        engine.initial_account_value = self.starting_balance
+        return engine
+
+    async def run(self) -> BacktestResult:
+        """Run the backtest to completion and return the collected results."""
+        root_logger = logging.getLogger()
+        previous_level = root_logger.level
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            diary_path = Path(self.diary_path) if self.diary_path else Path(tmp_dir) / "diary.jsonl"
+            engine = self._build_engine(diary_path)
+            if self.quiet:
+                root_logger.setLevel(logging.WARNING)
+                engine.logger.setLevel(logging.WARNING)
+            try:
+                return await self._run(engine)
+            finally:
+                if self.quiet:
+                    root_logger.setLevel(previous_level)
+                    engine.logger.setLevel(logging.NOTSET)
+
+    async def _run(self, engine: TradingBotEngine) -> BacktestResult:
+        result = BacktestResult()
+        engine.on_error = result.errors.append
+
+        iteration_times: List[float] = []
+        steps = 0
+        steps_per_decision = self.decision_seconds // self.step_seconds
+        wall_started = time.perf_counter()
+        step = timedelta(seconds=self.step_seconds)
+        moment = self.start
+
+        while moment <= self.end:
+            self.clock.set(moment)
+            await self.exchange.check_trigger_orders()
+
+            if steps % steps_per_decision == 0:
+                iter_started = time.perf_counter()
+                await engine._run_iteration()
+                iteration_times.append(time.perf_counter() - iter_started)
+
+            account = await self.exchange.get_user_state()
+            result.equity_curve.append({
+                "timestamp": self.clock.now().isoformat(),
+                "total_value": account["total_value"],
+                "balance": account["balance"],
+            })
+
+            steps += 1
+            moment += step
+
+        wall_seconds = time.perf_counter() - wall_started
+        simulated_seconds = (self.end - self.start).total_seconds()
+        decision_times = self.agent.durations
+
+        result.iterations = len(iteration_times)
+        result.fills = list(self.exchange.fills)
+        result.timing = {
+            "wall_seconds": wall_seconds,
+            "simulated_seconds": simulated_seconds,
+            "speedup": simulated_seconds / wall_seconds if wall_seconds > 0 else 0.0,
+            "steps": steps,
+            "iterations_per_second": len(iteration_times) / wall_seconds if wall_seconds > 0 else 0.0,
+            "iteration_ms_mean": statistics.mean(iteration_times) * 1000 if iteration_times else 0.0,
+            "iteration_ms_p95": _percentile(iteration_times, 95) * 1000,
+            "iteration_ms_max": max(iteration_times) * 1000 if iteration_times else 0.0,
+            "decision_ms_mean": statistics.mean(decision_times) * 1000 if decision_times else 0.0,
+            "decision_ms_p95": _percentile(decision_times, 95) * 1000,
+        }
+        return result
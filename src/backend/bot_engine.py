@@ -12,10 +12,14 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Callable, Any
 
+from src.backend.agent.change_detector import MaterialityGate
+from src.backend.agent.hedged_agent import is_valid_decision_payload
+from src.backend.agent.json_repair import repair_decision_payload
 from src.backend.config_loader import CONFIG
 from src.backend.indicators.local_indicators import LocalIndicatorService
 from src.backend.models.trade_proposal import TradeProposal
-from src.backend.models.trade_proposal import TradeProposal
+from src.backend.utils.clock import SystemClock
+from src.backend.utils.context_builder import ContextBuilder
 from src.backend.utils.prompt_utils import json_default
 
 # Import appropriate trading backend based on configuration
@@ -30,6 +34,10 @@ if CONFIG.get("llm_provider") == "gemini":
 else:
     from src.backend.agent.decision_maker import TradingAgent
 
+# Share of a held position an opposite order must cover to count as closing it
+# (sizes are rounded to the exchange's lot size before the order is placed)
+CLOSE_SIZE_TOLERANCE = 0.01
+
 
 @dataclass
 class BotState:
@@ -49,6 +57,9 @@ class BotState:
     last_update: str = ""
     error: Optional[str] = None
     invocation_count: int = 0
+    context_tokens: int = 0  # Estimated prompt tokens of the last LLM context
+    llm_calls_saved: int = 0  # LLM calls skipped by the materiality gate
+    persistence: Dict = field(default_factory=dict)  # Write-behind queue depth and flush latency
 
 
 class TradingBotEngine:
@@ -64,6 +75,9 @@ class TradingBotEngine:
         on_state_update: Optional[Callable[[BotState], None]] = None,
         on_trade_executed: Optional[Callable[[Dict], None]] = None,
         on_error: Optional[Callable[[str], None]] = None,
+        exchange: Optional[Any] = None,
+        agent: Optional[Any] = None,
+        clock: Optional[Any] = None,
     ):
         """
         Initialize trading bot engine.
@@ -74,6 +88,9 @@ class TradingBotEngine:
             on_state_update: Callback for state updates
             on_trade_executed: Callback when trade is executed
             on_error: Callback for errors
+            exchange: Trading backend override (defaults to CONFIG selection)
+            agent: Decision agent override (defaults to CONFIG selection)
+            clock: Time source override (defaults to wall-clock time)
         """
         self.assets = assets
         self.interval = interval
@@ -81,23 +98,52 @@ class TradingBotEngine:
         self.on_trade_executed = on_trade_executed
         self.on_error = on_error
 
-        # Logging (initialize first!)
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s [%(levelname)s] %(message)s",
-            handlers=[
-                logging.FileHandler("bot.log", encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        # Logging (initialize first!). basicConfig ignores handlers once the root
+        # logger is configured (e.g. by the host app or pytest), but building the
+        # FileHandler would still create bot.log, so only build it when needed.
+        if not logging.getLogger().handlers:
+            logging.basicConfig(
+                level=logging.INFO,
+                format="%(asctime)s [%(levelname)s] %(message)s",
+                handlers=[
+                    logging.FileHandler("bot.log", encoding='utf-8'),
+                    logging.StreamHandler()
+                ]
+            )
         self.logger = logging.getLogger(__name__)
 
         # Initialize trading components
-        # Initialize trading components
+        self.clock = clock or SystemClock()
         self.indicators = LocalIndicatorService()
-        self.exchange = TradingAPI()  # Paper or Hyperliquid based on CONFIG
-        self.exchange = TradingAPI()  # Paper or Hyperliquid based on CONFIG
-        self.agent = TradingAgent()
+        budget = CONFIG.get("context_token_budget") or 0
+        self.context_builder: Optional[ContextBuilder] = ContextBuilder(budget) if budget > 0 else None
+        cassette_mode = CONFIG.get("cassette_mode")
+        if cassette_mode:
+            # Record/replay exchange and LLM calls; replay runs without live services
+            from src.backend.testing.cassette import CassetteAgent, CassetteExchange, open_cassettes
+            exchange_tape, agent_tape = open_cassettes(
+                CONFIG.get("cassette_dir"), cassette_mode, CONFIG.get("cassette_latency")
+            )
+            offline = cassette_mode == "replay"
+            self.exchange = CassetteExchange(exchange or (None if offline else TradingAPI()), exchange_tape)
+            self.agent = CassetteAgent(agent or (None if offline else TradingAgent()), agent_tape)
+        else:
+            self.exchange = exchange or TradingAPI()  # Paper or Hyperliquid based on CONFIG
+            self.agent = agent or TradingAgent()
+            if agent is None and CONFIG.get("llm_hedge_enabled"):
+                from src.backend.agent.hedged_agent import build_hedged_agent
+                self.agent = build_hedged_agent(self.agent)
+        if self.context_builder and hasattr(self.exchange, "round_size"):
+            # Position and fill sizes keep the exchange's size precision in the prompt
+            self.context_builder.round_size = self.exchange.round_size
+
+        self.materiality_gate: Optional[MaterialityGate] = None
+        if CONFIG.get("llm_skip_unchanged"):
+            self.materiality_gate = MaterialityGate(
+                price_move_pct=float(CONFIG.get("materiality_price_move_pct") or 0.3),
+                rsi_levels=[float(level) for level in CONFIG.get("materiality_rsi_levels") or []],
+                max_interval=float(CONFIG.get("materiality_max_interval") or 900.0),
+            )
 
         # Log trading backend
         backend = CONFIG.get("trading_backend", "hyperliquid")
@@ -125,6 +171,13 @@ class TradingBotEngine:
         # File paths
         self.diary_path = Path("data/diary.jsonl")
         self.diary_path.parent.mkdir(parents=True, exist_ok=True)
+        self.prompt_log_path: Optional[Path] = Path("data/prompts.log")
+        self._recent_diary: Optional[deque] = None  # Tail of diary, loaded lazily
+
+        # Database writes go through a write-behind queue (created in start())
+        self.persister: Optional[Any] = None
+        self._persisted_positions: Dict[str, Dict[str, Any]] = {}
+        self._last_retention: Optional[datetime] = None
 
     async def start(self):
         """Start the trading bot"""
@@ -134,9 +187,18 @@ class TradingBotEngine:
 
         self.is_running = True
         self.state.is_running = True
-        self.start_time = datetime.now(timezone.utc)
+        self.start_time = self.clock.now()
         self.invocation_count = 0
 
+        if self.persister is None and CONFIG.get("db_write_behind", True):
+            try:
+                from src.database.persister import WriteBehindPersister
+                self.persister = WriteBehindPersister.from_config()
+            except Exception as e:
+                self.logger.error(f"Failed to initialize database persister: {e}")
+        if self.persister:
+            self.persister.start()
+
         # Get initial account value
         try:
             user_state = await self.exchange.get_user_state()
@@ -160,12 +222,24 @@ class TradingBotEngine:
         self.state.is_running = False
 
         if self._task:
+            # Cancelling the task also aborts an in-flight async LLM request
             self._task.cancel()
             try:
                 await self._task
             except asyncio.CancelledError:
                 pass
 
+        aclose = getattr(self.agent, "aclose", None)
+        if aclose:
+            try:
+                await aclose()
+            except Exception as e:
+                self.logger.warning(f"Failed to close agent session: {e}")
+
+        if self.persister:
+            # Drain queued writes off the event loop
+            await asyncio.to_thread(self.persister.close)
+
         self.logger.info("Bot stopped")
         self._notify_state_update()
 
@@ -176,486 +250,651 @@ class TradingBotEngine:
         """
         try:
             while self.is_running:
-                self.invocation_count += 1
-                self.state.invocation_count = self.invocation_count
-                self.state.error = None  # Clear previous errors on new iteration
+                await self._run_iteration()
 
+                # ===== PHASE 12: Sleep Until Next Interval =====
+                await self.clock.sleep(self._get_interval_seconds())
+
+        except asyncio.CancelledError:
+            self.logger.info("Bot loop cancelled")
+        except Exception as e:
+            self.logger.error(f"Fatal error in bot loop: {e}", exc_info=True)
+            self.state.error = str(e)
+            if self.on_error:
+                self.on_error(str(e))
+
+    @staticmethod
+    def _layout_context(payload: OrderedDict) -> OrderedDict:
+        """
+        Order context sections for provider prompt caching.
+
+        In ``stable_first`` layout the sections go from least to most volatile
+        (instructions, account, market data, invocation time) so consecutive
+        prompts share the longest possible byte-identical prefix.
+        """
+        if (CONFIG.get("prompt_layout") or "stable_first") != "stable_first":
+            return payload
+        order = ("instructions", "account", "market_data", "invocation")
+        ordered = OrderedDict((key, payload[key]) for key in order if key in payload)
+        ordered.update((k, v) for k, v in payload.items() if k not in ordered)
+        return ordered
+
+    def _serialize_context(self, payload: Dict) -> str:
+        """Serialize the LLM context: compact and token-budgeted unless disabled."""
+        if not self.context_builder:
+            return json.dumps(payload, default=json_default, indent=2)
+
+        context, stats = self.context_builder.build(payload)
+        self.state.context_tokens = stats.tokens
+        if stats.within_budget:
+            self.logger.info(f"LLM context: ~{stats.tokens} tokens (budget {stats.budget}, series length {stats.series_length})")
+        else:
+            self.logger.warning(f"LLM context over budget: ~{stats.tokens} tokens > {stats.budget} after full trimming")
+        return context
+
+    async def _call_agent(self, context: str, assets: Optional[List[str]] = None) -> Dict:
+        """
+        Request a decision from the agent.
+
+        Agents with a native ``decide_trade_async`` are awaited directly so the
+        request is cancellable; blocking agents run in a worker thread.
+        """
+        assets = assets or self.assets
+        decide_async = getattr(self.agent, "decide_trade_async", None)
+        if decide_async:
+            return await decide_async(assets, context)
+        return await asyncio.to_thread(self.agent.decide_trade, assets, context)
+
+    @staticmethod
+    def _hold_decision(asset: str, rationale: str) -> Dict:
+        return {
+            'asset': asset,
+            'action': 'hold',
+            'allocation_usd': 0.0,
+            'tp_price': None,
+            'sl_price': None,
+            'exit_plan': '',
+            'rationale': rationale
+        }
+
+    async def _fan_out_decisions(self, context_payload: OrderedDict) -> Dict:
+        """
+        Request one decision per asset concurrently and merge the results.
+
+        Each prompt carries the shared account section plus only that asset's
+        market section. Concurrency is bounded by CONFIG["llm_fanout_concurrency"];
+        an asset whose call fails or returns no decision falls back to HOLD.
+        """
+        semaphore = asyncio.Semaphore(max(1, int(CONFIG.get("llm_fanout_concurrency") or 4)))
+
+        async def decide(asset: str) -> Dict:
+            payload = OrderedDict(context_payload)
+            payload["market_data"] = [m for m in context_payload["market_data"] if m.get("asset") == asset]
+            payload["instructions"] = dict(context_payload["instructions"], assets=[asset])
+            asset_context = self._serialize_context(payload)
+            async with semaphore:
                 try:
-                    # ===== PHASE 1 & 2: Fetch Account State & Positions =====
-                    self.logger.info("Phase 1: Fetching user state...")
-                    state = await self.exchange.get_user_state()
-                    await self._update_bot_account_state(state)
-
-                    sharpe_ratio = self._calculate_sharpe(self.trade_log)
-                    self.state.sharpe_ratio = sharpe_ratio
-                    
-                    self.logger.debug(f"  Balance: ${self.state.balance:,.2f} | Return: {self.state.total_return_pct:+.2f}%")
-
-                    # ===== PHASE 3: Load Recent Diary =====
-                    recent_diary = self._load_recent_diary(limit=10)
-
-                    # ===== PHASE 4: Fetch Open Orders =====
-                    open_orders_raw = await self.exchange.get_open_orders()
-                    open_orders = []
-                    for o in open_orders_raw:
-                        order_type_obj = o.get('orderType', {})
-                        trigger_price = None
-                        order_type_str = 'limit'
-
-                        if isinstance(order_type_obj, dict) and 'trigger' in order_type_obj:
-                            order_type_str = 'trigger'
-                            trigger_data = order_type_obj.get('trigger', {})
-                            if 'triggerPx' in trigger_data:
-                                trigger_price = float(trigger_data['triggerPx'])
-
-                        open_orders.append({
-                            'coin': o.get('coin'),
-                            'oid': o.get('oid'),
-                            'is_buy': o.get('side') == 'B',
-                            'size': float(o.get('sz', 0)),
-                            'price': float(o.get('limitPx', 0)),
-                            'trigger_price': trigger_price,
-                            'order_type': order_type_str
-                        })
+                    result = await self._call_agent(asset_context, assets=[asset])
+                except Exception as e:
+                    self.logger.error(f"Decision for {asset} failed: {e}")
+                    return {'reasoning': f"Error: {e}", 'trade_decisions': [self._hold_decision(asset, f"LLM error: {e}")]}
+            if not isinstance(result, dict):
+                return {'reasoning': '', 'trade_decisions': [self._hold_decision(asset, "Invalid decision format")]}
+            matching = [d for d in result.get('trade_decisions') or [] if isinstance(d, dict) and d.get('asset') == asset]
+            return {
+                'reasoning': result.get('reasoning', ''),
+                'trade_decisions': matching[:1] or [self._hold_decision(asset, "No decision returned")],
+            }
+
+        results = await asyncio.gather(*(decide(asset) for asset in self.assets))
+        return {
+            'reasoning': "\n\n".join(f"[{asset}] {r['reasoning']}" for asset, r in zip(self.assets, results) if r['reasoning']),
+            'trade_decisions': [r['trade_decisions'][0] for r in results],
+        }
+
+    async def _run_iteration(self):
+        """
+        Run phases 1-11 of the trading loop once.
 
-                    self.state.open_orders = open_orders
-
-                    # ===== PHASE 5: Reconcile Active Trades =====
-                    await self._reconcile_active_trades(state['positions'], open_orders_raw)
-
-                    # ===== PHASE 6: Fetch Recent Fills =====
-                    fills_raw = await self.exchange.get_recent_fills(limit=50)
-                    recent_fills = []
-                    for fill in fills_raw[-20:]:
-                        ts = fill.get('time')
-                        ts_str = ""
-                        if ts:
-                            try:
-                                if isinstance(ts, (int, float)):
-                                    if ts > 1_000_000_000_000:
-                                        ts = ts / 1000
-                                    ts_str = datetime.fromtimestamp(ts, timezone.utc).isoformat()
-                                elif isinstance(ts, str):
-                                    ts_str = ts # Already ISO string (Paper Trading)
-                            except Exception:
-                                pass # Skip bad timestamps
-
-                        recent_fills.append({
-                            'timestamp': ts_str,
-                            'coin': fill.get('coin'),
-                            'is_buy': fill.get('side') == 'B',
-                            'size': float(fill.get('sz', 0)),
-                            'price': float(fill.get('px', 0))
-                        })
+        Errors are reported through the state/on_error callback instead of being
+        raised, so the caller (live loop or backtest runner) can keep stepping.
+        """
+        self.invocation_count += 1
+        self.state.invocation_count = self.invocation_count
+        self.state.error = None  # Clear previous errors on new iteration
 
-                    self.state.recent_fills = recent_fills
-
-                    # ===== PHASE 7: Build Dashboard =====
-                    dashboard = {
-                        'total_return_pct': self.state.total_return_pct,
-                        'balance': self.state.balance,
-                        'account_value': self.state.total_value,
-                        'sharpe_ratio': self.state.sharpe_ratio,
-                        'positions': self.state.positions,
-                        'active_trades': self.active_trades,
-                        'open_orders': open_orders,
-                        'recent_diary': recent_diary,
-                        'recent_fills': recent_fills
-                    }
-
-                    # ===== PHASE 8: Gather Market Data =====
-                    market_sections = []
-                    for idx, asset in enumerate(self.assets):
-                        try:
-                            # 1. Init History if empty (Critical for Charts)
-                            if len(self.price_history[asset]) == 0:
-                                try:
-                                    if hasattr(self.exchange, 'get_historical_candles'):
-                                        candles = await self.exchange.get_historical_candles(asset, interval="5m", limit=100)
-                                        if candles:
-                                            self.price_history[asset].extend(candles)
-                                            self.logger.info(f"Initialized price history for {asset} with {len(candles)} candles")
-                                except Exception as e:
-                                    self.logger.warning(f"Failed to init history for {asset}: {e}")
-
-                            # 2. Fetch Fundamentals (Price, OI, Funding) - Essential
-                            current_price = await self.exchange.get_current_price(asset)
-                            
-                            # Store price history (Unified OHLC Format)
-                            now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
-                            self.price_history[asset].append({
-                                't': now_ms,
-                                'o': current_price,
-                                'h': current_price,
-                                'l': current_price,
-                                'c': current_price,
-                                'v': 0
-                            })
+        try:
+            # ===== PHASE 1 & 2: Fetch Account State & Positions =====
+            self.logger.info("Phase 1: Fetching user state...")
+            state = await self.exchange.get_user_state()
+            await self._update_bot_account_state(state)
+
+            sharpe_ratio = self._calculate_sharpe(self.trade_log)
+            self.state.sharpe_ratio = sharpe_ratio
+
+            self.logger.debug(f"  Balance: ${self.state.balance:,.2f} | Return: {self.state.total_return_pct:+.2f}%")
+
+            # ===== PHASE 3: Load Recent Diary =====
+            recent_diary = self._load_recent_diary(limit=10)
+
+            # ===== PHASE 4: Fetch Open Orders =====
+            open_orders_raw = await self.exchange.get_open_orders()
+            open_orders = []
+            for o in open_orders_raw:
+                order_type_obj = o.get('orderType', {})
+                trigger_price = None
+                order_type_str = 'limit'
+
+                if isinstance(order_type_obj, dict) and 'trigger' in order_type_obj:
+                    order_type_str = 'trigger'
+                    trigger_data = order_type_obj.get('trigger', {})
+                    if 'triggerPx' in trigger_data:
+                        trigger_price = float(trigger_data['triggerPx'])
+
+                open_orders.append({
+                    'coin': o.get('coin'),
+                    'oid': o.get('oid'),
+                    'is_buy': o.get('side') == 'B',
+                    'size': float(o.get('sz', 0)),
+                    'price': float(o.get('limitPx', 0)),
+                    'trigger_price': trigger_price,
+                    'order_type': order_type_str
+                })
 
-                            # Open interest and funding (fail-safe)
-                            try:
-                                oi = await self.exchange.get_open_interest(asset)
-                                funding = await self.exchange.get_funding_rate(asset)
-                            except Exception as e:
-                                self.logger.error(f"Error fetching OI/Funding for {asset}: {e}")
-                                oi = None
-                                funding = None
-
-                            # 2. Fetch Indicators (Local Calculation) - Fast & Free
-                            indicators = {}
-                            try:
-                                # Fetch history and calculate indicators locally
-                                # No rate limits needed!
-                                self.logger.debug(f"Calculating indicators for {asset}...")
-                                indicators = await self.indicators.fetch_and_calculate_all(self.exchange, asset)
-                            except Exception as e:
-                                self.logger.error(f"Error gathering local indicators for {asset}: {e}")
-                                indicators = {"5m": {}, "1h": {}, "4h": {}} # Empty fallback
-
-                            # Extract 5m indicators (safe get)
-                            i_5m = indicators.get("5m", {})
-                            
-                            def to_list(val):
-                                if val is None: return []
-                                if isinstance(val, list): return val
-                                return [val]
-
-                            ema20_5m_series = to_list(i_5m.get("ema20"))
-                            macd_5m_series = to_list(i_5m.get("macd"))
-                            rsi7_5m_series = to_list(i_5m.get("rsi7"))
-                            rsi14_5m_series = to_list(i_5m.get("rsi14"))
-
-                            # Extract long-term indicators (safe get + list handling)
-                            interval = CONFIG.get("interval", "1h")
-                            i_lt = indicators.get(interval, {})
-                            
-                            def get_last(val):
-                                lst = to_list(val)
-                                return lst[-1] if lst else None
-                                
-                            stats = indicators.get("stats", {})
-
-                            # Build market data structure
-                            market_sections.append({
-                                "asset": asset,
-                                "current_price": current_price,
-                                "change_24h": stats.get("change_24h"),
-                                "volume_24h": stats.get("volume_24h"),
-                                "intraday": {
-                                    "ema20": get_last(i_5m.get("ema20")),
-                                    "macd": (i_5m.get("macd") or [None])[-1], # dict inside list
-                                    "rsi7": get_last(i_5m.get("rsi7")),
-                                    "rsi14": get_last(i_5m.get("rsi14")),
-                                    "series": {
-                                        "ema20": ema20_5m_series,
-                                        "macd": macd_5m_series,
-                                        "rsi7": rsi7_5m_series,
-                                        "rsi14": rsi14_5m_series
-                                    }
-                                },
-                                "long_term": {
-                                    "ema20": get_last(i_lt.get("ema20")),
-                                    "ema50": get_last(i_lt.get("ema50")),
-                                    "atr3": get_last(i_lt.get("atr3")),
-                                    "atr14": get_last(i_lt.get("atr14")),
-                                    "macd_series": i_lt.get("macd", []) or [],
-                                    "rsi_series": i_lt.get("rsi14", []) or []
-                                },
-                                "open_interest": oi,
-                                "funding_rate": funding,
-                                "funding_annualized_pct": funding * 24 * 365 * 100 if funding is not None else None,
-                                "recent_mid_prices": [p.get('c', p.get('mid')) for p in list(self.price_history[asset])[-10:]],
-                                "price_history": list(self.price_history[asset])[-50:] # Export last 50 candles for charting
-                            })
+            self.state.open_orders = open_orders
+
+            # ===== PHASE 5: Reconcile Active Trades =====
+            await self._reconcile_active_trades(state['positions'], open_orders_raw)
+
+            # ===== PHASE 6: Fetch Recent Fills =====
+            fills_raw = await self.exchange.get_recent_fills(limit=50)
+            recent_fills = []
+            for fill in fills_raw[-20:]:
+                ts = fill.get('time')
+                ts_str = ""
+                if ts:
+                    try:
+                        if isinstance(ts, (int, float)):
+                            if ts > 1_000_000_000_000:
+                                ts = ts / 1000
+                            ts_str = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+                        elif isinstance(ts, str):
+                            ts_str = ts # Already ISO string (Paper Trading)
+                    except Exception:
+                        pass # Skip bad timestamps
+
+                recent_fills.append({
+                    'timestamp': ts_str,
+                    'coin': fill.get('coin'),
+                    'is_buy': fill.get('side') == 'B',
+                    'size': float(fill.get('sz', 0)),
+                    'price': float(fill.get('px', 0))
+                })
 
+            self.state.recent_fills = recent_fills
+
+            # ===== PHASE 7: Build Dashboard =====
+            dashboard = {
+                'total_return_pct': self.state.total_return_pct,
+                'balance': self.state.balance,
+                'account_value': self.state.total_value,
+                'sharpe_ratio': self.state.sharpe_ratio,
+                'positions': self.state.positions,
+                'active_trades': self.active_trades,
+                'open_orders': open_orders,
+                'recent_diary': recent_diary,
+                'recent_fills': recent_fills
+            }
+
+            # ===== PHASE 8: Gather Market Data =====
+            market_sections = []
+            for idx, asset in enumerate(self.assets):
+                try:
+                    # 1. Init History if empty (Critical for Charts)
+                    if len(self.price_history[asset]) == 0:
+                        try:
+                            if hasattr(self.exchange, 'get_historical_candles'):
+                                candles = await self.exchange.get_historical_candles(asset, interval="5m", limit=100)
+                                if candles:
+                                    self.price_history[asset].extend(candles)
+                                    self.logger.info(f"Initialized price history for {asset} with {len(candles)} candles")
                         except Exception as e:
-                            self.logger.error(f"Critical error processing market data for {asset}: {e}", exc_info=True)
-
-
-                    # Update Bot State with gathered market data (Critical for GUI)
-                    # Use update() to preserve data for assets that might have failed this specific loop
-                    new_market_data = {
-                        item['asset']: item for item in market_sections
-                    }
-                    
-                    # Ensure state.market_data is a dict (BotState defaults to list)
-                    if isinstance(self.state.market_data, list):
-                         self.state.market_data = {}
-                    
-                    if not self.state.market_data:
-                        self.state.market_data = {}
-                    
-                    if new_market_data:
-                        self.state.market_data.update(new_market_data)
-                    elif len(self.assets) > 0 and not self.state.market_data:
-                        # Only log warning if we have defined assets but no data at all
-                        self.logger.warning("No market data gathered this loop, keeping stale data if any.")
-
-                    # ===== PHASE 9: Build LLM Context =====
-                    context_payload = OrderedDict([
-                        ("invocation", {
-                            "count": self.invocation_count,
-                            "current_time": datetime.now(timezone.utc).isoformat()
-                        }),
-                        ("account", dashboard),
-                        ("market_data", market_sections),
-                        ("instructions", {
-                            "assets": self.assets,
-                            "max_position_size": float(CONFIG.get("max_position_size", 1000)),
-                            "note": "Follow the system prompt guidelines strictly"
-                        })
-                    ])
-                    context = json.dumps(context_payload, default=json_default, indent=2)
-
-                    # Log prompt
-                    with open("data/prompts.log", "a", encoding="utf-8") as f:
-                        f.write(f"\n{'='*80}\n")
-                        f.write(f"Invocation {self.invocation_count} - {datetime.now(timezone.utc).isoformat()}\n")
-                        f.write(f"{'='*80}\n")
-                        f.write(context + "\n")
-
-                    # ===== PHASE 10: Get LLM Decision =====
-                    self.logger.info("Phase 10: Calling LLM decision...")
-                    decisions = await asyncio.to_thread(
-                        self.agent.decide_trade, self.assets, context
+                            self.logger.warning(f"Failed to init history for {asset}: {e}")
+
+                    # 2. Fetch Fundamentals (Price, OI, Funding) - Essential
+                    current_price = await self.exchange.get_current_price(asset)
+
+                    # Store price history (Unified OHLC Format)
+                    now_ms = int(self.clock.now().timestamp() * 1000)
+                    self.price_history[asset].append({
+                        't': now_ms,
+                        'o': current_price,
+                        'h': current_price,
+                        'l': current_price,
+                        'c': current_price,
+                        'v': 0
+                    })
+
+                    # Open interest and funding (fail-safe)
+                    try:
+                        oi = await self.exchange.get_open_interest(asset)
+                        funding = await self.exchange.get_funding_rate(asset)
+                    except Exception as e:
+                        self.logger.error(f"Error fetching OI/Funding for {asset}: {e}")
+                        oi = None
+                        funding = None
+
+                    # 2. Fetch Indicators (Local Calculation) - Fast & Free
+                    indicators = {}
+                    try:
+                        # Fetch history and calculate indicators locally
+                        # No rate limits needed!
+                        self.logger.debug(f"Calculating indicators for {asset}...")
+                        indicators = await self.indicators.fetch_and_calculate_all(self.exchange, asset)
+                        self._archive_candles(asset)
+                    except Exception as e:
+                        self.logger.error(f"Error gathering local indicators for {asset}: {e}")
+                        indicators = {"5m": {}, "1h": {}, "4h": {}} # Empty fallback
+
+                    # Extract 5m indicators (safe get)
+                    i_5m = indicators.get("5m", {})
+
+                    def to_list(val):
+                        if val is None: return []
+                        if isinstance(val, list): return val
+                        return [val]
+
+                    ema20_5m_series = to_list(i_5m.get("ema20"))
+                    macd_5m_series = to_list(i_5m.get("macd"))
+                    rsi7_5m_series = to_list(i_5m.get("rsi7"))
+                    rsi14_5m_series = to_list(i_5m.get("rsi14"))
+
+                    # Extract long-term indicators (safe get + list handling)
+                    interval = CONFIG.get("interval", "1h")
+                    i_lt = indicators.get(interval, {})
+
+                    def get_last(val):
+                        lst = to_list(val)
+                        return lst[-1] if lst else None
+
+                    stats = indicators.get("stats", {})
+
+                    # Build market data structure
+                    market_sections.append({
+                        "asset": asset,
+                        "current_price": current_price,
+                        "change_24h": stats.get("change_24h"),
+                        "volume_24h": stats.get("volume_24h"),
+                        "intraday": {
+                            "ema20": get_last(i_5m.get("ema20")),
+                            "macd": (i_5m.get("macd") or [None])[-1], # dict inside list
+                            "rsi7": get_last(i_5m.get("rsi7")),
+                            "rsi14": get_last(i_5m.get("rsi14")),
+                            "series": {
+                                "ema20": ema20_5m_series,
+                                "macd": macd_5m_series,
+                                "rsi7": rsi7_5m_series,
+                                "rsi14": rsi14_5m_series
+                            }
+                        },
+                        "long_term": {
+                            "ema20": get_last(i_lt.get("ema20")),
+                            "ema50": get_last(i_lt.get("ema50")),
+                            "atr3": get_last(i_lt.get("atr3")),
+                            "atr14": get_last(i_lt.get("atr14")),
+                            "macd_series": i_lt.get("macd", []) or [],
+                            "rsi_series": i_lt.get("rsi14", []) or []
+                        },
+                        "open_interest": oi,
+                        "funding_rate": funding,
+                        "funding_annualized_pct": funding * 24 * 365 * 100 if funding is not None else None,
+                        "recent_mid_prices": [p.get('c', p.get('mid')) for p in list(self.price_history[asset])[-10:]],
+                        "price_history": list(self.price_history[asset])[-50:] # Export last 50 candles for charting
+                    })
+
+                except Exception as e:
+                    self.logger.error(f"Critical error processing market data for {asset}: {e}", exc_info=True)
+
+
+            # Update Bot State with gathered market data (Critical for GUI)
+            # Use update() to preserve data for assets that might have failed this specific loop
+            new_market_data = {
+                item['asset']: item for item in market_sections
+            }
+
+            # Ensure state.market_data is a dict (BotState defaults to list)
+            if isinstance(self.state.market_data, list):
+                 self.state.market_data = {}
+
+            if not self.state.market_data:
+                self.state.market_data = {}
+
+            if new_market_data:
+                self.state.market_data.update(new_market_data)
+            elif len(self.assets) > 0 and not self.state.market_data:
+                # Only log warning if we have defined assets but no data at all
+                self.logger.warning("No market data gathered this loop, keeping stale data if any.")
+
+            # ===== PHASE 9: Build LLM Context =====
+            context_payload = self._layout_context(OrderedDict([
+                ("invocation", {
+                    "count": self.invocation_count,
+                    "current_time": self.clock.now().isoformat()
+                }),
+                ("account", dashboard),
+                ("market_data", market_sections),
+                ("instructions", {
+                    "assets": self.assets,
+                    "max_position_size": float(CONFIG.get("max_position_size", 1000)),
+                    "note": "Follow the system prompt guidelines strictly"
+                })
+            ]))
+            context = self._serialize_context(context_payload)
+
+            # Log prompt
+            if self.prompt_log_path:
+                with open(self.prompt_log_path, "a", encoding="utf-8") as f:
+                    f.write(f"\n{'='*80}\n")
+                    f.write(f"Invocation {self.invocation_count} - {self.clock.now().isoformat()}\n")
+                    f.write(f"{'='*80}\n")
+                    f.write(context + "\n")
+
+            # ===== PHASE 10: Get LLM Decision =====
+            self.logger.info("Phase 10: Calling LLM decision...")
+            streamed_assets: set = set()
+            fanned_out = bool(CONFIG.get("llm_fanout")) and len(self.assets) > 1
+            material = True
+            if self.materiality_gate:
+                material, gate_reason = self.materiality_gate.check(market_sections, dashboard, self.clock.now())
+            if not material:
+                decisions = self.materiality_gate.reuse_decision(self.assets, gate_reason)
+                self.state.llm_calls_saved = self.materiality_gate.calls_saved
+            elif fanned_out:
+                decisions = await self._fan_out_decisions(context_payload)
+            elif CONFIG.get("llm_streaming") and hasattr(self.agent, "decide_trade_streaming"):
+                decisions, streamed_assets = await self._stream_decisions(context)
+            else:
+                decisions = await self._call_agent(context)
+
+            # Validate and retry if needed (fan-out falls back per asset; streamed
+            # decisions may already be executed)
+            can_retry = material and not fanned_out and not streamed_assets
+            if not isinstance(decisions, dict) or 'trade_decisions' not in decisions:
+                # Try a local repair before paying for another full-context call
+                decisions = repair_decision_payload(decisions, self.assets) or decisions
+            if can_retry and (not isinstance(decisions, dict) or 'trade_decisions' not in decisions):
+                self.logger.warning("Invalid decision format, retrying with strict prefix...")
+                strict_context = (
+                    "Return ONLY the JSON object per the schema. "
+                    "No markdown, no explanation.\n\n" + context
+                )
+                decisions = await self._call_agent(strict_context)
+
+            # Check for all-hold with parse errors
+            trade_decisions = decisions.get('trade_decisions', [])
+            if can_retry and all(
+                d.get('action') == 'hold' and 'parse error' in d.get('rationale', '').lower()
+                for d in trade_decisions
+            ):
+                self.logger.warning("All holds with parse errors, retrying...")
+                decisions = await self._call_agent(context)
+                trade_decisions = decisions.get('trade_decisions', [])
+
+            if material and self.materiality_gate and is_valid_decision_payload(decisions, self.assets):
+                self.materiality_gate.record_decision(market_sections, dashboard, decisions, self.clock.now())
+
+            # Extract reasoning
+            reasoning = decisions.get('reasoning', '')
+            if reasoning:
+                self.logger.info(f"LLM Reasoning: {reasoning[:200]}...")
+
+            self.state.last_reasoning = decisions
+
+            # ===== PHASE 11: Execute Trades or Create Proposals =====
+            for decision in trade_decisions:
+                if decision.get('asset') in streamed_assets:
+                    continue  # Already executed while the response was streaming
+                await self._process_decision(decision)
+
+            # Update market data in state for dashboard
+            self.state.market_data = market_sections
+
+            # Update state timestamp
+            self.state.last_update = self.clock.now().isoformat()
+            self._persist_state_snapshot()
+            self._notify_state_update()
+
+        except Exception as e:
+            error_msg = str(e)
+            self.logger.error(f"Error in main loop iteration: {error_msg} (Type: {type(e).__name__})", exc_info=True)
+            self.state.error = error_msg if error_msg else f"Unknown Error ({type(e).__name__})"
+            if self.on_error:
+                self.on_error(self.state.error)
+
+    async def _stream_decisions(self, context: str):
+        """
+        Stream the LLM response and execute decisions as they arrive.
+
+        A consumer task executes each per-asset decision in order while the
+        model is still generating the remaining ones.
+
+        Returns:
+            (decisions, streamed_assets): full decision payload and the assets
+            already handled during streaming
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        streamed_assets: set = set()
+
+        async def consume():
+            while True:
+                decision = await queue.get()
+                if decision is None:
+                    return
+                asset = decision.get('asset')
+                if asset in self.assets and asset not in streamed_assets:
+                    streamed_assets.add(asset)
+                    self.logger.info(f"Streamed decision for {asset}: {decision.get('action')}")
+                    await self._process_decision(decision)
+
+        consumer = asyncio.create_task(consume())
+        try:
+            decisions = await self.agent.decide_trade_streaming(self.assets, context, queue.put_nowait)
+        except asyncio.CancelledError:
+            consumer.cancel()
+            raise
+        except Exception:
+            # Decisions that already arrived still run to completion (order,
+            # TP/SL, diary) before the stream error is surfaced
+            queue.put_nowait(None)
+            await consumer
+            raise
+        queue.put_nowait(None)
+        await consumer
+        return decisions, streamed_assets
+
+    async def _process_decision(self, decision: Dict):
+        """Execute (auto mode) or propose (manual mode) a single trade decision."""
+        asset = decision.get('asset')
+        if asset not in self.assets:
+            return
+
+        action = decision.get('action')
+        rationale = decision.get('rationale', '')
+        allocation = float(decision.get('allocation_usd', 0))
+        tp_price = decision.get('tp_price')
+        sl_price = decision.get('sl_price')
+        exit_plan = decision.get('exit_plan', '')
+        confidence = decision.get('confidence', 75.0)
+
+        if action in ['buy', 'sell']:
+            # Apply Risk Management Logic
+            max_pos_size = float(CONFIG.get('max_position_size', 1000))
+            if allocation > max_pos_size:
+                self.logger.warning(f"Risk Control: Capping {asset} allocation from ${allocation:.2f} to ${max_pos_size:.2f}")
+                allocation = max_pos_size
+
+            # AUTO-TRADE LOGIC
+            auto_trade_enabled = CONFIG.get('auto_trade_enabled', False)
+            auto_threshold = float(CONFIG.get('auto_trade_threshold', 80))
+
+            should_auto = (self.trading_mode == "auto")
+            if not should_auto and auto_trade_enabled and confidence >= auto_threshold:
+                should_auto = True
+                self.logger.info(f"Auto-Trade Triggered: Confidence {confidence}% >= {auto_threshold}%")
+
+            # MANUAL MODE / LOW CONFIDENCE: Create proposal instead of executing
+            if not should_auto:
+                try:
+                    current_price = await self.exchange.get_current_price(asset)
+                    size = allocation / current_price if current_price > 0 else 0
+                    risk_reward = None
+                    if tp_price and sl_price and current_price:
+                        potential_gain = abs(tp_price - current_price) / current_price
+                        potential_loss = abs(sl_price - current_price) / current_price
+                        if potential_loss > 0:
+                            risk_reward = potential_gain / potential_loss
+
+                    proposal = TradeProposal(
+                        asset=asset,
+                        action=action,
+                        confidence=confidence,
+                        risk_reward=risk_reward,
+                        entry_price=current_price,
+                        tp_price=tp_price,
+                        sl_price=sl_price,
+                        size=size,
+                        allocation=allocation,
+                        rationale=rationale,
+                        market_conditions={
+                            'current_price': current_price,
+                            'exit_plan': exit_plan
+                        }
                     )
 
-                    # Validate and retry if needed
-                    if not isinstance(decisions, dict) or 'trade_decisions' not in decisions:
-                        self.logger.warning("Invalid decision format, retrying with strict prefix...")
-                        strict_context = (
-                            "Return ONLY the JSON object per the schema. "
-                            "No markdown, no explanation.\n\n" + context
-                        )
-                        decisions = await asyncio.to_thread(
-                            self.agent.decide_trade, self.assets, strict_context
-                        )
-
-                    # Check for all-hold with parse errors
-                    trade_decisions = decisions.get('trade_decisions', [])
-                    if all(
-                        d.get('action') == 'hold' and 'parse error' in d.get('rationale', '').lower()
-                        for d in trade_decisions
-                    ):
-                        self.logger.warning("All holds with parse errors, retrying...")
-                        decisions = await asyncio.to_thread(
-                            self.agent.decide_trade, self.assets, context
-                        )
-                        trade_decisions = decisions.get('trade_decisions', [])
-
-                    # Extract reasoning
-                    reasoning = decisions.get('reasoning', '')
-                    if reasoning:
-                        self.logger.info(f"LLM Reasoning: {reasoning[:200]}...")
-
-                    self.state.last_reasoning = decisions
-
-                    # ===== PHASE 11: Execute Trades or Create Proposals =====
-                    for decision in trade_decisions:
-                        asset = decision.get('asset')
-                        if asset not in self.assets:
-                            continue
-
-                        action = decision.get('action')
-                        rationale = decision.get('rationale', '')
-                        allocation = float(decision.get('allocation_usd', 0))
-                        tp_price = decision.get('tp_price')
-                        sl_price = decision.get('sl_price')
-                        exit_plan = decision.get('exit_plan', '')
-                        confidence = decision.get('confidence', 75.0)
-
-                        if action in ['buy', 'sell']:
-                            # Apply Risk Management Logic
-                            max_pos_size = float(CONFIG.get('max_position_size', 1000))
-                            if allocation > max_pos_size:
-                                self.logger.warning(f"Risk Control: Capping {asset} allocation from ${allocation:.2f} to ${max_pos_size:.2f}")
-                                allocation = max_pos_size
-
-                            # AUTO-TRADE LOGIC
-                            auto_trade_enabled = CONFIG.get('auto_trade_enabled', False)
-                            auto_threshold = float(CONFIG.get('auto_trade_threshold', 80))
-                            
-                            should_auto = (self.trading_mode == "auto")
-                            if not should_auto and auto_trade_enabled and confidence >= auto_threshold:
-                                should_auto = True
-                                self.logger.info(f"Auto-Trade Triggered: Confidence {confidence}% >= {auto_threshold}%")
-
-                            # MANUAL MODE / LOW CONFIDENCE: Create proposal instead of executing
-                            if not should_auto:
-                                try:
-                                    current_price = await self.exchange.get_current_price(asset)
-                                    size = allocation / current_price if current_price > 0 else 0
-                                    risk_reward = None
-                                    if tp_price and sl_price and current_price:
-                                        potential_gain = abs(tp_price - current_price) / current_price
-                                        potential_loss = abs(sl_price - current_price) / current_price
-                                        if potential_loss > 0:
-                                            risk_reward = potential_gain / potential_loss
-                                    
-                                    proposal = TradeProposal(
-                                        asset=asset,
-                                        action=action,
-                                        confidence=confidence,
-                                        risk_reward=risk_reward,
-                                        entry_price=current_price,
-                                        tp_price=tp_price,
-                                        sl_price=sl_price,
-                                        size=size,
-                                        allocation=allocation,
-                                        rationale=rationale,
-                                        market_conditions={
-                                            'current_price': current_price,
-                                            'exit_plan': exit_plan
-                                        }
-                                    )
-                                    
-                                    self.pending_proposals.append(proposal)
-                                    self.logger.info(f"[PROPOSAL] Created: {action.upper()} {asset} @ ${current_price:,.2f} (ID: {proposal.id[:8]})")
-                                    
-                                    # Update state with proposals
-                                    self.state.pending_proposals = [p.to_dict() for p in self.pending_proposals if p.is_pending]
-                                    
-                                except Exception as e:
-                                    self.logger.error(f"Error creating proposal for {asset}: {e}")
-                                    
-                                continue  # Skip execution in manual mode
-                            
-                            # AUTO MODE: Execute immediately (original behavior)
-                            try:
-                                current_price = await self.exchange.get_current_price(asset)
-                                amount = allocation / current_price if current_price > 0 else 0
-
-                                if amount > 0:
-                                    # Place market order
-                                    if action == 'buy':
-                                        order_result = await self.exchange.place_buy_order(asset, amount)
-                                    else:
-                                        order_result = await self.exchange.place_sell_order(asset, amount)
-
-                                    self.logger.info(f"Executed {action} {asset}: {amount:.6f} @ {current_price}")
-
-                                    # Wait and check fills
-                                    await asyncio.sleep(1)
-                                    recent_fills_check = await self.exchange.get_recent_fills(limit=5)
-                                    filled = any(
-                                        f.get('coin') == asset and
-                                        abs(float(f.get('sz', 0)) - amount) < 0.0001
-                                        for f in recent_fills_check
-                                    )
-
-                                    # Place TP/SL orders
-                                    tp_oid = None
-                                    sl_oid = None
-
-                                    if tp_price:
-                                        try:
-                                            is_buy = (action == 'buy')
-                                            tp_order = await self.exchange.place_take_profit(
-                                                asset, is_buy, amount, tp_price
-                                            )
-                                            oids = self.exchange.extract_oids(tp_order)
-                                            tp_oid = oids[0] if oids else None
-                                            self.logger.info(f"Placed TP order for {asset} @ {tp_price}")
-                                        except Exception as e:
-                                            self.logger.error(f"Failed to place TP: {e}")
-
-                                    if sl_price:
-                                        try:
-                                            is_buy = (action == 'buy')
-                                            sl_order = await self.exchange.place_stop_loss(
-                                                asset, is_buy, amount, sl_price
-                                            )
-                                            oids = self.exchange.extract_oids(sl_order)
-                                            sl_oid = oids[0] if oids else None
-                                            self.logger.info(f"Placed SL order for {asset} @ {sl_price}")
-                                        except Exception as e:
-                                            self.logger.error(f"Failed to place SL: {e}")
-
-                                    # Update active trades
-                                    self.active_trades = [
-                                        t for t in self.active_trades if t['asset'] != asset
-                                    ]
-                                    self.active_trades.append({
-                                        'asset': asset,
-                                        'is_long': (action == 'buy'),
-                                        'amount': amount,
-                                        'entry_price': current_price,
-                                        'tp_oid': tp_oid,
-                                        'sl_oid': sl_oid,
-                                        'exit_plan': exit_plan,
-                                        'opened_at': datetime.now(timezone.utc).isoformat()
-                                    })
-
-                                    # Write to diary
-                                    self._write_diary_entry({
-                                        'timestamp': datetime.now(timezone.utc).isoformat(),
-                                        'asset': asset,
-                                        'action': action,
-                                        'allocation_usd': allocation,
-                                        'amount': amount,
-                                        'entry_price': current_price,
-                                        'tp_price': tp_price,
-                                        'tp_oid': tp_oid,
-                                        'sl_price': sl_price,
-                                        'sl_oid': sl_oid,
-                                        'exit_plan': exit_plan,
-                                        'rationale': rationale,
-                                        'order_result': str(order_result),
-                                        'opened_at': datetime.now(timezone.utc).isoformat(),
-                                        'filled': filled
-                                    })
-
-                                    # Notify GUI of trade
-                                    if self.on_trade_executed:
-                                        self.on_trade_executed({
-                                            'asset': asset,
-                                            'action': action,
-                                            'amount': amount,
-                                            'price': current_price,
-                                            'timestamp': datetime.now(timezone.utc).isoformat()
-                                        })
-
-                                    # Track PnL for Sharpe
-                                    # (Simplified - actual PnL tracked on position close)
-
-                            except Exception as e:
-                                self.logger.error(f"Error executing {action} for {asset}: {e}")
-                                if self.on_error:
-                                    self.on_error(f"Trade execution error: {e}")
-
-                        elif action == 'hold':
-                            self.logger.info(f"{asset}: HOLD - {rationale}")
-                            self._write_diary_entry({
-                                'timestamp': datetime.now(timezone.utc).isoformat(),
-                                'asset': asset,
-                                'action': 'hold',
-                                'rationale': rationale
-                            })
+                    self.pending_proposals.append(proposal)
+                    self.logger.info(f"[PROPOSAL] Created: {action.upper()} {asset} @ ${current_price:,.2f} (ID: {proposal.id[:8]})")
 
-                    # Update market data in state for dashboard
-                    self.state.market_data = market_sections
-                    
-                    # Update state timestamp
-                    self.state.last_update = datetime.now(timezone.utc).isoformat()
-                    self._notify_state_update()
+                    # Update state with proposals
+                    self.state.pending_proposals = [p.to_dict() for p in self.pending_proposals if p.is_pending]
 
                 except Exception as e:
-                    error_msg = str(e)
-                    self.logger.error(f"Error in main loop iteration: {error_msg} (Type: {type(e).__name__})", exc_info=True)
-                    self.state.error = error_msg if error_msg else f"Unknown Error ({type(e).__name__})"
-                    if self.on_error:
-                        self.on_error(self.state.error)
+                    self.logger.error(f"Error creating proposal for {asset}: {e}")
 
-                # ===== PHASE 12: Sleep Until Next Interval =====
-                await asyncio.sleep(self._get_interval_seconds())
+                return  # Skip execution in manual mode
 
-        except asyncio.CancelledError:
-            self.logger.info("Bot loop cancelled")
-        except Exception as e:
-            self.logger.error(f"Fatal error in bot loop: {e}", exc_info=True)
-            self.state.error = str(e)
-            if self.on_error:
-                self.on_error(str(e))
+            # AUTO MODE: Execute immediately (original behavior)
+            try:
+                current_price = await self.exchange.get_current_price(asset)
+                amount = allocation / current_price if current_price > 0 else 0
+
+                if amount > 0:
+                    # Place market order
+                    if action == 'buy':
+                        order_result = await self.exchange.place_buy_order(asset, amount)
+                    else:
+                        order_result = await self.exchange.place_sell_order(asset, amount)
+
+                    self.logger.info(f"Executed {action} {asset}: {amount:.6f} @ {current_price}")
+                    self._persist_trade(asset, action, current_price, amount, allocation,
+                                        sl_price, tp_price, rationale, order_result)
+
+                    # Wait and check fills
+                    await self.clock.sleep(1)
+                    recent_fills_check = await self.exchange.get_recent_fills(limit=5)
+                    filled = any(
+                        f.get('coin') == asset and
+                        abs(float(f.get('sz', 0)) - amount) < 0.0001
+                        for f in recent_fills_check
+                    )
+
+                    # Place TP/SL orders
+                    tp_oid = None
+                    sl_oid = None
+
+                    if tp_price:
+                        try:
+                            is_buy = (action == 'buy')
+                            tp_order = await self.exchange.place_take_profit(
+                                asset, is_buy, amount, tp_price
+                            )
+                            oids = self.exchange.extract_oids(tp_order)
+                            tp_oid = oids[0] if oids else None
+                            self.logger.info(f"Placed TP order for {asset} @ {tp_price}")
+                        except Exception as e:
+                            self.logger.error(f"Failed to place TP: {e}")
+
+                    if sl_price:
+                        try:
+                            is_buy = (action == 'buy')
+                            sl_order = await self.exchange.place_stop_loss(
+                                asset, is_buy, amount, sl_price
+                            )
+                            oids = self.exchange.extract_oids(sl_order)
+                            sl_oid = oids[0] if oids else None
+                            self.logger.info(f"Placed SL order for {asset} @ {sl_price}")
+                        except Exception as e:
+                            self.logger.error(f"Failed to place SL: {e}")
+
+                    # Update active trades
+                    self.active_trades = [
+                        t for t in self.active_trades if t['asset'] != asset
+                    ]
+                    self.active_trades.append({
+                        'asset': asset,
+                        'is_long': (action == 'buy'),
+                        'amount': amount,
+                        'entry_price': current_price,
+                        'tp_oid': tp_oid,
+                        'sl_oid': sl_oid,
+                        'exit_plan': exit_plan,
+                        'opened_at': self.clock.now().isoformat()
+                    })
+
+                    # Write to diary
+                    self._write_diary_entry({
+                        'timestamp': self.clock.now().isoformat(),
+                        'asset': asset,
+                        'action': action,
+                        'allocation_usd': allocation,
+                        'amount': amount,
+                        'entry_price': current_price,
+                        'tp_price': tp_price,
+                        'tp_oid': tp_oid,
+                        'sl_price': sl_price,
+                        'sl_oid': sl_oid,
+                        'exit_plan': exit_plan,
+                        'rationale': rationale,
+                        'order_result': str(order_result),
+                        'opened_at': self.clock.now().isoformat(),
+                        'filled': filled
+                    })
+
+                    # Notify GUI of trade
+                    if self.on_trade_executed:
+                        self.on_trade_executed({
+                            'asset': asset,
+                            'action': action,
+                            'amount': amount,
+                            'price': current_price,
+                            'timestamp': self.clock.now().isoformat()
+                        })
+
+                    # Track PnL for Sharpe
+                    # (Simplified - actual PnL tracked on position close)
+
+            except Exception as e:
+                self.logger.error(f"Error executing {action} for {asset}: {e}")
+                if self.on_error:
+                    self.on_error(f"Trade execution error: {e}")
+
+        elif action == 'hold':
+            self.logger.info(f"{asset}: HOLD - {rationale}")
+            self._write_diary_entry({
+                'timestamp': self.clock.now().isoformat(),
+                'asset': asset,
+                'action': 'hold',
+                'rationale': rationale
+            })
 
     async def _update_bot_account_state(self, user_state: Dict):
         """Update bot state positions AND balance from exchange state"""
@@ -697,6 +936,7 @@ class TradingBotEngine:
                 self.logger.error(f"Error enriching position for {symbol}: {e}")
 
         self.state.positions = enriched_positions
+        self._persist_positions(enriched_positions)
         self._notify_state_update()
 
     async def _reconcile_active_trades(self, positions: List[Dict], open_orders: List[Dict]):
@@ -717,7 +957,7 @@ class TradingBotEngine:
         if removed:
             self.logger.info(f"Reconciled: removed stale trades for {removed}")
             self._write_diary_entry({
-                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'timestamp': self.clock.now().isoformat(),
                 'action': 'reconcile',
                 'removed_assets': removed,
                 'note': 'Position no longer exists on exchange'
@@ -759,28 +999,162 @@ class TradingBotEngine:
         try:
             with open(self.diary_path, "a", encoding="utf-8") as f:
                 f.write(json.dumps(entry, default=json_default) + "\n")
+            if self._recent_diary is not None:
+                self._recent_diary.append(entry)
         except Exception as e:
             self.logger.error(f"Failed to write diary entry: {e}")
+        if self.persister:
+            self.persister.record_diary(entry)
 
-    def _load_recent_diary(self, limit: int = 10) -> List[Dict]:
-        """Load recent diary entries"""
-        if not self.diary_path.exists():
-            return []
+    def _persist_trade(self, asset: str, action: str, price: float, amount: float, allocation: float,
+                       sl_price: Optional[float], tp_price: Optional[float], rationale: str, order_result: Any):
+        """
+        Queue the executed order as a Trade row (never blocks order placement).
 
+        An order against the held position reduces it rather than opening a
+        trade: once it covers the whole position the asset's open trades are
+        closed at ``price`` and only a remainder that flips the side is
+        recorded as a new trade. Partial reductions leave the trades open
+        until the position closes.
+        """
+        if not self.persister:
+            return
+        held = self._persisted_positions.get(asset)
+        if held and action == ('sell' if held['side'] == 'long' else 'buy'):
+            if amount < held['size'] * (1 - CLOSE_SIZE_TOLERANCE):
+                return
+            self.persister.close_trades(asset, exit_price=price,
+                                        exit_timestamp=self.clock.now().replace(tzinfo=None))
+            remainder = amount - held['size']
+            if remainder <= held['size'] * CLOSE_SIZE_TOLERANCE:
+                # Position row is removed once the next refresh no longer reports it
+                held['size'] = 0.0
+                return
+            held.update(side='long' if action == 'buy' else 'short', size=remainder, price=price)
+            allocation *= remainder / amount
+            amount = remainder
+        oids = []
         try:
-            entries = []
-            with open(self.diary_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            entries.append(json.loads(line))
-                        except json.JSONDecodeError:
-                            continue
-            return entries[-limit:]
-        except Exception as e:
-            self.logger.error(f"Failed to load diary: {e}")
-            return []
+            oids = self.exchange.extract_oids(order_result)
+        except Exception:
+            pass
+        self.persister.record_trade(
+            asset=asset,
+            action=action,
+            entry_timestamp=self.clock.now().replace(tzinfo=None),
+            entry_price=price,
+            entry_size=amount,
+            entry_value=allocation,
+            leverage=float(CONFIG.get("leverage") or 1),
+            stop_loss=sl_price,
+            take_profit=tp_price,
+            llm_model=getattr(self.agent, "model", None),
+            rationale=rationale,
+            order_id=str(oids[0]) if oids else None,
+        )
+
+    def _persist_positions(self, positions: List[Dict]):
+        """
+        Queue upserts for current positions and closes for ones that disappeared.
+
+        A position that disappeared without a closing order (TP/SL fill,
+        liquidation, manual close) closes its open trades at the last price
+        seen for it.
+        """
+        if not self.persister:
+            return
+        current = {}
+        for pos in positions:
+            quantity = pos['quantity']
+            if not pos['symbol'] or quantity == 0:
+                continue
+            notional = abs(quantity) * pos['entry_price']
+            leverage = float(pos.get('leverage') or 1)
+            current[pos['symbol']] = {
+                'side': 'long' if quantity > 0 else 'short',
+                'size': abs(quantity),
+                'price': pos['current_price'],
+            }
+            self.persister.upsert_position(
+                asset=pos['symbol'],
+                side='long' if quantity > 0 else 'short',
+                size=abs(quantity),
+                entry_price=pos['entry_price'],
+                current_price=pos['current_price'],
+                liquidation_price=pos['liquidation_price'] or None,
+                unrealized_pnl=pos['unrealized_pnl'],
+                unrealized_pnl_pct=(pos['unrealized_pnl'] / notional * 100) if notional else 0.0,
+                leverage=leverage,
+                margin=notional / leverage if leverage else notional,
+            )
+        now = self.clock.now().replace(tzinfo=None)
+        for asset, held in self._persisted_positions.items():
+            if asset not in current:
+                self.persister.close_position(asset)
+                self.persister.close_trades(asset, exit_price=held['price'], exit_timestamp=now)
+        self._persisted_positions = current
+
+    def _archive_candles(self, asset: str):
+        """Queue the candles just fetched for the indicators into market_data."""
+        if not self.persister or not CONFIG.get("db_archive_candles"):
+            return
+        for interval in ("5m", "1h", "4h"):
+            candles = self.indicators.candle_cache.get(asset, interval)
+            if candles:
+                self.persister.record_candles(asset, interval, candles)
+
+    def _persist_state_snapshot(self):
+        """Queue a BotState row for this iteration and publish persister stats."""
+        if not self.persister:
+            return
+        self.persister.snapshot_state(
+            timestamp=self.clock.now().replace(tzinfo=None),
+            balance=self.state.balance,
+            total_value=self.state.total_value,
+            equity=self.state.total_value,
+            total_return_pct=self.state.total_return_pct,
+            sharpe_ratio=self.state.sharpe_ratio,
+            open_positions_count=len(self.state.positions),
+            total_position_value=sum(abs(p['quantity']) * p['current_price'] for p in self.state.positions),
+            total_unrealized_pnl=sum(p['unrealized_pnl'] for p in self.state.positions),
+            is_running=self.is_running,
+            trading_mode=self.trading_mode,
+        )
+        self.state.persistence = self.persister.stats()
+
+        # Daily market data compaction, run on the persister's writer thread
+        now = self.clock.now()
+        if CONFIG.get("db_archive_candles") and (
+            self._last_retention is None or (now - self._last_retention).total_seconds() >= 86400
+        ):
+            self.persister.apply_retention()
+            self._last_retention = now
+
+    def _load_recent_diary(self, limit: int = 10) -> List[Dict]:
+        """
+        Load recent diary entries.
+
+        The file is read once; afterwards the tail is served from memory and kept
+        current by _write_diary_entry, so the cost no longer grows with the diary.
+        """
+        if self._recent_diary is None:
+            self._recent_diary = deque(maxlen=max(limit, 50))
+            if self.diary_path.exists():
+                try:
+                    with open(self.diary_path, "r", encoding="utf-8") as f:
+                        for line in f:
+                            line = line.strip()
+                            if line:
+                                try:
+                                    self._recent_diary.append(json.loads(line))
+                                except json.JSONDecodeError:
+                                    continue
+                except Exception as e:
+                    self.logger.error(f"Failed to load diary: {e}")
+                    self._recent_diary = None
+                    return []
+
+        return list(self._recent_diary)[-limit:]
 
     def get_state(self) -> BotState:
         """Get current bot state"""
@@ -826,7 +1200,7 @@ class TradingBotEngine:
                         ]
 
                         self._write_diary_entry({
-                            'timestamp': datetime.now(timezone.utc).isoformat(),
+                            'timestamp': self.clock.now().isoformat(),
                             'asset': asset,
                             'action': 'manual_close',
                             'amount': quantity,
@@ -841,7 +1215,7 @@ class TradingBotEngine:
                                 'action': 'manual_close',
                                 'amount': quantity,
                                 'price': current_price,
-                                'timestamp': datetime.now(timezone.utc).isoformat()
+                                'timestamp': self.clock.now().isoformat()
                             })
 
                         self.logger.info(f"Manually closed position: {asset}")
@@ -922,7 +1296,7 @@ class TradingBotEngine:
         
         # Write to diary
         self._write_diary_entry({
-            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'timestamp': self.clock.now().isoformat(),
             'asset': proposal.asset,
             'action': 'proposal_rejected',
             'proposal_id': proposal_id,
@@ -962,9 +1336,11 @@ class TradingBotEngine:
                 raise ValueError(f"Invalid action: {proposal.action}")
             
             self.logger.info(f"Order placed: {proposal.action} {proposal.asset}: {amount:.6f} @ {current_price}")
+            self._persist_trade(proposal.asset, proposal.action, current_price, amount, proposal.allocation,
+                                proposal.sl_price, proposal.tp_price, proposal.rationale, order_result)
             
             # Wait and check fills
-            await asyncio.sleep(1)
+            await self.clock.sleep(1)
             recent_fills = await self.exchange.get_recent_fills(limit=5)
             filled = any(
                 f.get('coin') == proposal.asset and
@@ -1012,7 +1388,7 @@ class TradingBotEngine:
                 'tp_oid': tp_oid,
                 'sl_oid': sl_oid,
                 'exit_plan': proposal.market_conditions.get('exit_plan', ''),
-                'opened_at': datetime.now(timezone.utc).isoformat(),
+                'opened_at': self.clock.now().isoformat(),
                 'from_proposal': proposal.id
             })
             
@@ -1021,7 +1397,7 @@ class TradingBotEngine:
             
             # Write to diary
             self._write_diary_entry({
-                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'timestamp': self.clock.now().isoformat(),
                 'asset': proposal.asset,
                 'action': proposal.action,
                 'allocation_usd': proposal.allocation,
@@ -1045,7 +1421,7 @@ class TradingBotEngine:
                     'action': proposal.action,
                     'amount': amount,
                     'price': current_price,
-                    'timestamp': datetime.now(timezone.utc).isoformat(),
+                    'timestamp': self.clock.now().isoformat(),
                     'from_proposal': True
                 })
             
@@ -82,6 +82,16 @@ def _get_list(name: str, default: list[str] | None = None) -> list[str] | None:
 CONFIG = {
     # API keys - not required during module import (checked when bot starts)
     "taapi_api_key": _get_env("TAAPI_API_KEY"),
+    "local_tool_indicators": _get_bool("LOCAL_TOOL_INDICATORS", True),  # answer tool calls from local candles
+    "taapi_rate_limit": _get_int("TAAPI_RATE_LIMIT", 1),  # requests per TAAPI_RATE_PERIOD (Free plan: 1)
+    "taapi_rate_period": _get_float("TAAPI_RATE_PERIOD", 15.0),  # seconds
+    "taapi_batching": _get_bool("TAAPI_BATCHING", True),  # merge concurrent requests into bulk calls
+    "taapi_batch_window": _get_float("TAAPI_BATCH_WINDOW", 0.05),  # seconds to collect a batch
+    "taapi_batch_max": _get_int("TAAPI_BATCH_MAX", 20),  # indicators per bulk request
+    "taapi_cache_max_entries": _get_int("TAAPI_CACHE_MAX_ENTRIES", 512),
+    "taapi_cache_max_bytes": _get_int("TAAPI_CACHE_MAX_BYTES", 8 * 1024 * 1024),
+    "taapi_cache_path": _get_env("TAAPI_CACHE_PATH", "data/taapi_cache.json"),  # empty = memory only
+    "taapi_cache_expiry_interval": _get_float("TAAPI_CACHE_EXPIRY_INTERVAL", 30.0),  # seconds, 0 = no sweeper
     "hyperliquid_private_key": _get_env("HYPERLIQUID_PRIVATE_KEY") or _get_env("LIGHTER_PRIVATE_KEY"),
     "mnemonic": _get_env("MNEMONIC"),
     # Trading Backend Selection
@@ -101,6 +111,28 @@ CONFIG = {
     "openrouter_referer": _get_env("OPENROUTER_REFERER"),
     "openrouter_app_title": _get_env("OPENROUTER_APP_TITLE", "trading-agent"),
     "llm_model": _get_env("LLM_MODEL", "x-ai/grok-4"),
+    "llm_timeout": _get_float("LLM_TIMEOUT", 60.0),  # seconds an LLM response may go without sending data
+    "llm_streaming": _get_bool("LLM_STREAMING", False),  # execute decisions as they stream in
+    "llm_fanout": _get_bool("LLM_FANOUT", False),  # one concurrent LLM call per asset
+    "llm_fanout_concurrency": _get_int("LLM_FANOUT_CONCURRENCY", 4),
+    # Hedged requests: start a secondary model when the primary is slow
+    "llm_hedge_enabled": _get_bool("LLM_HEDGE_ENABLED", False),
+    "llm_hedge_provider": _get_env("LLM_HEDGE_PROVIDER", "openrouter"),  # "openrouter" or "gemini"
+    "llm_hedge_model": _get_env("LLM_HEDGE_MODEL"),
+    "llm_hedge_delay": _get_float("LLM_HEDGE_DELAY", 10.0),  # seconds before hedging
+    "context_token_budget": _get_int("CONTEXT_TOKEN_BUDGET", 8000),  # 0 = legacy pretty-printed context
+    # Provider-side prompt caching: stable content first, explicit cache markers
+    "prompt_layout": _get_env("PROMPT_LAYOUT", "stable_first"),  # "stable_first" or "legacy"
+    "prompt_cache_enabled": _get_bool("PROMPT_CACHE_ENABLED", True),
+    "gemini_cache_ttl": _get_int("GEMINI_CACHE_TTL", 3600),  # seconds a Gemini context cache lives
+    # Materiality gate: reuse the last decision when nothing material changed
+    "llm_skip_unchanged": _get_bool("LLM_SKIP_UNCHANGED", False),
+    "materiality_price_move_pct": _get_float("MATERIALITY_PRICE_MOVE_PCT", 0.3),
+    "materiality_rsi_levels": _get_list("MATERIALITY_RSI_LEVELS", ["30", "50", "70"]),
+    "materiality_max_interval": _get_float("MATERIALITY_MAX_INTERVAL", 900.0),  # seconds
+    # Per-call LLM telemetry (llm_calls table)
+    "llm_telemetry_enabled": _get_bool("LLM_TELEMETRY_ENABLED", True),
+    "llm_pricing": _get_json("LLM_PRICING"),  # {"model": {"prompt": usd_per_mtok, "completion": usd_per_mtok}}
     # LLM via Gemini Direct
     "gemini_api_key": _get_env("GEMINI_API_KEY"),
     "gemini_model": _get_env("GEMINI_MODEL", "gemini-2.0-flash-exp"),
@@ -110,11 +142,29 @@ CONFIG = {
     # Provider routing
     "provider_config": _get_json("PROVIDER_CONFIG"),
     "provider_quantizations": _get_list("PROVIDER_QUANTIZATIONS"),
+    # Database write-behind persistence (trades, diary, positions, state snapshots)
+    "db_write_behind": _get_bool("DB_WRITE_BEHIND", True),
+    "db_batch_size": _get_int("DB_BATCH_SIZE", 100),  # operations per transaction
+    "db_flush_interval": _get_float("DB_FLUSH_INTERVAL", 0.5),  # seconds to fill a batch
+    "db_queue_max": _get_int("DB_QUEUE_MAX", 10000),  # operations dropped beyond this
+    "db_archive_candles": _get_bool("DB_ARCHIVE_CANDLES", False),  # store every fetched candle in market_data
+    # Days to keep per candle interval; expired candles are compacted into the next listed interval
+    "market_data_retention": _get_json("MARKET_DATA_RETENTION", {"5m": 14, "1h": 365}),
+    # SQLite tuning: "tuned" = WAL, synchronous=NORMAL, bigger cache, mmap, read-only pool
+    "db_sqlite_profile": _get_env("DB_SQLITE_PROFILE", "tuned"),  # "tuned" or "default"
+    "db_cache_size_kb": _get_int("DB_CACHE_SIZE_KB", 65536),  # page cache per connection
+    "db_mmap_size": _get_int("DB_MMAP_SIZE", 256 * 1024 * 1024),  # bytes, 0 = no mmap
+    "db_busy_timeout_ms": _get_int("DB_BUSY_TIMEOUT_MS", 5000),
+    "db_read_pool_size": _get_int("DB_READ_POOL_SIZE", 4),
     # Runtime controls via env
     "assets": _get_env("ASSETS"),  # e.g., "BTC ETH SOL" or "BTC,ETH,SOL"
     "interval": _get_env("INTERVAL"),  # e.g., "5m", "1h"
     "trading_mode": _get_env("TRADING_MODE", "auto"),  # manual or auto
     "leverage": _get_int("LEVERAGE", 1),
+    # Record/replay of exchange and LLM calls (tests, benchmarks, profiling)
+    "cassette_mode": _get_env("CASSETTE_MODE"),  # unset, "record", "replay" or "auto"
+    "cassette_dir": _get_env("CASSETTE_DIR", "data/cassettes"),
+    "cassette_latency": _get_env("CASSETTE_LATENCY", "zero"),  # "zero", "realistic" or scale factor
     # API server
     "api_host": _get_env("API_HOST", "0.0.0.0"),
     "api_port": _get_env("APP_PORT") or _get_env("API_PORT") or "3000",
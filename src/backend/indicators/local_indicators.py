@@ -6,11 +6,52 @@ Replaces external APIs (TAAPI) for zero-latency, unlimited usage.
 
 import math
 import logging
-from typing import List, Dict, Optional
+import time
+from typing import Any, List, Dict, Optional, Tuple
+
+
+class CandleCache:
+    """
+    Most recent candles per (asset, interval), shared between the engine and agents.
+
+    Filled as a side effect of ``fetch_and_calculate_all`` so LLM tool calls can
+    be answered from memory instead of a network round trip.
+    """
+
+    def __init__(self, max_age: float = 900.0):
+        """
+        Initialize candle cache.
+
+        Args:
+            max_age: Seconds after which cached candles are considered stale
+        """
+        self.max_age = max_age
+        self._entries: Dict[Tuple[str, str], Tuple[float, List[Dict]]] = {}
+
+    def put(self, asset: str, interval: str, candles: List[Dict]):
+        self._entries[(asset.upper(), interval)] = (time.monotonic(), list(candles))
+
+    def get(self, asset: str, interval: str) -> Optional[List[Dict]]:
+        entry = self._entries.get((asset.upper(), interval))
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            return None
+        return entry[1]
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Process-wide cache used by default (engine writes, agent tool resolver reads)
+shared_candle_cache = CandleCache()
+
 
 class LocalIndicatorService:
-    def __init__(self):
+    # TAAPI default periods for the indicators we can compute locally
+    DEFAULT_PERIODS = {"ema": 30, "sma": 30, "rsi": 14, "atr": 14, "bbands": 20}
+
+    def __init__(self, candle_cache: Optional[CandleCache] = None):
         self.logger = logging.getLogger(__name__)
+        self.candle_cache = candle_cache if candle_cache is not None else shared_candle_cache
 
     async def fetch_and_calculate_all(self, exchange, asset: str) -> Dict[str, Dict]:
         """
@@ -40,6 +81,7 @@ class LocalIndicatorService:
                 candles = await exchange.get_historical_candles(asset, interval=interval, limit=100)
                 if not candles:
                     continue
+                self.candle_cache.put(asset, interval, candles)
                     
                 # Extract closing prices (chronological: old -> new)
                 closes = [float(c['c']) for c in candles]
@@ -107,8 +149,79 @@ class LocalIndicatorService:
             
         return results
 
+    def calculate(self, indicator: str, candles: List[Dict], period: Optional[int] = None,
+                  backtrack: int = 0, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, float]]:
+        """
+        Compute one indicator value in TAAPI's response shape.
+
+        Returns None when the indicator (or one of its parameters) is not
+        supported locally, or there is not enough history.
+        """
+        indicator = indicator.lower()
+        params = dict(params or {})
+        closes = [float(c['c']) for c in candles]
+        period = int(period or self.DEFAULT_PERIODS.get(indicator, 0)) or None
+
+        if indicator in ("ema", "sma", "rsi", "atr") and not params:
+            series = {
+                "ema": lambda: self.ema(closes, period),
+                "sma": lambda: self.sma(closes, period),
+                "rsi": lambda: self.rsi(closes, period),
+                "atr": lambda: self.atr(candles, period),
+            }[indicator]()
+            value = self._at(series, backtrack)
+            return None if value is None else {"value": value}
+
+        if indicator == "macd":
+            fast = int(params.pop("optInFastPeriod", 12))
+            slow = int(params.pop("optInSlowPeriod", 26))
+            signal = int(params.pop("optInSignalPeriod", 9))
+            if params:
+                return None
+            return self._at(self.macd(closes, fast, slow, signal), backtrack)
+
+        if indicator == "bbands":
+            stddev = float(params.pop("stddev", 2))
+            if params:
+                return None
+            return self._at(self.bbands(closes, period, stddev), backtrack)
+
+        return None
+
+    @staticmethod
+    def _at(series: List, backtrack: int):
+        """Value ``backtrack`` candles before the latest one (None if out of range)."""
+        index = len(series) - 1 - int(backtrack or 0)
+        return series[index] if 0 <= index < len(series) else None
+
     # --- Calculation Engines ---
 
+    def sma(self, prices: List[float], period: int) -> List[float]:
+        """Calculate Simple Moving Average"""
+        if len(prices) < period:
+            return []
+        window = sum(prices[:period])
+        values = [window / period]
+        for i in range(period, len(prices)):
+            window += prices[i] - prices[i - period]
+            values.append(window / period)
+        return values
+
+    def bbands(self, prices: List[float], period: int = 20, stddev: float = 2.0) -> List[Dict[str, float]]:
+        """Calculate Bollinger Bands (population standard deviation, as TAAPI)"""
+        results = []
+        for i in range(period, len(prices) + 1):
+            window = prices[i - period:i]
+            middle = sum(window) / period
+            deviation = math.sqrt(sum((p - middle) ** 2 for p in window) / period)
+            results.append({
+                "valueUpperBand": middle + stddev * deviation,
+                "valueMiddleBand": middle,
+                "valueLowerBand": middle - stddev * deviation
+            })
+        return results
+
+
     def ema(self, prices: List[float], period: int) -> List[float]:
         """Calculate Exponential Moving Average"""
         if len(prices) < period:
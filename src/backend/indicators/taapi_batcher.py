@@ -0,0 +1,112 @@
+"""Micro-batching of TAAPI indicator requests into bulk construct calls."""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# (symbol, interval, indicator definitions) -> {id: result}
+BulkFetcher = Callable[[str, str, List[Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class _Batch:
+    """Indicator requests collected for one symbol/interval during a window."""
+    definitions: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # id -> definition
+    waiters: Dict[str, List[asyncio.Future]] = field(default_factory=dict)  # id -> futures
+    by_signature: Dict[str, str] = field(default_factory=dict)  # identical definitions share an id
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class TAAPIBatcher:
+    """
+    Collects indicator requests for the same symbol and interval that arrive
+    within ``window`` seconds and sends them as a single bulk POST.
+
+    Each caller awaits only its own result; identical definitions in a window
+    are deduplicated. A batch is flushed early once it reaches ``max_batch``
+    indicators (the TAAPI bulk construct limit).
+    """
+
+    def __init__(self, fetch_bulk: BulkFetcher, window: float = 0.05, max_batch: int = 20):
+        """
+        Initialize batcher.
+
+        Args:
+            fetch_bulk: Coroutine sending one bulk request and returning results by id
+            window: Seconds to wait for more requests before flushing
+            max_batch: Maximum indicators per bulk request
+        """
+        self.fetch_bulk = fetch_bulk
+        self.window = window
+        self.max_batch = max_batch
+        self._batches: Dict[Tuple[Any, str, str], _Batch] = {}
+        self._tasks: Set[asyncio.Task] = set()  # in-flight bulk sends (the loop keeps only weak refs)
+        self._counter = 0
+        self.requests = 0
+        self.bulk_calls = 0
+
+    async def fetch(self, symbol: str, interval: str, indicator: str, **params) -> Any:
+        """Queue one indicator request and await its slice of the bulk result."""
+        loop = asyncio.get_running_loop()
+        key = (loop, symbol, interval)
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch()
+            batch.timer = loop.call_later(self.window, self._flush, key)
+
+        definition = {"indicator": indicator, **params}
+        signature = json.dumps(definition, sort_keys=True, default=str)
+        item_id = batch.by_signature.get(signature)
+        if item_id is None:
+            self._counter += 1
+            item_id = f"{indicator}_{self._counter}"
+            batch.by_signature[signature] = item_id
+            batch.definitions[item_id] = dict(definition, id=item_id)
+            batch.waiters[item_id] = []
+
+        future = loop.create_future()
+        batch.waiters[item_id].append(future)
+        self.requests += 1
+
+        if len(batch.definitions) >= self.max_batch:
+            batch.timer.cancel()
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Tuple[Any, str, str]) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        loop, symbol, interval = key
+        task = loop.create_task(self._send(symbol, interval, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """Send batches still waiting on this loop's window and wait for every in-flight send."""
+        loop = asyncio.get_running_loop()
+        for key in [k for k in self._batches if k[0] is loop]:
+            self._batches[key].timer.cancel()
+            self._flush(key)
+        pending = [task for task in self._tasks if task.get_loop() is loop]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _send(self, symbol: str, interval: str, batch: _Batch) -> None:
+        self.bulk_calls += 1
+        callers = sum(len(w) for w in batch.waiters.values())
+        logging.debug(f"TAAPI batch: {len(batch.definitions)} indicators for {callers} callers ({symbol} {interval})")
+        try:
+            results = await self.fetch_bulk(symbol, interval, list(batch.definitions.values()))
+        except Exception as e:
+            for futures in batch.waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for item_id, futures in batch.waiters.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result((results or {}).get(item_id))
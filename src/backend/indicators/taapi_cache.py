@@ -1,110 +1,262 @@
 """
-TAAPI Cache - Simple in-memory cache for TAAPI indicator results
+TAAPI Cache - Bounded in-memory LRU cache for TAAPI indicator results
 Reduces redundant API calls and respects rate limits
 """
 
+import atexit
+import json
+import os
+import threading
 import time
 import logging
+from collections import OrderedDict
+from pathlib import Path
 from typing import Dict, Optional, Any
 
+from src.backend.config_loader import CONFIG
+
 logger = logging.getLogger(__name__)
 
 
 class TAAPICache:
     """
-    Simple in-memory cache for TAAPI indicator results.
-    
+    LRU cache for TAAPI indicator results with size accounting.
+
     Cache keys: f"{asset}:{interval}"
     TTL: configurable (default 60 seconds)
+
+    Entries are evicted least-recently-used first once either ``max_entries``
+    or ``max_bytes`` (JSON-encoded size) is exceeded. Expired entries are
+    dropped by an optional background sweeper, and the cache can be persisted
+    to disk so a restart does not begin cold.
     """
-    
-    def __init__(self, ttl: int = 60):
+
+    def __init__(
+        self,
+        ttl: int = 60,
+        max_entries: int = 512,
+        max_bytes: int = 8 * 1024 * 1024,
+        persist_path: Optional[str] = None,
+        expiry_interval: Optional[float] = None,
+    ):
         """
         Initialize cache.
-        
+
         Args:
             ttl: Time-to-live in seconds (default: 60)
+            max_entries: Maximum number of cached keys
+            max_bytes: Maximum total size of cached data (JSON bytes)
+            persist_path: Optional JSON file used to save/restore entries
+            expiry_interval: Seconds between background expiry sweeps (None = no sweeper)
         """
         self.ttl = ttl
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        logger.info(f"TAAPI Cache initialized with TTL={ttl}s")
-    
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persist_path = Path(persist_path) if persist_path else None
+
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # LRU order
+        self._by_time: "OrderedDict[str, float]" = OrderedDict()  # insertion (= expiry) order
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self._dirty = False
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+
+        if self.persist_path:
+            self.load()
+            atexit.register(lambda: self._dirty and self.save())
+        if expiry_interval:
+            self.start_background_expiry(expiry_interval)
+
+        logger.info(f"TAAPI Cache initialized with TTL={ttl}s, max_entries={max_entries}, max_bytes={max_bytes}")
+
     def get(self, asset: str, interval: str) -> Optional[Dict[str, Any]]:
         """
         Get cached indicators for asset and interval.
-        
+
         Args:
             asset: Asset symbol (e.g., "BTC", "ETH")
             interval: Time interval (e.g., "5m", "1h")
-            
+
         Returns:
             Cached data dict or None if expired/missing
         """
         key = f"{asset}:{interval}"
-        
-        if key not in self._cache:
-            logger.debug(f"Cache MISS: {key}")
-            return None
-        
-        entry = self._cache[key]
-        age = time.time() - entry['timestamp']
-        
-        if age > self.ttl:
-            logger.debug(f"Cache EXPIRED: {key} (age: {age:.1f}s)")
-            del self._cache[key]
-            return None
-        
-        logger.debug(f"Cache HIT: {key} (age: {age:.1f}s)")
-        return entry['data']
-    
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                logger.debug(f"Cache MISS: {key}")
+                return None
+
+            age = time.time() - entry['timestamp']
+            if age > self.ttl:
+                logger.debug(f"Cache EXPIRED: {key} (age: {age:.1f}s)")
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._cache.move_to_end(key)
+            self.hits += 1
+            logger.debug(f"Cache HIT: {key} (age: {age:.1f}s)")
+            return entry['data']
+
     def set(self, asset: str, interval: str, data: Dict[str, Any]) -> None:
         """
         Store indicators in cache.
-        
+
         Args:
             asset: Asset symbol
             interval: Time interval
             data: Indicator data to cache
         """
         key = f"{asset}:{interval}"
-        
-        self._cache[key] = {
-            'timestamp': time.time(),
-            'data': data
-        }
-        
+        self._store(key, data, time.time())
         logger.debug(f"Cache SET: {key}")
-    
+
+    def _store(self, key: str, data: Dict[str, Any], timestamp: float) -> None:
+        size = len(json.dumps(data, default=str))
+        if size > self.max_bytes:
+            logger.warning(f"Cache entry {key} ({size} bytes) exceeds max_bytes, not cached")
+            return
+
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+            self._cache[key] = {'timestamp': timestamp, 'data': data, 'size': size}
+            self._by_time[key] = timestamp
+            self._bytes += size
+            self._dirty = True
+
+            while len(self._cache) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._cache))
+                self._remove(oldest)
+                self.evictions += 1
+                logger.debug(f"Cache EVICT: {oldest}")
+
+    def _remove(self, key: str) -> None:
+        entry = self._cache.pop(key)
+        self._by_time.pop(key, None)
+        self._bytes -= entry['size']
+        self._dirty = True
+
+    def purge_expired(self) -> int:
+        """Drop expired entries; cost is proportional to the number removed."""
+        cutoff = time.time() - self.ttl
+        removed = 0
+        with self._lock:
+            while self._by_time:
+                key, timestamp = next(iter(self._by_time.items()))
+                if timestamp >= cutoff:
+                    break
+                self._remove(key)
+                removed += 1
+            self.expirations += removed
+        if removed:
+            logger.debug(f"Cache expired {removed} entries")
+        return removed
+
+    def start_background_expiry(self, interval: float = 30.0) -> None:
+        """Start a daemon thread that purges expired entries (and saves, if persistent)."""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop.clear()
+
+        def sweep():
+            while not self._stop.wait(interval):
+                self.purge_expired()
+                if self.persist_path and self._dirty:
+                    self.save()
+
+        self._sweeper = threading.Thread(target=sweep, name="taapi-cache-expiry", daemon=True)
+        self._sweeper.start()
+
+    def stop_background_expiry(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=1)
+            self._sweeper = None
+
+    def save(self) -> None:
+        """Write live entries to ``persist_path`` (atomic replace)."""
+        if not self.persist_path:
+            return
+        self.purge_expired()
+        with self._lock:
+            snapshot = {k: {'timestamp': e['timestamp'], 'data': e['data']} for k, e in self._cache.items()}
+            self._dirty = False
+        try:
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.persist_path.with_suffix(self.persist_path.suffix + ".tmp")
+            tmp.write_text(json.dumps(snapshot, default=str), encoding="utf-8")
+            os.replace(tmp, self.persist_path)
+        except OSError as e:
+            logger.warning(f"Failed to persist TAAPI cache: {e}")
+
+    def load(self) -> int:
+        """Restore unexpired entries from ``persist_path``; returns the number loaded."""
+        if not self.persist_path or not self.persist_path.exists():
+            return 0
+        try:
+            snapshot = json.loads(self.persist_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable TAAPI cache file {self.persist_path}: {e}")
+            return 0
+
+        cutoff = time.time() - self.ttl
+        loaded = 0
+        # Oldest first so LRU and expiry order match the saved timestamps
+        for key, entry in sorted(snapshot.items(), key=lambda item: item[1].get('timestamp', 0)):
+            timestamp = entry.get('timestamp', 0)
+            if timestamp >= cutoff:
+                self._store(key, entry.get('data'), timestamp)
+                loaded += 1
+        self._dirty = False
+        logger.info(f"Loaded {loaded} TAAPI cache entries from {self.persist_path}")
+        return loaded
+
     def clear(self) -> None:
         """Clear all cached data"""
-        count = len(self._cache)
-        self._cache.clear()
+        with self._lock:
+            count = len(self._cache)
+            self._cache.clear()
+            self._by_time.clear()
+            self._bytes = 0
+            self._dirty = True
         logger.info(f"Cache cleared ({count} entries removed)")
-    
+
     def stats(self) -> Dict[str, Any]:
         """
         Get cache statistics.
-        
+
         Returns:
             Dict with cache stats
         """
-        now = time.time()
-        active = 0
-        expired = 0
-        
-        for entry in self._cache.values():
-            age = now - entry['timestamp']
-            if age <= self.ttl:
-                active += 1
-            else:
-                expired += 1
-        
-        return {
-            'total_entries': len(self._cache),
-            'active_entries': active,
-            'expired_entries': expired,
-            'ttl_seconds': self.ttl
-        }
+        self.purge_expired()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'total_entries': len(self._cache),
+                'active_entries': len(self._cache),
+                'expired_entries': 0,
+                'ttl_seconds': self.ttl,
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
 
 
 # Global cache instance
@@ -114,16 +266,22 @@ _cache_instance: Optional[TAAPICache] = None
 def get_cache(ttl: int = 60) -> TAAPICache:
     """
     Get or create global TAAPI cache instance.
-    
+
     Args:
         ttl: Time-to-live in seconds
-        
+
     Returns:
         TAAPICache instance
     """
     global _cache_instance
-    
+
     if _cache_instance is None:
-        _cache_instance = TAAPICache(ttl=ttl)
-    
+        _cache_instance = TAAPICache(
+            ttl=ttl,
+            max_entries=int(CONFIG.get("taapi_cache_max_entries") or 512),
+            max_bytes=int(CONFIG.get("taapi_cache_max_bytes") or 8 * 1024 * 1024),
+            persist_path=CONFIG.get("taapi_cache_path") or None,
+            expiry_interval=float(CONFIG.get("taapi_cache_expiry_interval") or 0) or None,
+        )
+
     return _cache_instance
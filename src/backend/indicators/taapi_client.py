@@ -2,10 +2,27 @@
 
 import aiohttp
 import asyncio
+import json
 import logging
 import time
 from src.backend.config_loader import CONFIG
+from src.backend.indicators.taapi_batcher import TAAPIBatcher
 from src.backend.indicators.taapi_cache import get_cache
+from src.backend.utils.rate_limiter import SingleFlight, TokenBucket
+
+# One quota per API key, shared by every client in the process
+_rate_limiter: TokenBucket | None = None
+
+
+def get_rate_limiter() -> TokenBucket:
+    """Get or create the process-wide TAAPI token bucket (sized by TAAPI_RATE_*)."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucket(
+            capacity=int(CONFIG.get("taapi_rate_limit") or 1),
+            period=float(CONFIG.get("taapi_rate_period") or 15.0),
+        )
+    return _rate_limiter
 
 
 class TAAPIClient:
@@ -24,117 +41,173 @@ class TAAPIClient:
         self.bulk_url = "https://api.taapi.io/bulk"
         self.enable_cache = enable_cache
         self.cache = get_cache(ttl=cache_ttl) if enable_cache else None
+        self.rate_limiter = get_rate_limiter()
 
-    async def _get_with_retry(self, url, params, retries=3, backoff=0.5):
-        """Perform a GET request with exponential backoff retry logic."""
-        async with aiohttp.ClientSession() as session:
-            for attempt in range(retries):
-                try:
-                    async with session.get(url, params=params, timeout=10) as resp:
-                        if resp.status == 200:
-                            return await resp.json()
-                        
-                        # Retry on rate limit (429) or server errors (500+)
-                        if (resp.status == 429 or resp.status >= 500) and attempt < retries - 1:
-                            wait = backoff * (2 ** attempt)
-                            if resp.status == 429:
-                                logging.warning(f"TAAPI rate limit (429) hit, retrying in {wait}s (attempt {attempt + 1}/{retries})")
-                            else:
-                                logging.warning(f"TAAPI {resp.status}, retrying in {wait}s")
-                            await asyncio.sleep(wait)
-                        else:
-                            resp.raise_for_status()
-                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-                    if attempt < retries - 1:
+        # Long-lived keep-alive session (recreated lazily per event loop) and
+        # coalescing of identical in-flight requests
+        self._session: aiohttp.ClientSession | None = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
+        self._single_flight = SingleFlight()
+
+        # Requests for the same symbol/interval within a short window share one bulk POST
+        self.batcher: TAAPIBatcher | None = None
+        if CONFIG.get("taapi_batching", True):
+            self.batcher = TAAPIBatcher(
+                self._bulk_request,
+                window=float(CONFIG.get("taapi_batch_window") or 0.05),
+                max_batch=int(CONFIG.get("taapi_batch_max") or 20),
+            )
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, recreating it if closed or bound to another loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, keepalive_timeout=60),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """Close the pooled session (call on shutdown; recreated lazily on next use)."""
+        if self.batcher is not None:
+            await self.batcher.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    @staticmethod
+    def _flight_key(method, url, body):
+        """Identity of a request for coalescing (the secret is identical for all callers)."""
+        if isinstance(body, dict):
+            body = {k: v for k, v in body.items() if k != "secret"}
+        return method, url, json.dumps(body, sort_keys=True, default=str)
+
+    async def _request_with_retry(self, method, url, label, retries, backoff, timeout, **kwargs):
+        """Rate-limited request with exponential backoff on 429/5xx and connection errors."""
+        session = await self._get_session()
+        for attempt in range(retries):
+            waited = await self.rate_limiter.acquire()
+            if waited > 0:
+                logging.debug(f"{label} rate limiter: waited {waited:.2f}s")
+            try:
+                async with session.request(method, url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as resp:
+                    if resp.status == 200:
+                        return await resp.json()
+
+                    # Retry on rate limit (429) or server errors (500+)
+                    if (resp.status == 429 or resp.status >= 500) and attempt < retries - 1:
                         wait = backoff * (2 ** attempt)
-                        logging.warning(f"TAAPI connection error: {e}, retrying in {wait}s")
+                        if resp.status == 429:
+                            logging.warning(f"{label} rate limit (429) hit, retrying in {wait}s (attempt {attempt + 1}/{retries})")
+                        else:
+                            logging.warning(f"{label} {resp.status}, retrying in {wait}s")
                         await asyncio.sleep(wait)
                     else:
-                        raise
-            raise RuntimeError("Max retries exceeded")
+                        resp.raise_for_status()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < retries - 1:
+                    wait = backoff * (2 ** attempt)
+                    logging.warning(f"TAAPI connection error: {e}, retrying in {wait}s")
+                    await asyncio.sleep(wait)
+                else:
+                    raise
+        raise RuntimeError("Max retries exceeded")
+
+    async def _get_with_retry(self, url, params, retries=3, backoff=0.5):
+        """Perform a GET request with exponential backoff retry logic."""
+        return await self._single_flight.do(
+            self._flight_key("GET", url, params),
+            lambda: self._request_with_retry("GET", url, "TAAPI", retries, backoff, 10, params=params),
+        )
 
     async def _post_with_retry(self, url, payload, retries=3, backoff=0.5):
         """Perform a POST request with exponential backoff retry logic."""
-        async with aiohttp.ClientSession() as session:
-            for attempt in range(retries):
-                try:
-                    async with session.post(url, json=payload, timeout=15) as resp:
-                        if resp.status == 200:
-                            return await resp.json()
-                        
-                        # Retry on rate limit (429) or server errors (500+)
-                        if (resp.status == 429 or resp.status >= 500) and attempt < retries - 1:
-                            wait = backoff * (2 ** attempt)
-                            if resp.status == 429:
-                                logging.warning(f"TAAPI Bulk rate limit (429), retrying in {wait}s (attempt {attempt + 1}/{retries})")
-                            else:
-                                logging.warning(f"TAAPI Bulk {resp.status}, retrying in {wait}s")
-                            await asyncio.sleep(wait)
-                        else:
-                            resp.raise_for_status()
-                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-                    if attempt < retries - 1:
-                        wait = backoff * (2 ** attempt)
-                        logging.warning(f"TAAPI connection error: {e}, retrying in {wait}s")
-                        await asyncio.sleep(wait)
-                    else:
-                        raise
-            raise RuntimeError("Max retries exceeded")
+        return await self._single_flight.do(
+            self._flight_key("POST", url, payload),
+            lambda: self._request_with_retry("POST", url, "TAAPI Bulk", retries, backoff, 15, json=payload),
+        )
+
+    async def _bulk_request(self, symbol, interval, indicators_config):
+        """Send one bulk construct request and return results keyed by indicator id (raises on failure)."""
+        indicators = []
+        for config in indicators_config:
+            indicator_def = {
+                "id": config.get("id", config["indicator"]),
+                "indicator": config["indicator"]
+            }
+            # Pass through optional parameters (period, results, backtrack, optIn*, ...)
+            indicator_def.update({k: v for k, v in config.items() if k not in ("id", "indicator")})
+            indicators.append(indicator_def)
+
+        payload = {
+            "secret": self.api_key,
+            "construct": {
+                "exchange": "binance",
+                "symbol": symbol,
+                "interval": interval,
+                "indicators": indicators
+            }
+        }
+
+        # Make bulk POST request
+        response = await self._post_with_retry(self.bulk_url, payload)
+
+        # Parse results by ID
+        results = {}
+        if isinstance(response, dict) and "data" in response:
+            for item in response["data"]:
+                indicator_id = item.get("id")
+                if indicator_id:
+                    results[indicator_id] = item.get("result")
+
+        return results
 
     async def fetch_bulk_indicators(self, symbol, interval, indicators_config):
         """
         Fetch multiple indicators in one bulk request to TAAPI.
         """
         try:
-            # Build bulk request payload
-            indicators = []
-            for config in indicators_config:
-                indicator_def = {
-                    "id": config.get("id", config["indicator"]),
-                    "indicator": config["indicator"]
-                }
-
-                # Add optional parameters
-                if "period" in config:
-                    indicator_def["period"] = config["period"]
-                if "results" in config:
-                    indicator_def["results"] = config["results"]
-                if "backtrack" in config:
-                    indicator_def["backtrack"] = config["backtrack"]
-
-                indicators.append(indicator_def)
-
-            payload = {
-                "secret": self.api_key,
-                "construct": {
-                    "exchange": "binance",
-                    "symbol": symbol,
-                    "interval": interval,
-                    "indicators": indicators
-                }
-            }
-
-            # Make bulk POST request
-            response = await self._post_with_retry(self.bulk_url, payload)
-
-            # Parse results by ID
-            results = {}
-            if isinstance(response, dict) and "data" in response:
-                for item in response["data"]:
-                    indicator_id = item.get("id")
-                    if indicator_id:
-                        results[indicator_id] = item.get("result")
-
-            return results
+            return await self._bulk_request(symbol, interval, indicators_config)
+        except Exception as e:
+            logging.error(f"TAAPI bulk fetch exception for {symbol} {interval}: {e}")
+            return {}
 
+    async def _fetch_many(self, symbol, interval, indicators_config):
+        """Fetch several indicators, merged with concurrent requests when batching is on."""
+        if self.batcher is None:
+            return await self.fetch_bulk_indicators(symbol, interval, indicators_config)
+        ids = [config.get("id", config["indicator"]) for config in indicators_config]
+        try:
+            results = await asyncio.gather(*(
+                self.batcher.fetch(symbol, interval, **{k: v for k, v in config.items() if k != "id"})
+                for config in indicators_config
+            ))
         except Exception as e:
             logging.error(f"TAAPI bulk fetch exception for {symbol} {interval}: {e}")
             return {}
+        return dict(zip(ids, results))
+
+    async def _fetch_indicator(self, indicator, symbol, interval, params=None):
+        """Fetch one indicator: via the micro-batcher when enabled, else a direct GET."""
+        params = dict(params or {})
+        if self.batcher is not None:
+            return await self.batcher.fetch(symbol, interval, indicator, **params)
+        base_params = {
+            "secret": self.api_key,
+            "exchange": "binance",
+            "symbol": symbol,
+            "interval": interval
+        }
+        base_params.update(params)
+        return await self._get_with_retry(f"{self.base_url}{indicator}", base_params)
 
     async def fetch_asset_indicators(self, asset):
         """
         Fetch all required indicators for an asset using bulk requests (Async).
         Makes 2 requests total (5m + 4h) instead of 10 individual requests.
+        Concurrent cache misses for the same asset share one fetch.
         """
         # Check cache first (for current interval from config)
         interval = CONFIG.get("interval", "1h")
@@ -147,7 +220,13 @@ class TAAPIClient:
             if cached_5m and cached_interval:
                 logging.info(f"Using cached indicators for {asset} (5m + {interval})")
                 return {"5m": cached_5m, interval: cached_interval}
-        
+
+        return await self._single_flight.do(
+            ("asset", asset, interval),
+            lambda: self._fetch_asset_indicators(asset, interval),
+        )
+
+    async def _fetch_asset_indicators(self, asset, interval):
         symbol = f"{asset}/USDT"
         result = {"5m": {}, interval: {}}
 
@@ -159,18 +238,6 @@ class TAAPIClient:
             {"id": "rsi14", "indicator": "rsi", "period": 14, "results": 20}
         ]
 
-        bulk_5m = await self.fetch_bulk_indicators(symbol, "5m", indicators_5m)
-
-        # Extract series data from bulk response
-        result["5m"]["ema20"] = self._extract_series(bulk_5m.get("ema20"), "value")
-        result["5m"]["macd"] = self._extract_series(bulk_5m.get("macd"), "valueMACD")
-        result["5m"]["rsi7"] = self._extract_series(bulk_5m.get("rsi7"), "value")
-        result["5m"]["rsi14"] = self._extract_series(bulk_5m.get("rsi14"), "value")
-
-        # Wait 15 seconds to respect Free plan rate limit (1 request per 15 seconds)
-        logging.info(f"Waiting 15s for TAAPI rate limit (Free plan: 1 req/15s)...")
-        await asyncio.sleep(15)
-
         # Bulk request for 4h indicators
         indicators_4h = [
             {"id": "ema20", "indicator": "ema", "period": 20},
@@ -181,7 +248,19 @@ class TAAPIClient:
             {"id": "rsi14", "indicator": "rsi", "period": 14, "results": 5}
         ]
 
-        bulk_4h = await self.fetch_bulk_indicators(symbol, "4h", indicators_4h)
+        # Both bulk requests run concurrently; plan rate limits are enforced by
+        # the shared token bucket (TAAPI_RATE_LIMIT)
+        bulk_5m, bulk_4h = await asyncio.gather(
+            self._fetch_many(symbol, "5m", indicators_5m),
+            self._fetch_many(symbol, "4h", indicators_4h),
+        )
+
+        # Extract series data from bulk response
+        result["5m"]["ema20"] = self._extract_series(bulk_5m.get("ema20"), "value")
+        result["5m"]["macd"] = self._extract_series(bulk_5m.get("macd"), "valueMACD")
+        result["5m"]["rsi7"] = self._extract_series(bulk_5m.get("rsi7"), "value")
+        result["5m"]["rsi14"] = self._extract_series(bulk_5m.get("rsi14"), "value")
+
 
         # Extract values and series
         result[interval]["ema20"] = self._extract_value(bulk_4h.get("ema20"))
@@ -243,52 +322,31 @@ class TAAPIClient:
 
     # Helper methods for basic fetch (kept for backward compatibility but made async)
     async def get_indicators(self, asset, interval):
-        params = {
-            "secret": self.api_key,
-            "exchange": "binance",
-            "symbol": f"{asset}/USDT",
-            "interval": interval
-        }
-        # Parallel fetch would be better but keeping simple for now
-        rsi = await self._get_with_retry(f"{self.base_url}rsi", params)
-        macd = await self._get_with_retry(f"{self.base_url}macd", params)
-        sma = await self._get_with_retry(f"{self.base_url}sma", params)
-        ema = await self._get_with_retry(f"{self.base_url}ema", params)
-        bbands = await self._get_with_retry(f"{self.base_url}bbands", params)
+        symbol = f"{asset}/USDT"
+        # Issued together so the micro-batcher folds them into one bulk request
+        rsi, macd, sma, ema, bbands = await asyncio.gather(*(
+            self._fetch_indicator(indicator, symbol, interval)
+            for indicator in ("rsi", "macd", "sma", "ema", "bbands")
+        ))
         return {
-            "rsi": rsi.get("value"),
+            "rsi": (rsi or {}).get("value"),
             "macd": macd,
-            "sma": sma.get("value"),
-            "ema": ema.get("value"),
+            "sma": (sma or {}).get("value"),
+            "ema": (ema or {}).get("value"),
             "bbands": bbands
         }
     
     async def get_historical_indicator(self, indicator, symbol, interval, results=10, params=None):
         """Fetch historical indicator data with optional overrides."""
-        base_params = {
-            "secret": self.api_key,
-            "exchange": "binance",
-            "symbol": symbol,
-            "interval": interval,
-            "results": results
-        }
+        base_params = {"results": results}
         if params:
             base_params.update(params)
-        response = await self._get_with_retry(f"{self.base_url}{indicator}", base_params)
-        return response
+        return await self._fetch_indicator(indicator, symbol, interval, base_params)
 
     async def fetch_value(self, indicator: str, symbol: str, interval: str, params: dict | None = None, key: str = "value"):
         """Fetch a single indicator value for the latest candle."""
         try:
-            base_params = {
-                "secret": self.api_key,
-                "exchange": "binance",
-                "symbol": symbol,
-                "interval": interval
-            }
-            if params:
-                base_params.update(params)
-            data = await self._get_with_retry(f"{self.base_url}{indicator}", base_params)
+            data = await self._fetch_indicator(indicator, symbol, interval, params)
             if isinstance(data, dict):
                 val = data.get(key)
                 return round(val, 4) if isinstance(val, (int, float)) else val
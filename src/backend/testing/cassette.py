@@ -0,0 +1,331 @@
+"""
+Cassettes - Record/replay layer for exchange and LLM calls.
+
+A cassette stores request/response pairs as JSONL on disk. In replay mode the
+trading loop runs fully offline and deterministically, which makes the whole
+iteration benchmarkable and profileable without live services.
+
+Interactions are keyed by method name and arguments. Repeated calls with the
+same key replay the recorded responses in order (the last one is reused once
+the sequence is exhausted), so polling loops such as ``get_current_price``
+reproduce the recorded price path.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.backend.utils.prompt_utils import json_default
+
+logger = logging.getLogger(__name__)
+
+MODES = ("record", "replay", "auto")
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when no recorded interaction matches a call."""
+
+
+class RecordedError(RuntimeError):
+    """Replayed exception that was raised by the live service during recording."""
+
+
+class Cassette:
+    """
+    JSONL-backed store of recorded interactions.
+
+    Modes:
+        record: call the live service and append every interaction (file is truncated)
+        replay: serve only recorded interactions, raise CassetteMiss otherwise
+        auto: replay when recorded, otherwise call live and record
+
+    Latency:
+        "zero" replays instantly, "realistic" sleeps for the recorded duration,
+        and a number scales the recorded duration (e.g. 0.1 = 10x faster).
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency: Any = "zero"):
+        """
+        Initialize cassette.
+
+        Args:
+            path: JSONL file holding the interactions
+            mode: "record", "replay" or "auto"
+            latency: "zero", "realistic" or a float scale factor
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {MODES})")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = self._parse_latency(latency)
+        self._lock = threading.Lock()
+        self._interactions: Dict[str, List[Dict]] = defaultdict(list)
+        self._cursors: Dict[str, int] = defaultdict(int)
+        self._methods = set()
+        self.stats = {"replayed": 0, "recorded": 0, "misses": 0}
+
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("", encoding="utf-8")
+        elif self.path.exists():
+            self._load()
+        elif mode == "replay":
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+
+        logger.info(f"Cassette {self.path} opened in {mode} mode ({self.size} interactions)")
+
+    @staticmethod
+    def _parse_latency(latency: Any) -> float:
+        if latency in (None, "", "zero"):
+            return 0.0
+        if latency == "realistic":
+            return 1.0
+        try:
+            return max(0.0, float(latency))
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid cassette latency: {latency}") from exc
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed cassette line in {self.path}")
+                    continue
+                self._interactions[record["key"]].append(record)
+                self._methods.add(record.get("method"))
+
+    @property
+    def size(self) -> int:
+        return sum(len(v) for v in self._interactions.values())
+
+    def has_method(self, method: str) -> bool:
+        """Whether any interaction was recorded for ``method``."""
+        return method in self._methods
+
+    @staticmethod
+    def make_key(method: str, args: tuple = (), kwargs: Optional[dict] = None) -> str:
+        """Build a stable key from the method name and JSON-encoded arguments."""
+        payload = {"args": list(args), "kwargs": kwargs or {}}
+        return f"{method}:{json.dumps(payload, sort_keys=True, default=json_default)}"
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        """Return the next recorded interaction for ``key`` (or None if never recorded)."""
+        with self._lock:
+            records = self._interactions.get(key)
+            if not records:
+                return None
+            idx = self._cursors[key]
+            self._cursors[key] = idx + 1
+            return records[min(idx, len(records) - 1)]
+
+    def _append(self, key: str, method: str, response: Any, error: Optional[str], latency: float):
+        record = {"key": key, "method": method, "response": response, "error": error, "latency": latency}
+        line = json.dumps(record, default=json_default)
+        with self._lock:
+            # Round-trip through JSON so replayed and recorded values look identical
+            self._interactions[key].append(json.loads(line))
+            self._methods.add(method)
+            self._cursors[key] = len(self._interactions[key])
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.stats["recorded"] += 1
+
+    def _replay_or_miss(self, key: str) -> Tuple[Optional[Dict], bool]:
+        """Return (record, should_call_live)."""
+        if self.mode == "record":
+            return None, True
+        record = self._lookup(key)
+        if record is not None:
+            self.stats["replayed"] += 1
+            return record, False
+        self.stats["misses"] += 1
+        if self.mode == "replay":
+            raise CassetteMiss(f"No recorded interaction for {key}")
+        return None, True
+
+    @staticmethod
+    def _require_live(key: str, fn: Optional[Callable]) -> None:
+        if fn is None:
+            raise CassetteMiss(f"No recorded interaction for {key} and no live service to call")
+
+    @staticmethod
+    def _result(record: Dict) -> Any:
+        if record.get("error"):
+            raise RecordedError(record["error"])
+        return record.get("response")
+
+    async def call_async(self, method: str, fn: Callable, *args, **kwargs) -> Any:
+        """Replay or record an awaitable call."""
+        key = self.make_key(method, args, kwargs)
+        record, live = self._replay_or_miss(key)
+        if not live:
+            delay = record.get("latency", 0.0) * self.latency_scale
+            if delay:
+                await asyncio.sleep(delay)
+            return self._result(record)
+
+        self._require_live(key, fn)
+        started = time.perf_counter()
+        try:
+            response = await fn(*args, **kwargs)
+        except Exception as e:
+            self._append(key, method, None, f"{type(e).__name__}: {e}", time.perf_counter() - started)
+            raise
+        self._append(key, method, response, None, time.perf_counter() - started)
+        return response
+
+    def call(self, method: str, fn: Callable, *args, **kwargs) -> Any:
+        """Replay or record a blocking call."""
+        key = self.make_key(method, args, kwargs)
+        record, live = self._replay_or_miss(key)
+        if not live:
+            delay = record.get("latency", 0.0) * self.latency_scale
+            if delay:
+                time.sleep(delay)
+            return self._result(record)
+
+        self._require_live(key, fn)
+        started = time.perf_counter()
+        try:
+            response = fn(*args, **kwargs)
+        except Exception as e:
+            self._append(key, method, None, f"{type(e).__name__}: {e}", time.perf_counter() - started)
+            raise
+        self._append(key, method, response, None, time.perf_counter() - started)
+        return response
+
+    def rewind(self):
+        """Restart every replay sequence from the first recorded response."""
+        with self._lock:
+            self._cursors.clear()
+
+
+class CassetteExchange:
+    """
+    Wraps a trading backend so every async API call goes through a cassette.
+
+    Sync helpers (``round_size``, ``extract_oids``) are pure and pass straight
+    through. Without a wrapped exchange (replay) only methods recorded on the
+    cassette exist, so ``hasattr`` checks see the recorded backend's API; pure
+    helpers then fall back to minimal implementations.
+    """
+
+    def __init__(self, exchange: Any, cassette: Cassette):
+        if exchange is None and cassette.mode == "record":
+            raise ValueError("Recording a cassette needs a live exchange")
+        self._exchange = exchange
+        self.cassette = cassette
+
+    def __getattr__(self, name: str):
+        if self._exchange is not None:
+            target = getattr(self._exchange, name)
+            if not inspect.iscoroutinefunction(target):
+                return target
+        elif name.startswith("_") or not self.cassette.has_method(name):
+            raise AttributeError(f"{type(self).__name__} has no recorded method {name!r}")
+        else:
+            target = None
+
+        async def _call(*args, **kwargs):
+            return await self.cassette.call_async(name, target, *args, **kwargs)
+        return _call
+
+    def round_size(self, asset: str, amount: float) -> float:
+        if self._exchange is not None:
+            return self._exchange.round_size(asset, amount)
+        return round(amount, 6)
+
+    def extract_oids(self, order_result: dict) -> List[str]:
+        if self._exchange is not None:
+            return self._exchange.extract_oids(order_result)
+        statuses = (order_result or {}).get("response", {}).get("data", {}).get("statuses", [])
+        oids = []
+        for status in statuses:
+            for key in ("resting", "filled"):
+                if isinstance(status.get(key), dict) and "oid" in status[key]:
+                    oids.append(status[key]["oid"])
+        return oids
+
+
+class CassetteAgent:
+    """
+    Wraps a decision agent so ``decide_trade`` calls go through a cassette.
+
+    Calls are keyed on the asset list only: the context embeds timestamps and
+    live prices, so the n-th decision replays the n-th recorded response.
+    """
+
+    def __init__(self, agent: Any, cassette: Cassette):
+        if agent is None and cassette.mode == "record":
+            raise ValueError("Recording a cassette needs a live agent")
+        self._agent = agent
+        self.cassette = cassette
+
+    def __getattr__(self, name: str):
+        if self._agent is None:
+            raise AttributeError(f"{type(self).__name__} replays without an agent; no attribute {name!r}")
+        return getattr(self._agent, name)
+
+    def decide_trade(self, assets, context):
+        def _live(_assets):
+            return self._agent.decide_trade(assets, context)
+
+        return self.cassette.call("decide_trade", _live if self._agent is not None else None, list(assets))
+
+    async def decide_trade_async(self, assets, context):
+        native = getattr(self._agent, "decide_trade_async", None) if self._agent is not None else None
+
+        async def _live(_assets):
+            if native:
+                return await native(assets, context)
+            return await asyncio.to_thread(self._agent.decide_trade, assets, context)
+
+        return await self.cassette.call_async("decide_trade", _live if self._agent is not None else None,
+                                              list(assets))
+
+    async def decide_trade_streaming(self, assets, context, on_decision):
+        """Record a streamed decision; on replay, emit the recorded decisions in order."""
+        native = getattr(self._agent, "decide_trade_streaming", None) if self._agent is not None else None
+        emitted = set()
+
+        def _forward(decision):
+            emitted.add(decision.get("asset"))
+            on_decision(decision)
+
+        async def _live(_assets):
+            if native:
+                return await native(assets, context, _forward)
+            return await asyncio.to_thread(self._agent.decide_trade, assets, context)
+
+        result = await self.cassette.call_async("decide_trade", _live if self._agent is not None else None,
+                                                list(assets))
+        for decision in (result or {}).get("trade_decisions", []):
+            if decision.get("asset") not in emitted:
+                _forward(decision)
+        return result
+
+    async def aclose(self):
+        aclose = getattr(self._agent, "aclose", None)
+        if aclose:
+            await aclose()
+
+
+def open_cassettes(directory: str, mode: str, latency: Any = "zero") -> Tuple[Cassette, Cassette]:
+    """Open the exchange and agent cassettes stored under ``directory``."""
+    base = Path(directory)
+    return (
+        Cassette(str(base / "exchange.jsonl"), mode=mode, latency=latency),
+        Cassette(str(base / "agent.jsonl"), mode=mode, latency=latency),
+    )
@@ -0,0 +1,418 @@
+"""
+Stub LLM server - local OpenAI/OpenRouter-compatible chat completions endpoint.
+
+Serves the protocol used by ``TradingAgent._decide``: tool calls for
+``fetch_taapi_indicator``, ``response_format`` json_schema, SSE streaming and
+usage accounting. Decisions come from deterministic policies, latency from a
+configurable distribution, and faults (429, 5xx, malformed JSON) are injected
+at configurable rates, so the decision path can be load-tested offline.
+
+Examples:
+    python -m src.backend.testing.stub_llm --port 8089 --policy random --latency lognormal:0.8,0.4
+    OPENROUTER_BASE_URL=http://127.0.0.1:8089/api/v1 python main.py
+
+    async with StubLLMServer(policy="hold", faults={"429": 0.1}) as stub:
+        agent.base_url = stub.url
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = ("buy", "sell", "hold")
+MALFORMED_STYLES = ("truncate", "fence", "trailing_comma")
+
+# (assets, payload, rng) -> trade_decisions
+Policy = Callable[[List[str], Dict[str, Any], random.Random], List[Dict[str, Any]]]
+
+
+def _decision(asset: str, action: str, allocation: float = 0.0, rationale: str = "") -> Dict[str, Any]:
+    return {
+        "asset": asset,
+        "action": action,
+        "allocation_usd": allocation if action != "hold" else 0.0,
+        "tp_price": None,
+        "sl_price": None,
+        "exit_plan": "",
+        "rationale": rationale or f"stub {action}",
+    }
+
+
+def hold_policy(assets, payload, rng):
+    return [_decision(a, "hold") for a in assets]
+
+
+def long_policy(assets, payload, rng):
+    return [_decision(a, "buy", 100.0) for a in assets]
+
+
+def short_policy(assets, payload, rng):
+    return [_decision(a, "sell", 100.0) for a in assets]
+
+
+def random_policy(assets, payload, rng):
+    return [_decision(a, rng.choice(ACTIONS), float(rng.randrange(50, 500, 50))) for a in assets]
+
+
+POLICIES: Dict[str, Policy] = {
+    "hold": hold_policy,
+    "long": long_policy,
+    "short": short_policy,
+    "random": random_policy,
+}
+
+
+class LatencyModel:
+    """
+    Response latency distribution in seconds.
+
+    Spec strings: ``fixed:S``, ``uniform:LO,HI``, ``normal:MEAN,STD``,
+    ``lognormal:MEDIAN,SIGMA`` (heavy right tail like real providers) and
+    ``pareto:SCALE,ALPHA``. Samples are clamped at zero.
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal", "pareto")
+
+    def __init__(self, kind: str = "fixed", params: tuple = (0.0,), seed: Optional[int] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution: {kind} (expected one of {self.KINDS})")
+        self.kind = kind
+        self.params = tuple(float(p) for p in params)
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: Union[str, float, "LatencyModel", None], seed: Optional[int] = None) -> "LatencyModel":
+        if isinstance(spec, LatencyModel):
+            return spec
+        if spec is None:
+            return cls("fixed", (0.0,), seed)
+        if isinstance(spec, (int, float)):
+            return cls("fixed", (spec,), seed)
+        kind, _, args = str(spec).partition(":")
+        params = tuple(float(p) for p in args.split(",") if p.strip()) or (0.0,)
+        return cls(kind.strip(), params, seed)
+
+    def sample(self) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            value = p[0]
+        elif self.kind == "uniform":
+            value = self.rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            value = self.rng.gauss(p[0], p[1])
+        elif self.kind == "lognormal":
+            value = p[0] * self.rng.lognormvariate(0.0, p[1])
+        else:
+            value = p[0] * self.rng.paretovariate(p[1])
+        return max(0.0, value)
+
+
+class StubLLMServer:
+    """
+    aiohttp chat completions server for offline load tests.
+
+    Decisions are produced by ``policy`` for the assets found in the request's
+    json_schema (``default_assets`` when structured output is off). Policy
+    randomness is seeded from ``seed`` and the conversation, so identical
+    requests get identical decisions regardless of concurrency or arrival
+    order. When ``tool_rounds`` > 0 and tools are offered, the first rounds
+    answer with ``fetch_taapi_indicator`` calls instead of a decision.
+    """
+
+    def __init__(
+        self,
+        policy: Union[str, Policy] = "hold",
+        latency: Union[str, float, LatencyModel, None] = None,
+        faults: Optional[Dict[str, float]] = None,
+        tool_rounds: int = 0,
+        stream_chunks: int = 8,
+        malformed_style: str = "truncate",
+        default_assets: Optional[List[str]] = None,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Initialize stub server.
+
+        Args:
+            policy: Policy name from POLICIES or a callable (assets, payload, rng) -> decisions
+            latency: Distribution spec for the total response time
+            faults: Injection rates per kind, e.g. {"429": 0.05, "500": 0.01, "malformed": 0.02}
+            tool_rounds: Tool-call rounds before answering with a decision
+            stream_chunks: Content chunks per streamed response
+            malformed_style: "truncate" (cut off mid-object), "fence" (Markdown code fence)
+                or "trailing_comma"
+            default_assets: Assets used when the request carries no json_schema
+            seed: Seed for latency, fault and policy randomness
+            host: Bind address
+            port: Bind port (0 = pick a free port)
+        """
+        self.policy = POLICIES[policy] if isinstance(policy, str) else policy
+        self.latency = LatencyModel.parse(latency, seed)
+        self.faults = {str(kind): float(rate) for kind, rate in (faults or {}).items()}
+        for kind in self.faults:
+            if kind != "malformed" and not kind.isdigit():
+                raise ValueError(f"Unknown fault kind: {kind} (expected an HTTP status or 'malformed')")
+        self.tool_rounds = tool_rounds
+        self.stream_chunks = max(1, stream_chunks)
+        if malformed_style not in MALFORMED_STYLES:
+            raise ValueError(f"Unknown malformed style: {malformed_style} (expected one of {MALFORMED_STYLES})")
+        self.malformed_style = malformed_style
+        self.default_assets = default_assets or ["BTC"]
+        self.seed = seed
+        self.host = host
+        self.port = port
+        self.fault_rng = random.Random(seed)
+
+        self.stats: Counter = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.url: Optional[str] = None
+        self.base_url: Optional[str] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/v1/chat/completions", self.handle)
+        app.router.add_post("/chat/completions", self.handle)
+        return app
+
+    async def start(self) -> "StubLLMServer":
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{self.host}:{self.port}/api/v1"
+        self.url = f"{self.base_url}/chat/completions"
+        logger.info(f"Stub LLM server listening on {self.base_url}")
+        return self
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # ------------------------------------------------------------------
+    # Request handling
+    # ------------------------------------------------------------------
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        self.stats["requests"] += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            try:
+                payload = await request.json()
+            except json.JSONDecodeError:
+                return self._error(400, "Request body is not valid JSON")
+
+            delay = self.latency.sample()
+            fault = self._pick_fault()
+            if fault is not None and fault != "malformed":
+                await asyncio.sleep(delay)
+                return self._error(int(fault), "Injected fault")
+
+            message = self._reply(payload, malformed=fault == "malformed")
+            usage = self._usage(payload, message)
+            if payload.get("stream"):
+                self.stats["streamed"] += 1
+                return await self._stream(request, payload, message, usage, delay)
+            await asyncio.sleep(delay)
+            self.stats["status_200"] += 1
+            return web.json_response(self._completion(payload, message, usage))
+        finally:
+            self.in_flight -= 1
+
+    def _pick_fault(self) -> Optional[str]:
+        roll = self.fault_rng.random()
+        for kind, rate in self.faults.items():
+            if roll < rate:
+                self.stats[f"fault_{kind}"] += 1
+                return kind
+            roll -= rate
+        return None
+
+    def _error(self, status: int, message: str) -> web.Response:
+        self.stats[f"status_{status}"] += 1
+        headers = {"Retry-After": "1"} if status == 429 else None
+        body = {"error": {"code": status, "message": message, "metadata": {"provider_name": "stub"}}}
+        return web.json_response(body, status=status, headers=headers)
+
+    @staticmethod
+    def _assets(payload: Dict[str, Any]) -> Optional[List[str]]:
+        """Assets from the json_schema ``asset`` enum, if structured output was requested."""
+        try:
+            schema = payload["response_format"]["json_schema"]["schema"]
+            return list(schema["properties"]["trade_decisions"]["items"]["properties"]["asset"]["enum"])
+        except (KeyError, TypeError):
+            return None
+
+    def _policy_rng(self, payload: Dict[str, Any]) -> random.Random:
+        conversation = json.dumps(payload.get("messages", []), sort_keys=True, default=str)
+        digest = hashlib.sha256(f"{self.seed}:{conversation}".encode()).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def _reply(self, payload: Dict[str, Any], malformed: bool = False) -> Dict[str, Any]:
+        """Build the assistant message: tool calls, a decision, or truncated JSON."""
+        assets = self._assets(payload) or self.default_assets
+        messages = payload.get("messages") or []
+        rounds_done = sum(1 for m in messages if m.get("role") == "assistant" and m.get("tool_calls"))
+
+        if payload.get("tools") and rounds_done < self.tool_rounds:
+            self.stats["tool_call_responses"] += 1
+            return {"role": "assistant", "content": None, "tool_calls": [
+                {
+                    "id": f"call_{rounds_done}_{i}",
+                    "type": "function",
+                    "function": {
+                        "name": "fetch_taapi_indicator",
+                        "arguments": json.dumps({"indicator": "rsi", "symbol": f"{asset}/USDT", "interval": "5m"}),
+                    },
+                }
+                for i, asset in enumerate(assets)
+            ]}
+
+        decisions = self.policy(assets, payload, self._policy_rng(payload))
+        content = json.dumps({"reasoning": f"stub policy decision for {', '.join(assets)}", "trade_decisions": decisions})
+        if malformed:
+            content = self._malform(content)
+        return {"role": "assistant", "content": content}
+
+    def _malform(self, content: str) -> str:
+        if self.malformed_style == "fence":
+            return f"```json\n{content}\n```"
+        if self.malformed_style == "trailing_comma":
+            return content[:-2] + ",]}"
+        return content[: len(content) * 2 // 3]
+
+    @staticmethod
+    def _usage(payload: Dict[str, Any], message: Dict[str, Any]) -> Dict[str, Any]:
+        """Rough token counts (~4 characters per token)."""
+        prompt = max(1, len(json.dumps(payload.get("messages", []), default=str)) // 4)
+        completion = max(1, len(json.dumps(message.get("tool_calls") or message.get("content") or "")) // 4)
+        return {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+            "prompt_tokens_details": {"cached_tokens": 0},
+            "completion_tokens_details": {"reasoning_tokens": 0},
+        }
+
+    @staticmethod
+    def _completion(payload: Dict[str, Any], message: Dict[str, Any], usage: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": f"stub-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+            }],
+            "usage": usage,
+        }
+
+    async def _stream(self, request, payload, message, usage, delay) -> web.StreamResponse:
+        """SSE response: first chunk after ~30% of ``delay``, the rest spread evenly."""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(b": OPENROUTER PROCESSING\n\n")
+
+        if message.get("tool_calls"):
+            deltas = [{"tool_calls": [dict(tc, index=i)]} for i, tc in enumerate(message["tool_calls"])]
+        else:
+            content = message["content"]
+            size = max(1, -(-len(content) // self.stream_chunks))
+            deltas = [{"content": content[i:i + size]} for i in range(0, len(content), size)]
+
+        await asyncio.sleep(delay * 0.3)
+        gap = delay * 0.7 / max(1, len(deltas) - 1)
+        for i, delta in enumerate(deltas):
+            if i:
+                await asyncio.sleep(gap)
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "model": payload.get("model", "stub"),
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        finish = "tool_calls" if message.get("tool_calls") else "stop"
+        final = {"id": "stub", "object": "chat.completion.chunk",
+                 "choices": [{"index": 0, "delta": {}, "finish_reason": finish}]}
+        await response.write(f"data: {json.dumps(final)}\n\n".encode())
+        await response.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        self.stats["status_200"] += 1
+        return response
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local OpenRouter-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--policy", default="hold", choices=sorted(POLICIES), help="Decision policy")
+    parser.add_argument("--latency", default="fixed:0", help="e.g. fixed:0.5, uniform:0.2,1, lognormal:0.8,0.4")
+    parser.add_argument("--tool-rounds", type=int, default=0, help="Tool-call rounds before each decision")
+    parser.add_argument("--error-429", type=float, default=0.0, help="Rate of 429 responses")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="Rate of 502 responses")
+    parser.add_argument("--malformed", type=float, default=0.0, help="Rate of malformed JSON decisions")
+    parser.add_argument("--malformed-style", default="truncate", choices=MALFORMED_STYLES)
+    parser.add_argument("--assets", nargs="+", default=["BTC"], help="Assets when no json_schema is sent")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+async def _serve(args) -> None:
+    faults = {"429": args.error_429, "502": args.error_5xx, "malformed": args.malformed}
+    stub = StubLLMServer(
+        policy=args.policy,
+        latency=args.latency,
+        faults={kind: rate for kind, rate in faults.items() if rate > 0},
+        tool_rounds=args.tool_rounds,
+        malformed_style=args.malformed_style,
+        default_assets=args.assets,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    async with stub:
+        print(f"Stub LLM server: set OPENROUTER_BASE_URL={stub.base_url}")
+        try:
+            while True:
+                await asyncio.sleep(60)
+                logger.info(f"Stub stats: {dict(stub.stats)} (peak in flight {stub.peak_in_flight})")
+        finally:
+            print(f"Stub stats: {dict(stub.stats)}")
+
+
+def main(argv=None) -> None:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    try:
+        asyncio.run(_serve(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
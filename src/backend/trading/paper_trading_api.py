@@ -12,6 +12,8 @@ import json
 import os
 from dataclasses import dataclass, field
 
+STATE_PATH = "data/paper_trading_state.json"
+
 
 @dataclass
 class Position:
@@ -56,13 +58,15 @@ class PaperTradingAPI:
     - Ingen ekte penger involvert!
     """
 
-    def __init__(self, starting_balance: float = 10000.0):
+    def __init__(self, starting_balance: float = 10000.0, state_path: str = STATE_PATH):
         """
         Initialize paper trading API.
 
         Args:
             starting_balance: Starting USDC balance (default: $10,000)
+            state_path: JSON file the simulated account is saved to and resumed from
         """
+        self.state_path = state_path
         self.balance = starting_balance
         self.initial_balance = starting_balance
         self.positions: Dict[str, Position] = {}
@@ -86,7 +90,7 @@ class PaperTradingAPI:
     def _save_state(self):
         """Save state to file"""
         try:
-            os.makedirs("data", exist_ok=True)
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
             state = {
                 "balance": self.balance,
                 "positions": [
@@ -105,7 +109,7 @@ class PaperTradingAPI:
                     } for o in self.orders
                 ]
             }
-            with open("data/paper_trading_state.json", "w") as f:
+            with open(self.state_path, "w") as f:
                 json.dump(state, f, indent=2)
         except Exception as e:
             logging.error(f"Failed to save paper state: {e}")
@@ -113,9 +117,9 @@ class PaperTradingAPI:
     def _load_state(self):
         """Load state from file"""
         try:
-            if not os.path.exists("data/paper_trading_state.json"):
+            if not os.path.exists(self.state_path):
                 return
-            with open("data/paper_trading_state.json", "r") as f:
+            with open(self.state_path, "r") as f:
                 state = json.load(f)
             
             self.balance = state.get("balance", self.initial_balance)
@@ -147,10 +151,14 @@ class PaperTradingAPI:
         except Exception as e:
             logging.error(f"Failed to load state: {e}")
 
+    def _now(self) -> datetime:
+        """Current time used for fills and orders (overridden by simulations)."""
+        return datetime.now(timezone.utc)
+
     def _get_next_oid(self) -> str:
         """Generate unique order ID."""
         self.order_counter += 1
-        return f"paper_{self.order_counter}_{int(datetime.now(timezone.utc).timestamp())}"
+        return f"paper_{self.order_counter}_{int(self._now().timestamp())}"
 
     async def get_current_price(self, asset: str) -> float:
         """
@@ -319,7 +327,8 @@ class PaperTradingAPI:
             self.positions[asset] = Position(
                 coin=asset,
                 entry_px=fill_price,
-                size=amount
+                size=amount,
+                timestamp=self._now()
             )
 
         # Record fill
@@ -330,7 +339,7 @@ class PaperTradingAPI:
             "side": "B",
             "px": fill_price,
             "sz": amount,
-            "time": datetime.now(timezone.utc).isoformat(),
+            "time": self._now().isoformat(),
             "fee": cost * 0.0002,  # 0.02% taker fee
         })
 
@@ -394,7 +403,8 @@ class PaperTradingAPI:
             self.positions[asset] = Position(
                 coin=asset,
                 entry_px=fill_price,
-                size=-amount  # Negative = short
+                size=-amount,  # Negative = short
+                timestamp=self._now()
             )
 
         # Record fill
@@ -405,7 +415,7 @@ class PaperTradingAPI:
             "side": "A",
             "px": fill_price,
             "sz": amount,
-            "time": datetime.now(timezone.utc).isoformat(),
+            "time": self._now().isoformat(),
             "fee": received * 0.0002,
         })
 
@@ -453,7 +463,8 @@ class PaperTradingAPI:
             sz=amount,
             limit_px=tp_price,
             order_type={"trigger": {"triggerPx": tp_price, "isMarket": True, "tpsl": "tp"}},
-            reduce_only=True
+            reduce_only=True,
+            timestamp=self._now()
         )
 
         self.orders.append(order)
@@ -500,7 +511,8 @@ class PaperTradingAPI:
             sz=amount,
             limit_px=sl_price,
             order_type={"trigger": {"triggerPx": sl_price, "isMarket": True, "tpsl": "sl"}},
-            reduce_only=True
+            reduce_only=True,
+            timestamp=self._now()
         )
 
         self.orders.append(order)
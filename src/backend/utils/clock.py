@@ -0,0 +1,58 @@
+"""Clock abstractions so the engine loop can run in real or simulated time."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+
+class SystemClock:
+    """Wall-clock time backed by ``datetime.now`` and ``asyncio.sleep``."""
+
+    def now(self) -> datetime:
+        """Return the current UTC time."""
+        return datetime.now(timezone.utc)
+
+    async def sleep(self, seconds: float) -> None:
+        """Suspend the caller for ``seconds`` of real time."""
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Simulated clock for accelerated replays.
+
+    ``sleep`` advances the virtual time instantly instead of waiting, so a loop
+    that sleeps for an interval between iterations runs as fast as the CPU allows.
+    """
+
+    def __init__(self, start: datetime):
+        """
+        Initialize the clock.
+
+        Args:
+            start: Initial virtual time (naive values are treated as UTC)
+        """
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        self._now = start
+
+    def now(self) -> datetime:
+        """Return the current virtual time."""
+        return self._now
+
+    def set(self, moment: datetime) -> None:
+        """Jump to ``moment``; the clock never moves backwards."""
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        if moment > self._now:
+            self._now = moment
+
+    def advance(self, seconds: float) -> None:
+        """Move the virtual time forward by ``seconds``."""
+        self._now += timedelta(seconds=seconds)
+
+    async def sleep(self, seconds: float) -> None:
+        """Advance virtual time and yield control once to the event loop."""
+        self.advance(seconds)
+        await asyncio.sleep(0)
@@ -0,0 +1,193 @@
+"""Token-budgeted serialization of the LLM context payload."""
+
+from __future__ import annotations
+
+import copy
+import json
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from src.backend.utils.prompt_utils import json_default, round_or_none, round_series
+
+# Keys that duplicate information already present elsewhere in a market section
+REDUNDANT_MARKET_KEYS = ("price_history", "funding_annualized_pct")
+
+# Series lengths tried in order until the context fits the budget (0 = drop series)
+SERIES_STEPS = (20, 10, 5, 3, 0)
+# Account list lengths tried alongside the series steps
+HISTORY_STEPS = (10, 10, 5, 3, 1)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for JSON/English)."""
+    return (len(text) + 3) // 4
+
+
+def price_decimals(price: Any) -> int:
+    """Decimals that keep ~6 significant digits for a price of this magnitude."""
+    try:
+        value = abs(float(price))
+    except (TypeError, ValueError):
+        return 2
+    if value == 0 or math.isnan(value) or math.isinf(value):
+        return 2
+    return max(2, min(10, 5 - int(math.floor(math.log10(value)))))
+
+
+def round_significant(value: float, digits: int = 4) -> float:
+    """Round to ``digits`` significant digits (keeps tiny rates like funding readable)."""
+    if value == 0 or math.isnan(value) or math.isinf(value):
+        return value
+    return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+
+
+@dataclass
+class ContextStats:
+    """Outcome of a build: achieved size and how much trimming was needed."""
+    tokens: int
+    budget: int
+    series_length: int
+    chars: int
+
+    @property
+    def within_budget(self) -> bool:
+        return self.budget <= 0 or self.tokens <= self.budget
+
+
+class ContextBuilder:
+    """
+    Compresses the context payload into compact JSON under a token budget.
+
+    Numbers are rounded per asset (prices keep ~6 significant digits, oscillators
+    one decimal, funding rates 4 significant digits, position and fill sizes the
+    asset's size precision), redundant keys and empty market values are dropped,
+    and indicator series / account history are trimmed progressively until the
+    estimate fits. The account keeps empty collections so a flat account still
+    says ``"positions":[]``.
+    """
+
+    OSCILLATOR_KEYS = ("rsi", "stoch", "cci", "mfi", "willr", "adx")
+    PRICE_KEYS = ("price", "px", "tp", "sl")  # suffixes: entry_price, liquidation_px, trigger_price...
+    SIZE_KEYS = ("quantity", "size", "amount", "szi", "sz")
+    ASSET_KEYS = ("asset", "symbol", "coin")
+
+    def __init__(self, token_budget: int = 8000,
+                 round_size: Optional[Callable[[str, float], float]] = None):
+        """
+        Initialize context builder.
+
+        Args:
+            token_budget: Maximum estimated prompt tokens (0 disables trimming)
+            round_size: ``(asset, amount) -> amount`` rounding to the exchange's
+                size precision (sizes keep 6 significant digits without it)
+        """
+        self.token_budget = token_budget
+        self.round_size = round_size
+        self.last_stats: ContextStats | None = None
+
+    def build(self, payload: dict) -> tuple[str, ContextStats]:
+        """Serialize ``payload`` and return (compact_json, stats)."""
+        base = self._prepare(payload)
+        text = ""
+        series_length = SERIES_STEPS[0]
+
+        for series_length, history_length in zip(SERIES_STEPS, HISTORY_STEPS):
+            trimmed = self._trim(base, series_length, history_length)
+            text = json.dumps(trimmed, separators=(",", ":"), default=json_default)
+            if self.token_budget <= 0 or estimate_tokens(text) <= self.token_budget:
+                break
+
+        self.last_stats = ContextStats(
+            tokens=estimate_tokens(text),
+            budget=self.token_budget,
+            series_length=series_length,
+            chars=len(text),
+        )
+        return text, self.last_stats
+
+    # ------------------------------------------------------------------
+
+    def _prepare(self, payload: dict) -> dict:
+        """Round numbers and drop redundant/empty market values (on a copy)."""
+        prepared = copy.deepcopy(payload)
+        sections = prepared.get("market_data") or []
+        for idx, section in enumerate(sections):
+            for key in REDUNDANT_MARKET_KEYS:
+                section.pop(key, None)
+            decimals = price_decimals(section.get("current_price"))
+            sections[idx] = self._drop_empty(self._round(section, decimals))
+        if "account" in prepared:
+            prepared["account"] = self._round(prepared["account"], 2, price_aware=True)
+        return prepared
+
+    def _round(self, value: Any, decimals: int, key: str = "", price_aware: bool = False,
+               asset: Optional[str] = None) -> Any:
+        if isinstance(value, dict):
+            if price_aware:
+                # Account entries (positions, fills) carry their own price scale and asset
+                price = next((value.get(k) for k in ("entry_price", "price", "current_price") if value.get(k)), None)
+                if price is not None:
+                    decimals = price_decimals(price)
+                asset = next((value[k] for k in self.ASSET_KEYS if isinstance(value.get(k), str)), asset)
+            return {k: self._round(v, decimals, k, price_aware, asset) for k, v in value.items()}
+        if isinstance(value, list):
+            digits = self._digits(key, decimals, price_aware)
+            if value and all(isinstance(v, (int, float)) or v is None for v in value):
+                return round_series(value, digits)
+            return [self._round(v, decimals, key, price_aware, asset) for v in value]
+        if isinstance(value, float):
+            name = key.lower()
+            if "funding" in name:
+                return round_significant(value, 4)
+            if price_aware and name in self.SIZE_KEYS:
+                return self._round_size(asset, value)
+            return round_or_none(value, self._digits(key, decimals, price_aware))
+        return value
+
+    def _digits(self, key: str, decimals: int, price_aware: bool) -> int:
+        """Decimals for a number: oscillators 1; in the account, prices keep ``decimals`` and USD values 2."""
+        name = key.lower()
+        if any(tag in name for tag in self.OSCILLATOR_KEYS):
+            return 1
+        if price_aware and not (name in self.PRICE_KEYS or name.endswith(("_price", "_px"))):
+            return 2
+        return decimals
+
+    def _round_size(self, asset: Optional[str], amount: float) -> float:
+        if self.round_size is not None and asset:
+            try:
+                return self.round_size(asset, amount)
+            except Exception:
+                pass
+        return round_significant(amount, 6)
+
+    def _drop_empty(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            cleaned = {k: self._drop_empty(v) for k, v in value.items()}
+            return {k: v for k, v in cleaned.items() if v not in (None, "", [], {})}
+        if isinstance(value, list):
+            return [self._drop_empty(v) for v in value]
+        return value
+
+    def _trim(self, payload: dict, series_length: int, history_length: int) -> dict:
+        trimmed = dict(payload)
+        trimmed["market_data"] = [
+            self._drop_empty(self._trim_series(section, series_length))
+            for section in payload.get("market_data") or []
+        ]
+        account = payload.get("account")
+        if isinstance(account, dict):
+            trimmed["account"] = {
+                k: (v[-history_length:] if isinstance(v, list) and k.startswith("recent_") else v)
+                for k, v in account.items()
+            }
+        return trimmed
+
+    def _trim_series(self, value: Any, length: int) -> Any:
+        if isinstance(value, dict):
+            return {k: self._trim_series(v, length) for k, v in value.items()}
+        if isinstance(value, list):
+            return value[-length:] if length > 0 else []
+        return value
+
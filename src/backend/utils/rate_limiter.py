@@ -0,0 +1,78 @@
+"""Async rate limiting and request coalescing helpers for external APIs."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class TokenBucket:
+    """
+    Async token bucket: ``capacity`` requests per ``period`` seconds.
+
+    Callers wait in ``acquire`` until their token is due, which keeps the
+    client under the provider quota instead of reacting to 429 responses.
+    Tokens are reserved up front (the balance may go negative), so waiters are
+    served in arrival order without a lock and the bucket works across loops.
+    """
+
+    def __init__(self, capacity: int, period: float):
+        """
+        Initialize token bucket.
+
+        Args:
+            capacity: Requests allowed per period (also the burst size)
+            period: Length of the quota window in seconds
+        """
+        if capacity <= 0 or period <= 0:
+            raise ValueError("TokenBucket capacity and period must be positive")
+        self.capacity = float(capacity)
+        self.rate = capacity / period  # tokens per second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` now and return how many seconds the caller must wait."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= tokens
+        return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Wait until the reserved tokens are due; returns seconds waited."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one in-flight task.
+
+    The first caller for a key starts the work; later callers with the same key
+    await the same result. A caller being cancelled does not cancel the shared
+    task for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved so orphaned failures are not logged as unhandled
@@ -0,0 +1,134 @@
+"""
+Awaitable database access for async callers (FastAPI routes, NiceGUI handlers).
+
+``DatabaseManager`` runs synchronous SQLAlchemy sessions; calling it from a
+coroutine blocks the event loop the trading loop also runs on.
+``AsyncDatabaseManager`` exposes the same public operations as coroutines and
+runs them on dedicated database threads: one writer thread (writes are
+serialized by SQLite anyway) and a small reader pool sized like the read
+connection pool. It owns its own ``DatabaseManager`` and therefore its own
+connection pools.
+"""
+
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.backend.config_loader import CONFIG
+from src.database.db_manager import DatabaseManager
+
+# Context managers hand out sessions bound to the calling thread; use run_sync instead
+_SYNC_ONLY = {"session_scope", "read_scope"}
+# Methods that only query and can run on the reader threads
+_READ_PREFIXES = ("get_", "search_")
+
+
+class AsyncDatabaseManager:
+    """
+    Coroutine facade over ``DatabaseManager``.
+
+    Every public ``DatabaseManager`` method is available with the same
+    signature as a coroutine (``await adb.get_trades(limit=10)``). ``get_*``
+    and ``search_*`` methods run on the reader threads, everything else on the single writer
+    thread in call order.
+    """
+
+    def __init__(self, db_url: str = None, sqlite_profile: Optional[str] = None,
+                 db: Optional[DatabaseManager] = None, read_workers: Optional[int] = None):
+        """
+        Initialize async database manager.
+
+        Args:
+            db_url: SQLAlchemy database URL (see ``DatabaseManager``)
+            sqlite_profile: SQLite profile (see ``DatabaseManager``)
+            db: Existing DatabaseManager to wrap instead of creating one
+                (required for in-memory SQLite, which is per-engine)
+            read_workers: Reader threads (defaults to CONFIG db_read_pool_size)
+        """
+        self.db = db if db is not None else DatabaseManager(db_url=db_url, sqlite_profile=sqlite_profile)
+        read_workers = read_workers or int(CONFIG.get("db_read_pool_size") or 4)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="db-reader")
+        self._closed = False
+
+    async def run_sync(self, fn: Callable[..., Any], *args, read: bool = False, **kwargs) -> Any:
+        """
+        Run ``fn(db, *args, **kwargs)`` on a database thread.
+
+        For work that needs a session directly, e.g.
+        ``await adb.run_sync(lambda db: ...)``. ``read=True`` uses the reader
+        threads instead of the writer thread.
+        """
+        if self._closed:
+            raise RuntimeError("AsyncDatabaseManager is closed")
+        executor = self._readers if read else self._writer
+        call = functools.partial(fn, self.db, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+    async def close(self) -> None:
+        """Finish queued calls, stop the database threads and release connections."""
+        if self._closed:
+            return
+        self._closed = True
+        await asyncio.to_thread(self._shutdown)
+
+    def _shutdown(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        self.db.engine.dispose()
+        if self.db.read_engine is not self.db.engine:
+            self.db.read_engine.dispose()
+
+    async def __aenter__(self) -> "AsyncDatabaseManager":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+def _make_async(name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+    read = name.startswith(_READ_PREFIXES)
+
+    @functools.wraps(method)
+    async def call(self: AsyncDatabaseManager, *args, **kwargs):
+        return await self.run_sync(method, *args, read=read, **kwargs)
+
+    return call
+
+
+for _name, _method in inspect.getmembers(DatabaseManager, inspect.isfunction):
+    if not _name.startswith("_") and _name not in _SYNC_ONLY:
+        setattr(AsyncDatabaseManager, _name, _make_async(_name, _method))
+
+
+# Global async database manager instance (singleton pattern)
+_async_db_manager: Optional[AsyncDatabaseManager] = None
+
+
+def get_async_db_manager(db_url: str = None) -> AsyncDatabaseManager:
+    """
+    Get or create global async database manager instance.
+
+    Args:
+        db_url: SQLAlchemy database URL (optional)
+
+    Returns:
+        AsyncDatabaseManager instance
+    """
+    global _async_db_manager
+
+    if _async_db_manager is None:
+        _async_db_manager = AsyncDatabaseManager(db_url=db_url)
+
+    return _async_db_manager
+
+
+async def close_async_db_manager() -> None:
+    """Close the global async database manager, if one was created."""
+    global _async_db_manager
+
+    if _async_db_manager is not None:
+        await _async_db_manager.close()
+        _async_db_manager = None
@@ -6,25 +6,38 @@ replacing JSONL-based storage with SQLite/SQLAlchemy.
 """
 
 import os
+import re
 import logging
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Dict, Any, Tuple
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, desc, and_, or_, func
+from sqlalchemy import create_engine, desc, and_, or_, func, case, event, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 
+from src.backend.config_loader import CONFIG
 from src.database.models import (
     Base,
     Trade,
     Position,
     DiaryEntry,
     BotState,
+    EquityRollup,
     TradeProposal,
     MarketData,
+    LLMCall,
+    TradeStats,
+    MigrationCheckpoint,
+    SEARCH_SOURCES,
+    SEARCH_TABLE,
+    create_search_index,
     create_tables,
+    rebuild_search_index,
 )
+from src.database.downsample import lttb
+from src.database.pagination import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -37,34 +50,90 @@ class DatabaseManager:
     automatic session management and error handling.
     """
 
-    def __init__(self, db_url: str = None):
+    def __init__(self, db_url: str = None, sqlite_profile: Optional[str] = None):
         """
         Initialize database manager.
 
         Args:
             db_url: SQLAlchemy database URL. Defaults to sqlite:///data/bot.db
+            sqlite_profile: "tuned" (WAL, relaxed fsync, larger cache, read pool)
+                or "default" (SQLite defaults). Defaults to CONFIG db_sqlite_profile.
         """
         if db_url is None:
             # Default to SQLite in data/ directory
             db_path = os.path.join('data', 'bot.db')
             os.makedirs('data', exist_ok=True)
             db_url = f'sqlite:///{db_path}'
+        if sqlite_profile is None:
+            sqlite_profile = CONFIG.get("db_sqlite_profile") or "tuned"
 
         self.engine = create_engine(
             db_url,
             echo=False,  # Set to True for SQL query logging
             pool_pre_ping=True,  # Verify connections before using
         )
+        self.read_engine = self.engine
+
+        url = self.engine.url
+        on_disk = url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+        self.sqlite_profile = sqlite_profile if on_disk else 'default'
+        if self.sqlite_profile == 'tuned':
+            self._apply_sqlite_pragmas(self.engine, self._sqlite_pragmas(read_only=False))
+            # Readers get their own pool so GUI/API queries never queue behind bot writes
+            self.read_engine = create_engine(
+                db_url,
+                echo=False,
+                pool_size=int(CONFIG.get("db_read_pool_size") or 4),
+                max_overflow=0,
+            )
+            self._apply_sqlite_pragmas(self.read_engine, self._sqlite_pragmas(read_only=True))
 
+        # expire_on_commit=False: returned objects stay readable after their session closes
         self.SessionLocal = sessionmaker(
             autocommit=False,
             autoflush=False,
+            expire_on_commit=False,
             bind=self.engine
         )
 
+        self.ReadSessionLocal = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            bind=self.read_engine
+        )
+
         # Create tables if they don't exist
         create_tables(self.engine)
-        logger.info(f"Database initialized: {db_url}")
+        # FTS5 index over rationales (SQLite only; other databases fall back to LIKE)
+        self.search_enabled = create_search_index(self.engine)
+        logger.info(f"Database initialized: {db_url} (sqlite profile: {self.sqlite_profile})")
+
+    @staticmethod
+    def _sqlite_pragmas(read_only: bool) -> List[str]:
+        """PRAGMA statements for the tuned profile."""
+        pragmas = [
+            # WAL lets readers run alongside the writer; NORMAL only fsyncs at checkpoints
+            'synchronous=NORMAL',
+            f'cache_size=-{int(CONFIG.get("db_cache_size_kb") or 65536)}',
+            f'mmap_size={int(CONFIG.get("db_mmap_size") or 0)}',
+            f'busy_timeout={int(CONFIG.get("db_busy_timeout_ms") or 5000)}',
+            'temp_store=MEMORY',
+        ]
+        if read_only:
+            pragmas.append('query_only=ON')
+        else:
+            pragmas.insert(0, 'journal_mode=WAL')
+        return pragmas
+
+    @staticmethod
+    def _apply_sqlite_pragmas(engine, pragmas: List[str]) -> None:
+        @event.listens_for(engine, 'connect')
+        def _set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(f'PRAGMA {pragma}')
+            cursor.close()
 
     @contextmanager
     def session_scope(self):
@@ -86,6 +155,22 @@ class DatabaseManager:
         finally:
             session.close()
 
+    @contextmanager
+    def read_scope(self):
+        """
+        Session on the read-only pool (the main pool unless the tuned SQLite
+        profile is active). Use for queries only; nothing is committed.
+        """
+        session = self.ReadSessionLocal()
+        try:
+            yield session
+        except Exception as e:
+            logger.error(f"Database read error: {e}")
+            raise
+        finally:
+            # close() ends the read transaction without expiring loaded objects
+            session.close()
+
     # ==================== TRADE OPERATIONS ====================
 
     def create_trade(
@@ -138,6 +223,7 @@ class DatabaseManager:
             trade = session.query(Trade).filter(Trade.id == trade_id).first()
             if not trade:
                 raise ValueError(f"Trade {trade_id} not found")
+            was_closed = trade.status == 'closed'
 
             trade.exit_timestamp = datetime.utcnow()
             trade.exit_price = exit_price
@@ -147,13 +233,51 @@ class DatabaseManager:
             trade.status = 'closed'
 
             session.flush()
+            if was_closed:
+                # Re-closing changes an already counted P&L; recount instead of adding
+                self._rebuild_trade_stats(session)
+            else:
+                self._add_closed_trade(session, realized_pnl)
             session.refresh(trade)
             logger.info(f"Closed trade: {trade_id} (PnL: {realized_pnl:.2f}, {realized_pnl_pct:.2f}%)")
             return trade
 
+    def close_open_trades(self, asset: str, exit_price: float,
+                          exit_timestamp: Optional[datetime] = None) -> int:
+        """
+        Close every open trade on an asset at the price its position closed at.
+
+        Returns:
+            Number of trades closed
+        """
+        with self.session_scope() as session:
+            return self._close_open_trades(session, asset, exit_price, exit_timestamp)
+
+    @classmethod
+    def _close_open_trades(cls, session: Session, asset: str, exit_price: float,
+                           exit_timestamp: Optional[datetime] = None) -> int:
+        trades = (
+            session.query(Trade)
+            .filter(Trade.asset == asset, Trade.status == 'open')
+            .all()
+        )
+        for trade in trades:
+            direction = 1 if trade.action == 'buy' else -1
+            pnl = (exit_price - trade.entry_price) * trade.entry_size * direction
+            trade.exit_timestamp = exit_timestamp or datetime.utcnow()
+            trade.exit_price = exit_price
+            trade.exit_value = exit_price * trade.entry_size
+            trade.realized_pnl = pnl
+            trade.realized_pnl_pct = pnl / trade.entry_value * 100 if trade.entry_value else 0.0
+            trade.status = 'closed'
+            session.flush()
+            cls._add_closed_trade(session, pnl)
+            logger.info(f"Closed trade: {trade.id} ({asset} @ {exit_price}, PnL: {pnl:.2f})")
+        return len(trades)
+
     def get_trade(self, trade_id: int) -> Optional[Trade]:
         """Get a trade by ID."""
-        with self.session_scope() as session:
+        with self.read_scope() as session:
             return session.query(Trade).filter(Trade.id == trade_id).first()
 
     def get_trades(
@@ -164,7 +288,7 @@ class DatabaseManager:
         offset: int = 0,
     ) -> List[Trade]:
         """Get trades with optional filtering."""
-        with self.session_scope() as session:
+        with self.read_scope() as session:
             query = session.query(Trade)
 
             if asset:
@@ -172,53 +296,140 @@ class DatabaseManager:
             if status:
                 query = query.filter(Trade.status == status)
 
-            query = query.order_by(desc(Trade.entry_timestamp))
+            query = query.order_by(desc(Trade.entry_timestamp), desc(Trade.id))
             query = query.limit(limit).offset(offset)
 
             return query.all()
 
+    def get_trades_page(
+        self,
+        asset: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Trade], Optional[str]]:
+        """
+        Get one page of trades, newest first, using keyset pagination.
+
+        Returns:
+            (trades, next_cursor); next_cursor is None on the last page
+        """
+        with self.read_scope() as session:
+            query = session.query(Trade)
+
+            if asset:
+                query = query.filter(Trade.asset == asset)
+            if status:
+                query = query.filter(Trade.status == status)
+
+            return self._keyset_page(query, Trade.entry_timestamp, Trade.id, limit, cursor)
+
     def get_open_trades(self, asset: Optional[str] = None) -> List[Trade]:
         """Get all open trades."""
         return self.get_trades(asset=asset, status='open', limit=1000)
 
     def get_trade_stats(self) -> Dict[str, Any]:
-        """Get aggregate trade statistics."""
-        with self.session_scope() as session:
-            closed_trades = session.query(Trade).filter(Trade.status == 'closed').all()
-
-            if not closed_trades:
-                return {
-                    'total_trades': 0,
-                    'winning_trades': 0,
-                    'losing_trades': 0,
-                    'win_rate': 0.0,
-                    'total_pnl': 0.0,
-                    'avg_profit': 0.0,
-                    'avg_loss': 0.0,
-                    'profit_factor': 0.0,
-                }
-
-            total_trades = len(closed_trades)
-            winning_trades = [t for t in closed_trades if t.realized_pnl and t.realized_pnl > 0]
-            losing_trades = [t for t in closed_trades if t.realized_pnl and t.realized_pnl < 0]
+        """Get aggregate trade statistics (constant time once the stats row exists)."""
+        with self.read_scope() as session:
+            return self._trade_stats(session)
 
-            total_pnl = sum(t.realized_pnl for t in closed_trades if t.realized_pnl)
-            avg_profit = sum(t.realized_pnl for t in winning_trades) / len(winning_trades) if winning_trades else 0
-            avg_loss = sum(t.realized_pnl for t in losing_trades) / len(losing_trades) if losing_trades else 0
+    def rebuild_trade_stats(self) -> Dict[str, Any]:
+        """Recount the trade_stats row from the trades table (e.g. after manual edits)."""
+        with self.session_scope() as session:
+            return self._summarize_trade_stats(self._rebuild_trade_stats(session))
+
+    @classmethod
+    def _trade_stats(cls, session: Session) -> Dict[str, Any]:
+        row = session.get(TradeStats, 1)
+        if row is None:
+            # Databases created before trade_stats existed, until the next close_trade
+            row = cls._aggregate_trade_stats(session)
+        return cls._summarize_trade_stats(row)
+
+    @staticmethod
+    def _aggregate_trade_stats(session: Session) -> TradeStats:
+        """Totals over all closed trades in a single aggregate query."""
+        pnl = Trade.realized_pnl
+        row = session.query(
+            func.count(Trade.id),
+            func.sum(case((pnl > 0, 1), else_=0)),
+            func.sum(case((pnl < 0, 1), else_=0)),
+            func.sum(pnl),
+            func.sum(case((pnl > 0, pnl), else_=0.0)),
+            func.sum(case((pnl < 0, pnl), else_=0.0)),
+            func.max(pnl),
+            func.min(pnl),
+        ).filter(Trade.status == 'closed').one()
+        return TradeStats(
+            id=1,
+            total_trades=row[0] or 0,
+            winning_trades=row[1] or 0,
+            losing_trades=row[2] or 0,
+            total_pnl=row[3] or 0.0,
+            gross_profit=row[4] or 0.0,
+            gross_loss=row[5] or 0.0,
+            best_trade=row[6],
+            worst_trade=row[7],
+        )
 
-            win_rate = len(winning_trades) / total_trades if total_trades > 0 else 0
-            profit_factor = abs(sum(t.realized_pnl for t in winning_trades) / sum(t.realized_pnl for t in losing_trades)) if losing_trades and sum(t.realized_pnl for t in losing_trades) != 0 else 0
+    @classmethod
+    def _rebuild_trade_stats(cls, session: Session) -> TradeStats:
+        return session.merge(cls._aggregate_trade_stats(session))
+
+    @classmethod
+    def _add_closed_trade(cls, session: Session, realized_pnl: Optional[float]) -> None:
+        """Fold a newly closed trade (already flushed) into the stats row."""
+        row = session.get(TradeStats, 1)
+        if row is None:
+            cls._rebuild_trade_stats(session)  # the aggregate already includes this trade
+        else:
+            row.add_trade(realized_pnl)
+
+    @staticmethod
+    def _summarize_trade_stats(row: TradeStats) -> Dict[str, Any]:
+        wins, losses = row.winning_trades, row.losing_trades
+        return {
+            'total_trades': row.total_trades,
+            'winning_trades': wins,
+            'losing_trades': losses,
+            'win_rate': wins / row.total_trades if row.total_trades else 0.0,
+            'total_pnl': row.total_pnl,
+            'avg_profit': row.gross_profit / wins if wins else 0.0,
+            'avg_loss': row.gross_loss / losses if losses else 0.0,
+            'profit_factor': abs(row.gross_profit / row.gross_loss) if row.gross_loss else 0.0,
+            'gross_profit': row.gross_profit,
+            'gross_loss': row.gross_loss,
+            'best_trade': row.best_trade,
+            'worst_trade': row.worst_trade,
+        }
+
+    @staticmethod
+    def _keyset_page(query, timestamp_column, id_column, limit: int, cursor: Optional[str]) -> Tuple[List[Any], Optional[str]]:
+        """
+        Order by (timestamp, id) descending and continue after ``cursor``.
 
-            return {
-                'total_trades': total_trades,
-                'winning_trades': len(winning_trades),
-                'losing_trades': len(losing_trades),
-                'win_rate': win_rate,
-                'total_pnl': total_pnl,
-                'avg_profit': avg_profit,
-                'avg_loss': avg_loss,
-                'profit_factor': profit_factor,
-            }
+        Unlike OFFSET, the cost does not grow with page depth and rows inserted
+        meanwhile cannot shift a page. The timestamp indexes cover the seek:
+        SQLite appends the integer primary key to every index entry.
+        """
+        if cursor:
+            raw_timestamp, last_id = decode_cursor(cursor, 2)
+            try:
+                last_timestamp = datetime.fromisoformat(raw_timestamp)
+                last_id = int(last_id)
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+            query = query.filter(or_(
+                timestamp_column < last_timestamp,
+                and_(timestamp_column == last_timestamp, id_column < last_id),
+            ))
+
+        rows = query.order_by(desc(timestamp_column), desc(id_column)).limit(limit + 1).all()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, encode_cursor(getattr(last, timestamp_column.key).isoformat(), getattr(last, id_column.key))
 
     # ==================== POSITION OPERATIONS ====================
 
@@ -238,44 +449,41 @@ class DatabaseManager:
     ) -> Position:
         """Create or update a position."""
         with self.session_scope() as session:
-            position = session.query(Position).filter(Position.asset == asset).first()
-
-            if position:
-                # Update existing position
-                position.side = side
-                position.size = size
-                position.entry_price = entry_price
-                position.current_price = current_price
-                position.unrealized_pnl = unrealized_pnl
-                position.unrealized_pnl_pct = unrealized_pnl_pct
-                position.leverage = leverage
-                position.margin = margin
-                position.liquidation_price = liquidation_price
-                position.trade_id = trade_id
-                logger.debug(f"Updated position: {asset}")
-            else:
-                # Create new position
-                position = Position(
-                    asset=asset,
-                    side=side,
-                    size=size,
-                    entry_price=entry_price,
-                    current_price=current_price,
-                    unrealized_pnl=unrealized_pnl,
-                    unrealized_pnl_pct=unrealized_pnl_pct,
-                    leverage=leverage,
-                    margin=margin,
-                    liquidation_price=liquidation_price,
-                    trade_id=trade_id,
-                    opened_at=datetime.utcnow(),
-                )
-                session.add(position)
-                logger.info(f"Created position: {asset}")
-
+            position = self._upsert_position(
+                session,
+                asset=asset,
+                side=side,
+                size=size,
+                entry_price=entry_price,
+                current_price=current_price,
+                unrealized_pnl=unrealized_pnl,
+                unrealized_pnl_pct=unrealized_pnl_pct,
+                leverage=leverage,
+                margin=margin,
+                liquidation_price=liquidation_price,
+                trade_id=trade_id,
+            )
             session.flush()
             session.refresh(position)
             return position
 
+    @staticmethod
+    def _upsert_position(session: Session, asset: str, **fields) -> Position:
+        position = session.query(Position).filter(Position.asset == asset).first()
+
+        if position:
+            # Update existing position
+            for key, value in fields.items():
+                setattr(position, key, value)
+            logger.debug(f"Updated position: {asset}")
+        else:
+            # Create new position
+            fields.setdefault('opened_at', datetime.utcnow())
+            position = Position(asset=asset, **fields)
+            session.add(position)
+            logger.info(f"Created position: {asset}")
+        return position
+
     def close_position(self, asset: str) -> None:
         """Close (delete) a position."""
         with self.session_scope() as session:
@@ -286,12 +494,12 @@ class DatabaseManager:
 
     def get_position(self, asset: str) -> Optional[Position]:
         """Get a position by asset."""
-        with self.session_scope() as session:
+        with self.read_scope() as session:
             return session.query(Position).filter(Position.asset == asset).first()
 
     def get_all_positions(self) -> List[Position]:
         """Get all open positions."""
-        with self.session_scope() as session:
+        with self.read_scope() as session:
             return session.query(Position).order_by(Position.opened_at).all()
 
     # ==================== DIARY OPERATIONS ====================
@@ -332,7 +540,7 @@ class DatabaseManager:
         offset: int = 0,
     ) -> List[DiaryEntry]:
         """Get diary entries with optional filtering."""
-        with self.session_scope() as session:
+        with self.read_scope() as session:
             query = session.query(DiaryEntry)
 
             if asset:
@@ -340,11 +548,29 @@ class DatabaseManager:
             if action:
                 query = query.filter(DiaryEntry.action == action)
 
-            query = query.order_by(desc(DiaryEntry.timestamp))
+            query = query.order_by(desc(DiaryEntry.timestamp), desc(DiaryEntry.id))
             query = query.limit(limit).offset(offset)
 
             return query.all()
 
+    def get_diary_page(
+        self,
+        asset: Optional[str] = None,
+        action: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[DiaryEntry], Optional[str]]:
+        """Get one page of diary entries, newest first (see get_trades_page)."""
+        with self.read_scope() as session:
+            query = session.query(DiaryEntry)
+
+            if asset:
+                query = query.filter(DiaryEntry.asset == asset)
+            if action:
+                query = query.filter(DiaryEntry.action == action)
+
+            return self._keyset_page(query, DiaryEntry.timestamp, DiaryEntry.id, limit, cursor)
+
     def get_recent_diary(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent diary entries in format compatible with bot_engine."""
         entries = self.get_diary_entries(limit=limit)
@@ -375,11 +601,8 @@ class DatabaseManager:
     ) -> BotState:
         """Save a snapshot of bot state."""
         with self.session_scope() as session:
-            # Get trade stats
-            stats = self.get_trade_stats()
-
-            state = BotState(
-                timestamp=datetime.utcnow(),
+            state = self._build_bot_state(
+                self._trade_stats(session),
                 balance=balance,
                 total_value=total_value,
                 equity=equity,
@@ -388,25 +611,34 @@ class DatabaseManager:
                 open_positions_count=open_positions_count,
                 total_position_value=total_position_value,
                 total_unrealized_pnl=total_unrealized_pnl,
-                total_trades=stats['total_trades'],
-                winning_trades=stats['winning_trades'],
-                losing_trades=stats['losing_trades'],
-                win_rate=stats['win_rate'],
-                avg_profit=stats['avg_profit'],
-                avg_loss=stats['avg_loss'],
-                profit_factor=stats['profit_factor'],
                 is_running=is_running,
                 trading_mode=trading_mode,
             )
             session.add(state)
+            self._roll_up_equity(session, state.timestamp, equity)
             session.flush()
             session.refresh(state)
             logger.debug(f"Saved bot state: balance={balance:.2f}, total_value={total_value:.2f}")
             return state
 
+    @staticmethod
+    def _build_bot_state(stats: Dict[str, Any], **fields) -> BotState:
+        """BotState row with trade summary columns filled from ``stats``."""
+        fields.setdefault('timestamp', datetime.utcnow())
+        return BotState(
+            total_trades=stats['total_trades'],
+            winning_trades=stats['winning_trades'],
+            losing_trades=stats['losing_trades'],
+            win_rate=stats['win_rate'],
+            avg_profit=stats['avg_profit'],
+            avg_loss=stats['avg_loss'],
+            profit_factor=stats['profit_factor'],
+            **fields,
+        )
+
     def get_latest_bot_state(self) -> Optional[BotState]:
         """Get the most recent bot state."""
-        with self.session_scope() as session:
+        with self.read_scope() as session:
             return session.query(BotState).order_by(desc(BotState.timestamp)).first()
 
     def get_bot_states(
@@ -416,7 +648,7 @@ class DatabaseManager:
         limit: int = 1000,
     ) -> List[BotState]:
         """Get bot states within a date range."""
-        with self.session_scope() as session:
+        with self.read_scope() as session:
             query = session.query(BotState)
 
             if start_date:
@@ -424,25 +656,166 @@ class DatabaseManager:
             if end_date:
                 query = query.filter(BotState.timestamp <= end_date)
 
-            query = query.order_by(desc(BotState.timestamp))
+            query = query.order_by(desc(BotState.timestamp), desc(BotState.id))
             query = query.limit(limit)
 
             return query.all()
 
-    def get_equity_curve(self, days: int = 30) -> List[Dict[str, Any]]:
-        """Get equity curve data for charting."""
+    def get_bot_states_page(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 1000,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[BotState], Optional[str]]:
+        """Get one page of bot states, newest first (see get_trades_page)."""
+        with self.read_scope() as session:
+            query = session.query(BotState)
+
+            if start_date:
+                query = query.filter(BotState.timestamp >= start_date)
+            if end_date:
+                query = query.filter(BotState.timestamp <= end_date)
+
+            return self._keyset_page(query, BotState.timestamp, BotState.id, limit, cursor)
+
+    def get_equity_curve(self, days: int = 30, max_points: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get equity curve data for charting, oldest first.
+
+        Args:
+            days: Range to return, ending now
+            max_points: Downsample to this many points with LTTB (None = every snapshot).
+                Ranges with far more snapshots than that are read from the
+                hourly or daily rollups instead of bot_states.
+        """
         start_date = datetime.utcnow() - timedelta(days=days)
-        states = self.get_bot_states(start_date=start_date, limit=10000)
+        with self.read_scope() as session:
+            bucket = self._equity_rollup_source(session, start_date, max_points) if max_points else None
+            if bucket:
+                rows = session.query(EquityRollup.bucket_start, EquityRollup.close).filter(
+                    EquityRollup.bucket == bucket,
+                    EquityRollup.bucket_start >= self._bucket_start(bucket, start_date),
+                ).order_by(EquityRollup.bucket_start).all()
+                points = [
+                    {'timestamp': start.isoformat(), 'equity': close, 'balance': None, 'total_value': None}
+                    for start, close in rows
+                ]
+            else:
+                rows = session.query(
+                    BotState.timestamp, BotState.equity, BotState.balance, BotState.total_value
+                ).filter(BotState.timestamp >= start_date).order_by(BotState.timestamp, BotState.id).all()
+                points = [
+                    {
+                        'timestamp': timestamp.isoformat() if timestamp else None,
+                        'equity': equity,
+                        'balance': balance,
+                        'total_value': total_value,
+                    }
+                    for timestamp, equity, balance, total_value in rows
+                ]
+
+        if max_points:
+            points = lttb(points, max_points, x=lambda p: datetime.fromisoformat(p['timestamp']).timestamp(),
+                          y=lambda p: p['equity'])
+        return points
+
+    def _equity_rollup_source(self, session: Session, start_date: datetime, max_points: int) -> Optional[str]:
+        """Coarsest source still dense enough for max_points: None (raw snapshots), 'hour' or 'day'."""
+        limit = self.EQUITY_ROLLUP_FACTOR * max_points
+        if session.query(BotState.id).filter(BotState.timestamp >= start_date).limit(limit + 1).count() <= limit:
+            return None
+        hourly = session.query(EquityRollup.id).filter(
+            EquityRollup.bucket == 'hour', EquityRollup.bucket_start >= self._bucket_start('hour', start_date)
+        ).limit(limit + 1).count()
+        if hourly == 0:
+            return None  # rollups not built yet (see rebuild_equity_rollups)
+        return 'hour' if hourly <= limit else 'day'
+
+    # ==================== EQUITY ROLLUPS ====================
+
+    # Raw snapshots per requested point above which get_equity_curve reads rollups
+    EQUITY_ROLLUP_FACTOR = 20
+
+    @staticmethod
+    def _bucket_start(bucket: str, timestamp: datetime) -> datetime:
+        if bucket == 'hour':
+            return timestamp.replace(minute=0, second=0, microsecond=0)
+        if bucket == 'day':
+            return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        raise ValueError(f"Unknown equity bucket: {bucket} (expected hour or day)")
+
+    def _roll_up_equity(self, session: Session, timestamp: datetime, equity: float) -> None:
+        """Fold one snapshot into its hourly and daily rollup rows."""
+        for bucket in ('hour', 'day'):
+            start = self._bucket_start(bucket, timestamp)
+            rollup = session.query(EquityRollup).filter(
+                EquityRollup.bucket == bucket, EquityRollup.bucket_start == start
+            ).first()
+            if rollup:
+                rollup.add_sample(timestamp, equity)
+            else:
+                session.add(EquityRollup(
+                    bucket=bucket, bucket_start=start, open=equity, high=equity, low=equity, close=equity,
+                    samples=1, first_at=timestamp, last_at=timestamp,
+                ))
+                session.flush()  # visible to the next snapshot in the same transaction
 
-        return [
-            {
-                'timestamp': state.timestamp.isoformat() if state.timestamp else None,
-                'equity': state.equity,
-                'balance': state.balance,
-                'total_value': state.total_value,
-            }
-            for state in reversed(states)
-        ]
+    def get_equity_ohlc(
+        self,
+        bucket: str = 'hour',
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Equity OHLC per bucket ('hour' or 'day'), oldest first.
+
+        Raises:
+            ValueError: If bucket is not 'hour' or 'day'
+        """
+        self._bucket_start(bucket, datetime.utcnow())
+        with self.read_scope() as session:
+            query = session.query(EquityRollup).filter(EquityRollup.bucket == bucket)
+
+            if start_date:
+                query = query.filter(EquityRollup.bucket_start >= self._bucket_start(bucket, start_date))
+            if end_date:
+                query = query.filter(EquityRollup.bucket_start <= end_date)
+
+            return [
+                {
+                    'timestamp': rollup.bucket_start.isoformat(),
+                    'open': rollup.open,
+                    'high': rollup.high,
+                    'low': rollup.low,
+                    'close': rollup.close,
+                    'samples': rollup.samples,
+                }
+                for rollup in query.order_by(EquityRollup.bucket_start).all()
+            ]
+
+    def rebuild_equity_rollups(self) -> int:
+        """
+        Recompute every rollup from bot_states (e.g. for databases created
+        before rollups existed). Returns the number of rollup rows.
+        """
+        with self.session_scope() as session:
+            session.query(EquityRollup).delete()
+            rollups: Dict[Tuple[str, datetime], EquityRollup] = {}
+            states = session.query(BotState.timestamp, BotState.equity).order_by(BotState.timestamp)
+            for timestamp, equity in states.yield_per(1000):
+                for bucket in ('hour', 'day'):
+                    key = (bucket, self._bucket_start(bucket, timestamp))
+                    if key in rollups:
+                        rollups[key].add_sample(timestamp, equity)
+                    else:
+                        rollups[key] = EquityRollup(
+                            bucket=bucket, bucket_start=key[1], open=equity, high=equity, low=equity,
+                            close=equity, samples=1, first_at=timestamp, last_at=timestamp,
+                        )
+            session.add_all(rollups.values())
+            logger.info(f"Rebuilt {len(rollups)} equity rollups")
+            return len(rollups)
 
     # ==================== TRADE PROPOSAL OPERATIONS ====================
 
@@ -536,7 +909,7 @@ class DatabaseManager:
 
     def get_pending_proposals(self, asset: Optional[str] = None) -> List[TradeProposal]:
         """Get all pending trade proposals."""
-        with self.session_scope() as session:
+        with self.read_scope() as session:
             query = session.query(TradeProposal).filter(TradeProposal.status == 'pending')
 
             if asset:
@@ -546,59 +919,648 @@ class DatabaseManager:
 
             return query.all()
 
+    # ==================== BATCH OPERATIONS ====================
+
+    def apply_batch(self, operations: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Apply queued write operations in a single transaction.
+
+        Used by the write-behind persister. Operation kinds: 'trade', 'diary',
+        'position', 'close_position' and 'state' (field names match the
+        corresponding model columns), 'close_trades' (close_open_trades
+        arguments), 'candles' (upsert_candles arguments) and
+        'market_data_retention' (apply_market_data_retention arguments).
+
+        Returns:
+            Number of operations applied
+        """
+        with self.session_scope() as session:
+            stats = None
+            for kind, fields in operations:
+                if kind == 'trade':
+                    fields = dict(fields)
+                    fields.setdefault('status', 'open')
+                    session.add(Trade(**fields))
+                    if fields['status'] == 'closed':
+                        session.flush()
+                        self._add_closed_trade(session, fields.get('realized_pnl'))
+                elif kind == 'diary':
+                    session.add(DiaryEntry(**fields))
+                elif kind == 'position':
+                    self._upsert_position(session, **dict(fields))
+                    session.flush()
+                elif kind == 'candles':
+                    self._upsert_candles(session, **fields)
+                elif kind == 'market_data_retention':
+                    self._apply_market_data_retention(session, **fields)
+                elif kind == 'close_position':
+                    session.query(Position).filter(Position.asset == fields['asset']).delete()
+                elif kind == 'close_trades':
+                    if self._close_open_trades(session, **fields):
+                        stats = None
+                elif kind == 'state':
+                    if stats is None:
+                        session.flush()
+                        stats = self._trade_stats(session)
+                    state = self._build_bot_state(stats, **dict(fields))
+                    session.add(state)
+                    self._roll_up_equity(session, state.timestamp, state.equity)
+                else:
+                    raise ValueError(f"Unknown batch operation: {kind}")
+            return len(operations)
+
+    # ==================== MARKET DATA OPERATIONS ====================
+
+    # Rows per executemany statement (SQLite caps bound parameters per statement)
+    CANDLE_CHUNK_SIZE = 500
+
+    def upsert_candles(self, asset: str, interval: str, candles: List[Dict[str, Any]]) -> int:
+        """
+        Insert or update candles in bulk.
+
+        Args:
+            asset: Asset symbol
+            interval: Candle interval ("5m", "1h", ...)
+            candles: Exchange-format candles {'t': open_time_ms, 'o', 'h', 'l', 'c', 'v'}
+
+        Returns:
+            Number of candles written
+        """
+        with self.session_scope() as session:
+            return self._upsert_candles(session, asset, interval, candles)
+
+    def _upsert_candles(self, session: Session, asset: str, interval: str,
+                        candles: List[Dict[str, Any]], replace: bool = True) -> int:
+        """
+        Chunked INSERT ... ON CONFLICT on (asset, timestamp, interval).
+
+        The still-forming last candle of a fetch is overwritten by later fetches
+        (``replace=True``); ``replace=False`` keeps existing rows.
+        """
+        rows = [
+            {
+                'asset': asset,
+                'interval': interval,
+                'timestamp': datetime.fromtimestamp(c['t'] / 1000, timezone.utc).replace(tzinfo=None),
+                'open': float(c['o']),
+                'high': float(c['h']),
+                'low': float(c['l']),
+                'close': float(c['c']),
+                'volume': float(c.get('v') or 0.0),
+            }
+            for c in candles
+        ]
+        if not rows:
+            return 0
+
+        dialect = session.get_bind().dialect.name
+        insert = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}.get(dialect)
+        if insert is None:
+            # No native upsert: fall back to per-row merge
+            for row in rows:
+                existing = session.query(MarketData).filter_by(
+                    asset=asset, interval=interval, timestamp=row['timestamp']
+                ).first()
+                if existing is None:
+                    session.add(MarketData(**row))
+                elif replace:
+                    for key in ('open', 'high', 'low', 'close', 'volume'):
+                        setattr(existing, key, row[key])
+            return len(rows)
+
+        stmt = insert(MarketData.__table__)
+        conflict = ['asset', 'timestamp', 'interval']
+        if replace:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict,
+                set_={key: stmt.excluded[key] for key in ('open', 'high', 'low', 'close', 'volume')},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict)
+        for start in range(0, len(rows), self.CANDLE_CHUNK_SIZE):
+            session.execute(stmt, rows[start:start + self.CANDLE_CHUNK_SIZE])
+        return len(rows)
+
+    def get_candles(
+        self,
+        asset: str,
+        interval: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Stored candles in exchange format, oldest first.
+
+        With ``limit`` and no ``start_date``, returns the most recent ``limit`` candles.
+        """
+        with self.read_scope() as session:
+            query = session.query(
+                MarketData.timestamp, MarketData.open, MarketData.high,
+                MarketData.low, MarketData.close, MarketData.volume,
+            ).filter(MarketData.asset == asset, MarketData.interval == interval)
+
+            if start_date:
+                query = query.filter(MarketData.timestamp >= start_date)
+            if end_date:
+                query = query.filter(MarketData.timestamp <= end_date)
+
+            if limit and not start_date:
+                rows = query.order_by(desc(MarketData.timestamp)).limit(limit).all()[::-1]
+            else:
+                query = query.order_by(MarketData.timestamp)
+                rows = (query.limit(limit) if limit else query).all()
+
+        return [
+            {
+                't': int(timestamp.replace(tzinfo=timezone.utc).timestamp() * 1000),
+                'o': open_, 'h': high, 'l': low, 'c': close, 'v': volume,
+            }
+            for timestamp, open_, high, low, close, volume in rows
+        ]
+
+    def apply_market_data_retention(self, retention: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Compact or delete candles older than their interval's retention.
+
+        Args:
+            retention: Days to keep per interval (defaults to CONFIG
+                market_data_retention). Expired candles are resampled into the
+                next coarser interval in ``retention`` and then deleted; the
+                coarsest interval's expired candles are only deleted. Intervals
+                not listed are kept forever.
+
+        Returns:
+            {interval: {'compacted': n, 'deleted': n}}
+        """
+        with self.session_scope() as session:
+            return self._apply_market_data_retention(session, retention)
+
+    def _apply_market_data_retention(self, session: Session,
+                                     retention: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, int]]:
+        from src.backend.backtest.data import interval_to_seconds, resample_candles
+
+        if retention is None:
+            retention = CONFIG.get("market_data_retention") or {}
+        intervals = sorted(retention, key=interval_to_seconds)
+        now = datetime.utcnow()
+        report: Dict[str, Dict[str, int]] = {}
+
+        for index, interval in enumerate(intervals):
+            cutoff = now - timedelta(days=float(retention[interval]))
+            target = intervals[index + 1] if index + 1 < len(intervals) else None
+            compacted = 0
+            if target:
+                # Only compact whole target buckets so none is split across the cutoff
+                step = interval_to_seconds(target)
+                epoch = datetime(1970, 1, 1)
+                cutoff = epoch + timedelta(seconds=int((cutoff - epoch).total_seconds()) // step * step)
+                expired = session.query(
+                    MarketData.asset, MarketData.timestamp, MarketData.open, MarketData.high,
+                    MarketData.low, MarketData.close, MarketData.volume,
+                ).filter(MarketData.interval == interval, MarketData.timestamp < cutoff) \
+                 .order_by(MarketData.asset, MarketData.timestamp)
+
+                by_asset: Dict[str, List[Dict[str, Any]]] = {}
+                for asset, timestamp, open_, high, low, close, volume in expired.yield_per(5000):
+                    by_asset.setdefault(asset, []).append({
+                        't': int(timestamp.replace(tzinfo=timezone.utc).timestamp() * 1000),
+                        'o': open_, 'h': high, 'l': low, 'c': close, 'v': volume,
+                    })
+                for asset, candles in by_asset.items():
+                    # Candles fetched at the coarser interval win over compacted ones
+                    compacted += self._upsert_candles(
+                        session, asset, target, resample_candles(candles, target), replace=False
+                    )
+
+            deleted = session.query(MarketData).filter(
+                MarketData.interval == interval, MarketData.timestamp < cutoff
+            ).delete(synchronize_session=False)
+            report[interval] = {'compacted': compacted, 'deleted': deleted}
+            if compacted or deleted:
+                logger.info(f"Market data retention {interval}: compacted {compacted} into {target}, deleted {deleted}")
+
+        return report
+
+    # ==================== LLM CALL TELEMETRY ====================
+
+    # strftime formats used to bucket llm_calls.timestamp (SQLite)
+    LLM_STATS_BUCKETS = {
+        'hour': '%Y-%m-%d %H:00',
+        'day': '%Y-%m-%d',
+        'week': '%Y-W%W',
+        'month': '%Y-%m',
+    }
+    # PostgreSQL to_char() equivalents (weeks are ISO weeks there)
+    PG_LLM_STATS_BUCKETS = {
+        'hour': 'YYYY-MM-DD HH24:00',
+        'day': 'YYYY-MM-DD',
+        'week': 'IYYY-"W"IW',
+        'month': 'YYYY-MM',
+    }
+
+    def record_llm_call(self, **fields) -> int:
+        """Persist one LLM call telemetry record; returns its id."""
+        with self.session_scope() as session:
+            call = LLMCall(**fields)
+            session.add(call)
+            session.flush()
+            logger.debug(f"Recorded LLM call: {call.model} ({call.parse_outcome}, {call.wall_time_ms} ms)")
+            return call.id
+
+    def get_llm_calls(
+        self,
+        model: Optional[str] = None,
+        parse_outcome: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Get the most recent LLM call records as dicts."""
+        with self.read_scope() as session:
+            query = session.query(LLMCall)
+
+            if model:
+                query = query.filter(LLMCall.model == model)
+            if parse_outcome:
+                query = query.filter(LLMCall.parse_outcome == parse_outcome)
+
+            query = query.order_by(desc(LLMCall.timestamp)).limit(limit)
+            return [
+                {column.name: getattr(call, column.name) for column in LLMCall.__table__.columns}
+                for call in query.all()
+            ]
+
+    def get_llm_call_stats(
+        self,
+        bucket: str = 'day',
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        model: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate LLM cost and latency per model and time bucket.
+
+        Args:
+            bucket: 'hour', 'day', 'week' or 'month'
+            start_date: Only include calls at or after this time
+            end_date: Only include calls at or before this time
+            model: Restrict to one model
+
+        Returns:
+            One dict per (bucket, model), oldest bucket first
+
+        Raises:
+            ValueError: If the bucket is unknown or the database is neither
+                SQLite nor PostgreSQL
+        """
+        if bucket not in self.LLM_STATS_BUCKETS:
+            raise ValueError(f"Unknown bucket '{bucket}', expected one of {sorted(self.LLM_STATS_BUCKETS)}")
+
+        period = self._llm_stats_period(self.read_engine.dialect.name, bucket).label('bucket')
+        failed = func.sum(case((LLMCall.parse_outcome.in_(('fallback', 'tool_cap', 'error')), 1), else_=0))
+        retried = func.sum(case((LLMCall.retry_reason.isnot(None), 1), else_=0))
+
+        with self.read_scope() as session:
+            query = session.query(
+                period,
+                LLMCall.model,
+                func.count(LLMCall.id),
+                func.sum(LLMCall.prompt_tokens),
+                func.sum(LLMCall.completion_tokens),
+                func.sum(LLMCall.reasoning_tokens),
+                func.sum(LLMCall.cached_tokens),
+                func.sum(LLMCall.cost_usd),
+                func.avg(LLMCall.wall_time_ms),
+                func.max(LLMCall.wall_time_ms),
+                func.avg(LLMCall.ttft_ms),
+                func.avg(LLMCall.tool_rounds),
+                retried,
+                failed,
+            )
+
+            if start_date:
+                query = query.filter(LLMCall.timestamp >= start_date)
+            if end_date:
+                query = query.filter(LLMCall.timestamp <= end_date)
+            if model:
+                query = query.filter(LLMCall.model == model)
+
+            rows = query.group_by(period, LLMCall.model).order_by(period, LLMCall.model).all()
+
+        return [
+            {
+                'bucket': row[0],
+                'model': row[1],
+                'calls': row[2],
+                'prompt_tokens': row[3] or 0,
+                'completion_tokens': row[4] or 0,
+                'reasoning_tokens': row[5] or 0,
+                'cached_tokens': row[6] or 0,
+                'cost_usd': round(row[7], 6) if row[7] is not None else None,
+                'avg_wall_time_ms': round(row[8], 1) if row[8] is not None else None,
+                'max_wall_time_ms': round(row[9], 1) if row[9] is not None else None,
+                'avg_ttft_ms': round(row[10], 1) if row[10] is not None else None,
+                'avg_tool_rounds': round(row[11] or 0, 2),
+                'retried_calls': row[12] or 0,
+                'failed_calls': row[13] or 0,
+            }
+            for row in rows
+        ]
+
+    @classmethod
+    def _llm_stats_period(cls, dialect: str, bucket: str):
+        """Bucket label expression for LLMCall.timestamp in the given SQL dialect."""
+        if dialect == 'sqlite':
+            return func.strftime(cls.LLM_STATS_BUCKETS[bucket], LLMCall.timestamp)
+        if dialect == 'postgresql':
+            return func.to_char(LLMCall.timestamp, cls.PG_LLM_STATS_BUCKETS[bucket])
+        raise ValueError(f"LLM call stats are not supported on {dialect} (SQLite and PostgreSQL only)")
+
+    # ==================== SEARCH OPERATIONS ====================
+
+    SEARCH_MODELS = {'diary': DiaryEntry, 'trade': Trade, 'proposal': TradeProposal}
+
+    def search_rationales(
+        self,
+        query: str,
+        kinds: Optional[List[str]] = None,
+        asset: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        action: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Full-text search over diary, trade and proposal rationales, best match first.
+
+        Words must all match (stemmed, so "breakout" finds "breakouts");
+        "quoted phrases" match in order and a trailing * matches a prefix.
+        Ranked by BM25 through the FTS5 index; without FTS5 every term is
+        matched with LIKE and results are ordered newest first.
+
+        Args:
+            query: Search text
+            kinds: Sources to search: 'diary', 'trade', 'proposal' (default all)
+            asset: Filter by asset (optional)
+            start_date: Filter from date (optional)
+            end_date: Filter to date (optional)
+            limit: Maximum number of results
+            cursor: next_cursor from the previous page
+            action: Filter by action, e.g. 'buy' (optional)
+
+        Returns:
+            (results, next_cursor). Each result has kind, id, asset, action,
+            timestamp, rationale, snippet (matches in [brackets]) and score
+            (higher is better; None without FTS5).
+
+        Raises:
+            ValueError: If the query is empty, a kind is unknown or the cursor is invalid
+        """
+        match = self._fts_query(query)
+        kinds = list(kinds or SEARCH_SOURCES)
+        unknown = set(kinds) - set(SEARCH_SOURCES)
+        if unknown:
+            raise ValueError(f"Unknown search kind(s): {sorted(unknown)}")
+        offset = 0
+        if cursor:
+            (offset,) = decode_cursor(cursor, 1)
+            if not isinstance(offset, int) or offset < 0:
+                raise ValueError(f"Invalid cursor: {cursor!r}")
+
+        if self.search_enabled:
+            hits = self._search_fts(match, kinds, asset, action, start_date, end_date, limit + 1, offset)
+        else:
+            hits = self._search_like(query, kinds, asset, action, start_date, end_date, limit + 1, offset)
+
+        next_cursor = encode_cursor(offset + limit) if len(hits) > limit else None
+        return hits[:limit], next_cursor
+
+    def rebuild_search_index(self) -> int:
+        """Repopulate the full-text index from the source tables. Returns rows indexed."""
+        if not self.search_enabled:
+            return 0
+        return rebuild_search_index(self.engine)
+
+    @staticmethod
+    def _search_terms(query: str) -> List[Tuple[str, bool]]:
+        """Split user input into (term, is_prefix) pairs; "quoted phrases" stay together."""
+        terms = []
+        for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query or ''):
+            prefix = not phrase and word.endswith('*')
+            term = word.rstrip('*') if prefix else (phrase or word)
+            if term.strip():
+                terms.append((term, prefix))
+        if not terms:
+            raise ValueError("Empty search query")
+        return terms
+
+    @classmethod
+    def _fts_query(cls, query: str) -> str:
+        """Turn user input into an FTS5 query of quoted terms (no FTS5 syntax errors)."""
+        return ' '.join('"' + term.replace('"', '""') + '"' + ('*' if prefix else '')
+                        for term, prefix in cls._search_terms(query))
+
+    def _search_fts(self, match: str, kinds: List[str], asset: Optional[str], action: Optional[str],
+                    start_date: Optional[datetime], end_date: Optional[datetime],
+                    limit: int, offset: int) -> List[Dict[str, Any]]:
+        sql = (f"SELECT rowid, rank, snippet({SEARCH_TABLE}, 0, '[', ']', '...', 16) "
+               f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match")
+        params: Dict[str, Any] = {'match': match, 'limit': limit, 'offset': offset}
+        if len(kinds) < len(SEARCH_SOURCES):
+            sql += f" AND rowid % 4 IN ({', '.join(str(SEARCH_SOURCES[k][0]) for k in kinds)})"
+        if asset:
+            sql += " AND asset = :asset"
+            params['asset'] = asset
+        if action:
+            sql += " AND action = :action"
+            params['action'] = action
+        # Timestamps are stored as 'YYYY-MM-DD HH:MM:SS.ffffff' text, which sorts chronologically
+        if start_date:
+            sql += " AND timestamp >= :start"
+            params['start'] = start_date.isoformat(sep=' ')
+        if end_date:
+            sql += " AND timestamp <= :end"
+            params['end'] = end_date.isoformat(sep=' ')
+        sql += " ORDER BY rank LIMIT :limit OFFSET :offset"
+
+        kind_by_code = {code: kind for kind, (code, _, _) in SEARCH_SOURCES.items()}
+        with self.read_scope() as session:
+            rows = session.execute(text(sql), params).all()
+            hits = [(kind_by_code[rowid % 4], rowid // 4, -rank, snippet) for rowid, rank, snippet in rows]
+            sources = self._load_search_sources(session, hits)
+        return [
+            self._search_result(kind, sources[(kind, source_id)], snippet, round(score, 4))
+            for kind, source_id, score, snippet in hits
+            if (kind, source_id) in sources
+        ]
+
+    def _load_search_sources(self, session: Session, hits) -> Dict[Tuple[str, int], Any]:
+        """Fetch the rows behind search hits with one query per kind."""
+        ids: Dict[str, List[int]] = {}
+        for kind, source_id, _, _ in hits:
+            ids.setdefault(kind, []).append(source_id)
+        sources = {}
+        for kind, kind_ids in ids.items():
+            model = self.SEARCH_MODELS[kind]
+            for row in session.query(model).filter(model.id.in_(kind_ids)):
+                sources[(kind, row.id)] = row
+        return sources
+
+    def _search_like(self, query: str, kinds: List[str], asset: Optional[str], action: Optional[str],
+                     start_date: Optional[datetime], end_date: Optional[datetime],
+                     limit: int, offset: int) -> List[Dict[str, Any]]:
+        """Fallback for databases without FTS5: every term must appear, newest first."""
+        terms = [term for term, _ in self._search_terms(query)]
+        rows = []
+        with self.read_scope() as session:
+            for kind in kinds:
+                model = self.SEARCH_MODELS[kind]
+                ts_col = getattr(model, SEARCH_SOURCES[kind][2])
+                q = session.query(model).filter(*[model.rationale.ilike(f'%{t}%') for t in terms])
+                if asset:
+                    q = q.filter(model.asset == asset)
+                if action:
+                    q = q.filter(model.action == action)
+                if start_date:
+                    q = q.filter(ts_col >= start_date)
+                if end_date:
+                    q = q.filter(ts_col <= end_date)
+                rows.extend((kind, row) for row in q.order_by(desc(ts_col)).limit(offset + limit))
+        rows.sort(key=lambda item: getattr(item[1], SEARCH_SOURCES[item[0]][2]), reverse=True)
+        return [self._search_result(kind, row, (row.rationale or '')[:200], None)
+                for kind, row in rows[offset:offset + limit]]
+
+    @staticmethod
+    def _search_result(kind: str, row: Any, snippet: str, score: Optional[float]) -> Dict[str, Any]:
+        timestamp = getattr(row, SEARCH_SOURCES[kind][2])
+        return {
+            'kind': kind,
+            'id': row.id,
+            'asset': row.asset,
+            'action': row.action,
+            'timestamp': timestamp.isoformat() if timestamp else None,
+            'rationale': row.rationale,
+            'snippet': snippet,
+            'score': score,
+        }
+
     # ==================== UTILITY OPERATIONS ====================
 
-    def migrate_jsonl_diary(self, jsonl_path: str = 'data/diary.jsonl'):
+    MIGRATION_CHUNK_SIZE = 5000
+
+    def migrate_jsonl_diary(self, jsonl_path: str = 'data/diary.jsonl', chunk_size: Optional[int] = None,
+                            resume: bool = True,
+                            progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> int:
         """
         Migrate existing JSONL diary to database.
 
+        Streams the file in chunks of ``chunk_size`` lines; each chunk is
+        bulk-inserted together with a byte offset checkpoint in one
+        transaction, so a rerun after an interruption continues after the last
+        committed chunk. Malformed lines are skipped and counted.
+
         Args:
             jsonl_path: Path to diary.jsonl file
+            chunk_size: Lines per transaction (default MIGRATION_CHUNK_SIZE)
+            resume: Continue from the stored checkpoint (False discards it and
+                starts over; entries already imported are not removed)
+            progress: Called after each chunk with offset, total_bytes, rows
+                (this run), skipped and elapsed seconds
+
+        Returns:
+            Number of diary entries imported by this run
         """
         import json
+        import time
 
         if not os.path.exists(jsonl_path):
             logger.warning(f"JSONL file not found: {jsonl_path}")
             return 0
 
-        count = 0
-        with open(jsonl_path, 'r') as f:
-            for line in f:
-                try:
-                    entry = json.loads(line.strip())
-
-                    # Parse timestamp
-                    timestamp_str = entry.get('timestamp', '')
-                    if timestamp_str:
-                        # Handle both ISO format and timestamp
-                        try:
-                            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                        except:
-                            timestamp = datetime.utcnow()
-                    else:
-                        timestamp = datetime.utcnow()
-
-                    # Create diary entry
-                    with self.session_scope() as session:
-                        diary_entry = DiaryEntry(
-                            timestamp=timestamp,
-                            asset=entry.get('asset', 'UNKNOWN'),
-                            action=entry.get('action', 'hold'),
-                            rationale=entry.get('rationale', ''),
-                        )
-                        session.add(diary_entry)
-                        count += 1
+        source = os.path.abspath(jsonl_path)
+        chunk_size = chunk_size or self.MIGRATION_CHUNK_SIZE
+        total_bytes = os.path.getsize(jsonl_path)
 
-                except Exception as e:
-                    logger.error(f"Error migrating JSONL entry: {e}")
-                    continue
+        offset = 0
+        with self.session_scope() as session:
+            checkpoint = session.get(MigrationCheckpoint, source)
+            if checkpoint is not None and resume and checkpoint.offset <= total_bytes:
+                offset = checkpoint.offset
+            elif checkpoint is not None:
+                if resume:
+                    logger.warning(f"{jsonl_path} is shorter than its checkpoint; migrating from the start")
+                session.delete(checkpoint)
+        if offset:
+            logger.info(f"Resuming migration of {jsonl_path} at byte {offset:,}/{total_bytes:,}")
+
+        started = time.perf_counter()
+        count = skipped = chunk_skipped = 0
+        rows: List[Dict[str, Any]] = []
+        with open(jsonl_path, 'rb') as f:
+            f.seek(offset)
+            while True:
+                line = f.readline()
+                if line.strip():
+                    try:
+                        rows.append(self._diary_row(json.loads(line)))
+                    except (ValueError, TypeError, AttributeError) as e:
+                        if not line.endswith(b'\n'):
+                            line = b''  # unterminated last line may still be being written; retry next run
+                        else:
+                            chunk_skipped += 1
+                            logger.error(f"Error migrating JSONL entry at byte {offset}: {e}")
+                offset += len(line)
+
+                if len(rows) >= chunk_size or not line:
+                    self._import_diary_chunk(source, rows, offset, chunk_skipped, finished=not line)
+                    count += len(rows)
+                    skipped += chunk_skipped
+                    rows, chunk_skipped = [], 0
+                    if progress:
+                        progress({'offset': offset, 'total_bytes': total_bytes, 'rows': count,
+                                  'skipped': skipped, 'elapsed': time.perf_counter() - started})
+                if not line:
+                    break
 
         logger.info(f"[OK] Migrated {count} diary entries from {jsonl_path}")
         return count
 
+    @staticmethod
+    def _diary_row(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a diary.jsonl entry to DiaryEntry column values."""
+        timestamp = None
+        timestamp_str = entry.get('timestamp', '')
+        if timestamp_str:
+            # Handle both ISO format and timestamp
+            try:
+                timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00')).replace(tzinfo=None)
+            except (ValueError, TypeError, AttributeError):
+                pass
+        return {
+            'timestamp': timestamp or datetime.utcnow(),
+            'asset': str(entry.get('asset', 'UNKNOWN'))[:20],
+            'action': str(entry.get('action', 'hold'))[:10],
+            'rationale': entry.get('rationale') or '',
+        }
+
+    def _import_diary_chunk(self, source: str, rows: List[Dict[str, Any]], offset: int, skipped: int,
+                            finished: bool) -> None:
+        """Insert one chunk of diary rows and advance the checkpoint atomically."""
+        with self.session_scope() as session:
+            if rows:
+                session.execute(insert(DiaryEntry), rows)
+            checkpoint = session.get(MigrationCheckpoint, source)
+            if checkpoint is None:
+                checkpoint = MigrationCheckpoint(source=source, rows=0, skipped=0)
+                session.add(checkpoint)
+            checkpoint.offset = offset
+            checkpoint.rows += len(rows)
+            checkpoint.skipped += skipped
+            checkpoint.completed_at = datetime.utcnow() if finished else None
+
     def get_database_stats(self) -> Dict[str, int]:
         """Get statistics about database contents."""
-        with self.session_scope() as session:
+        with self.read_scope() as session:
             return {
                 'trades': session.query(Trade).count(),
                 'open_trades': session.query(Trade).filter(Trade.status == 'open').count(),
@@ -608,6 +1570,7 @@ class DatabaseManager:
                 'bot_states': session.query(BotState).count(),
                 'trade_proposals': session.query(TradeProposal).count(),
                 'pending_proposals': session.query(TradeProposal).filter(TradeProposal.status == 'pending').count(),
+                'llm_calls': session.query(LLMCall).count(),
             }
 
 
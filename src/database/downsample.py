@@ -0,0 +1,61 @@
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling for chart series.
+
+Reduces a time series to a target number of points while keeping its
+visual shape (peaks, troughs and drawdowns survive, unlike plain striding).
+"""
+
+from typing import Callable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def lttb(points: Sequence[T], threshold: int, x: Callable[[T], float], y: Callable[[T], float]) -> List[T]:
+    """
+    Downsample ``points`` (sorted by x) to at most ``threshold`` points.
+
+    The first and last points are always kept; every other bucket contributes
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket.
+
+    Args:
+        points: Series sorted by x
+        threshold: Target number of points (values below 3 keep the endpoints only)
+        x: Key returning a numeric x value (e.g. epoch seconds)
+        y: Key returning the numeric y value
+    """
+    count = len(points)
+    if threshold >= count or count <= 2:
+        return list(points)
+    if threshold < 3:
+        return [points[0], points[-1]]
+
+    xs = [float(x(p)) for p in points]
+    ys = [float(y(p)) for p in points]
+    sampled: List[T] = [points[0]]
+    bucket_size = (count - 2) / (threshold - 2)
+    kept = 0
+
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket (the last point for the final bucket)
+        next_start, next_end = end, min(int((i + 2) * bucket_size) + 1, count)
+        if next_start >= next_end:
+            next_start, next_end = count - 1, count
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        best, best_area = start, -1.0
+        ax, ay = xs[kept], ys[kept]
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        kept = best
+
+    sampled.append(points[-1])
+    return sampled
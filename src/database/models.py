@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy import (
     create_engine,
+    text,
     Column,
     Integer,
     String,
@@ -286,9 +287,10 @@ class TradeProposal(Base):
 
 class MarketData(Base):
     """
-    Historical market data snapshots for backtesting and analysis.
+    Historical candles for backtesting and analysis.
 
-    Optional table for future backtesting functionality.
+    Written in bulk by DatabaseManager.upsert_candles (one row per asset,
+    interval and open time) and thinned by apply_market_data_retention.
     """
     __tablename__ = 'market_data'
 
@@ -320,21 +322,281 @@ class MarketData(Base):
     __table_args__ = (
         UniqueConstraint('asset', 'timestamp', 'interval', name='uq_market_data'),
         Index('idx_market_asset_timestamp', 'asset', 'timestamp'),
-        Index('idx_market_asset_interval', 'asset', 'interval'),
+        Index('idx_market_asset_interval_timestamp', 'asset', 'interval', 'timestamp'),  # range queries
     )
 
     def __repr__(self):
         return f"<MarketData(id={self.id}, asset={self.asset}, timestamp={self.timestamp}, close={self.close})>"
 
 
+class LLMCall(Base):
+    """
+    LLM call telemetry - one row per decision request to a model.
+
+    Replaces the free-text payload dumps in llm_requests.log for anything that
+    needs querying (latency, token usage, cost, retries, parse failures).
+    """
+    __tablename__ = 'llm_calls'
+
+    # Primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Call identification
+    timestamp = Column(DateTime, nullable=False, default=func.now(), index=True)  # call start
+    provider = Column(String(20), nullable=False)  # openrouter, gemini
+    model = Column(String(100), nullable=False, index=True)
+    purpose = Column(String(20), default='decision')  # decision, sanitize
+    assets = Column(String(200), nullable=True)  # "BTC,ETH"
+    streamed = Column(Boolean, default=False)
+
+    # Token usage (summed over all round trips of the call)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    reasoning_tokens = Column(Integer, default=0)
+    cached_tokens = Column(Integer, default=0)
+    cost_usd = Column(Float, nullable=True)  # provider-reported or estimated from llm_pricing
+
+    # Latency
+    wall_time_ms = Column(Float, nullable=True)
+    ttft_ms = Column(Float, nullable=True)  # time to first token (first response when not streamed)
+
+    # Control flow
+    requests = Column(Integer, default=0)  # HTTP round trips
+    tool_rounds = Column(Integer, default=0)
+    tool_calls = Column(Integer, default=0)
+    retry_reason = Column(String(200), nullable=True)  # e.g. "422 tools_rejected"
+    parse_outcome = Column(String(20), nullable=False, index=True)  # ok, repaired, sanitized, fallback, tool_cap, error, cancelled
+    error = Column(Text, nullable=True)
+
+    # Metadata
+    created_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        Index('idx_llm_call_model_timestamp', 'model', 'timestamp'),
+    )
+
+    def __repr__(self):
+        return f"<LLMCall(id={self.id}, model={self.model}, outcome={self.parse_outcome}, wall_time_ms={self.wall_time_ms})>"
+
+
+class EquityRollup(Base):
+    """
+    Equity OHLC per hour and per day, maintained as bot states are saved.
+
+    Lets long-range equity charts read one row per bucket instead of every
+    BotState snapshot.
+    """
+    __tablename__ = 'equity_rollups'
+
+    # Primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Bucket identification
+    bucket = Column(String(10), nullable=False)  # hour, day
+    bucket_start = Column(DateTime, nullable=False)
+
+    # Equity OHLC
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    samples = Column(Integer, nullable=False, default=1)
+
+    # Timestamps of the snapshots behind open/close (out-of-order inserts)
+    first_at = Column(DateTime, nullable=False)
+    last_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('bucket', 'bucket_start', name='uq_equity_rollup'),
+    )
+
+    def add_sample(self, timestamp: datetime, equity: float) -> None:
+        """Fold one equity snapshot into the bucket."""
+        self.high = max(self.high, equity)
+        self.low = min(self.low, equity)
+        if timestamp >= self.last_at:
+            self.close, self.last_at = equity, timestamp
+        if timestamp < self.first_at:
+            self.open, self.first_at = equity, timestamp
+        self.samples += 1
+
+    def __repr__(self):
+        return f"<EquityRollup(bucket={self.bucket}, start={self.bucket_start}, close={self.close})>"
+
+
+class TradeStats(Base):
+    """
+    Running totals over closed trades (single row, id=1).
+
+    Maintained incrementally by DatabaseManager.close_trade so the dashboard
+    reads trade statistics in constant time instead of scanning history.
+    """
+    __tablename__ = 'trade_stats'
+
+    # Primary key (always 1)
+    id = Column(Integer, primary_key=True)
+
+    # Counts
+    total_trades = Column(Integer, nullable=False, default=0)
+    winning_trades = Column(Integer, nullable=False, default=0)
+    losing_trades = Column(Integer, nullable=False, default=0)
+
+    # P&L totals (USD)
+    total_pnl = Column(Float, nullable=False, default=0.0)
+    gross_profit = Column(Float, nullable=False, default=0.0)  # sum of winning trades
+    gross_loss = Column(Float, nullable=False, default=0.0)  # sum of losing trades (negative)
+    best_trade = Column(Float, nullable=True)
+    worst_trade = Column(Float, nullable=True)
+
+    # Metadata
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def add_trade(self, realized_pnl: Optional[float]) -> None:
+        """Fold one newly closed trade into the totals."""
+        self.total_trades += 1
+        if realized_pnl is None:
+            return
+        if realized_pnl > 0:
+            self.winning_trades += 1
+            self.gross_profit += realized_pnl
+        elif realized_pnl < 0:
+            self.losing_trades += 1
+            self.gross_loss += realized_pnl
+        self.total_pnl += realized_pnl
+        self.best_trade = realized_pnl if self.best_trade is None else max(self.best_trade, realized_pnl)
+        self.worst_trade = realized_pnl if self.worst_trade is None else min(self.worst_trade, realized_pnl)
+
+    def __repr__(self):
+        return f"<TradeStats(total_trades={self.total_trades}, total_pnl={self.total_pnl})>"
+
+
+class MigrationCheckpoint(Base):
+    """
+    Progress of a JSONL import, one row per source file.
+
+    Updated in the same transaction as each imported chunk, so an interrupted
+    migration resumes after the last committed line without duplicating rows.
+    """
+    __tablename__ = 'migration_checkpoints'
+
+    # Source file (absolute path)
+    source = Column(String(500), primary_key=True)
+
+    # Progress
+    offset = Column(Integer, nullable=False, default=0)  # bytes consumed (always at a line boundary)
+    rows = Column(Integer, nullable=False, default=0)  # entries imported
+    skipped = Column(Integer, nullable=False, default=0)  # malformed lines
+    completed_at = Column(DateTime, nullable=True)  # set once the end of file was reached
+
+    # Metadata
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<MigrationCheckpoint(source={self.source}, offset={self.offset}, rows={self.rows})>"
+
+
 # Database initialization helper
 def create_tables(engine):
     """Create all tables in the database."""
     Base.metadata.create_all(engine)
+    # create_all skips existing tables; add indexes introduced since they were created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
     print("[OK] Database tables created successfully")
 
 
+# Full-text search over rationales (SQLite FTS5)
+#
+# One FTS5 table indexes the rationale of diary entries, trades and trade
+# proposals. The FTS rowid is ``source id * 4 + kind code`` so triggers can
+# update or delete a row by rowid instead of scanning the index.
+SEARCH_TABLE = 'rationale_fts'
+SEARCH_SOURCES = {
+    # kind: (code, table, timestamp column)
+    'diary': (1, 'diary_entries', 'timestamp'),
+    'trade': (2, 'trades', 'entry_timestamp'),
+    'proposal': (3, 'trade_proposals', 'proposed_at'),
+}
+
+
+def _search_triggers(kind: str):
+    code, table, ts_col = SEARCH_SOURCES[kind]
+    insert = (f"INSERT INTO {SEARCH_TABLE}(rowid, rationale, asset, action, timestamp) "
+              f"SELECT new.id * 4 + {code}, new.rationale, new.asset, new.action, new.{ts_col} "
+              f"WHERE coalesce(new.rationale, '') != '';")
+    delete = f"DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 4 + {code};"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF rationale, asset, action, {ts_col} "
+        f"ON {table} BEGIN {delete} {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN {delete} END",
+    ]
+
+
+def _drop_search_index(conn) -> None:
+    for _, table, _ in SEARCH_SOURCES.values():
+        for event in ("insert", "update", "delete"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_fts_{event}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+
+
+def create_search_index(engine) -> bool:
+    """
+    Create the rationale FTS5 index and its sync triggers (SQLite only).
+
+    A newly created index is backfilled from existing rows; an index built
+    before the ``action`` column existed is rebuilt. Returns False if the
+    database is not SQLite or SQLite was built without FTS5.
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+    with engine.begin() as conn:
+        columns = [row[1] for row in conn.execute(text(f"PRAGMA table_info({SEARCH_TABLE})"))]
+        if columns and 'action' not in columns:
+            _drop_search_index(conn)
+            columns = []
+        exists = bool(columns)
+        if not exists:
+            try:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                    "rationale, asset UNINDEXED, action UNINDEXED, timestamp UNINDEXED, "
+                    "tokenize='porter unicode61')"
+                ))
+            except Exception as e:
+                print(f"[WARNING] Full-text search unavailable: {e}")
+                return False
+        for kind in SEARCH_SOURCES:
+            for ddl in _search_triggers(kind):
+                conn.execute(text(ddl))
+        if not exists:
+            _backfill_search_index(conn)
+    return True
+
+
+def rebuild_search_index(engine) -> int:
+    """Repopulate the rationale FTS5 index from the source tables. Returns rows indexed."""
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+        return _backfill_search_index(conn)
+
+
+def _backfill_search_index(conn) -> int:
+    count = 0
+    for code, table, ts_col in SEARCH_SOURCES.values():
+        count += conn.execute(text(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, rationale, asset, action, timestamp) "
+            f"SELECT id * 4 + {code}, rationale, asset, action, {ts_col} FROM {table} "
+            "WHERE coalesce(rationale, '') != ''"
+        )).rowcount
+    return count
+
+
 def drop_tables(engine):
     """Drop all tables in the database (use with caution!)."""
     Base.metadata.drop_all(engine)
+    if engine.dialect.name == 'sqlite':
+        with engine.begin() as conn:
+            _drop_search_index(conn)
     print("[WARNING] All database tables dropped")
@@ -0,0 +1,245 @@
+"""
+Write-behind persistence for the trading loop.
+
+The engine enqueues trades, diary entries, position upserts and state
+snapshots without touching the database; a background thread drains the
+queue and commits each batch in a single transaction. Enqueueing never
+blocks, so a slow or locked disk cannot delay order placement.
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.backend.config_loader import CONFIG
+
+logger = logging.getLogger(__name__)
+
+Operation = Tuple[str, Dict[str, Any]]
+
+
+class WriteBehindPersister:
+    """
+    Queue-backed, batching writer in front of ``DatabaseManager.apply_batch``.
+
+    Operations are committed in arrival order. A batch is flushed once
+    ``batch_size`` operations are waiting or ``flush_interval`` seconds have
+    passed since the first one arrived. When the queue is full new operations
+    are dropped (and counted) rather than blocking the caller; a failed batch
+    is retried ``max_retries`` times before it is dropped.
+    """
+
+    def __init__(
+        self,
+        db=None,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_queue: int = 10000,
+        max_retries: int = 3,
+    ):
+        """
+        Initialize persister.
+
+        Args:
+            db: DatabaseManager to write to (defaults to the global instance)
+            batch_size: Maximum operations per transaction
+            flush_interval: Seconds to wait for a batch to fill
+            max_queue: Queue capacity; operations beyond it are dropped
+            max_retries: Attempts per failed batch before it is dropped
+        """
+        if db is None:
+            from src.database.db_manager import get_db_manager
+            db = get_db_manager()
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+
+        self._queue: "queue.Queue[Optional[Operation]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @classmethod
+    def from_config(cls, db=None) -> "WriteBehindPersister":
+        return cls(
+            db=db,
+            batch_size=int(CONFIG.get("db_batch_size") or 100),
+            flush_interval=float(CONFIG.get("db_flush_interval") or 0.5),
+            max_queue=int(CONFIG.get("db_queue_max") or 10000),
+        )
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+        logger.info(f"Write-behind persister started (batch_size={self.batch_size}, flush_interval={self.flush_interval}s)")
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush everything queued so far and stop the writer thread."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("Persister queue full on close; pending operations may be lost")
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Persister did not drain within {timeout}s ({self._queue.qsize()} operations left)")
+        self._thread = None
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until every operation enqueued so far is committed (or dropped)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    # ------------------------------------------------------------------
+    # Enqueueing (called from the trading loop; never blocks)
+    # ------------------------------------------------------------------
+
+    def enqueue(self, kind: str, **fields) -> bool:
+        """Queue one operation; returns False if it was dropped because the queue is full."""
+        try:
+            self._queue.put_nowait((kind, fields))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning(f"Persister queue full, dropped {kind} operation")
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def record_trade(self, **fields) -> bool:
+        """Queue a new Trade row (fields as in ``DatabaseManager.create_trade``)."""
+        fields.setdefault("entry_timestamp", datetime.utcnow())
+        return self.enqueue("trade", **fields)
+
+    def record_diary(self, entry: Dict[str, Any]) -> bool:
+        """Queue an engine diary entry (the dict written to diary.jsonl)."""
+        timestamp = entry.get("timestamp")
+        if isinstance(timestamp, str):
+            try:
+                timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00")).replace(tzinfo=None)
+            except ValueError:
+                timestamp = None
+        asset = entry.get("asset") or ",".join(entry.get("removed_assets") or []) or "SYSTEM"
+        return self.enqueue(
+            "diary",
+            timestamp=timestamp or datetime.utcnow(),
+            asset=str(asset)[:20],
+            action=str(entry.get("action", "hold"))[:10],
+            rationale=entry.get("rationale") or entry.get("note") or entry.get("reason") or "",
+            price=entry.get("entry_price", entry.get("price")),
+        )
+
+    def upsert_position(self, **fields) -> bool:
+        """Queue a Position upsert (fields as in ``DatabaseManager.upsert_position``)."""
+        return self.enqueue("position", **fields)
+
+    def close_position(self, asset: str) -> bool:
+        return self.enqueue("close_position", asset=asset)
+
+    def close_trades(self, asset: str, exit_price: float, exit_timestamp: Optional[datetime] = None) -> bool:
+        """Queue closing the asset's open trades (see ``DatabaseManager.close_open_trades``)."""
+        return self.enqueue("close_trades", asset=asset, exit_price=exit_price,
+                            exit_timestamp=exit_timestamp or datetime.utcnow())
+
+    def record_candles(self, asset: str, interval: str, candles: List[Dict[str, Any]]) -> bool:
+        """Queue an exchange candle fetch for ``DatabaseManager.upsert_candles``."""
+        return self.enqueue("candles", asset=asset, interval=interval, candles=list(candles))
+
+    def apply_retention(self, retention: Optional[Dict[str, float]] = None) -> bool:
+        """Queue a market data retention/compaction pass on the writer thread."""
+        return self.enqueue("market_data_retention", retention=retention)
+
+    def snapshot_state(self, **fields) -> bool:
+        """Queue a BotState snapshot (fields as in ``DatabaseManager.save_bot_state``)."""
+        fields.setdefault("timestamp", datetime.utcnow())
+        return self.enqueue("state", **fields)
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                break
+            batch: List[Operation] = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    op = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if op is None:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(op)
+            self._flush(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _flush(self, batch: List[Operation]) -> None:
+        for attempt in range(1, self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                self.db.apply_batch(batch)
+            except Exception as e:
+                logger.error(f"Persister batch of {len(batch)} failed (attempt {attempt}/{self.max_retries}): {e}")
+                if attempt < self.max_retries:
+                    time.sleep(min(0.1 * 2 ** attempt, 2.0))
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.batches += 1
+                self.written += len(batch)
+                self.last_flush_ms = elapsed
+                self.max_flush_ms = max(self.max_flush_ms, elapsed)
+                self._total_flush_ms += elapsed
+            logger.debug(f"Persisted {len(batch)} operations in {elapsed:.1f} ms")
+            return
+        with self._lock:
+            self.failed_batches += 1
+            self.dropped += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput and flush latency."""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "last_flush_ms": round(self.last_flush_ms, 2),
+                "avg_flush_ms": round(self._total_flush_ms / self.batches, 2) if self.batches else 0.0,
+                "max_flush_ms": round(self.max_flush_ms, 2),
+            }
@@ -30,39 +30,47 @@ class TradeHistoryPaginator:
     def __init__(self, bot_service: BotService, page_size: int = 50):
         self.bot_service = bot_service
         self.page_size = page_size
-        self.current_offset = 0
+        self.cursor = None  # Opaque cursor of the next page
         self.total_loaded = 0
         self.cache = []  # Cache loaded trades
         self.has_more = True
-        self.filters = {'asset': None, 'action': None}
+        self.filters = {'asset': None, 'action': None, 'query': None}
 
-    def load_next_page(self):
-        """Load next page of trades using offset-based pagination"""
+    async def load_next_page(self):
+        """Load next page of trades using cursor-based pagination"""
         if not self.has_more:
             return []
 
-        # Get trades with offset
-        new_trades = self.bot_service.get_trade_history(
-            asset=self.filters['asset'],
-            action=self.filters['action'],
-            limit=self.page_size,
-            offset=self.current_offset  # Use offset for pagination
-        )
+        if self.filters.get('query'):
+            # Ranked full-text search over rationales (database index)
+            new_trades, self.cursor = await self.bot_service.search_trade_history(
+                self.filters['query'],
+                asset=self.filters['asset'],
+                action=self.filters['action'],
+                limit=self.page_size,
+                cursor=self.cursor
+            )
+        else:
+            # Continue after the last loaded entry (stable while new trades arrive)
+            new_trades, self.cursor = self.bot_service.get_trade_history_page(
+                asset=self.filters['asset'],
+                action=self.filters['action'],
+                limit=self.page_size,
+                cursor=self.cursor
+            )
 
-        # Check if we got less than page_size = no more data
-        if len(new_trades) < self.page_size:
-            self.has_more = False
+        # No cursor = no more data
+        self.has_more = self.cursor is not None
 
         # Update state
         self.cache.extend(new_trades)
-        self.current_offset += len(new_trades)
         self.total_loaded = len(self.cache)
 
         return new_trades
 
     def reset(self, filters=None):
         """Reset pagination (when filters change)"""
-        self.current_offset = 0
+        self.cursor = None
         self.total_loaded = 0
         self.cache = []
         self.has_more = True
@@ -102,6 +110,12 @@ def create_history(bot_service: BotService, state_manager: StateManager):
                     value='All'
                 ).classes('flex-1')
 
+                # Rationale search (full-text, best match first)
+                search_input = ui.input(
+                    label='Search rationale',
+                    placeholder='e.g. "strong volume" breakout'
+                ).classes('flex-1')
+
                 # Apply button
                 apply_btn = ui.button('Apply Filters', on_click=lambda: None).classes('bg-blue-600 px-6')
 
@@ -282,7 +296,7 @@ def create_history(bot_service: BotService, state_manager: StateManager):
             paginator.reset()
 
             # Load first page
-            new_trades = paginator.load_next_page()
+            new_trades = await paginator.load_next_page()
 
             if table.is_deleted:
                 return
@@ -321,7 +335,7 @@ def create_history(bot_service: BotService, state_manager: StateManager):
 
         try:
             # Load next page
-            new_trades = paginator.load_next_page()
+            new_trades = await paginator.load_next_page()
 
             if new_trades:
                 if table.is_deleted:
@@ -380,9 +394,10 @@ def create_history(bot_service: BotService, state_manager: StateManager):
         """Apply selected filters and reload"""
         asset = None if asset_filter.value == 'All' else asset_filter.value
         action = None if action_filter.value == 'All' else action_filter.value
+        query = (search_input.value or '').strip() or None
 
         # Reset paginator with new filters
-        paginator.reset(filters={'asset': asset, 'action': action})
+        paginator.reset(filters={'asset': asset, 'action': action, 'query': query})
 
         # Reload first page
         await load_initial_trades()
@@ -459,6 +474,7 @@ def create_history(bot_service: BotService, state_manager: StateManager):
     # ===== WIRE UP HANDLERS =====
 
     apply_btn.on('click', apply_filters)
+    search_input.on('keydown.enter', apply_filters)
     export_btn.on('click', export_csv)
     load_more_btn.on('click', load_more_trades)
 
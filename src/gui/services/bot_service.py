@@ -6,13 +6,14 @@ import asyncio
 import json
 import logging
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 from datetime import datetime
 
 from src.backend.bot_engine import TradingBotEngine, BotState
 from src.backend.config_loader import CONFIG
 from src.gui.services.event_bus import get_event_bus, EventTypes
 from src.gui.services.cache_manager import get_cache_manager
+from src.database.pagination import decode_cursor, encode_cursor
 
 
 class BotService:
@@ -200,6 +201,108 @@ class BotService:
             self.logger.error(f"Failed to load trade history: {e}")
             return []
 
+    def get_trade_history_page(
+        self,
+        asset: Optional[str] = None,
+        action: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Get one page of trade history, most recent first, with an opaque cursor.
+
+        The cursor is the byte offset in diary.jsonl where the page ended, so
+        entries appended while paging never shift later pages, and each page
+        reads only the lines it returns (plus filtered-out ones) from the end
+        of the file instead of parsing the whole diary.
+
+        Args:
+            asset: Filter by asset (optional)
+            action: Filter by action (buy/sell/hold) (optional)
+            limit: Maximum number of entries to return
+            cursor: next_cursor from the previous page (None for the first page)
+
+        Returns:
+            (entries, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        end = None
+        if cursor:
+            (end,) = decode_cursor(cursor, 1)
+            if not isinstance(end, int) or end < 0:
+                raise ValueError(f"Invalid cursor: {cursor!r}")
+
+        diary_path = Path("data/diary.jsonl")
+        if not diary_path.exists():
+            return [], None
+
+        entries: List[Dict] = []
+        page_end = None
+        try:
+            for offset, line in self._read_lines_reversed(diary_path, end):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if asset and entry.get('asset') != asset:
+                    continue
+                if action and entry.get('action') != action:
+                    continue
+                if len(entries) == limit:
+                    # One more match exists, so there is a next page
+                    return entries, encode_cursor(page_end)
+                entries.append(entry)
+                page_end = offset
+        except Exception as e:
+            self.logger.error(f"Failed to load trade history: {e}")
+        return entries, None
+
+    async def search_trade_history(
+        self,
+        query: str,
+        asset: Optional[str] = None,
+        action: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Full-text search over diary and trade rationales, best match first.
+
+        Uses the database FTS index (off the event loop) instead of scanning
+        diary.jsonl; results carry timestamp, asset, action, rationale and a
+        snippet with matches in [brackets].
+
+        Raises:
+            ValueError: If the query is empty or the cursor is invalid
+        """
+        from src.database.async_db import get_async_db_manager
+        return await get_async_db_manager().search_rationales(
+            query, kinds=['diary', 'trade'], asset=asset, action=action, limit=limit, cursor=cursor
+        )
+
+    @staticmethod
+    def _read_lines_reversed(path: Path, end: Optional[int] = None, block_size: int = 64 * 1024) -> Iterator[Tuple[int, bytes]]:
+        """Yield (start_offset, line) for non-empty lines before ``end``, last line first."""
+        with open(path, "rb") as f:
+            position = f.seek(0, 2) if end is None else min(end, f.seek(0, 2))
+            tail = b""
+            while position > 0:
+                read = min(block_size, position)
+                position -= read
+                f.seek(position)
+                chunk = f.read(read) + tail
+                lines = chunk.split(b"\n")
+                tail = lines.pop(0)  # may be incomplete; completed by the next block
+                line_end = position + len(chunk)
+                for line in reversed(lines):
+                    line_end -= len(line) + 1
+                    if line.strip():
+                        yield line_end + 1, line
+            if tail.strip():
+                yield 0, tail
+
     async def close_position(self, asset: str) -> bool:
         """
         Manually close a position via GUI.
@@ -2,7 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, AsyncMock
 from src.api.main import app
-from src.api.dependencies import get_bot_service
+from src.api.dependencies import get_bot_service, get_database
+from src.database.async_db import AsyncDatabaseManager
 from src.gui.services.bot_service import BotService
 from src.backend.bot_engine import BotState
 
@@ -22,6 +23,7 @@ def mock_bot_service():
     service.start = AsyncMock()
     service.stop = AsyncMock()
     service.get_trade_history.return_value = []
+    service.get_trade_history_page.return_value = ([], None)
     service.close_position = AsyncMock(return_value=True)
     service.refresh_market_data = AsyncMock(return_value=True)
     service.get_current_config = AsyncMock(return_value={
@@ -32,8 +34,20 @@ def mock_bot_service():
     
     return service
 
+# Mock DatabaseManager
+@pytest.fixture
+def mock_database():
+    db = MagicMock(spec=AsyncDatabaseManager)  # awaitable methods become AsyncMocks
+    db.get_llm_call_stats.return_value = []
+    db.get_llm_calls.return_value = []
+    db.get_equity_curve.return_value = []
+    db.get_equity_ohlc.return_value = []
+    db.search_rationales.return_value = ([], None)
+    return db
+
 # Override dependency
 @pytest.fixture
-def client(mock_bot_service):
+def client(mock_bot_service, mock_database):
     app.dependency_overrides[get_bot_service] = lambda: mock_bot_service
+    app.dependency_overrides[get_database] = lambda: mock_database
     return TestClient(app)
@@ -34,6 +34,16 @@ def test_get_trades(client):
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
+def test_get_trades_cursor(client, mock_bot_service):
+    mock_bot_service.get_trade_history_page.return_value = ([{"asset": "BTC"}], "abc")
+    response = client.get("/api/v1/trades/?limit=1&cursor=xyz")
+    assert response.status_code == 200
+    assert response.headers["X-Next-Cursor"] == "abc"
+    assert mock_bot_service.get_trade_history_page.call_args.kwargs["cursor"] == "xyz"
+
+    mock_bot_service.get_trade_history_page.side_effect = ValueError("Invalid cursor")
+    assert client.get("/api/v1/trades/?cursor=bad").status_code == 400
+
 def test_refresh_market_data(client, mock_bot_service):
     response = client.post("/api/v1/market/refresh")
     assert response.status_code == 200
@@ -51,3 +61,37 @@ def test_update_settings(client, mock_bot_service):
     assert response.status_code == 200
     assert response.json()["success"] is True
     mock_bot_service.update_config.assert_called_with({"assets": ["SOL"]})
+
+def test_get_llm_stats(client, mock_database):
+    response = client.get("/api/v1/llm/stats?bucket=hour&model=x-ai/grok-4")
+    assert response.status_code == 200
+    assert response.json() == []
+    kwargs = mock_database.get_llm_call_stats.call_args.kwargs
+    assert kwargs["bucket"] == "hour" and kwargs["model"] == "x-ai/grok-4"
+
+def test_get_llm_stats_rejects_unknown_bucket(client, mock_database):
+    mock_database.get_llm_call_stats.side_effect = ValueError("Unknown bucket")
+    response = client.get("/api/v1/llm/stats?bucket=minute")
+    assert response.status_code == 400
+
+def test_get_equity(client, mock_database):
+    response = client.get("/api/v1/bot/equity?days=90&max_points=200")
+    assert response.status_code == 200
+    mock_database.get_equity_curve.assert_called_with(days=90, max_points=200)
+
+    mock_database.get_equity_ohlc.side_effect = ValueError("Unknown equity bucket")
+    assert client.get("/api/v1/bot/equity?bucket=week").status_code == 400
+
+def test_search_rationales(client, mock_database):
+    hit = {"kind": "diary", "id": 1, "asset": "BTC", "snippet": "[breakout]", "score": 1.2}
+    mock_database.search_rationales.return_value = ([hit], "next")
+    response = client.get("/api/v1/search/?q=breakout&kind=diary&kind=trade&asset=BTC&action=buy&limit=5")
+    assert response.status_code == 200
+    assert response.json() == [hit]
+    assert response.headers["X-Next-Cursor"] == "next"
+    kwargs = mock_database.search_rationales.call_args.kwargs
+    assert kwargs["kinds"] == ["diary", "trade"] and kwargs["limit"] == 5
+    assert kwargs["action"] == "buy"
+
+    mock_database.search_rationales.side_effect = ValueError("Empty search query")
+    assert client.get("/api/v1/search/?q=%20").status_code == 400
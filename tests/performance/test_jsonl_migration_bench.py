@@ -0,0 +1,30 @@
+"""
+JSONL diary migration benchmark: stream a 50k-line diary.jsonl into the
+database in chunks. Reports the time taken; asserts only that every line was
+imported and the checkpoint reached the end of the file.
+"""
+import time
+
+from src.database.db_manager import DatabaseManager
+from src.database.models import DiaryEntry, MigrationCheckpoint
+from tests.test_jsonl_migration import write_diary
+
+LINES = 50_000
+
+
+class TestJsonlMigrationBench:
+
+    def test_large_diary_migration(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        diary = tmp_path / "diary.jsonl"
+        write_diary(diary, LINES)
+
+        started = time.perf_counter()
+        imported = db.migrate_jsonl_diary(str(diary))
+        elapsed = time.perf_counter() - started
+        print(f"\nmigrated {imported} diary entries in {elapsed * 1000:.0f} ms ({imported / elapsed:,.0f}/s)")
+
+        assert imported == LINES
+        with db.read_scope() as session:
+            assert session.query(DiaryEntry).count() == LINES
+            assert session.get(MigrationCheckpoint, str(diary)).offset == diary.stat().st_size
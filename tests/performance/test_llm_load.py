@@ -0,0 +1,46 @@
+"""
+LLM Decision Path Load Test
+Drives TradingAgent at high concurrency against the local stub server.
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.backend.agent.decision_maker import TradingAgent
+from src.backend.testing.stub_llm import StubLLMServer
+
+
+class TestLLMLoad:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_decisions_against_stub(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)  # llm_requests.log
+        agent = TradingAgent()
+        agent.telemetry.enabled = False
+        calls = 200
+        latencies = []
+
+        async def decide(i):
+            started = time.perf_counter()
+            result = await agent.decide_trade_async(["BTC", "ETH"], f"ctx {i}")
+            latencies.append(time.perf_counter() - started)
+            return result
+
+        async with StubLLMServer(policy="random", latency="lognormal:0.05,0.3", seed=1) as stub:
+            agent.base_url = stub.url
+            started = time.perf_counter()
+            results = await asyncio.gather(*(decide(i) for i in range(calls)))
+            elapsed = time.perf_counter() - started
+        await agent.aclose()
+
+        latencies.sort()
+        print(f"\n{calls} decisions in {elapsed:.2f}s ({calls / elapsed:.0f}/s), "
+              f"p50 {latencies[calls // 2] * 1000:.0f} ms, p95 {latencies[int(calls * 0.95)] * 1000:.0f} ms, "
+              f"peak in flight {stub.peak_in_flight}")
+
+        assert all(len(r["trade_decisions"]) == 2 for r in results)
+        assert stub.stats["status_200"] == calls
+        # The pooled session overlaps requests instead of running them back to back
+        assert stub.peak_in_flight > 1
+        assert elapsed < calls * 0.05 / 2
@@ -0,0 +1,26 @@
+"""
+Market data ingest benchmark: bulk upsert of a long 5m candle history into
+market_data. Reports the time taken; asserts only that every candle landed.
+"""
+import time
+from datetime import datetime
+
+from src.database.db_manager import DatabaseManager
+from tests.test_market_data import candles
+
+CANDLES = 20_000
+
+
+class TestMarketDataIngest:
+
+    def test_bulk_ingest(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        batch = candles(CANDLES, datetime(2025, 1, 1))
+
+        started = time.perf_counter()
+        db.upsert_candles("BTC", "5m", batch)
+        elapsed = time.perf_counter() - started
+        print(f"\nupserted {len(batch)} candles in {elapsed * 1000:.0f} ms ({len(batch) / elapsed:,.0f}/s)")
+
+        stored = db.get_candles("BTC", "5m", limit=CANDLES)
+        assert len(stored) == CANDLES and stored[-1] == batch[-1]
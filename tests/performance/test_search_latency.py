@@ -0,0 +1,35 @@
+"""
+Rationale search benchmark: a phrase + term query over 100k diary
+rationales through the FTS5 index. Reports the query latency; asserts only
+that a full first page and a next-page cursor come back.
+"""
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from src.database.db_manager import DatabaseManager
+from src.database.models import DiaryEntry
+
+ROWS = 100_000
+WORDS = ["breakout", "resistance", "support", "volume", "momentum", "funding", "divergence", "hold"]
+
+
+class TestSearchLatency:
+
+    def test_search_over_large_history(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        t0 = datetime(2025, 1, 1)
+        rows = [{"timestamp": t0 + timedelta(minutes=5 * i), "asset": "BTC", "action": "hold",
+                 "rationale": f"{WORDS[i % 8]} {WORDS[(i * 3) % 8]} near {i} with {WORDS[(i * 5) % 7]}"}
+                for i in range(ROWS)]
+        with db.session_scope() as session:
+            session.execute(insert(DiaryEntry), rows)
+
+        started = time.perf_counter()
+        results, cursor = db.search_rationales('"resistance volume" momentum', limit=20)
+        elapsed = time.perf_counter() - started
+        print(f"\nsearched {ROWS} rationales in {elapsed * 1000:.1f} ms")
+
+        assert len(results) == 20 and cursor is not None
+        assert all("resistance volume" in r["rationale"] and "momentum" in r["rationale"] for r in results)
@@ -0,0 +1,90 @@
+"""
+SQLite profile benchmark: concurrent bot writes and GUI reads against the
+default SQLite settings and the tuned profile (WAL, synchronous=NORMAL,
+page cache, mmap, busy_timeout, read-only pool).
+"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import text
+
+from src.database.db_manager import DatabaseManager
+
+DURATION = 1.5  # seconds per profile
+READERS = 4
+
+
+def run_workload(db: DatabaseManager) -> dict:
+    """One writer committing trades while READERS threads poll the dashboard queries."""
+    for i in range(200):
+        db.create_trade("BTC", "buy", 100.0 + i, 1.0, 100.0 + i)
+
+    stop = threading.Event()
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            try:
+                db.create_trade("ETH", "sell", 50.0 + i, 2.0, 100.0)
+                with lock:
+                    counts["writes"] += 1
+            except Exception:
+                with lock:
+                    counts["errors"] += 1
+            i += 1
+
+    def reader():
+        while not stop.is_set():
+            try:
+                db.get_trades(limit=50)
+                db.get_database_stats()
+                with lock:
+                    counts["reads"] += 1
+            except Exception:
+                with lock:
+                    counts["errors"] += 1
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(READERS)]
+    for t in threads:
+        t.start()
+    time.sleep(DURATION)
+    stop.set()
+    for t in threads:
+        t.join()
+    return {key: value / DURATION if key != "errors" else value for key, value in counts.items()}
+
+
+class TestSQLiteProfile:
+
+    def test_tuned_profile_pragmas(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'tuned.db'}", sqlite_profile="tuned")
+        with db.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        with db.read_engine.connect() as conn:
+            assert conn.execute(text("PRAGMA query_only")).scalar() == 1
+        with pytest.raises(Exception):
+            with db.read_scope() as session:
+                session.execute(text("DELETE FROM trades"))
+
+    def test_memory_database_keeps_single_pool(self):
+        db = DatabaseManager("sqlite:///:memory:", sqlite_profile="tuned")
+        assert db.sqlite_profile == "default" and db.read_engine is db.engine
+
+    def test_concurrent_workload_before_and_after(self, tmp_path):
+        before = run_workload(DatabaseManager(f"sqlite:///{tmp_path / 'default.db'}", sqlite_profile="default"))
+        after = run_workload(DatabaseManager(f"sqlite:///{tmp_path / 'tuned.db'}", sqlite_profile="tuned"))
+
+        print(f"\n{'profile':<10}{'writes/s':>12}{'reads/s':>12}{'errors':>8}")
+        for name, result in (("default", before), ("tuned", after)):
+            print(f"{name:<10}{result['writes']:>12.0f}{result['reads']:>12.0f}{result['errors']:>8}")
+
+        # Expected: tuned writes more per second (WAL readers no longer block the
+        # writer, commits skip the per-transaction fsync). Throughput depends on the
+        # machine and its disk, so only the numbers above report it; assert correctness.
+        assert after["errors"] == 0
+        assert after["writes"] > 0 and after["reads"] > 0
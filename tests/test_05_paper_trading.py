@@ -8,6 +8,7 @@ for risk-free testing without a real exchange.
 import asyncio
 import json
 import sys
+import tempfile
 import pytest
 from pathlib import Path
 
@@ -25,7 +26,7 @@ def print_header(text: str):
 
 
 @pytest.mark.asyncio
-async def test_paper_trading():
+async def test_paper_trading(tmp_path):
     """Test paper trading API functionality"""
 
     print_header("TEST 05: PAPER TRADING API")
@@ -48,7 +49,8 @@ async def test_paper_trading():
     print("\n💼 Test 2/8: Creating paper trading instance...")
     try:
         starting_balance = 10000.0
-        api = PaperTradingAPI(starting_balance=starting_balance)
+        api = PaperTradingAPI(starting_balance=starting_balance,
+                              state_path=str(tmp_path / "paper_trading_state.json"))
         print(f"✅ Paper trading API initialized")
         print(f"   Starting balance: ${api.balance:,.2f} USDC")
     except Exception as e:
@@ -261,7 +263,8 @@ async def main():
     print("\nTesting the paper trading backend...")
     print("This requires internet connection (Binance price API)")
 
-    success = await test_paper_trading()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        success = await test_paper_trading(Path(tmp_dir))
 
     return success
 
@@ -0,0 +1,55 @@
+import asyncio
+import inspect
+import threading
+import time
+
+import pytest
+
+from src.database.async_db import AsyncDatabaseManager
+from src.database.db_manager import DatabaseManager
+
+
+class TestAsyncDatabaseManager:
+
+    def test_exposes_same_operations(self):
+        for name in ("create_trade", "get_trades_page", "get_equity_curve", "migrate_jsonl_diary"):
+            method = getattr(AsyncDatabaseManager, name)
+            assert inspect.iscoroutinefunction(method)
+            assert inspect.signature(method) == inspect.signature(getattr(DatabaseManager, name))
+        assert not hasattr(AsyncDatabaseManager, "session_scope")
+
+    @pytest.mark.asyncio
+    async def test_round_trip_on_database_threads(self, tmp_path):
+        async with AsyncDatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}", read_workers=2) as adb:
+            trades = await asyncio.gather(*[
+                adb.create_trade("BTC", "buy", 100.0 + i, 1.0, 100.0) for i in range(20)
+            ])
+            assert [t.entry_price for t in trades] == [100.0 + i for i in range(20)]
+            assert [t.id for t in trades] == sorted(t.id for t in trades)  # writes keep call order
+
+            page, _ = await adb.get_trades_page(limit=5)
+            assert [t.entry_price for t in page] == [119.0, 118.0, 117.0, 116.0, 115.0]
+
+            writer = await adb.run_sync(lambda db: threading.current_thread().name)
+            reader = await adb.run_sync(lambda db: threading.current_thread().name, read=True)
+            assert writer.startswith("db-writer") and reader.startswith("db-reader")
+            assert threading.current_thread().name not in (writer, reader)
+
+        with pytest.raises(RuntimeError):
+            await adb.get_trades()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_keeps_running_during_slow_queries(self, tmp_path):
+        async with AsyncDatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}") as adb:
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.create_task(ticker())
+            await adb.run_sync(lambda db: time.sleep(0.3), read=True)  # stands in for a slow query
+            task.cancel()
+            assert ticks >= 10
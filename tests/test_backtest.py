@@ -0,0 +1,106 @@
+import json
+import math
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.backend.backtest.agents import RecordedAgent, RuleBasedAgent
+from src.backend.backtest.data import resample_candles
+from src.backend.backtest.exchange import BacktestExchange
+from src.backend.backtest.runner import BacktestRunner
+from src.backend.utils.clock import VirtualClock
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_candles(count: int, step_minutes: int = 5, base: float = 100.0):
+    """Synthetic sine-wave candles so the rule-based agent both buys and sells."""
+    candles = []
+    for i in range(count):
+        price = base + 10 * math.sin(i / 40)
+        candles.append({
+            "t": int((START + timedelta(minutes=step_minutes * i)).timestamp() * 1000),
+            "o": price, "h": price + 0.5, "l": price - 0.5, "c": price + 0.1, "v": 1.0,
+        })
+    return candles
+
+
+class TestVirtualClock:
+
+    @pytest.mark.asyncio
+    async def test_sleep_advances_time(self):
+        clock = VirtualClock(START)
+        await clock.sleep(3600)
+        assert clock.now() == START + timedelta(hours=1)
+
+    def test_set_never_moves_backwards(self):
+        clock = VirtualClock(START)
+        clock.set(START - timedelta(days=1))
+        assert clock.now() == START
+
+
+class TestBacktestExchange:
+
+    def setup_method(self):
+        self.clock = VirtualClock(START)
+        self.exchange = BacktestExchange({"BTC": make_candles(48)}, clock=self.clock)
+
+    @pytest.mark.asyncio
+    async def test_no_lookahead(self):
+        self.clock.set(START + timedelta(minutes=12))
+        candles = await self.exchange.get_historical_candles("BTC", "5m", limit=100)
+        # Only the 00:00 and 00:05 candles have closed at 00:12
+        assert len(candles) == 2
+        assert await self.exchange.get_current_price("BTC") == candles[-1]["c"]
+
+    @pytest.mark.asyncio
+    async def test_resampled_interval(self):
+        self.clock.set(START + timedelta(hours=3))
+        candles = await self.exchange.get_historical_candles("BTC", "1h", limit=10)
+        assert len(candles) == 3
+        assert candles == resample_candles(make_candles(48), "1h")[:3]
+
+    @pytest.mark.asyncio
+    async def test_fills_use_virtual_time(self):
+        self.clock.set(START + timedelta(hours=1))
+        await self.exchange.place_buy_order("BTC", 1.0)
+        assert self.exchange.fills[-1]["time"].startswith("2024-01-01T01:00")
+
+
+class TestBacktestRunner:
+
+    @pytest.mark.asyncio
+    async def test_rule_based_run(self):
+        runner = BacktestRunner(
+            {"BTC": make_candles(12 * 24 * 3)},
+            agent=RuleBasedAgent(allocation_usd=500),
+            interval="1h",
+            warmup_candles=12 * 24,
+        )
+        result = await runner.run()
+
+        assert result.iterations == 24 * 2 + 1
+        assert len(result.equity_curve) == 12 * 24 * 2 + 1
+        assert result.fills, "expected the sine wave to trigger trades"
+        assert result.errors == []
+        summary = result.summary()
+        assert summary["speedup"] > 1
+        assert summary["start_value"] == pytest.approx(10000.0)
+
+    @pytest.mark.asyncio
+    async def test_recorded_agent(self, tmp_path):
+        path = tmp_path / "decisions.jsonl"
+        decision = {"asset": "BTC", "action": "buy", "allocation_usd": 200, "tp_price": None,
+                    "sl_price": None, "exit_plan": "", "rationale": "recorded"}
+        path.write_text(json.dumps({"reasoning": "r", "trade_decisions": [decision]}) + "\n")
+
+        runner = BacktestRunner(
+            {"BTC": make_candles(12 * 30)},
+            agent=RecordedAgent(str(path)),
+            interval="1h",
+            warmup_candles=12 * 24,
+        )
+        result = await runner.run()
+
+        buys = [f for f in result.fills if f["side"] == "B"]
+        assert len(buys) == 1
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.backend.agent.call_telemetry import LLMCallRecord, LLMTelemetry
+from src.backend.agent.decision_maker import TradingAgent
+from src.database.db_manager import DatabaseManager
+from tests.test_decision_maker_async import FakeOpenRouter
+
+
+def record(model, day, wall, outcome="ok", retry=None, cost=0.01):
+    return dict(
+        timestamp=datetime(2025, 1, day, 12), provider="openrouter", model=model,
+        prompt_tokens=1000, completion_tokens=200, wall_time_ms=wall, ttft_ms=wall / 2,
+        tool_rounds=1, retry_reason=retry, parse_outcome=outcome, cost_usd=cost,
+    )
+
+
+class TestLLMCallRecord:
+
+    def test_finish_keeps_outcome_marked_while_parsing(self):
+        call = LLMCallRecord("openrouter", "m")
+        call.parse_outcome = "repaired"
+        call.finish("ok")
+        assert call.parse_outcome == "repaired"
+        call.finish("error", "boom")
+        assert (call.parse_outcome, call.error) == ("error", "boom")
+        assert call.wall_time_ms >= 0
+
+    def test_cost_estimated_from_pricing_when_not_reported(self):
+        telemetry = LLMTelemetry(enabled=False, pricing={"m": {"prompt": 3.0, "completion": 15.0}})
+        call = telemetry.start("openrouter", "m", ["BTC", "ETH"])
+        call.add_usage(prompt=1_000_000, completion=100_000)
+        call.finish("ok")
+        telemetry.record(call)
+        assert call.cost_usd == pytest.approx(4.5)
+        assert call.assets == "BTC,ETH"
+
+        reported = telemetry.start("openrouter", "m")
+        reported.add_usage(prompt=10, completion=10, cost=0.002)
+        telemetry.record(reported)
+        assert reported.cost_usd == 0.002 and reported.parse_outcome == "error"
+
+
+class TestLLMCallStore:
+
+    def test_aggregates_cost_and_latency_per_model_and_day(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        db.record_llm_call(**record("grok", 1, 1000))
+        db.record_llm_call(**record("grok", 1, 3000, outcome="fallback", retry="422 tools_rejected"))
+        db.record_llm_call(**record("grok", 2, 2000))
+        db.record_llm_call(**record("gemini", 1, 500, cost=None))
+
+        stats = db.get_llm_call_stats(bucket="day")
+        assert [(s["bucket"], s["model"], s["calls"]) for s in stats] == [
+            ("2025-01-01", "gemini", 1), ("2025-01-01", "grok", 2), ("2025-01-02", "grok", 1),
+        ]
+        grok = stats[1]
+        assert grok["prompt_tokens"] == 2000 and grok["cost_usd"] == 0.02
+        assert grok["avg_wall_time_ms"] == 2000 and grok["max_wall_time_ms"] == 3000
+        assert grok["avg_ttft_ms"] == 1000
+        assert (grok["retried_calls"], grok["failed_calls"]) == (1, 1)
+        assert stats[0]["cost_usd"] is None
+
+        monthly = db.get_llm_call_stats(bucket="month", model="grok")
+        assert monthly == [dict(monthly[0], bucket="2025-01", calls=3)]
+        assert db.get_llm_calls(parse_outcome="fallback")[0]["retry_reason"] == "422 tools_rejected"
+        with pytest.raises(ValueError):
+            db.get_llm_call_stats(bucket="minute")
+
+    def test_stats_bucket_follows_the_sql_dialect(self):
+        pg = DatabaseManager._llm_stats_period("postgresql", "hour").compile(dialect=postgresql.dialect())
+        assert "to_char(llm_calls.timestamp" in str(pg)
+        assert "YYYY-MM-DD HH24:00" in pg.params.values()
+        with pytest.raises(ValueError, match="mysql"):
+            DatabaseManager._llm_stats_period("mysql", "day")
+
+    @pytest.mark.asyncio
+    async def test_agent_records_each_decision(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)  # llm_requests.log
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        agent = TradingAgent()
+        agent.telemetry = LLMTelemetry(db=db, pricing={})
+        writes = []
+        async with FakeOpenRouter() as server:
+            agent.base_url = server.url
+            await agent.decide_trade_async(["BTC"], "ctx")
+            writes.append(agent.telemetry.last)
+            await agent.decide_trade_streaming(["BTC", "ETH"], "ctx", lambda d: None)
+            writes.append(agent.telemetry.last)
+        await agent.aclose()
+        agent.telemetry._executor.shutdown(wait=True)
+
+        plain, streamed = writes
+        assert (plain.parse_outcome, plain.requests, plain.prompt_tokens) == ("ok", 1, 1000)
+        assert plain.ttft_ms <= plain.wall_time_ms
+        assert streamed.streamed and streamed.ttft_ms < streamed.wall_time_ms - 200
+
+        rows = db.get_llm_calls()
+        assert len(rows) == 2
+        assert {row["assets"] for row in rows} == {"BTC", "BTC,ETH"}
+        assert db.get_llm_call_stats()[0]["calls"] == 2
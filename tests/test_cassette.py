@@ -0,0 +1,131 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from src.backend.backtest.agents import RuleBasedAgent
+from src.backend.backtest.exchange import BacktestExchange
+from src.backend.config_loader import CONFIG
+from src.backend.testing.cassette import (
+    Cassette,
+    CassetteAgent,
+    CassetteExchange,
+    CassetteMiss,
+    RecordedError,
+)
+from src.backend.utils.clock import VirtualClock
+from tests.test_backtest import START, make_candles
+
+
+class FakeExchange:
+
+    def __init__(self):
+        self.prices = iter([100.0, 101.0, 102.0])
+
+    async def get_current_price(self, asset):
+        return next(self.prices)
+
+    async def get_user_state(self):
+        raise ConnectionError("exchange down")
+
+    def round_size(self, asset, amount):
+        return round(amount, 2)
+
+
+class TestCassette:
+
+    @pytest.mark.asyncio
+    async def test_record_then_replay_offline(self, tmp_path):
+        path = tmp_path / "exchange.jsonl"
+        recorder = CassetteExchange(FakeExchange(), Cassette(str(path), mode="record"))
+        recorded = [await recorder.get_current_price("BTC") for _ in range(3)]
+        with pytest.raises(ConnectionError):
+            await recorder.get_user_state()
+
+        player = CassetteExchange(None, Cassette(str(path), mode="replay"))
+        assert [await player.get_current_price("BTC") for _ in range(3)] == recorded
+        # Exhausted sequences keep returning the last response
+        assert await player.get_current_price("BTC") == 102.0
+        with pytest.raises(RecordedError, match="exchange down"):
+            await player.get_user_state()
+        with pytest.raises(CassetteMiss):
+            await player.get_current_price("ETH")
+
+    @pytest.mark.asyncio
+    async def test_missing_attributes_raise(self, tmp_path):
+        path = tmp_path / "exchange.jsonl"
+        recorder = CassetteExchange(FakeExchange(), Cassette(str(path), mode="record"))
+        assert not hasattr(recorder, "get_historical_candles")
+        await recorder.get_current_price("BTC")
+        with pytest.raises(ValueError):
+            CassetteExchange(None, Cassette(str(tmp_path / "other.jsonl"), mode="record"))
+
+        player = CassetteExchange(None, Cassette(str(path), mode="replay"))
+        assert hasattr(player, "get_current_price")
+        assert not hasattr(player, "get_historical_candles")
+        assert not hasattr(CassetteAgent(None, Cassette(str(tmp_path / "agent.jsonl"), mode="auto")), "model")
+
+        offline = CassetteAgent(None, Cassette(str(tmp_path / "agent.jsonl"), mode="auto"))
+        with pytest.raises(CassetteMiss):
+            await offline.decide_trade_async(["BTC"], "context")
+
+    @pytest.mark.asyncio
+    async def test_realistic_latency(self, tmp_path):
+        path = tmp_path / "exchange.jsonl"
+        path.write_text('{"key": "get_current_price:{\\"args\\": [\\"BTC\\"], \\"kwargs\\": {}}", '
+                        '"method": "get_current_price", "response": 1.0, "error": null, "latency": 0.05}\n')
+
+        zero = CassetteExchange(None, Cassette(str(path), latency="zero"))
+        started = time.perf_counter()
+        await zero.get_current_price("BTC")
+        assert time.perf_counter() - started < 0.04
+
+        realistic = CassetteExchange(None, Cassette(str(path), latency="realistic"))
+        started = time.perf_counter()
+        await realistic.get_current_price("BTC")
+        assert time.perf_counter() - started >= 0.05
+
+    def test_auto_mode_records_misses(self, tmp_path):
+        path = tmp_path / "agent.jsonl"
+        calls = []
+
+        class Agent:
+            def decide_trade(self, assets, context):
+                calls.append(context)
+                return {"reasoning": context, "trade_decisions": []}
+
+        agent = CassetteAgent(Agent(), Cassette(str(path), mode="auto"))
+        assert agent.decide_trade(["BTC"], "first")["reasoning"] == "first"
+
+        replay = CassetteAgent(Agent(), Cassette(str(path), mode="auto"))
+        assert replay.decide_trade(["BTC"], "different context")["reasoning"] == "first"
+        assert calls == ["first"]
+
+
+class TestEngineReplay:
+
+    @pytest.mark.asyncio
+    async def test_iteration_replays_without_live_services(self, tmp_path, monkeypatch):
+        from src.backend.bot_engine import TradingBotEngine
+
+        def build(mode, exchange=None, agent=None, clock=None):
+            monkeypatch.setitem(CONFIG, "cassette_mode", mode)
+            monkeypatch.setitem(CONFIG, "cassette_dir", str(tmp_path / "tapes"))
+            engine = TradingBotEngine(["BTC"], "1h", exchange=exchange, agent=agent, clock=clock)
+            engine.trading_mode = "auto"
+            engine.diary_path = tmp_path / f"{mode}_diary.jsonl"
+            engine.prompt_log_path = None
+            engine.is_running = True
+            return engine
+
+        clock = VirtualClock(START + timedelta(days=1))
+        exchange = BacktestExchange({"BTC": make_candles(12 * 48)}, clock=clock)
+        recorder = build("record", exchange=exchange, agent=RuleBasedAgent(), clock=clock)
+        await recorder._run_iteration()
+        assert recorder.state.error is None
+
+        player = build("replay", clock=VirtualClock(START + timedelta(days=1)))
+        await player._run_iteration()
+        assert player.state.error is None
+        assert player.state.last_reasoning == recorder.state.last_reasoning
+        assert player.exchange.cassette.stats["misses"] == 0
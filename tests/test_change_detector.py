@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+import pytest
+
+from src.backend.agent.change_detector import MaterialityGate
+from src.backend.backtest.exchange import BacktestExchange
+from src.backend.config_loader import CONFIG
+from src.backend.utils.clock import VirtualClock
+from tests.test_backtest import START, make_candles
+
+DECISIONS = {"reasoning": "trend up", "trade_decisions": [
+    {"asset": "BTC", "action": "buy", "allocation_usd": 100, "tp_price": None, "sl_price": None,
+     "exit_plan": "close below 95k", "rationale": "breakout"},
+]}
+
+
+def section(price, rsi=55.0, hist=0.5):
+    return [{"asset": "BTC", "current_price": price,
+             "intraday": {"rsi14": rsi, "macd": {"valueMACD": 1.0, "valueMACDHist": hist}}}]
+
+
+def account(quantity=0.01):
+    return {"positions": [{"symbol": "BTC", "quantity": quantity}], "open_orders": []}
+
+
+class CountingAgent:
+
+    def __init__(self):
+        self.calls = 0
+
+    def decide_trade(self, assets, context):
+        self.calls += 1
+        return {"reasoning": "flat", "trade_decisions": [
+            {"asset": a, "action": "hold", "allocation_usd": 0, "tp_price": None, "sl_price": None,
+             "exit_plan": "", "rationale": "no edge"} for a in assets
+        ]}
+
+
+class TestMaterialityGate:
+
+    def setup_method(self):
+        self.gate = MaterialityGate(price_move_pct=0.5, rsi_levels=(30, 70), max_interval=600)
+        self.gate.record_decision(section(100000), account(), DECISIONS, START)
+
+    def test_first_call_is_always_material(self):
+        assert MaterialityGate().check(section(1), account(), START) == (True, "no previous decision")
+
+    def test_small_moves_are_not_material(self):
+        material, reason = self.gate.check(section(100200, rsi=60), account(), START + timedelta(minutes=5))
+        assert not material and reason == "no material change"
+
+    @pytest.mark.parametrize("market,acct,minutes,expected", [
+        (section(100600), account(), 5, "moved"),
+        (section(100000, rsi=72), account(), 5, "RSI crossed 70"),
+        (section(100000, hist=-0.1), account(), 5, "MACD crossed"),
+        (section(100000), account(0.02), 5, "positions"),
+        (section(100000), account(), 10, "600s"),
+    ])
+    def test_material_changes(self, market, acct, minutes, expected):
+        material, reason = self.gate.check(market, acct, START + timedelta(minutes=minutes))
+        assert material and expected in reason
+
+    def test_reuse_returns_holds_and_counts(self):
+        reused = self.gate.reuse_decision(["BTC"], "no material change")
+        (decision,) = reused["trade_decisions"]
+        assert decision["action"] == "hold"
+        assert decision["exit_plan"] == "close below 95k"
+        assert "previous: buy - breakout" in decision["rationale"]
+        assert self.gate.get_stats() == {"calls_made": 1, "calls_saved": 1, "saved_pct": 50.0}
+
+    @pytest.mark.asyncio
+    async def test_engine_skips_llm_when_market_is_unchanged(self, tmp_path, monkeypatch):
+        from src.backend.bot_engine import TradingBotEngine
+
+        monkeypatch.setitem(CONFIG, "llm_skip_unchanged", True)
+        monkeypatch.setitem(CONFIG, "materiality_price_move_pct", 50.0)
+        clock = VirtualClock(START + timedelta(days=1))
+        exchange = BacktestExchange({"BTC": make_candles(12 * 48)}, clock=clock)
+        agent = CountingAgent()
+        engine = TradingBotEngine(["BTC"], "1h", exchange=exchange, agent=agent, clock=clock)
+        engine.diary_path = tmp_path / "diary.jsonl"
+        engine.prompt_log_path = None
+
+        for _ in range(3):
+            await engine._run_iteration()
+            clock.advance(60)
+
+        assert engine.state.error is None
+        assert agent.calls == 1
+        assert engine.state.llm_calls_saved == 2
@@ -0,0 +1,123 @@
+import copy
+import json
+
+from src.backend.bot_engine import TradingBotEngine
+from src.backend.config_loader import CONFIG
+from src.backend.utils.context_builder import ContextBuilder, estimate_tokens, price_decimals
+
+
+def market_section(asset, price, length=60):
+    return {
+        "asset": asset,
+        "current_price": price,
+        "funding_rate": 1.2345678e-05,
+        "funding_annualized_pct": 10.81481,
+        "open_interest": None,
+        "intraday": {
+            "ema20": price * 1.0012345678,
+            "rsi14": 55.123456789,
+            "macd": {"valueMACD": 1.23456789, "valueMACDHist": -0.000123456},
+            "series": {
+                "ema20": [price * (1 + i / 1000) for i in range(length)],
+                "rsi14": [50 + i / 7 for i in range(length)],
+                "macd": [{"valueMACD": i / 3, "valueMACDHist": i / 9} for i in range(length)],
+            },
+        },
+        "recent_mid_prices": [price + i / 3 for i in range(10)],
+        "price_history": [{"t": i, "o": price, "h": price, "l": price, "c": price, "v": 0} for i in range(50)],
+    }
+
+
+def payload(assets=("BTC", "ETH", "SOL", "DOGE")):
+    prices = {"BTC": 97123.456789, "ETH": 3456.789123, "SOL": 187.654321, "DOGE": 0.123456789}
+    return {
+        "invocation": {"count": 3, "current_time": "2024-01-01T00:00:00+00:00"},
+        "account": {
+            "balance": 10000.123456,
+            "positions": [{"symbol": "BTC", "quantity": 0.0123456789, "entry_price": 96000.987654}],
+            "recent_fills": [{"coin": "BTC", "price": 96000.98765, "size": 0.01} for _ in range(20)],
+            "recent_diary": [{"asset": "BTC", "action": "hold", "rationale": "x" * 40} for _ in range(10)],
+        },
+        "market_data": [market_section(a, prices[a]) for a in assets],
+        "instructions": {"assets": list(assets)},
+    }
+
+
+class TestContextBuilder:
+
+    def test_price_decimals_scale_with_magnitude(self):
+        assert price_decimals(97000) == 2
+        assert price_decimals(187.65) == 3
+        assert price_decimals(0.1234) == 6
+
+    def test_compacts_and_rounds_without_mutating_input(self):
+        original = payload()
+        snapshot = copy.deepcopy(original)
+        text, stats = ContextBuilder(token_budget=100000).build(original)
+
+        assert original == snapshot
+        assert "\n" not in text and ": " not in text
+        data = json.loads(text)
+        btc = data["market_data"][0]
+        assert "price_history" not in btc and "funding_annualized_pct" not in btc
+        assert "open_interest" not in btc  # None values are dropped
+        assert btc["intraday"]["rsi14"] == 55.1
+        assert btc["intraday"]["ema20"] == round(97123.456789 * 1.0012345678, 2)
+        assert data["market_data"][3]["current_price"] == 0.123457
+        assert len(btc["intraday"]["series"]["ema20"]) == 20
+        assert stats.tokens == estimate_tokens(text)
+
+    def test_sizes_and_funding_keep_their_own_precision(self):
+        data = payload()
+        data["account"]["positions"][0].update(quantity=0.035, unrealized_pnl=12.345678, liquidation_price=81234.56789)
+        data["account"]["active_trades"] = [{"asset": "BTC", "amount": 0.001, "entry_price": 96000.0}]
+        data["account"]["recent_fills"] = [{"coin": "DOGE", "price": 0.123456789, "size": 1234.5678}]
+        sizes = {"BTC": 4, "DOGE": 0}
+        builder = ContextBuilder(token_budget=100000, round_size=lambda asset, amount: round(amount, sizes[asset]))
+        built = json.loads(builder.build(data)[0])
+
+        account = built["account"]
+        assert account["positions"][0] == {"symbol": "BTC", "quantity": 0.035, "entry_price": 96000.99,
+                                           "unrealized_pnl": 12.35, "liquidation_price": 81234.57}
+        assert account["active_trades"][0]["amount"] == 0.001
+        assert account["recent_fills"][0] == {"coin": "DOGE", "price": 0.123457, "size": 1235.0}
+        assert built["market_data"][0]["funding_rate"] == 1.235e-05
+
+        # Without an exchange rounder sizes keep 6 significant digits
+        fills = json.loads(ContextBuilder(token_budget=100000).build(data)[0])["account"]["recent_fills"]
+        assert fills[0]["size"] == 1234.57
+
+    def test_flat_account_keeps_empty_collections(self):
+        data = payload()
+        data["account"].update(positions=[], open_orders=[], active_trades=[], recent_fills=[])
+        data["market_data"][0]["intraday"]["series"]["rsi14"] = []
+        built = json.loads(ContextBuilder(token_budget=1500).build(data)[0])
+
+        account = built["account"]
+        assert (account["positions"], account["open_orders"], account["active_trades"]) == ([], [], [])
+        assert account["recent_fills"] == []
+        assert "rsi14" not in built["market_data"][0]["intraday"]["series"]
+
+    def test_trims_series_to_meet_budget(self):
+        legacy = json.dumps(payload(), indent=2)
+        builder = ContextBuilder(token_budget=1500)
+        text, stats = builder.build(payload())
+
+        assert stats.within_budget
+        assert stats.tokens <= 1500
+        assert stats.series_length < 20
+        assert estimate_tokens(text) < estimate_tokens(legacy) / 5
+        assert len(json.loads(text)["account"]["recent_fills"]) <= 10
+
+    def test_reports_when_budget_cannot_be_met(self):
+        _, stats = ContextBuilder(token_budget=50).build(payload())
+        assert not stats.within_budget
+        assert stats.series_length == 0
+
+    def test_stable_first_layout_puts_volatile_sections_last(self, monkeypatch):
+        monkeypatch.setitem(CONFIG, "prompt_layout", "stable_first")
+        ordered = TradingBotEngine._layout_context(payload())
+        assert list(ordered) == ["instructions", "account", "market_data", "invocation"]
+
+        monkeypatch.setitem(CONFIG, "prompt_layout", "legacy")
+        assert list(TradingBotEngine._layout_context(payload()))[0] == "invocation"
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import threading
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from src.backend.agent.decision_maker import TradingAgent
+
+DECISION = {
+    "reasoning": "flat market",
+    "trade_decisions": [{"asset": "BTC", "action": "hold", "allocation_usd": 0, "tp_price": None,
+                         "sl_price": None, "exit_plan": "", "rationale": "no edge"}],
+}
+
+STREAMED = {
+    "reasoning": "two assets",
+    "trade_decisions": [
+        {"asset": "BTC", "action": "buy", "allocation_usd": 100, "tp_price": None, "sl_price": None,
+         "exit_plan": "", "rationale": "first"},
+        {"asset": "ETH", "action": "hold", "allocation_usd": 0, "tp_price": None, "sl_price": None,
+         "exit_plan": "", "rationale": "second"},
+    ],
+}
+
+
+class FakeOpenRouter:
+    """Minimal chat-completions endpoint that counts TCP connections."""
+
+    def __init__(self, delay: float = 0.0, drip: float = 0.0):
+        self.delay = delay
+        self.drip = drip  # pause between body chunks of a non-streamed answer
+        self.peers = set()
+        self.requests = 0
+        self.payloads = []
+
+    async def handle(self, request):
+        self.requests += 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+        payload = await request.json()
+        self.payloads.append(payload)
+        await asyncio.sleep(self.delay)
+        if not payload.get("stream"):
+            # Prompt prefix is served from the provider cache after the first request
+            cached = 0 if self.requests == 1 else 900
+            usage = {"prompt_tokens": 1000, "prompt_tokens_details": {"cached_tokens": cached}}
+            body = {"choices": [{"message": {"content": json.dumps(DECISION)}}], "usage": usage}
+            if not self.drip:
+                return web.json_response(body)
+            response = web.StreamResponse(headers={"Content-Type": "application/json"})
+            await response.prepare(request)
+            text = json.dumps(body).encode()
+            for i in range(0, len(text), len(text) // 3 + 1):
+                await response.write(text[i:i + len(text) // 3 + 1])
+                await asyncio.sleep(self.drip)
+            return response
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(b": OPENROUTER PROCESSING\n\n")
+        text = json.dumps(STREAMED)
+        split = text.index('"ETH"')
+        for piece in (text[:split], text[split:]):
+            chunk = {"choices": [{"delta": {"content": piece}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(0.3)
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/chat/completions", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/chat/completions"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+class TestTradingAgentAsync:
+
+    def setup_method(self):
+        self.agent = TradingAgent()
+        self.agent.telemetry.enabled = False
+
+    @pytest.mark.asyncio
+    async def test_reuses_connection(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)  # llm_requests.log
+        async with FakeOpenRouter() as server:
+            self.agent.base_url = server.url
+            for _ in range(3):
+                result = await self.agent.decide_trade_async(["BTC"], "ctx")
+                assert result["trade_decisions"][0]["rationale"] == "no edge"
+            await self.agent.aclose()
+
+        assert server.requests == 3
+        assert len(server.peers) == 1
+
+    @pytest.mark.asyncio
+    async def test_request_log_written_off_the_loop(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        log_request = self.agent._log_request
+        writers = []
+
+        def recording_log_request(payload):
+            writers.append(threading.get_ident())
+            log_request(payload)
+
+        monkeypatch.setattr(self.agent, "_log_request", recording_log_request)
+        async with FakeOpenRouter() as server:
+            self.agent.base_url = server.url
+            await self.agent.decide_trade_async(["BTC"], "ctx")
+            await self.agent.aclose()
+
+        assert writers and threading.get_ident() not in writers
+        assert "Payload:" in (tmp_path / "llm_requests.log").read_text(encoding="utf-8")
+
+    @pytest.mark.asyncio
+    async def test_cancellation_aborts_request(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        async with FakeOpenRouter(delay=1) as server:
+            self.agent.base_url = server.url
+            task = asyncio.create_task(self.agent.decide_trade_async(["BTC"], "ctx"))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await asyncio.wait_for(task, timeout=1)
+            await self.agent.aclose()
+
+    @pytest.mark.asyncio
+    async def test_timeout_bounds_reads_not_the_whole_answer(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        self.agent.timeout = 0.5
+        async with FakeOpenRouter(drip=0.3) as server:
+            self.agent.base_url = server.url
+            result = await self.agent.decide_trade_async(["BTC"], "ctx")
+            await self.agent.aclose()
+        assert result["trade_decisions"][0]["rationale"] == "no edge"
+
+    def test_session_from_finished_loop_is_closed(self):
+        first = asyncio.run(self.agent._get_aio_session())
+        second = asyncio.run(self.agent._get_aio_session())
+        assert first is not second and first.closed
+        asyncio.run(self.agent.aclose())
+
+    @pytest.mark.asyncio
+    async def test_timeout(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        self.agent.timeout = 0.2
+        async with FakeOpenRouter(delay=1) as server:
+            self.agent.base_url = server.url
+            with pytest.raises(asyncio.TimeoutError):
+                await self.agent.decide_trade_async(["BTC"], "ctx")
+            await self.agent.aclose()
+
+    @pytest.mark.asyncio
+    async def test_streaming_emits_decisions_early(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        loop = asyncio.get_running_loop()
+        arrivals = []
+        async with FakeOpenRouter() as server:
+            self.agent.base_url = server.url
+            started = loop.time()
+            result = await self.agent.decide_trade_streaming(
+                ["BTC", "ETH"], "ctx", lambda d: arrivals.append((d["asset"], loop.time() - started))
+            )
+            finished = loop.time() - started
+            await self.agent.aclose()
+
+        assert [a for a, _ in arrivals] == ["BTC", "ETH"]
+        assert arrivals[0][1] < finished - 0.2
+        assert result == STREAMED
+
+    @pytest.mark.asyncio
+    async def test_stream_outlives_session_total_timeout(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        self.agent.timeout = 0.5
+        # A session-wide cap shorter than the stream must not cut it off
+        self.agent._aio_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=0.4))
+        self.agent._aio_loop = asyncio.get_running_loop()
+        async with FakeOpenRouter() as server:
+            self.agent.base_url = server.url
+            result = await self.agent.decide_trade_streaming(["BTC", "ETH"], "ctx", lambda d: None)
+            await self.agent.aclose()
+        assert result == STREAMED
+
+    @pytest.mark.asyncio
+    async def test_prompt_cache_markers_and_hit_rate(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        self.agent.prompt_cache = True
+        async with FakeOpenRouter() as server:
+            self.agent.base_url = server.url
+            for _ in range(2):
+                await self.agent.decide_trade_async(["BTC"], "ctx")
+        await self.agent.aclose()
+
+        system = server.payloads[0]["messages"][0]
+        assert system["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert server.payloads[0]["messages"][0] == server.payloads[1]["messages"][0]
+        assert server.payloads[0]["usage"] == {"include": True}
+        stats = self.agent.cache_stats.as_dict()
+        assert stats["requests"] == 2 and stats["cache_hits"] == 1
+        assert stats["hit_rate"] == 0.45
@@ -0,0 +1,84 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.database.db_manager import DatabaseManager
+from src.database.downsample import lttb
+from src.database.models import BotState, EquityRollup
+
+
+def equity_at(i):
+    return 10000 + 500 * math.sin(i / 50) + (300 if i == 777 else 0)  # one spike
+
+
+class TestLTTB:
+
+    def test_keeps_endpoints_and_extremes(self):
+        points = [(i, equity_at(i)) for i in range(2000)]
+        sampled = lttb(points, 100, x=lambda p: p[0], y=lambda p: p[1])
+
+        assert len(sampled) == 100
+        assert sampled[0] == points[0] and sampled[-1] == points[-1]
+        assert (777, equity_at(777)) in sampled
+        assert [p[0] for p in sampled] == sorted(p[0] for p in sampled)
+
+    def test_short_series_unchanged(self):
+        points = [(0, 1.0), (1, 2.0), (2, 0.5)]
+        assert lttb(points, 10, x=lambda p: p[0], y=lambda p: p[1]) == points
+        assert lttb(points, 2, x=lambda p: p[0], y=lambda p: p[1]) == [points[0], points[-1]]
+
+
+class TestEquityRollups:
+
+    def setup_method(self):
+        self.start = (datetime.utcnow() - timedelta(days=5)).replace(minute=0, second=0, microsecond=0)
+
+    def save_states(self, db, count, step=timedelta(minutes=5)):
+        with db.session_scope() as session:
+            for i in range(count):
+                session.add(BotState(timestamp=self.start + step * i, balance=1.0, total_value=equity_at(i),
+                                     equity=equity_at(i), total_return_pct=0.0))
+
+    def test_rollups_maintained_on_save(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        equities = [100.0, 103.0, 97.0, 101.0]
+        for equity in equities:
+            db.save_bot_state(balance=equity, total_value=equity, equity=equity, total_return_pct=0.0)
+        db.apply_batch([("state", {"timestamp": datetime.utcnow(), "balance": 1.0, "total_value": 99.0,
+                                   "equity": 99.0, "total_return_pct": 0.0})] * 2)
+
+        (day,) = db.get_equity_ohlc(bucket="day")
+        assert (day["open"], day["high"], day["low"], day["close"], day["samples"]) == (100.0, 103.0, 97.0, 99.0, 6)
+        with pytest.raises(ValueError):
+            db.get_equity_ohlc(bucket="week")
+
+    def test_rebuild_matches_incremental(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        self.save_states(db, 300)
+        assert db.get_equity_ohlc(bucket="hour") == []  # raw inserts bypass the rollups
+
+        assert db.rebuild_equity_rollups() == 25 + 2  # 300 x 5m = 25 hours across 2 days
+        hours = db.get_equity_ohlc(bucket="hour")
+        assert len(hours) == 25
+        first = [equity_at(i) for i in range(12)]
+        assert (hours[0]["open"], hours[0]["high"], hours[0]["low"], hours[0]["close"]) == (
+            first[0], max(first), min(first), first[-1])
+        with db.session_scope() as session:
+            assert session.query(EquityRollup).filter(EquityRollup.bucket == "day").count() == 2
+
+    def test_curve_downsampled_and_served_from_rollups(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        self.save_states(db, 1200)  # ~4 days of 5m snapshots
+        db.rebuild_equity_rollups()
+
+        full = db.get_equity_curve(days=10)
+        assert len(full) == 1200 and full[0]["balance"] == 1.0
+
+        sampled = db.get_equity_curve(days=10, max_points=200)
+        assert len(sampled) == 200
+        assert sampled[0] == full[0] and sampled[-1] == full[-1]
+        assert full[777] in sampled  # the spike survives downsampling
+
+        coarse = db.get_equity_curve(days=10, max_points=20)  # 1200 > 20 x 20 snapshots: hourly rollups
+        assert len(coarse) == 20 and coarse[0]["balance"] is None
@@ -0,0 +1,65 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+
+from src.backend.backtest.exchange import BacktestExchange
+from src.backend.config_loader import CONFIG
+from src.backend.utils.clock import VirtualClock
+from tests.test_backtest import START, make_candles
+
+ASSETS = ["BTC", "ETH", "SOL"]
+
+
+class PerAssetAgent:
+    """Async agent that records concurrency and the assets seen in each prompt."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.prompts = {}
+
+    async def decide_trade_async(self, assets, context):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.05)
+            (asset,) = assets
+            self.prompts[asset] = [m["asset"] for m in json.loads(context)["market_data"]]
+            if asset == "SOL":
+                raise TimeoutError("provider timed out")
+            return {"reasoning": f"{asset} looks flat", "trade_decisions": [
+                {"asset": asset, "action": "hold", "allocation_usd": 0, "tp_price": None,
+                 "sl_price": None, "exit_plan": "", "rationale": f"{asset} ok"},
+            ]}
+        finally:
+            self.active -= 1
+
+
+class TestFanOut:
+
+    @pytest.mark.asyncio
+    async def test_per_asset_decisions_merge(self, tmp_path, monkeypatch):
+        from src.backend.bot_engine import TradingBotEngine
+
+        monkeypatch.setitem(CONFIG, "llm_fanout", True)
+        monkeypatch.setitem(CONFIG, "llm_fanout_concurrency", 2)
+        clock = VirtualClock(START + timedelta(days=1))
+        exchange = BacktestExchange({a: make_candles(12 * 48) for a in ASSETS}, clock=clock)
+        agent = PerAssetAgent()
+        engine = TradingBotEngine(ASSETS, "1h", exchange=exchange, agent=agent, clock=clock)
+        engine.diary_path = tmp_path / "diary.jsonl"
+        engine.prompt_log_path = None
+
+        await engine._run_iteration()
+
+        assert engine.state.error is None
+        assert agent.peak == 2
+        assert agent.prompts == {a: [a] for a in ASSETS}
+
+        decisions = engine.state.last_reasoning["trade_decisions"]
+        assert [d["asset"] for d in decisions] == ASSETS
+        assert decisions[2]["action"] == "hold"
+        assert "provider timed out" in decisions[2]["rationale"]
+        assert "[BTC] BTC looks flat" in engine.state.last_reasoning["reasoning"]
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from src.backend.agent.hedged_agent import HedgedTradingAgent, is_valid_decision_payload
+
+ASSETS = ["BTC"]
+
+
+def payload(rationale="ok", action="hold"):
+    return {"reasoning": "", "trade_decisions": [
+        {"asset": "BTC", "action": action, "allocation_usd": 0, "tp_price": None,
+         "sl_price": None, "exit_plan": "", "rationale": rationale},
+    ]}
+
+
+class FakeAgent:
+
+    def __init__(self, delay=0.0, result=None, error=None, model=None):
+        self.model = model
+        self.delay = delay
+        self.result = result or payload()
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def decide_trade_async(self, assets, context):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class TestHedgedTradingAgent:
+
+    def test_validation(self):
+        assert is_valid_decision_payload(payload(), ASSETS)
+        assert not is_valid_decision_payload(payload(rationale="Parse error"), ASSETS)
+        assert not is_valid_decision_payload(payload(action="short"), ASSETS)
+        assert not is_valid_decision_payload({"reasoning": "x"}, ASSETS)
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_never_hedges(self):
+        primary, secondary = FakeAgent(), FakeAgent()
+        agent = HedgedTradingAgent([("a", primary), ("b", secondary)], hedge_delay=0.1)
+        await agent.decide_trade_async(ASSETS, "ctx")
+        assert (primary.calls, secondary.calls) == (1, 0)
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        primary = FakeAgent(delay=1.0, result=payload("slow"))
+        secondary = FakeAgent(delay=0.01, result=payload("fast"))
+        agent = HedgedTradingAgent([("a", primary), ("b", secondary)], hedge_delay=0.05)
+
+        result = await agent.decide_trade_async(ASSETS, "ctx")
+
+        assert result["trade_decisions"][0]["rationale"] == "fast"
+        assert primary.cancelled == 1
+        assert agent.get_stats()["b"]["wins"] == 1
+
+    @pytest.mark.asyncio
+    async def test_model_names_the_winner(self):
+        primary = FakeAgent(delay=1.0, model="primary-model")
+        secondary = FakeAgent(delay=0.01, model="hedge-model")
+        agent = HedgedTradingAgent([("a", primary), ("b", secondary)], hedge_delay=0.05)
+        assert agent.model == "primary-model"
+        await agent.decide_trade_async(ASSETS, "ctx")
+        assert agent.model == "hedge-model"
+
+        invalid = HedgedTradingAgent([("a", FakeAgent(result=payload("Parse error"), model="m1"))], hedge_delay=5)
+        await invalid.decide_trade_async(ASSETS, "ctx")
+        assert invalid.model == "m1"
+
+    @pytest.mark.asyncio
+    async def test_invalid_or_failed_primary_falls_through(self):
+        primary = FakeAgent(result=payload("Parse error"))
+        secondary = FakeAgent(result=payload("valid"))
+        agent = HedgedTradingAgent([("a", primary), ("b", secondary)], hedge_delay=5)
+        result = await agent.decide_trade_async(ASSETS, "ctx")
+        assert result["trade_decisions"][0]["rationale"] == "valid"
+
+        broken = HedgedTradingAgent([("a", FakeAgent(error=ConnectionError("down")))], hedge_delay=5)
+        with pytest.raises(ConnectionError):
+            await broken.decide_trade_async(ASSETS, "ctx")
+
+    @pytest.mark.asyncio
+    async def test_routes_to_fastest_and_benches_failures(self):
+        slow, fast = FakeAgent(delay=0.05), FakeAgent(delay=0.0)
+        agent = HedgedTradingAgent([("slow", slow), ("fast", fast)], hedge_delay=1)
+        agent.stats["slow"].ewma_latency = 0.05
+        agent.stats["fast"].ewma_latency = 0.01
+        assert [n for n, _ in agent.ranked_agents()] == ["fast", "slow"]
+
+        flaky = HedgedTradingAgent([("x", FakeAgent(error=ValueError("bad"))), ("y", FakeAgent())],
+                                   hedge_delay=1, max_failures=2)
+        await flaky.decide_trade_async(ASSETS, "ctx")
+        # A failure penalizes the latency estimate, so the healthy model is tried first
+        assert [n for n, _ in flaky.ranked_agents()] == ["y", "x"]
+        flaky._record_failure("x", 0.1)
+        assert not flaky.get_stats()["x"]["healthy"]
+        assert [n for n, _ in flaky.ranked_agents()] == ["y"]
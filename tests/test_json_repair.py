@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from src.backend.agent.decision_maker import TradingAgent
+from src.backend.agent.json_repair import (
+    close_truncated,
+    remove_trailing_commas,
+    repair_decision_payload,
+    repair_json,
+)
+
+ASSETS = ["BTC", "ETH"]
+VALID = json.dumps({
+    "reasoning": "mixed",
+    "trade_decisions": [
+        {"asset": "BTC", "action": "buy", "allocation_usd": 100, "tp_price": 101000, "sl_price": 95000,
+         "exit_plan": "close below 95k", "rationale": "breakout, with volume"},
+        {"asset": "ETH", "action": "hold", "allocation_usd": 0, "tp_price": None, "sl_price": None,
+         "exit_plan": "", "rationale": "range"},
+    ],
+})
+
+
+class TestJsonRepair:
+
+    def test_trailing_commas_outside_strings_only(self):
+        assert remove_trailing_commas('{"a": [1, 2,], "b": "x,]",}') == '{"a": [1, 2], "b": "x,]"}'
+
+    def test_close_truncated_backs_off_to_last_complete_element(self):
+        assert json.loads(close_truncated('{"a": [1, 2, {"b": "unfinished')) == {"a": [1, 2]}
+        assert json.loads(close_truncated('{"a": 1, "b": [1, 2], "c"')) == {"a": 1, "b": [1, 2]}
+        assert json.loads(close_truncated('[[1, 2], [3, 4')) == [[1, 2]]
+
+    @pytest.mark.parametrize("raw", [
+        "```json\n" + VALID + "\n```",
+        "Here is my answer:\n" + VALID + "\nGood luck!",
+        VALID.replace('"range"}', '"range"},'),
+        VALID[:-2],  # cut off after the last decision closed
+    ])
+    def test_repairs_common_failures(self, raw):
+        result = repair_decision_payload(raw, ASSETS)
+        assert result is not None
+        assert result["trade_decisions"][0]["action"] == "buy"
+
+    def test_cut_off_decision_never_executes(self):
+        # Wherever the output stops, the BTC buy is either complete or absent
+        buy = json.loads(VALID)["trade_decisions"][0]
+        for cut in range(1, len(VALID)):
+            result = repair_decision_payload(VALID[:cut], ASSETS)
+            decisions = result["trade_decisions"] if result else []
+            assert [d for d in decisions if d["action"] != "hold"] in ([], [buy]), VALID[:cut]
+
+    def test_truncated_tail_is_dropped_not_completed(self):
+        raw = VALID.split('{"asset": "ETH"')[0] + '{"asset": "ETH", "action": "buy", "allocation_usd": 1000, "tp_price": 1010'
+        result = repair_decision_payload(raw, ASSETS)
+        assert [d["asset"] for d in result["trade_decisions"]] == ["BTC"]
+        assert repair_decision_payload(VALID[:VALID.index('"tp_price"')], ASSETS) is None
+        assert repair_decision_payload('[{"asset": "BTC", "action": "buy", "allocation_usd": 1000}]', ASSETS) is None
+
+    def test_maps_list_form_and_top_level_lists(self):
+        raw = '[["BTC", "SELL", "50", "90000", "null", "plan", "why"]]'
+        (decision,) = repair_decision_payload(raw, ASSETS)["trade_decisions"]
+        assert decision == {"asset": "BTC", "action": "sell", "allocation_usd": 50.0, "tp_price": 90000.0,
+                            "sl_price": None, "exit_plan": "plan", "rationale": "why"}
+
+    def test_rejects_schema_violations(self):
+        assert repair_decision_payload('{"trade_decisions": [{"asset": "DOGE", "action": "buy"}]}', ASSETS) is None
+        assert repair_decision_payload('{"trade_decisions": [{"asset": "BTC", "action": "short"}]}', ASSETS) is None
+        assert repair_json("no json here") is None
+
+    def test_agent_parse_repairs_before_sanitize(self):
+        # raw is None: no remote sanitize call is needed
+        result, raw, _ = TradingAgent()._parse_decision({"content": "```json\n" + VALID[:-2]}, ASSETS)
+        assert raw is None
+        assert [d["asset"] for d in result["trade_decisions"]] == ["BTC", "ETH"]
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from src.database.db_manager import DatabaseManager
+from src.database.models import DiaryEntry, MigrationCheckpoint
+
+
+def write_diary(path, count, start=0):
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(start, start + count):
+            f.write(json.dumps({"timestamp": f"2025-01-01T00:{i % 60:02d}:00Z", "asset": "BTC",
+                                "action": "buy" if i % 2 else "hold", "rationale": str(i)}) + "\n")
+
+
+class StopMigration(Exception):
+    pass
+
+
+class TestStreamingMigration:
+
+    def setup_method(self):
+        self.progress = []
+
+    def rationales(self, db):
+        with db.read_scope() as session:
+            return [int(r) for (r,) in session.query(DiaryEntry.rationale).order_by(DiaryEntry.id)]
+
+    def test_imports_in_chunks_and_skips_bad_lines(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        diary = tmp_path / "diary.jsonl"
+        write_diary(diary, 10)
+        with open(diary, "a", encoding="utf-8") as f:
+            f.write("{not json\n\n")
+        write_diary(diary, 15, start=10)
+
+        assert db.migrate_jsonl_diary(str(diary), chunk_size=10, progress=self.progress.append) == 25
+        assert self.rationales(db) == list(range(25))
+        assert [p["rows"] for p in self.progress] == [10, 20, 25]
+        assert self.progress[-1]["offset"] == self.progress[-1]["total_bytes"] == diary.stat().st_size
+        assert self.progress[-1]["skipped"] == 1
+
+        with db.read_scope() as session:
+            checkpoint = session.get(MigrationCheckpoint, str(diary))
+            assert (checkpoint.rows, checkpoint.skipped) == (25, 1) and checkpoint.completed_at is not None
+
+    def test_resumes_after_interruption_without_duplicates(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        diary = tmp_path / "diary.jsonl"
+        write_diary(diary, 35)
+
+        def interrupt(p):
+            if p["rows"] >= 20:
+                raise StopMigration
+
+        with pytest.raises(StopMigration):
+            db.migrate_jsonl_diary(str(diary), chunk_size=10, progress=interrupt)
+        assert self.rationales(db) == list(range(20))
+
+        assert db.migrate_jsonl_diary(str(diary), chunk_size=10) == 15
+        write_diary(diary, 5, start=35)  # the diary kept growing
+        assert db.migrate_jsonl_diary(str(diary), chunk_size=10) == 5
+        assert self.rationales(db) == list(range(40))
+
+    def test_unterminated_last_line_is_left_for_next_run(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        diary = tmp_path / "diary.jsonl"
+        write_diary(diary, 3)
+        with open(diary, "a", encoding="utf-8") as f:
+            f.write('{"asset": "ETH", "rationale": "3"')  # still being written
+        assert db.migrate_jsonl_diary(str(diary)) == 3
+
+        with open(diary, "a", encoding="utf-8") as f:
+            f.write("}\n")
+        assert db.migrate_jsonl_diary(str(diary)) == 1
+        assert self.rationales(db) == [0, 1, 2, 3]
+
+    def test_restart_and_replaced_file(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        diary = tmp_path / "diary.jsonl"
+        write_diary(diary, 10)
+        db.migrate_jsonl_diary(str(diary))
+        assert db.migrate_jsonl_diary(str(diary)) == 0
+        assert db.migrate_jsonl_diary(str(diary), resume=False) == 10
+
+        diary.write_text("")  # rotated: shorter than the checkpoint
+        write_diary(diary, 2)
+        assert db.migrate_jsonl_diary(str(diary)) == 2
+        with db.read_scope() as session:
+            assert session.get(MigrationCheckpoint, str(diary)).rows == 2
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import inspect, text
+
+from src.backend.backtest.exchange import BacktestExchange
+from src.backend.config_loader import CONFIG
+from src.backend.utils.clock import VirtualClock
+from src.database.db_manager import DatabaseManager
+from src.database.models import MarketData
+from src.database.persister import WriteBehindPersister
+from tests.test_backtest import START, make_candles
+
+
+def candles(count, start, step_minutes=5, price=100.0):
+    start_ms = int(start.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    return [
+        {"t": start_ms + i * step_minutes * 60_000, "o": price + i, "h": price + i + 1,
+         "l": price + i - 1, "c": price + i + 0.5, "v": 2.0}
+        for i in range(count)
+    ]
+
+
+class TestMarketDataStore:
+
+    def setup_method(self):
+        self.start = datetime(2025, 1, 1)
+
+    def test_upsert_is_idempotent_and_updates_forming_candle(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        batch = candles(1200, self.start)  # more than one chunk
+        assert db.upsert_candles("BTC", "5m", batch) == 1200
+
+        refetch = candles(1200, self.start)
+        refetch[-1] = dict(refetch[-1], c=999.0)  # the last candle was still forming
+        db.upsert_candles("BTC", "5m", refetch)
+        db.upsert_candles("BTC", "1h", candles(3, self.start, step_minutes=60))
+
+        with db.session_scope() as session:
+            assert session.query(MarketData).filter(MarketData.interval == "5m").count() == 1200
+        stored = db.get_candles("BTC", "5m")
+        assert stored[:-1] == batch[:-1] and stored[-1]["c"] == 999.0
+
+    def test_range_queries(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        batch = candles(100, self.start)
+        db.upsert_candles("ETH", "5m", batch)
+        db.upsert_candles("BTC", "5m", candles(100, self.start, price=50.0))
+
+        window = db.get_candles("ETH", "5m", start_date=self.start + timedelta(minutes=50),
+                                end_date=self.start + timedelta(minutes=95))
+        assert window == batch[10:20]
+        assert db.get_candles("ETH", "5m", limit=5) == batch[-5:]
+        assert db.get_candles("ETH", "5m", start_date=self.start, limit=5) == batch[:5]
+
+    def test_retention_compacts_then_deletes(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        old = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=30)
+        db.upsert_candles("BTC", "5m", candles(24, old))  # two full hours, 30 days ago
+        db.upsert_candles("BTC", "5m", candles(12, datetime.utcnow() - timedelta(hours=2)))
+        db.upsert_candles("BTC", "1h", candles(1, old + timedelta(hours=1), step_minutes=60, price=7.0))
+        db.upsert_candles("BTC", "1h", candles(1, old - timedelta(days=400), step_minutes=60))
+
+        report = db.apply_market_data_retention({"5m": 14, "1h": 365})
+        assert report == {"5m": {"compacted": 2, "deleted": 24}, "1h": {"compacted": 0, "deleted": 1}}
+
+        hourly = db.get_candles("BTC", "1h")
+        assert len(hourly) == 2
+        first = candles(12, old)
+        assert hourly[0] == {"t": first[0]["t"], "o": first[0]["o"], "h": first[-1]["h"],
+                             "l": first[0]["l"], "c": first[-1]["c"], "v": 24.0}
+        assert hourly[1]["o"] == 7.0  # a fetched 1h candle is not overwritten by compaction
+        assert len(db.get_candles("BTC", "5m")) == 12
+
+    def test_index_added_to_existing_database(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'bot.db'}"
+        db = DatabaseManager(url)
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP INDEX idx_market_asset_interval_timestamp"))
+        db = DatabaseManager(url)
+        names = {index["name"] for index in inspect(db.engine).get_indexes("market_data")}
+        assert "idx_market_asset_interval_timestamp" in names
+
+    def test_candles_through_persister(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        persister = WriteBehindPersister(db=db, flush_interval=0.01)
+        persister.start()
+        persister.record_candles("SOL", "1h", candles(10, self.start, step_minutes=60))
+        persister.record_candles("SOL", "1h", candles(12, self.start, step_minutes=60))
+        persister.apply_retention({"1h": 10_000})
+        persister.close()
+        assert persister.stats()["failed_batches"] == 0
+        assert len(db.get_candles("SOL", "1h")) == 12
+
+    @pytest.mark.asyncio
+    async def test_engine_archives_fetched_candles(self, tmp_path, monkeypatch):
+        from src.backend.bot_engine import TradingBotEngine
+        from tests.test_persister import BuyOnceAgent
+
+        monkeypatch.setitem(CONFIG, "db_archive_candles", True)
+        monkeypatch.setitem(CONFIG, "market_data_retention", {"5m": 10_000})  # 2024 candles would expire
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        clock = VirtualClock(START + timedelta(days=1))
+        exchange = BacktestExchange({"BTC": make_candles(12 * 48)}, clock=clock)
+        engine = TradingBotEngine(["BTC"], "1h", exchange=exchange, agent=BuyOnceAgent(), clock=clock)
+        engine.diary_path = tmp_path / "diary.jsonl"
+        engine.prompt_log_path = None
+        engine.persister = WriteBehindPersister(db=db, flush_interval=0.01)
+        engine.persister.start()
+
+        await engine._run_iteration()
+        engine.persister.close()
+
+        assert engine.persister.stats()["failed_batches"] == 0
+        assert len(db.get_candles("BTC", "5m")) == 100
+        assert len(db.get_candles("BTC", "1h")) == 24
+        assert engine._last_retention == clock.now()
@@ -0,0 +1,102 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.database.db_manager import DatabaseManager
+from src.database.models import DiaryEntry
+from src.database.pagination import decode_cursor, encode_cursor
+from src.gui.services.bot_service import BotService
+
+T0 = datetime(2025, 1, 1)
+
+
+def page_through(fetch, limit):
+    rows, cursor, pages = [], None, 0
+    while True:
+        page, cursor = fetch(limit=limit, cursor=cursor)
+        rows.extend(page)
+        pages += 1
+        if cursor is None:
+            return rows, pages
+
+
+class TestKeysetPagination:
+
+    def add_diary(self, db, count, start=0):
+        with db.session_scope() as session:
+            for i in range(start, start + count):
+                # Pairs of entries share a timestamp so the id tiebreak matters
+                session.add(DiaryEntry(timestamp=T0 + timedelta(minutes=i // 2), asset="BTC",
+                                       action="hold" if i % 3 else "buy", rationale=str(i)))
+
+    def test_pages_cover_every_row_once(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        self.add_diary(db, 25)
+
+        rows, pages = page_through(db.get_diary_page, limit=10)
+        assert pages == 3
+        assert [int(r.rationale) for r in rows] == list(range(24, -1, -1))
+
+        buys, _ = page_through(lambda **kw: db.get_diary_page(action="buy", **kw), limit=4)
+        assert [int(r.rationale) for r in buys] == [i for i in range(24, -1, -1) if i % 3 == 0]
+
+    def test_inserts_between_pages_do_not_shift_results(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        self.add_diary(db, 20)
+        first, cursor = db.get_diary_page(limit=5)
+        self.add_diary(db, 5, start=20)  # newer entries arrive while paging
+        second, _ = db.get_diary_page(limit=5, cursor=cursor)
+        assert [int(r.rationale) for r in first + second] == list(range(19, 9, -1))
+
+    def test_trades_and_states(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        for i in range(7):
+            db.create_trade("BTC" if i % 2 else "ETH", "buy", 100.0 + i, 1.0, 100.0)
+            db.save_bot_state(balance=1000.0 + i, total_value=1000.0, equity=1000.0, total_return_pct=0.0)
+
+        trades, _ = page_through(lambda **kw: db.get_trades_page(asset="BTC", **kw), limit=2)
+        assert [t.entry_price for t in trades] == [105.0, 103.0, 101.0]
+        states, pages = page_through(db.get_bot_states_page, limit=3)
+        assert pages == 3 and [s.balance for s in states] == [1006.0 - i for i in range(7)]
+
+    def test_invalid_cursor(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        assert decode_cursor(encode_cursor("2025-01-01T00:00:00", 3), 2) == ["2025-01-01T00:00:00", 3]
+        for cursor in ("not-base64!", encode_cursor(1, 2, 3), encode_cursor("yesterday", 1)):
+            with pytest.raises(ValueError):
+                db.get_trades_page(cursor=cursor)
+
+
+class TestTradeHistoryCursor:
+
+    def write_diary(self, path, entries):
+        with open(path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    def test_diary_pages_are_stable_under_appends(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "data").mkdir()
+        diary = tmp_path / "data" / "diary.jsonl"
+        self.write_diary(diary, [{"asset": "BTC" if i % 2 else "ETH", "action": "buy", "n": i} for i in range(9)])
+        service = BotService()
+
+        first, cursor = service.get_trade_history_page(asset="BTC", limit=2)
+        self.write_diary(diary, [{"asset": "BTC", "action": "buy", "n": 99}])
+        second, cursor = service.get_trade_history_page(asset="BTC", limit=2, cursor=cursor)
+        assert [e["n"] for e in first + second] == [7, 5, 3, 1]
+        assert cursor is None
+        with pytest.raises(ValueError):
+            service.get_trade_history_page(cursor=encode_cursor("x"))
+
+    def test_reverse_reader_across_block_boundaries(self, tmp_path):
+        path = tmp_path / "diary.jsonl"
+        lines = [json.dumps({"n": i, "pad": "x" * (i % 5)}) for i in range(30)]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        data = path.read_bytes()
+
+        read = list(BotService._read_lines_reversed(path, block_size=7))
+        assert [line.decode() for _, line in read] == lines[::-1]
+        assert all(data[offset:].startswith(line) for offset, line in read)
+        assert [line.decode() for _, line in BotService._read_lines_reversed(path, end=read[3][0])] == lines[-5::-1]
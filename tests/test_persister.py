@@ -0,0 +1,231 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from src.backend.backtest.exchange import BacktestExchange
+from src.backend.utils.clock import VirtualClock
+from src.database.db_manager import DatabaseManager
+from src.database.models import BotState, DiaryEntry, Position, Trade
+from src.database.persister import WriteBehindPersister
+from tests.test_backtest import START, make_candles
+
+
+def trade(asset="BTC", price=100.0):
+    return {"asset": asset, "action": "buy", "entry_price": price, "entry_size": 1.0, "entry_value": price}
+
+
+class SlowDB:
+    """Stands in for a DatabaseManager on a disk that takes ``delay`` seconds per commit."""
+
+    def __init__(self, delay=0.2, fail=0):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+
+    def apply_batch(self, operations):
+        time.sleep(self.delay)
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("database is locked")
+        self.batches.append(list(operations))
+        return len(operations)
+
+
+class BuyOnceAgent:
+
+    def __init__(self):
+        self.model = "test-model"
+
+    async def decide_trade_async(self, assets, context):
+        return {"reasoning": "", "trade_decisions": [
+            {"asset": "BTC", "action": "buy", "allocation_usd": 500, "tp_price": None,
+             "sl_price": None, "exit_plan": "", "rationale": "breakout"},
+        ]}
+
+
+class TestWriteBehindPersister:
+
+    def test_batches_operations_into_one_transaction(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        persister = WriteBehindPersister(db=db, batch_size=50, flush_interval=0.2)
+        persister.start()
+        persister.record_trade(**trade())
+        persister.record_diary({"timestamp": "2025-01-01T00:00:00+00:00", "asset": "BTC",
+                                "action": "buy", "rationale": "breakout", "entry_price": 100.0})
+        persister.upsert_position(asset="BTC", side="long", size=1.0, entry_price=100.0, current_price=101.0,
+                                  unrealized_pnl=1.0, unrealized_pnl_pct=1.0, margin=100.0)
+        persister.upsert_position(asset="BTC", side="long", size=1.0, entry_price=100.0, current_price=102.0,
+                                  unrealized_pnl=2.0, unrealized_pnl_pct=2.0, margin=100.0)
+        persister.snapshot_state(balance=900.0, total_value=1002.0, equity=1002.0, total_return_pct=0.2)
+        persister.close()
+
+        stats = persister.stats()
+        assert (stats["batches"], stats["written"], stats["queue_depth"]) == (1, 5, 0)
+        assert stats["last_flush_ms"] > 0
+        with db.session_scope() as session:
+            assert session.query(Trade).one().status == "open"
+            assert session.query(DiaryEntry).one().price == 100.0
+            assert session.query(Position).one().current_price == 102.0
+            assert session.query(BotState).one().total_value == 1002.0
+
+    def test_close_position_in_later_batch(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        db.upsert_position("ETH", "short", 2.0, 50.0, 49.0, 2.0, 2.0)
+        db.apply_batch([("close_position", {"asset": "ETH"})])
+        assert db.get_position("ETH") is None
+        with pytest.raises(ValueError):
+            db.apply_batch([("bogus", {})])
+
+    def test_open_close_cycle_through_persister(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        persister = WriteBehindPersister(db=db, flush_interval=0.01)
+        persister.start()
+        persister.record_trade(**trade(price=100.0))
+        persister.record_trade(**dict(trade(asset="ETH", price=50.0), action="sell"))
+        persister.upsert_position(asset="BTC", side="long", size=1.0, entry_price=100.0, current_price=100.0,
+                                  unrealized_pnl=0.0, unrealized_pnl_pct=0.0, margin=100.0)
+        assert persister.flush(timeout=5)
+        assert len(db.get_open_trades()) == 2
+
+        persister.close_position("BTC")
+        persister.close_trades("BTC", exit_price=110.0)
+        persister.close_trades("BTC", exit_price=90.0)  # nothing left open: no-op
+        persister.snapshot_state(balance=1010.0, total_value=1010.0, equity=1010.0, total_return_pct=1.0)
+        persister.close()
+
+        closed = db.get_trades(status="closed")
+        assert [(t.asset, t.exit_price, t.realized_pnl, t.realized_pnl_pct) for t in closed] == [
+            ("BTC", 110.0, 10.0, 10.0)]
+        assert [t.asset for t in db.get_open_trades()] == ["ETH"]
+        assert db.get_position("BTC") is None
+        stats = db.get_trade_stats()
+        assert (stats["total_trades"], stats["winning_trades"], stats["total_pnl"]) == (1, 1, 10.0)
+        assert db.get_latest_bot_state().total_trades == 1
+        assert db.rebuild_trade_stats() == stats
+
+    def test_short_trade_closes_with_inverted_pnl(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        db.create_trade(**dict(trade(asset="ETH", price=50.0), action="sell", entry_size=2.0))
+        assert db.close_open_trades("ETH", exit_price=55.0) == 1
+        closed = db.get_trades(status="closed")[0]
+        assert (closed.realized_pnl, closed.realized_pnl_pct, closed.exit_value) == (-10.0, -20.0, 110.0)
+        assert db.get_trade_stats()["losing_trades"] == 1
+
+    def test_enqueue_does_not_wait_for_slow_disk(self):
+        db = SlowDB(delay=0.3)
+        persister = WriteBehindPersister(db=db, batch_size=10, flush_interval=0.01)
+        persister.start()
+        started = time.perf_counter()
+        for i in range(25):
+            assert persister.record_trade(**trade(price=100.0 + i))
+        assert time.perf_counter() - started < 0.05
+        assert persister.stats()["queue_depth"] > 0
+
+        assert persister.flush(timeout=5)
+        persister.close()
+        assert sum(len(b) for b in db.batches) == 25
+        assert max(len(b) for b in db.batches) <= 10
+        assert persister.stats()["max_flush_ms"] >= 300
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        persister = WriteBehindPersister(db=SlowDB(), max_queue=3)
+        results = [persister.record_trade(**trade()) for _ in range(5)]
+        assert results == [True, True, True, False, False]
+        assert persister.stats()["dropped"] == 2
+
+    def test_failed_batch_is_retried(self):
+        db = SlowDB(delay=0, fail=1)
+        persister = WriteBehindPersister(db=db, flush_interval=0.01)
+        persister.start()
+        persister.record_trade(**trade())
+        persister.close()
+        assert len(db.batches) == 1
+        assert persister.stats()["failed_batches"] == 0
+
+    def test_created_rows_usable_after_commit(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        created = db.create_trade(**trade())
+        assert (created.id, created.asset) == (1, "BTC")
+
+
+class TestEnginePersistence:
+
+    @pytest.mark.asyncio
+    async def test_iteration_persists_through_queue(self, tmp_path):
+        from src.backend.bot_engine import TradingBotEngine
+
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        clock = VirtualClock(START + timedelta(days=1))
+        exchange = BacktestExchange({"BTC": make_candles(12 * 48)}, clock=clock)
+        engine = TradingBotEngine(["BTC"], "1h", exchange=exchange, agent=BuyOnceAgent(), clock=clock)
+        engine.trading_mode = "auto"
+        engine.diary_path = tmp_path / "diary.jsonl"
+        engine.prompt_log_path = None
+        engine.persister = WriteBehindPersister(db=db, flush_interval=0.01)
+        engine.persister.start()
+
+        await engine._run_iteration()
+        await engine._run_iteration()
+        engine.persister.close()
+
+        assert engine.state.error is None
+        assert engine.state.persistence["enqueued"] > 0
+        trades = db.get_trades()
+        assert [(t.asset, t.action, t.llm_model) for t in trades] == [("BTC", "buy", "test-model")] * 2
+        assert db.get_position("BTC").side == "long"
+        with db.session_scope() as session:
+            assert session.query(DiaryEntry).filter(DiaryEntry.action == "buy").count() == 2
+            assert session.query(BotState).count() == 2
+
+    @pytest.mark.asyncio
+    async def test_closing_orders_close_trades(self, tmp_path):
+        from src.backend.bot_engine import TradingBotEngine
+
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        clock = VirtualClock(START + timedelta(days=1))
+        exchange = BacktestExchange({"BTC": make_candles(12 * 48)}, clock=clock)
+        agent = ScriptedAgent(("buy", 500), ("sell", 1000), ("hold", 0))
+        engine = TradingBotEngine(["BTC"], "1h", exchange=exchange, agent=agent, clock=clock)
+        engine.trading_mode = "auto"
+        engine.diary_path = tmp_path / "diary.jsonl"
+        engine.prompt_log_path = None
+        engine.persister = WriteBehindPersister(db=db, flush_interval=0.01)
+        engine.persister.start()
+
+        # buy opens a long; selling twice its size closes it and opens a short with the rest
+        for _ in range(2):
+            await engine._run_iteration()
+            clock.advance(3600)
+        assert engine.persister.flush(timeout=5)
+        (closed,) = db.get_trades(status="closed")
+        (short,) = db.get_open_trades("BTC")
+        assert (closed.action, short.action) == ("buy", "sell")
+        assert closed.exit_price == short.entry_price
+        assert closed.realized_pnl == pytest.approx((closed.exit_price - closed.entry_price) * closed.entry_size)
+        assert db.get_trade_stats()["total_trades"] == 1
+
+        # the short is closed outside the engine (e.g. a TP fill); the next refresh closes its trade
+        await exchange.place_buy_order("BTC", engine._persisted_positions["BTC"]["size"])
+        await engine._run_iteration()
+        engine.persister.close()
+
+        assert engine.state.error is None
+        assert db.get_open_trades() == []
+        assert db.get_position("BTC") is None
+        assert db.get_trade_stats()["total_trades"] == 2
+
+
+class ScriptedAgent:
+    """Returns one scripted BTC decision per call (``None`` holds)."""
+
+    def __init__(self, *decisions):
+        self.model = "test-model"
+        self.decisions = list(decisions)
+
+    async def decide_trade_async(self, assets, context):
+        action, allocation = self.decisions.pop(0) if self.decisions else ("hold", 0)
+        return {"reasoning": "", "trade_decisions": [
+            {"asset": "BTC", "action": action, "allocation_usd": allocation, "tp_price": None,
+             "sl_price": None, "exit_plan": "", "rationale": f"scripted {action}"},
+        ]}
@@ -0,0 +1,138 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from src.database.db_manager import DatabaseManager
+from src.database.models import DiaryEntry, Trade
+
+
+def search_ids(db, query, **kwargs):
+    results, _ = db.search_rationales(query, **kwargs)
+    return [(r["kind"], r["id"]) for r in results]
+
+
+class TestRationaleSearch:
+
+    def setup_method(self):
+        self.t0 = datetime(2025, 1, 1)
+
+    def test_index_follows_inserts_updates_and_deletes(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        diary = db.create_diary_entry("BTC", "buy", "Breakout above resistance on strong volume")
+        trade = db.create_trade("ETH", "buy", 3000.0, 1.0, 3000.0, rationale="Funding reset, breakout retest")
+        proposal = db.create_trade_proposal("SOL", "sell", 2.0, 150.0, "Bearish divergence on RSI")
+        db.create_trade("BTC", "sell", 100.0, 1.0, 100.0)  # no rationale, not indexed
+
+        assert sorted(search_ids(db, "breakouts")) == [("diary", diary.id), ("trade", trade.id)]  # stemmed
+        assert search_ids(db, "divergence") == [("proposal", proposal.id)]
+        assert search_ids(db, "breakout", kinds=["trade"]) == [("trade", trade.id)]
+        assert search_ids(db, "breakout", asset="BTC") == [("diary", diary.id)]
+
+        with db.session_scope() as session:
+            session.get(Trade, trade.id).rationale = "Mean reversion after liquidation cascade"
+            session.delete(session.get(DiaryEntry, diary.id))
+        assert search_ids(db, "breakout") == []
+        assert search_ids(db, "liquidation") == [("trade", trade.id)]
+
+        (result,), cursor = db.search_rationales("liquidation")
+        assert result["asset"] == "ETH" and result["action"] == "buy" and cursor is None
+        assert result["snippet"] == "Mean reversion after [liquidation] cascade"
+
+    def test_ranking_phrases_prefixes_and_dates(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        rationales = [
+            "Volume is light, holding",
+            "Strong volume, volume confirms the volume breakout",
+            "Volume strong but momentum fading",
+            "Momentum and strong volume",
+        ]
+        with db.session_scope() as session:
+            for i, rationale in enumerate(rationales):
+                session.add(DiaryEntry(timestamp=self.t0 + timedelta(days=i), asset="BTC", action="hold",
+                                       rationale=rationale))
+
+        assert search_ids(db, "volume")[0] == ("diary", 2)  # most occurrences ranks first
+        assert sorted(search_ids(db, '"strong volume"')) == [("diary", 2), ("diary", 4)]
+        assert sorted(search_ids(db, "moment*")) == [("diary", 3), ("diary", 4)]
+        assert search_ids(db, "volume", start_date=self.t0 + timedelta(days=2),
+                          end_date=self.t0 + timedelta(days=2, hours=1)) == [("diary", 3)]
+
+        assert search_ids(db, 'volume AND ( "unbalanced') == []  # user input never breaks FTS syntax
+        with pytest.raises(ValueError):
+            db.search_rationales("  ")
+        with pytest.raises(ValueError):
+            db.search_rationales("volume", kinds=["tweets"])
+
+    def test_cursor_pages_cover_every_hit_once(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        with db.session_scope() as session:
+            for i in range(23):
+                session.add(DiaryEntry(timestamp=self.t0, asset="BTC", action="hold",
+                                       rationale="range bound " + "chop " * (i % 5)))
+        seen, cursor, pages = [], None, 0
+        while True:
+            page, cursor = db.search_rationales("range", limit=10, cursor=cursor)
+            seen.extend(r["id"] for r in page)
+            pages += 1
+            if cursor is None:
+                break
+        assert pages == 3 and sorted(seen) == list(range(1, 24))
+
+    def test_action_filter_applies_before_the_page_limit(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        with db.session_scope() as session:
+            for i in range(30):
+                session.add(DiaryEntry(timestamp=self.t0, asset="BTC", action="buy" if i % 10 == 0 else "hold",
+                                       rationale="range bound"))
+        page, cursor = db.search_rationales("range", action="buy", limit=2)
+        assert [r["action"] for r in page] == ["buy", "buy"] and cursor is not None
+        page, cursor = db.search_rationales("range", action="buy", limit=2, cursor=cursor)
+        assert [r["action"] for r in page] == ["buy"] and cursor is None
+
+        with db.session_scope() as session:
+            session.get(DiaryEntry, 2).action = "buy"  # the index follows action changes
+        assert len(db.search_rationales("range", action="buy")[0]) == 4
+
+        db.search_enabled = False
+        assert len(db.search_rationales("range", action="buy")[0]) == 4
+
+    def test_index_without_action_column_is_rebuilt(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'bot.db'}"
+        db = DatabaseManager(url)
+        db.create_diary_entry("BTC", "buy", "Golden cross on the daily")
+        db.create_diary_entry("BTC", "hold", "Golden cross fading")
+        with db.engine.begin() as conn:  # index layout from before the action filter
+            conn.execute(text("DROP TABLE rationale_fts"))
+            conn.execute(text("CREATE VIRTUAL TABLE rationale_fts USING fts5("
+                              "rationale, asset UNINDEXED, timestamp UNINDEXED, tokenize='porter unicode61')"))
+
+        db = DatabaseManager(url)
+        assert search_ids(db, "golden", action="buy") == [("diary", 1)]
+        db.create_diary_entry("ETH", "buy", "Golden cross on ETH")
+        assert len(search_ids(db, "golden", action="buy")) == 2
+
+    def test_backfill_and_migrated_rows_are_indexed(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'bot.db'}"
+        db = DatabaseManager(url)
+        db.create_diary_entry("BTC", "buy", "Golden cross on the daily")
+        with db.engine.begin() as conn:  # a database created before the index existed
+            conn.execute(text("DROP TABLE rationale_fts"))
+
+        db = DatabaseManager(url)
+        assert search_ids(db, "golden") == [("diary", 1)]
+
+        diary = tmp_path / "diary.jsonl"
+        diary.write_text(json.dumps({"asset": "ETH", "action": "sell", "rationale": "Death cross"}) + "\n")
+        db.migrate_jsonl_diary(str(diary))
+        assert search_ids(db, "cross") != [] and len(search_ids(db, "cross")) == 2
+        assert db.rebuild_search_index() == 2
+
+    def test_like_fallback_without_fts(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        db.create_diary_entry("BTC", "buy", "Breakout on strong volume")
+        db.create_trade("BTC", "buy", 100.0, 1.0, 100.0, rationale="Strong breakout")
+        db.search_enabled = False
+        results, _ = db.search_rationales("strong breakout")
+        assert [(r["kind"], r["score"]) for r in results] == [("trade", None), ("diary", None)]
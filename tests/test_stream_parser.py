@@ -0,0 +1,131 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+
+from src.backend.agent.stream_parser import DecisionStreamParser
+from src.backend.backtest.exchange import BacktestExchange
+from src.backend.config_loader import CONFIG
+from src.backend.utils.clock import VirtualClock
+from tests.test_backtest import START, make_candles
+
+PAYLOAD = {
+    "reasoning": 'BTC trending; ETH "choppy" {range} [no edge]',
+    "trade_decisions": [
+        {"asset": "BTC", "action": "buy", "allocation_usd": 500, "tp_price": 101000, "sl_price": 97000,
+         "exit_plan": "close if 4h close < EMA50 }", "rationale": "trend", "meta": {"tags": [1, {"x": 2}]}},
+        {"asset": "ETH", "action": "hold"},
+    ],
+}
+
+
+def feed_in_chunks(parser, text, size):
+    emitted = []
+    for i in range(0, len(text), size):
+        emitted.append(parser.feed(text[i:i + size]))
+    return emitted
+
+
+class TestDecisionStreamParser:
+
+    def test_emits_each_decision_when_its_object_closes(self):
+        text = json.dumps(PAYLOAD)
+        parser = DecisionStreamParser()
+        emitted = feed_in_chunks(parser, text, 1)
+
+        completed_at = [i for i, batch in enumerate(emitted) if batch]
+        assert len(completed_at) == 2
+        # BTC is available long before the stream ends
+        assert completed_at[0] < text.index('"ETH"')
+        assert emitted[completed_at[0]][0]["asset"] == "BTC"
+        assert emitted[completed_at[1]][0]["asset"] == "ETH"
+
+    def test_chunk_sizes_and_fences(self):
+        text = "```json\n" + json.dumps(PAYLOAD, indent=2) + "\n```"
+        for size in (1, 3, 17, len(text)):
+            parser = DecisionStreamParser()
+            feed_in_chunks(parser, text, size)
+            assert [d["asset"] for d in parser.decisions] == ["BTC", "ETH"]
+            assert parser.reasoning == PAYLOAD["reasoning"]
+            # Missing optional keys are filled with defaults
+            assert parser.decisions[1]["allocation_usd"] == 0.0
+            assert parser.result()["trade_decisions"][0]["exit_plan"].endswith("}")
+
+    def test_truncated_stream_keeps_completed_decisions(self):
+        text = json.dumps(PAYLOAD)
+        parser = DecisionStreamParser()
+        parser.feed(text[:text.index('"ETH"')])
+        result = parser.result()
+        assert [d["asset"] for d in result["trade_decisions"]] == ["BTC"]
+        assert result["reasoning"] == PAYLOAD["reasoning"]
+
+
+class StreamingAgent:
+    """Emits BTC, then waits until the engine has executed it before emitting ETH."""
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.fills_before_second = None
+
+    async def decide_trade_streaming(self, assets, context, on_decision):
+        decisions = [dict(d) for d in PAYLOAD["trade_decisions"]]
+        for d in decisions:
+            d.setdefault("allocation_usd", 0.0)
+            d.update(tp_price=None, sl_price=None)
+        on_decision(decisions[0])
+        for _ in range(50):
+            if self.exchange.fills:
+                break
+            await asyncio.sleep(0.01)
+        self.fills_before_second = len(self.exchange.fills)
+        on_decision(decisions[1])
+        return {"reasoning": PAYLOAD["reasoning"], "trade_decisions": decisions}
+
+
+class TestEngineStreaming:
+
+    @pytest.mark.asyncio
+    async def test_executes_while_streaming(self, tmp_path, monkeypatch):
+        from src.backend.bot_engine import TradingBotEngine
+
+        monkeypatch.setitem(CONFIG, "llm_streaming", True)
+        clock = VirtualClock(START + timedelta(days=1))
+        exchange = BacktestExchange({"BTC": make_candles(12 * 48), "ETH": make_candles(12 * 48)}, clock=clock)
+        agent = StreamingAgent(exchange)
+        engine = TradingBotEngine(["BTC", "ETH"], "1h", exchange=exchange, agent=agent, clock=clock)
+        engine.trading_mode = "auto"
+        engine.diary_path = tmp_path / "diary.jsonl"
+        engine.prompt_log_path = None
+
+        await engine._run_iteration()
+
+        assert engine.state.error is None
+        assert agent.fills_before_second == 1
+        # Streamed decisions are not executed a second time from the final payload
+        assert len(exchange.fills) == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_error_lets_started_decisions_finish(self, tmp_path, monkeypatch):
+        from src.backend.bot_engine import TradingBotEngine
+
+        class FailingStreamAgent:
+            async def decide_trade_streaming(self, assets, context, on_decision):
+                on_decision(dict(PAYLOAD["trade_decisions"][0], tp_price=None, sl_price=None))
+                raise RuntimeError("connection reset mid-stream")
+
+        monkeypatch.setitem(CONFIG, "llm_streaming", True)
+        clock = VirtualClock(START + timedelta(days=1))
+        exchange = BacktestExchange({"BTC": make_candles(12 * 48), "ETH": make_candles(12 * 48)}, clock=clock)
+        engine = TradingBotEngine(["BTC", "ETH"], "1h", exchange=exchange, agent=FailingStreamAgent(), clock=clock)
+        engine.trading_mode = "auto"
+        engine.diary_path = tmp_path / "diary.jsonl"
+        engine.prompt_log_path = None
+
+        with pytest.raises(RuntimeError, match="mid-stream"):
+            await engine._stream_decisions("ctx")
+
+        # The BTC buy that was already streamed completed, including its diary entry
+        assert len(exchange.fills) == 1
+        diary = [json.loads(line) for line in engine.diary_path.read_text().splitlines()]
+        assert [(d["asset"], d["action"]) for d in diary] == [("BTC", "buy")]
@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import pytest
+
+from src.backend.agent.decision_maker import LLMHTTPError, TradingAgent
+from src.backend.indicators.local_indicators import shared_candle_cache
+from src.backend.testing.stub_llm import LatencyModel, StubLLMServer
+from tests.test_backtest import make_candles
+
+
+class TestLatencyModel:
+
+    def test_parses_specs_and_is_seeded(self):
+        assert LatencyModel.parse(0.25).sample() == 0.25
+        first = [LatencyModel.parse("lognormal:0.5,0.4", seed=3).sample() for _ in range(3)]
+        second = [LatencyModel.parse("lognormal:0.5,0.4", seed=3).sample() for _ in range(3)]
+        assert first == second
+        model = LatencyModel.parse("uniform:0.1,0.2", seed=1)
+        assert all(0.1 <= model.sample() <= 0.2 for _ in range(50))
+        with pytest.raises(ValueError):
+            LatencyModel.parse("gamma:1,2")
+
+
+class TestStubLLMServer:
+
+    def setup_method(self):
+        self.agent = TradingAgent()
+        self.agent.telemetry.enabled = False
+
+    def teardown_method(self):
+        shared_candle_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_tool_rounds_then_structured_decision(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)  # llm_requests.log
+        for asset in ("BTC", "ETH"):  # tool calls are answered locally, never by TAAPI
+            shared_candle_cache.put(asset, "5m", make_candles(120))
+        async with StubLLMServer(policy="long", tool_rounds=1) as stub:
+            self.agent.base_url = stub.url
+            result = await self.agent.decide_trade_async(["BTC", "ETH"], "ctx")
+        await self.agent.aclose()
+
+        assert [d["asset"] for d in result["trade_decisions"]] == ["BTC", "ETH"]
+        assert all(d["action"] == "buy" for d in result["trade_decisions"])
+        assert stub.stats["requests"] == 2 and stub.stats["tool_call_responses"] == 1
+        assert self.agent.telemetry.last.tool_rounds == 1
+
+    @pytest.mark.asyncio
+    async def test_streaming_with_latency(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        seen = []
+        async with StubLLMServer(policy="short", latency=0.3, stream_chunks=6) as stub:
+            self.agent.base_url = stub.url
+            result = await self.agent.decide_trade_streaming(["BTC", "ETH"], "ctx", seen.append)
+        await self.agent.aclose()
+
+        assert [d["asset"] for d in seen] == ["BTC", "ETH"]
+        assert result["trade_decisions"] == seen
+        call = self.agent.telemetry.last
+        assert call.ttft_ms < call.wall_time_ms - 100 and call.prompt_tokens > 0
+
+    @pytest.mark.asyncio
+    async def test_injected_faults(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        async with StubLLMServer(faults={"429": 1.0}) as stub:
+            self.agent.base_url = stub.url
+            with pytest.raises(LLMHTTPError) as err:
+                await self.agent.decide_trade_async(["BTC"], "ctx")
+            assert err.value.status == 429
+
+        async with StubLLMServer(policy="long", faults={"malformed": 1.0}, malformed_style="fence") as stub:
+            self.agent.base_url = stub.url
+            result = await self.agent.decide_trade_async(["BTC", "ETH"], "ctx")
+        # Fenced output is recovered by local repair without a sanitize round trip
+        assert stub.stats["requests"] == 1
+        assert result["trade_decisions"][0]["action"] == "buy"
+        assert self.agent.telemetry.last.parse_outcome == "repaired"
+
+        async with StubLLMServer(policy="long", faults={"malformed": 1.0}) as stub:
+            self.agent.base_url = stub.url
+            result = await self.agent.decide_trade_async(["BTC", "ETH"], "ctx")
+        await self.agent.aclose()
+        # Output truncated inside the ETH decision keeps the complete BTC decision and drops the cut-off one
+        assert stub.stats["requests"] == 1
+        assert self.agent.telemetry.last.parse_outcome == "repaired"
+        assert [(d["asset"], d["action"]) for d in result["trade_decisions"]] == [("BTC", "buy")]
+
+    @pytest.mark.asyncio
+    async def test_random_policy_is_deterministic_under_concurrency(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        contexts = [f"ctx {i}" for i in range(20)]
+        runs = []
+        for _ in range(2):
+            async with StubLLMServer(policy="random", latency="uniform:0,0.05", seed=7) as stub:
+                self.agent.base_url = stub.url
+                results = await asyncio.gather(*(
+                    self.agent.decide_trade_async(["BTC", "ETH", "SOL"], ctx) for ctx in contexts
+                ))
+            runs.append([json.dumps(r, sort_keys=True) for r in results])
+            assert stub.peak_in_flight > 1
+        await self.agent.aclose()
+
+        assert runs[0] == runs[1]
+        assert len(set(runs[0])) > 1
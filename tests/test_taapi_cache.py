@@ -0,0 +1,47 @@
+import time
+
+from src.backend.indicators.taapi_cache import TAAPICache
+
+
+class TestTAAPICache:
+
+    def test_lru_eviction_by_count(self):
+        cache = TAAPICache(ttl=60, max_entries=2)
+        cache.set("BTC", "5m", {"rsi": 50})
+        cache.set("ETH", "5m", {"rsi": 40})
+        assert cache.get("BTC", "5m") == {"rsi": 50}  # BTC becomes most recent
+        cache.set("SOL", "5m", {"rsi": 30})
+
+        assert cache.get("ETH", "5m") is None
+        assert cache.get("BTC", "5m") is not None
+        stats = cache.stats()
+        assert (stats["evictions"], stats["hits"], stats["misses"]) == (1, 2, 1)
+
+    def test_byte_budget(self):
+        cache = TAAPICache(ttl=60, max_bytes=300)
+        for asset in ("BTC", "ETH", "SOL"):
+            cache.set(asset, "5m", {"series": list(range(30))})
+        stats = cache.stats()
+        assert stats["bytes"] <= 300
+        assert stats["total_entries"] == 2
+        cache.set("DOGE", "5m", {"series": list(range(1000))})  # larger than the whole budget
+        assert cache.get("DOGE", "5m") is None
+
+    def test_expiry_without_reads(self):
+        cache = TAAPICache(ttl=0.05, expiry_interval=0.02)
+        cache.set("BTC", "5m", {"rsi": 50})
+        time.sleep(0.15)
+        assert cache.stats()["total_entries"] == 0
+        assert cache.expirations == 1
+        cache.stop_background_expiry()
+
+    def test_persistence_round_trip(self, tmp_path):
+        path = tmp_path / "taapi_cache.json"
+        cache = TAAPICache(ttl=60, persist_path=str(path))
+        cache.set("BTC", "5m", {"rsi": 50})
+        cache.save()
+
+        restored = TAAPICache(ttl=60, persist_path=str(path))
+        assert restored.get("BTC", "5m") == {"rsi": 50}
+        expired = TAAPICache(ttl=0, persist_path=str(path))
+        assert expired.stats()["total_entries"] == 0
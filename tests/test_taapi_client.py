@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from src.backend.indicators.taapi_batcher import TAAPIBatcher
+from src.backend.indicators.taapi_client import TAAPIClient
+from src.backend.utils.rate_limiter import TokenBucket
+
+
+class FakeTAAPI:
+    """Indicator endpoint that counts requests and TCP connections."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.requests = 0
+        self.bulk_sizes = []
+        self.peers = set()
+
+    async def handle(self, request):
+        self.requests += 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(self.delay)
+        return web.json_response({"value": float(request.query.get("period", 14))})
+
+    async def handle_bulk(self, request):
+        self.requests += 1
+        indicators = (await request.json())["construct"]["indicators"]
+        self.bulk_sizes.append(len(indicators))
+        await asyncio.sleep(self.delay)
+        return web.json_response({"data": [
+            {"id": item["id"], "result": {"value": float(item.get("period", 14))}} for item in indicators
+        ]})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/bulk", self.handle_bulk)
+        app.router.add_get("/{indicator}", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}/"
+        self.bulk_url = f"{self.base_url}bulk"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+class TestTokenBucket:
+
+    @pytest.mark.asyncio
+    async def test_burst_then_paced(self):
+        bucket = TokenBucket(capacity=2, period=0.2)
+        started = time.monotonic()
+        waits = [await bucket.acquire() for _ in range(4)]
+        assert waits[:2] == [0.0, 0.0]
+        assert all(w > 0 for w in waits[2:])
+        assert time.monotonic() - started >= 0.18
+
+
+class TestTAAPIBatcher:
+
+    @pytest.mark.asyncio
+    async def test_close_sends_pending_batches_and_awaits_them(self):
+        sent = []
+
+        async def fetch_bulk(symbol, interval, definitions):
+            await asyncio.sleep(0.05)
+            sent.append([d["id"] for d in definitions])
+            return {d["id"]: d["period"] for d in definitions}
+
+        batcher = TAAPIBatcher(fetch_bulk, window=60)
+        callers = [asyncio.create_task(batcher.fetch("BTC/USDT", "5m", "rsi", period=p)) for p in (7, 14)]
+        await asyncio.sleep(0)
+        assert sent == [] and not batcher._tasks
+
+        await batcher.close()
+        assert sent == [["rsi_1", "rsi_2"]]
+        assert not batcher._tasks
+        assert await asyncio.gather(*callers) == [7, 14]
+
+
+class TestTAAPIClient:
+
+    def setup_method(self):
+        self.client = TAAPIClient(enable_cache=False)
+        self.client.api_key = "test-secret"
+        self.client.rate_limiter = TokenBucket(capacity=100, period=1)
+
+    @pytest.mark.asyncio
+    async def test_identical_inflight_requests_are_coalesced(self):
+        async with FakeTAAPI() as server:
+            params = {"secret": "x", "symbol": "BTC/USDT", "interval": "5m", "period": 14}
+            results = await asyncio.gather(*(
+                self.client._get_with_retry(f"{server.base_url}rsi", dict(params)) for _ in range(5)
+            ))
+            other = await self.client._get_with_retry(f"{server.base_url}rsi", dict(params, period=7))
+            await self.client.close()
+
+        assert results == [{"value": 14.0}] * 5
+        assert other == {"value": 7.0}
+        assert server.requests == 2
+
+    @pytest.mark.asyncio
+    async def test_session_is_reused_and_closed(self):
+        self.client.batcher = None  # direct GETs
+        async with FakeTAAPI(delay=0) as server:
+            self.client.base_url = server.base_url
+            values = [
+                await self.client.fetch_value("ema", "BTC/USDT", "5m", params={"period": period})
+                for period in (10, 20, 30)
+            ]
+            session = self.client._session
+            await self.client.close()
+
+        assert values == [10.0, 20.0, 30.0]
+        assert len(server.peers) == 1
+        assert session.closed and self.client._session is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_bulk_call(self):
+        async with FakeTAAPI(delay=0) as server:
+            self.client.bulk_url = server.bulk_url
+            values = await asyncio.gather(
+                self.client.fetch_value("rsi", "BTC/USDT", "5m", params={"period": 7}),
+                self.client.fetch_value("ema", "BTC/USDT", "5m", params={"period": 20}),
+                self.client.fetch_value("ema", "BTC/USDT", "5m", params={"period": 20}),
+                self.client.fetch_value("ema", "ETH/USDT", "5m", params={"period": 50}),
+            )
+            indicators = await self.client.get_indicators("BTC", "1h")
+            await self.client.close()
+
+        assert values == [7.0, 20.0, 20.0, 50.0]
+        assert indicators["rsi"] == 14.0
+        # BTC 5m (2 distinct indicators), ETH 5m, then the 5 get_indicators calls
+        assert sorted(server.bulk_sizes) == [1, 2, 5]
+        assert self.client.batcher.requests == 9
@@ -0,0 +1,73 @@
+import json
+
+from src.backend.agent.decision_maker import TradingAgent
+from src.backend.agent.tool_resolver import IndicatorToolResolver
+from src.backend.indicators.local_indicators import CandleCache, LocalIndicatorService
+from tests.test_backtest import make_candles
+
+
+class FakeResponse:
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class CountingSession:
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        return FakeResponse({"value": 42.0})
+
+
+def tool_call(**args):
+    return {"id": "call-1", "type": "function",
+            "function": {"name": "fetch_taapi_indicator", "arguments": json.dumps(args)}}
+
+
+class TestIndicatorToolResolver:
+
+    def setup_method(self):
+        self.candles = make_candles(120)
+        self.local = LocalIndicatorService(candle_cache=CandleCache())
+        self.local.candle_cache.put("BTC", "5m", self.candles)
+        self.resolver = IndicatorToolResolver(self.local, enabled=True)
+
+    def test_computes_supported_indicators_in_taapi_shape(self):
+        closes = [c["c"] for c in self.candles]
+        rsi = self.resolver.resolve({"indicator": "rsi", "symbol": "BTC/USDT", "interval": "5m"})
+        assert rsi == {"value": self.local.rsi(closes, 14)[-1]}
+
+        ema = self.resolver.resolve({"indicator": "ema", "symbol": "BTCUSDT", "interval": "5m",
+                                     "period": 20, "backtrack": 2})
+        assert ema == {"value": self.local.ema(closes, 20)[-3]}
+
+        macd = self.resolver.resolve({"indicator": "macd", "symbol": "BTC/USDT", "interval": "5m"})
+        assert set(macd) == {"valueMACD", "valueMACDSignal", "valueMACDHist"}
+        bands = self.resolver.resolve({"indicator": "bbands", "symbol": "BTC/USDT", "interval": "5m"})
+        assert bands["valueLowerBand"] < bands["valueMiddleBand"] < bands["valueUpperBand"]
+
+    def test_unsupported_requests_fall_back(self):
+        assert self.resolver.resolve({"indicator": "ichimoku", "symbol": "BTC/USDT", "interval": "5m"}) is None
+        assert self.resolver.resolve({"indicator": "rsi", "symbol": "BTC/USDT", "interval": "1d"}) is None
+        assert self.resolver.resolve({"indicator": "rsi", "symbol": "BTC/USDT", "interval": "5m",
+                                      "other_params": {"optInTimePeriod": 9}}) is None
+
+    def test_agent_memoizes_remote_results_per_decision(self):
+        agent = TradingAgent()
+        agent.session = CountingSession()
+        resolver = IndicatorToolResolver(self.local, enabled=True)
+
+        call = tool_call(indicator="supertrend", symbol="BTC/USDT", interval="5m")
+        first = agent._run_tool_call(call, resolver)
+        second = agent._run_tool_call(call, resolver)
+        agent._run_tool_call(tool_call(indicator="rsi", symbol="BTC/USDT", interval="5m"), resolver)
+
+        assert agent.session.calls == 1
+        assert first["content"] == second["content"] == json.dumps({"value": 42.0})
+        assert (resolver.local_hits, resolver.memo_hits) == (1, 1)
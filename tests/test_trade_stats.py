@@ -0,0 +1,85 @@
+import random
+
+import pytest
+from sqlalchemy import event
+
+from src.database.db_manager import DatabaseManager
+from src.database.models import TradeStats
+
+
+def reference_stats(pnls):
+    """The original Python-side computation over closed trades."""
+    wins = [p for p in pnls if p and p > 0]
+    losses = [p for p in pnls if p and p < 0]
+    return {
+        "total_trades": len(pnls),
+        "winning_trades": len(wins),
+        "losing_trades": len(losses),
+        "win_rate": len(wins) / len(pnls) if pnls else 0.0,
+        "total_pnl": sum(p for p in pnls if p),
+        "avg_profit": sum(wins) / len(wins) if wins else 0.0,
+        "avg_loss": sum(losses) / len(losses) if losses else 0.0,
+        "profit_factor": abs(sum(wins) / sum(losses)) if losses else 0.0,
+    }
+
+
+def close_trades(db, pnls):
+    for pnl in pnls:
+        trade = db.create_trade("BTC", "buy", 100.0, 1.0, 100.0)
+        db.close_trade(trade.id, 100.0 + (pnl or 0), 100.0 + (pnl or 0), pnl, pnl or 0)
+
+
+class TestTradeStats:
+
+    def setup_method(self):
+        rng = random.Random(7)
+        self.pnls = [round(rng.uniform(-50, 80), 2) for _ in range(40)] + [0.0]
+
+    def test_matches_python_reference(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        assert db.get_trade_stats()["total_trades"] == 0
+        db.create_trade("ETH", "sell", 10.0, 1.0, 10.0)  # open trades are not counted
+        close_trades(db, self.pnls)
+
+        stats = db.get_trade_stats()
+        for key, value in reference_stats(self.pnls).items():
+            assert stats[key] == pytest.approx(value), key
+        assert stats["best_trade"] == max(self.pnls)
+        assert stats["worst_trade"] == min(self.pnls)
+
+    def test_incremental_row_matches_aggregate(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        close_trades(db, self.pnls[:10])
+        trade = db.create_trade("BTC", "buy", 100.0, 1.0, 100.0)
+        db.close_trade(trade.id, 90.0, 90.0, -10.0, -10.0)
+        db.close_trade(trade.id, 120.0, 120.0, 20.0, 20.0)  # re-close replaces the P&L
+
+        incremental = db.get_trade_stats()
+        assert incremental == db.rebuild_trade_stats()
+        assert incremental["total_trades"] == 11
+        assert incremental["best_trade"] == max(self.pnls[:10] + [20.0])
+
+    def test_reads_stats_row_without_scanning_trades(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        close_trades(db, self.pnls[:5])
+        statements = []
+        event.listen(db.read_engine, "before_cursor_execute",
+                     lambda conn, cursor, sql, *args: statements.append(sql))
+
+        db.get_trade_stats()
+        assert len(statements) == 1 and "trade_stats" in statements[0]
+
+    def test_database_without_stats_row_falls_back_to_aggregate(self, tmp_path):
+        db = DatabaseManager(f"sqlite:///{tmp_path / 'bot.db'}")
+        close_trades(db, self.pnls[:5])
+        with db.session_scope() as session:
+            session.query(TradeStats).delete()
+
+        assert db.get_trade_stats() == reference_stats(self.pnls[:5]) | {
+            "gross_profit": pytest.approx(sum(p for p in self.pnls[:5] if p > 0)),
+            "gross_loss": pytest.approx(sum(p for p in self.pnls[:5] if p < 0)),
+            "best_trade": max(self.pnls[:5]),
+            "worst_trade": min(self.pnls[:5]),
+        }
+        close_trades(db, [5.0])
+        assert db.get_trade_stats()["total_trades"] == 6